@@ -0,0 +1,102 @@
+"""
+Adaptive learning API endpoints: learner mastery and spaced review.
+"""
+
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.mongodb import get_database
+from app.api.api_v1.endpoints.auth import get_current_user
+from app.models.user import User as UserModel
+from app.services.knowledge_tracing import MASTERED
+from app.services.mastery_service import mastery_service
+from app.services.review_schedule_service import review_schedule_service
+
+router = APIRouter()
+
+
+@router.get("/mastery/{user_id}")
+async def get_user_mastery(
+    user_id: str,
+    course_id: Optional[str] = Query(None, description="Only modules of this course"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get a learner's estimated mastery of each module they have activity in.
+    
+    Mastery is the knowledge-tracing probability that the module is learned,
+    updated from quiz answers and asset completions; modules at or above the
+    mastery threshold are marked as mastered.
+    """
+    # Users can only access their own mastery unless they're admin
+    if user_id != str(current_user.id) and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    try:
+        modules = await mastery_service.get_user_mastery(db, user_id, course_id)
+        return {
+            "user_id": user_id,
+            "threshold": MASTERED,
+            "total_modules": len(modules),
+            "mastered_modules": sum(1 for module in modules if module["mastered"]),
+            "modules": modules
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting mastery: {str(e)}"
+        )
+
+
+@router.post("/mastery/refresh")
+async def refresh_mastery(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Apply quiz answers and asset completions recorded since the last run now."""
+    try:
+        return await mastery_service.refresh(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error refreshing mastery: {str(e)}"
+        )
+
+
+@router.get("/review/due")
+async def get_due_reviews(
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of questions"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get the current user's quiz questions that are due for review, most overdue first.
+    
+    Questions are scheduled with SM-2 from the user's quiz answers.
+    """
+    try:
+        return await review_schedule_service.get_due(db, str(current_user.id), limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting due reviews: {str(e)}"
+        )
+
+
+@router.post("/review/refresh")
+async def refresh_review_schedule(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Reschedule questions answered since the last run now."""
+    try:
+        return await review_schedule_service.refresh(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error refreshing review schedule: {str(e)}"
+        )
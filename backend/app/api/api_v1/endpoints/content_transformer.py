@@ -1,28 +1,40 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import Optional
+from typing import Optional, Dict, Any
 import logging
-import google.generativeai as genai
 from datetime import datetime
 from app.core.config import settings
 from app.core.mongodb import get_database
+from app.utils.pagination import MAX_PAGE_SIZE, keyset_query, fetch_page, stream_ndjson
+from app.utils.projection import build_projection
+from app.utils.response import BSONJSONResponse
+from app.utils.vocabulary import canonical_domain, canonical_hobby, canonical_style
+from app.services.user_asset_status_service import user_asset_status_service
+from app.services.progress_buffer import progress_buffer
+from app.services.llm_service import llm_service
+from app.services.vocabulary_backfill_service import vocabulary_backfill_service
+from app.services.transformation_service import (
+    VARIANT_STYLES, find_original, find_variant, generate_asset_variants, get_or_generate_variant,
+    transformation_provider, variant_code
+)
+from app.services.pregeneration_service import pregeneration_service
 # Visual cues are text-based, no service needed
 from app.schemas.content_transformer import (
     ContentTransformerRequest,
     ContentTransformerResponse,
     ContentTransformerError
 )
+from app.schemas.user_asset_status import UserAssetStatusBulkRequest, UserAssetStatusBulkResponse
+from app.api.api_v1.endpoints.auth import get_current_user
+from app.models.user import User as UserModel
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Configure Google Generative AI
-if settings.google_api_key:
-    genai.configure(api_key=settings.google_api_key)
-    model = genai.GenerativeModel('gemini-1.5-flash')
-else:
-    model = None
-    logger.warning("Google API key not configured")
+# Lightweight defaults for list views; pass fields=* for whole documents
+ASSET_LIST_DEFAULT_FIELDS = ("code", "name", "style", "domain", "hobby", "language", "created_at")
+TRANSFORMED_ASSET_LIST_DEFAULT_FIELDS = ("assetCode", "style", "domain", "hobby", "created_at")
+FIELDS_QUERY_DESCRIPTION = "Comma-separated fields to return, or * for all (default omits content bodies)"
 
 @router.post(
     "/transform",
@@ -50,181 +62,51 @@ async def transform_content(request: ContentTransformerRequest, db=Depends(get_d
     
     - **assetCode**: Asset code identifier
     - **style**: Transformation style (storytelling, visual_cue, or summary)
-    - **content**: Raw content to transform (lecture, case study, or concept)
+    - **content**: Not used for generation; variants are shared, so they are generated from the asset's stored original
     - **domain**: Domain context (e.g., Business, Engineering, Medicine, Education)
     - **hobby**: Hobby context (e.g., Movies, Cricket, Gaming, Music)
     
-    Returns transformed content and saves it to the transformed-assets collection.
+    - **keywords**: Optional guidance; keyword-guided variants are stored with their keywords
+    
+    Returns the stored variant for this combination if there is one, otherwise
+    transforms the stored original and saves it as a variant in the assets collection.
     """
     try:
         logger.info(f"Transforming content for assetCode: {request.assetCode}, style: {request.style}, domain: {request.domain}, hobby: {request.hobby}")
         
-        if not model:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Google Generative AI not configured. Please check API key."
-            )
-        
-        # Create style-specific prompts
-        style_prompts = {
-            "storytelling": """
-### Storytelling Mode:
-- Convert the given content into a short storytelling analogy.
-- Make it relevant to the given domain and hobby.
-- Use simple, engaging language.
-- Create a narrative that helps explain the concept through a relatable story.
-""",
-          "visual_cue": """
-### Visual Cue Mode:
-- Convert the content into simple, symbolic visual representations (emoji flows, ASCII diagrams, metaphors).
-- Focus on clarity, simplicity, and instant understanding at a glance.
-- Provide 3–4 different cues for the same concept.
-- Each visual cue must connect the concept to the user's domain and hobby.
-- Use emojis, arrows, or short symbolic flows instead of long text.
-- Keep it fun, relatable, and visually intuitive.
-
-Format your response as:
-VISUAL CUE 1: [Emoji flow or diagram]
-VISUAL CUE 2: [Emoji flow or diagram]
-VISUAL CUE 3: [Emoji flow or diagram]
-VISUAL CUE 4: [Optional extra if needed]
-""",
-            "summary": """
-### Summary Mode:
-- Generate a concise summary of the content.
-- Keep it framed in the context of the given domain and hobby.
-- Make it clear, informative, and easy to understand.
-- Use analogies from the hobby to explain domain concepts.
-""",
-            "original": """
-### Original Mode:
-- Return the content as-is without any transformation.
-- This is the original learning material in its basic form.
-- No domain or hobby contextualization needed.
-"""
-        }
-        
-        # Create domain-specific context based on predefined categories
-        domain_contexts = {
-            "engineering-student": "Use examples in circuits, code snippets, algorithms, and technical implementations",
-            "medical-student": "Use case studies in healthcare, patient scenarios, medical procedures, and clinical examples", 
-            "business-student": "Use marketing examples, finance scenarios, business strategies, and corporate case studies",
-            "teacher-trainer": "Use classroom storytelling, pedagogy techniques, educational methods, and teaching scenarios",
-            "working-professional": "Use real-world workplace analogies, professional scenarios, industry examples, and practical applications"
-        }
-        
-        domain_context = domain_contexts.get(request.domain, f"Use examples relevant to {request.domain}")
-        
-        # Add keywords context if provided
-        keywords_context = f"\nAdditional guidance: {request.keywords}" if request.keywords else ""
-        
-        # Create the AI prompt based on selected style
-        prompt = f"""You are an AI content transformer. 
-You will receive inputs for content transformation based on specific learner profiles.
-
-Domain Context: {domain_context}
-Hobby Context: Connect concepts to {request.hobby} for better relatability{keywords_context}
-
-Your task is to generate content in the specified style:
-
-{style_prompts[request.style]}
-
-### Domain-Specific Examples:
-
-**For engineering-student:** Use circuit diagrams, code examples, algorithm explanations
-**For medical-student:** Use patient cases, diagnostic scenarios, treatment procedures  
-**For business-student:** Use market analysis, financial models, strategic planning
-**For teacher-trainer:** Use classroom analogies, learning techniques, educational frameworks
-**For working-professional:** Use workplace situations, project management, industry practices
-
-### Example for {request.style.title()} Mode:
-
-**Content:** "Neural networks learn patterns from data."
-**Domain:** engineering-student  
-**Hobby:** Cricket
-
-**Storytelling Mode Example:** 
-"Imagine writing a machine learning algorithm that analyzes cricket player performance data - just like how you'd code a neural network that processes input data through layers of nodes, learning patterns to predict the best batting order for the next match."
-
-**Visual Cue Mode Example:** 
-VISUAL CUE 1: 💻📊➡️🧠➡️🏏 (Code processing data → Neural Network → Cricket prediction)
-VISUAL CUE 2: ```python\nmodel.fit(cricket_data)``` ➡️ 🎯 (Training code → Accurate predictions)
-VISUAL CUE 3: Input Layer ➡️ Hidden Layers ➡️ Output = Best Team (Network architecture)
-VISUAL CUE 4: for epoch in range(100): train() ➡️ 🏆 (Training loop → Victory)
-
-**Summary Mode Example:** 
-"Neural networks are like coding a smart cricket analytics program - they process data through multiple layers (like nested functions) to learn patterns and make predictions about player performance."
-
----
-
-Now transform this content for {request.domain} who loves {request.hobby}:
-
-**Style:** {request.style}
-**Content:** "{request.content}"
-**Domain:** {request.domain} - {domain_context}
-**Hobby:** {request.hobby}{keywords_context}
-
-Please provide ONLY the {request.style} output without any formatting or labels:"""
-
-        # Generate response using Google Generative AI
-        response = model.generate_content(prompt)
-        
-        if not response.text:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate content transformation"
-            )
-        
-        # Parse the response - since we asked for only the output, use it directly
-        output = response.text.strip()
-        
-        # Clean up any unwanted formatting
-        if output.startswith('"') and output.endswith('"'):
-            output = output[1:-1]
-        
-        # Visual cues are text-based, no image generation needed
-        visual_cue_data = None
-        
-        # Prepare data for insertion into assets collection
-        # content field stores the generated content (not original)
-        from bson import ObjectId
-        
-        # Convert assetCode to ObjectId if it's a valid ObjectId string
-        try:
-            code_as_objectid = ObjectId(request.assetCode)
-        except Exception:
-            # If not a valid ObjectId, keep as string
-            code_as_objectid = request.assetCode
-        
-        asset_data = {
-            "code": code_as_objectid,
-            "content": output,  # Generated content goes in content field
-            "style": request.style,
-            "domain": request.domain,
-            "hobby": request.hobby,
-            "created_at": datetime.utcnow()
-        }
-        
-        # Visual cues are text-based only, no image data to add
-        
-        # Insert into MongoDB assets collection only
-        asset_result = await db["assets"].insert_one(asset_data)
-        
-        if not asset_result.inserted_id:
-            logger.error("Failed to insert data into assets collection")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to save data to database"
+        style = request.style.value
+        # Keywords only guide generation; the original style ignores them
+        keywords = request.keywords if style != "original" else None
+        # A stored variant for the same combination (and keywords) is returned instead of generating another
+        asset_data = await find_variant(db, request.assetCode, style, request.domain, request.hobby, keywords)
+        if asset_data is not None:
+            logger.info(f"Found existing variant for assetCode: {request.assetCode}, style: {style}")
+        else:
+            original = await find_original(db, request.assetCode)
+            if original is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No original asset found for assetCode '{request.assetCode}'"
+                )
+            if style != "original" and not llm_service.available(transformation_provider()):
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="LLM provider not configured. Please check API key."
+                )
+            
+            # Stored as a variant in the assets collection, like getAsset's
+            asset_data, _ = await get_or_generate_variant(
+                db, request.assetCode, original.get("content", ""), style, request.domain, request.hobby,
+                keywords=keywords
             )
-        
-        logger.info(f"Successfully transformed and saved content for assetCode: {request.assetCode}, style: {request.style}")
-        logger.info(f"Asset ID: {asset_result.inserted_id}")
+            logger.info(f"Successfully transformed and saved content for assetCode: {request.assetCode}, style: {style}")
+        logger.info(f"Asset ID: {asset_data['_id']}")
         
         return ContentTransformerResponse(
-            id=str(asset_result.inserted_id),
+            id=str(asset_data["_id"]),
             assetCode=request.assetCode,
-            style=request.style,
-            output=output,
+            style=style,
+            output=asset_data["content"],
             original_content="",  # Not storing original content anymore
             domain=request.domain,
             hobby=request.hobby,
@@ -259,189 +141,79 @@ async def get_or_generate_content(
     
     - **assetCode**: Asset code identifier
     - **style**: Transformation style (storytelling, visual_cue, or summary)
-    - **content**: Raw content to transform (used only if generating new content)
+    - **content**: Echoed back; new variants are generated from the asset's stored original
     - **domain**: Domain context
     - **hobby**: Hobby context
     
-    Returns existing content if found, otherwise generates and saves new content.
+    Returns the stored variant (or a legacy transformed-assets record) if found, otherwise generates and saves a new variant.
     """
     try:
+        # Variants like "Movies"/"films" share one stored transformation
+        style, domain, hobby = canonical_style(style), canonical_domain(domain), canonical_hobby(hobby)
         logger.info(f"Checking for existing content: assetCode={assetCode}, style={style}, domain={domain}, hobby={hobby}")
         
-        # Check if record already exists with the same combination
-        from bson import ObjectId
-        
-        # Try to convert assetCode to ObjectId for search
-        try:
-            search_code = ObjectId(assetCode)
-        except Exception:
-            # If not a valid ObjectId, search as string
-            search_code = assetCode
-        
-        existing_record = await db["transformed-assets"].find_one({
-            "assetCode": search_code,
-            "style": style,
-            "domain": domain,
-            "hobby": hobby
-        })
+        variant = await find_variant(db, assetCode, style, domain, hobby)
         
-        if existing_record:
-            # Record exists, return it
-            logger.info(f"Found existing record for assetCode: {assetCode}")
-            existing_record["id"] = str(existing_record["_id"])
-            del existing_record["_id"]
+        if variant is None:
+            # Records written before transformations were stored in assets are still served
+            from bson import ObjectId
             
-            return ContentTransformerResponse(
-                id=existing_record["id"],
-                assetCode=existing_record["assetCode"],
-                style=existing_record["style"],
-                output=existing_record["content"],
-                original_content=existing_record["original_content"],
-                domain=existing_record["domain"],
-                hobby=existing_record["hobby"],
-                created_at=existing_record["created_at"].isoformat()
-            )
-        
-        # Record doesn't exist, generate new content
-        logger.info(f"No existing record found, generating new content for assetCode: {assetCode}")
-        
-        if not model:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Google Generative AI not configured. Please check API key."
-            )
-        
-        # Create style-specific prompts
-        style_prompts = {
-            "storytelling": """
-### Storytelling Mode:
-- Convert the given content into a short storytelling analogy.
-- Make it relevant to the given domain and hobby.
-- Use simple, engaging language.
-- Create a narrative that helps explain the concept through a relatable story.
-""",
-            "visual_cue": """
-### Visual Cue Mode:
-- Convert the content into simple, symbolic visual representations (emoji flows, ASCII diagrams, metaphors).
-- Focus on clarity, simplicity, and instant understanding at a glance.
-- Provide 3–4 different cues for the same concept.
-- Each visual cue must connect the concept to the user's domain and hobby.
-- Use emojis, arrows, or short symbolic flows instead of long text.
-- Keep it fun, relatable, and visually intuitive.
-
-Format your response as:
-VISUAL CUE 1: [Emoji flow or diagram]
-VISUAL CUE 2: [Emoji flow or diagram]
-VISUAL CUE 3: [Emoji flow or diagram]
-VISUAL CUE 4: [Optional extra if needed]
-""",
-            "summary": """
-### Summary Mode:
-- Generate a concise summary of the content.
-- Keep it framed in the context of the given domain and hobby.
-- Make it clear, informative, and easy to understand.
-- Use analogies from the hobby to explain domain concepts.
-"""
-        }
-        
-        # Create the AI prompt based on selected style
-        prompt = f"""You are an AI content transformer. 
-You will receive four inputs:
-1. Style (storytelling, visual_cue, or summary)
-2. Content (raw lecture, case study, or concept)
-3. Domain (e.g., Business, Engineering, Medicine, Education, etc.)
-4. Hobby (e.g., Movies, Cricket, Gaming, Music, etc.)
-
-Your task is to generate content in the specified style:
-
-{style_prompts.get(style, style_prompts["summary"])}
-
-### Examples for {style.title()} Mode:
-
-**Content:** "Neural networks learn patterns from data."
-**Domain:** Business
-**Hobby:** Cricket
-
-**Storytelling Mode Example:** 
-"Imagine a cricket coach who studies thousands of player stats (data) to predict the best batting order. That's how neural networks learn patterns to make predictions."
-
-**Visual Cue Mode Example:** 
-VISUAL CUE 1: 🏏📊➡️🧠➡️🎯 (Cricket data → Neural Network → Target prediction)
-VISUAL CUE 2: 📈📋➡️🤖➡️💼 (Business charts → AI brain → Better decisions)  
-VISUAL CUE 3: Data ➡️ NN ➡️ Pattern ➡️ 🏆 (Linear flow to success)
-VISUAL CUE 4: 🧠=🏏coach (Neural Network equals cricket coach analogy)
-
-**Summary Mode Example:** 
-"Neural networks are like a cricket coach for business — analyzing tons of data to spot patterns and make smarter predictions."
-
----
-
-Now transform this content in {style} style:
-
-**Style:** {style}
-**Content:** "{content}"
-**Domain:** {domain}
-**Hobby:** {hobby}
-
-Please provide ONLY the {style} output without any formatting or labels:"""
-
-        # Generate response using Google Generative AI
-        response = model.generate_content(prompt)
-        
-        if not response.text:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to generate content transformation"
-            )
-        
-        # Parse the response
-        output = response.text.strip()
-        
-        # Clean up any unwanted formatting
-        if output.startswith('"') and output.endswith('"'):
-            output = output[1:-1]
-        
-        # Prepare data for insertion into transformed-assets collection
-        from bson import ObjectId
-        
-        # Convert assetCode to ObjectId if it's a valid ObjectId string
-        try:
-            code_as_objectid = ObjectId(assetCode)
-        except Exception:
-            # If not a valid ObjectId, keep as string
-            code_as_objectid = assetCode
-        
-        transformed_asset = {
-            "assetCode": code_as_objectid,
-            "style": style,
-            "content": output,
-            "original_content": content,
-            "domain": domain,
-            "hobby": hobby,
-            "created_at": datetime.utcnow()
-        }
-        
-        # Insert into MongoDB transformed-assets collection
-        result = await db["transformed-assets"].insert_one(transformed_asset)
-        
-        if not result.inserted_id:
-            logger.error("Failed to insert transformed content into database")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to save transformed content to database"
-            )
-        
-        logger.info(f"Successfully generated and saved new content for assetCode: {assetCode}")
+            try:
+                search_code = ObjectId(assetCode)
+            except Exception:
+                search_code = assetCode
+            
+            legacy_record = await db["transformed-assets"].find_one({
+                "assetCode": search_code,
+                "style": style,
+                "domain": domain,
+                "hobby": hobby
+            })
+            if legacy_record:
+                logger.info(f"Found existing transformed-assets record for assetCode: {assetCode}")
+                return ContentTransformerResponse(
+                    id=str(legacy_record["_id"]),
+                    assetCode=assetCode,
+                    style=legacy_record["style"],
+                    output=legacy_record["content"],
+                    original_content=legacy_record.get("original_content", ""),
+                    domain=legacy_record["domain"],
+                    hobby=legacy_record["hobby"],
+                    created_at=legacy_record["created_at"].isoformat()
+                )
+            
+            if style not in VARIANT_STYLES:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unsupported style: {style}"
+                )
+            if not llm_service.available(transformation_provider()):
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail="LLM provider not configured. Please check API key."
+                )
+            
+            original = await find_original(db, assetCode)
+            if original is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=f"No original asset found for assetCode '{assetCode}'"
+                )
+            
+            logger.info(f"No existing record found, generating new content for assetCode: {assetCode}")
+            variant, _ = await get_or_generate_variant(db, assetCode, original.get("content", ""), style, domain, hobby)
+        else:
+            logger.info(f"Found existing record for assetCode: {assetCode}")
         
         return ContentTransformerResponse(
-            id=str(result.inserted_id),
+            id=str(variant["_id"]),
             assetCode=assetCode,
             style=style,
-            output=output,
+            output=variant["content"],
             original_content=content,
             domain=domain,
             hobby=hobby,
-            created_at=transformed_asset["created_at"].isoformat()
+            created_at=variant["created_at"].isoformat()
         )
         
     except HTTPException:
@@ -458,28 +230,26 @@ Please provide ONLY the {style} output without any formatting or labels:"""
     summary="Get Transformed Assets by Asset Code",
     description="Retrieve all transformed assets for a specific asset code."
 )
-async def get_transformed_assets(asset_code: str, db=Depends(get_database)):
+async def get_transformed_assets(
+    asset_code: str,
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    db=Depends(get_database)
+):
     """Get all transformed assets for a specific asset code"""
     try:
         logger.info(f"Fetching transformed assets for asset code: {asset_code}")
+        projection = build_projection(fields, TRANSFORMED_ASSET_LIST_DEFAULT_FIELDS)
         
         # Find all transformed assets for the given asset code
-        assets_cursor = db["transformed-assets"].find({"assetCode": asset_code})
-        assets = await assets_cursor.to_list(length=None)
-        
-        # Convert MongoDB ObjectIds to strings
-        for asset in assets:
-            asset["id"] = str(asset["_id"])
-            del asset["_id"]
-            if "created_at" in asset and hasattr(asset["created_at"], 'isoformat'):
-                asset["created_at"] = asset["created_at"].isoformat()
+        assets_cursor = db["transformed-assets"].find({"assetCode": asset_code}, projection)
+        assets = [_rename_id(asset) async for asset in assets_cursor]
         
         logger.info(f"Found {len(assets)} transformed assets for asset code: {asset_code}")
-        return {
+        return BSONJSONResponse({
             "assetCode": asset_code,
             "count": len(assets),
             "assets": assets
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error fetching transformed assets: {str(e)}")
@@ -488,39 +258,56 @@ async def get_transformed_assets(asset_code: str, db=Depends(get_database)):
             detail=f"Failed to fetch transformed assets: {str(e)}"
         )
 
+def _rename_id(asset: Dict[str, Any]) -> Dict[str, Any]:
+    """Expose `_id` as `id`; ObjectIds and datetimes are left to BSONJSONResponse"""
+    if "_id" in asset:
+        asset["id"] = asset.pop("_id")
+    return asset
+
+
 @router.get(
     "/assets-collection",
     summary="Get All Assets from Assets Collection",
-    description="Retrieve all assets from the assets collection."
+    description="Retrieve all assets from the assets collection. Pass `after`/`limit` for keyset pagination or `format=ndjson` to stream."
 )
-async def get_all_assets(db=Depends(get_database)):
+async def get_all_assets(
+    after: Optional[str] = Query(None, description="Return assets after this id (keyset cursor)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$", description="'json' or 'ndjson' (streamed)"),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    db=Depends(get_database)
+):
     """Get all assets from assets collection"""
     try:
         logger.info("Fetching all assets from assets collection")
+        query = keyset_query(after)
+        projection = build_projection(fields, ASSET_LIST_DEFAULT_FIELDS)
         
-        # Find all assets
-        assets_cursor = db["assets"].find({})
-        assets = await assets_cursor.to_list(length=None)
+        if response_format == "ndjson":
+            return stream_ndjson(db["assets"], query, _rename_id, limit=limit, projection=projection)
         
-        # Convert MongoDB ObjectIds to strings and handle all fields properly
-        for asset in assets:
-            if "_id" in asset:
-                asset["id"] = str(asset["_id"])
-                del asset["_id"]
-            if "created_at" in asset and hasattr(asset["created_at"], 'isoformat'):
-                asset["created_at"] = asset["created_at"].isoformat()
-            
-            # Convert any ObjectId fields to strings
-            for key, value in list(asset.items()):
-                if hasattr(value, 'generation_time'):  # Check if it's an ObjectId
-                    asset[key] = str(value)
+        if after or limit:
+            assets, next_after = await fetch_page(
+                db["assets"], query, limit or MAX_PAGE_SIZE, _rename_id, projection=projection
+            )
+            return BSONJSONResponse({
+                "count": len(assets),
+                "assets": assets,
+                "next_after": next_after
+            })
+        
+        # Find all assets
+        assets_cursor = db["assets"].find({}, projection)
+        assets = [_rename_id(asset) async for asset in assets_cursor]
         
         logger.info(f"Found {len(assets)} total assets")
-        return {
+        return BSONJSONResponse({
             "count": len(assets),
             "assets": assets
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching all assets: {str(e)}")
         raise HTTPException(
@@ -531,30 +318,49 @@ async def get_all_assets(db=Depends(get_database)):
 @router.get(
     "/assets",
     summary="Get All Transformed Assets",
-    description="Retrieve all transformed assets from the database."
+    description="Retrieve all transformed assets from the database. Pass `after`/`limit` for keyset pagination or `format=ndjson` to stream."
 )
-async def get_all_transformed_assets(db=Depends(get_database)):
+async def get_all_transformed_assets(
+    after: Optional[str] = Query(None, description="Return transformed assets after this id (keyset cursor)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$", description="'json' or 'ndjson' (streamed)"),
+    fields: Optional[str] = Query(None, description=FIELDS_QUERY_DESCRIPTION),
+    db=Depends(get_database)
+):
     """Get all transformed assets"""
     try:
         logger.info("Fetching all transformed assets")
+        query = keyset_query(after)
+        projection = build_projection(fields, TRANSFORMED_ASSET_LIST_DEFAULT_FIELDS)
         
-        # Find all transformed assets
-        assets_cursor = db["transformed-assets"].find({})
-        assets = await assets_cursor.to_list(length=None)
+        if response_format == "ndjson":
+            return stream_ndjson(
+                db["transformed-assets"], query, _rename_id, limit=limit, projection=projection
+            )
         
-        # Convert MongoDB ObjectIds to strings
-        for asset in assets:
-            asset["id"] = str(asset["_id"])
-            del asset["_id"]
-            if "created_at" in asset and hasattr(asset["created_at"], 'isoformat'):
-                asset["created_at"] = asset["created_at"].isoformat()
+        if after or limit:
+            assets, next_after = await fetch_page(
+                db["transformed-assets"], query, limit or MAX_PAGE_SIZE, _rename_id,
+                projection=projection
+            )
+            return BSONJSONResponse({
+                "count": len(assets),
+                "assets": assets,
+                "next_after": next_after
+            })
+        
+        # Find all transformed assets
+        assets_cursor = db["transformed-assets"].find({}, projection)
+        assets = [_rename_id(asset) async for asset in assets_cursor]
         
         logger.info(f"Found {len(assets)} total transformed assets")
-        return {
+        return BSONJSONResponse({
             "count": len(assets),
             "assets": assets
-        }
+        })
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching all transformed assets: {str(e)}")
         raise HTTPException(
@@ -586,218 +392,70 @@ async def get_asset(
     Returns the matching asset or automatically returns the original style record for the given asset code.
     """
     try:
-        from bson import ObjectId
-        
+        # Variants like "Movies"/"films" share one stored asset
+        style, domain, hobby = canonical_style(style), canonical_domain(domain), canonical_hobby(hobby)
         logger.info(f"Searching for asset: code={code}, domain={domain}, hobby={hobby}, style={style}")
         
-        # Try to convert code to ObjectId for search
-        search_conditions = []
-        
-        # Add both ObjectId and string versions of the code to search
-        try:
-            code_as_objectid = ObjectId(code)
-            search_conditions.extend([
-                {"code": code_as_objectid},
-                {"code": code}
-            ])
-        except Exception:
-            # If not a valid ObjectId, search as string only
-            search_conditions.append({"code": code})
-        
         # First, try to find exact match with domain, hobby, and style
-        for search_condition in search_conditions:
-            exact_match = await db["assets"].find_one({
-                **search_condition,
-                "domain": domain,
-                "hobby": hobby,
-                "style": style
+        exact_match = await find_variant(db, code, style, domain, hobby)
+        if exact_match:
+            logger.info(f"Found exact match for code={code}, style={style}")
+            return BSONJSONResponse({
+                "found": True,
+                "match_type": "exact",
+                "asset": _rename_id(exact_match)
             })
-            
-            if exact_match:
-                logger.info(f"Found exact match for code={code}, style={style}")
-                # Convert ObjectId fields to strings for JSON response
-                exact_match["id"] = str(exact_match["_id"])
-                del exact_match["_id"]
-                if "code" in exact_match and hasattr(exact_match["code"], 'generation_time'):
-                    exact_match["code"] = str(exact_match["code"])
-                if "created_at" in exact_match and hasattr(exact_match["created_at"], 'isoformat'):
-                    exact_match["created_at"] = exact_match["created_at"].isoformat()
-                
-                return {
-                    "found": True,
-                    "match_type": "exact",
-                    "asset": exact_match
-                }
         
         # If no exact match found, always try to find original style record for the given asset code
         logger.info(f"No exact match found, searching for original style: code={code}, style=original")
         
-        for search_condition in search_conditions:
-            fallback_match = await db["assets"].find_one({
-                **search_condition,
-                "style": "original"
-            })
+        fallback_match = await find_original(db, code)
+        if fallback_match:
+            logger.info(f"Found original style record for code={code}")
+            
+            # If the requested style is 'original', return the original content
+            if style == "original":
+                return BSONJSONResponse({
+                    "found": True,
+                    "match_type": "default_original",
+                    "asset": _rename_id(fallback_match),
+                    "note": f"Original style found for asset code '{code}'."
+                })
             
-            if fallback_match:
-                logger.info(f"Found original style record for code={code}")
+            # If we have original content but need a different style, generate new content
+            try:
+                logger.info(f"Generating new {style} content for code={code} using original content")
                 
-                # If the requested style is 'original', return the original content
-                if style == "original":
-                    # Convert ObjectId fields to strings for JSON response
-                    fallback_match["id"] = str(fallback_match["_id"])
-                    del fallback_match["_id"]
-                    if "code" in fallback_match and hasattr(fallback_match["code"], 'generation_time'):
-                        fallback_match["code"] = str(fallback_match["code"])
-                    if "created_at" in fallback_match and hasattr(fallback_match["created_at"], 'isoformat'):
-                        fallback_match["created_at"] = fallback_match["created_at"].isoformat()
-                    
-                    return {
-                        "found": True,
-                        "match_type": "default_original",
-                        "asset": fallback_match,
-                        "note": f"Original style found for asset code '{code}'."
-                    }
+                # Joins a prefetch or another request already generating this variant
+                new_asset_data, generated = await get_or_generate_variant(
+                    db, code, fallback_match.get("content", ""), style, domain, hobby
+                )
+                _rename_id(new_asset_data)
                 
-                # If we have original content but need a different style, generate new content
-                try:
-                    logger.info(f"Generating new {style} content for code={code} using original content")
-                    
-                    # Use original content to generate new style
-                    original_content = fallback_match.get("content", "")
-                    
-                    if not original_content:
-                        raise ValueError("Original content is empty")
-                    
-                    # Generate new content using AI
-                    if style == "original":
-                        output = original_content
-                    else:
-                        # Style-specific prompts
-                        style_prompts = {
-                            "storytelling": """
-### Storytelling Mode:
-- Convert the given content into a short storytelling analogy.
-- Make it relevant to the given domain and hobby.
-- Use simple, engaging language.
-- Create a narrative that helps explain the concept.
-""",
-                            "visual_cue": """
-### Visual Cue Mode - Visual Instructions:
-- Create text-based visual cues that explain the content.
-- Use emojis, arrows (➡️), and symbolic representations.
-- Provide 3-4 different visual cue formats.
-- Make it hobby and domain relevant.
-- Focus on visual learning through text symbols.
-""",
-                            "summary": """
-### Summary Mode:
-- Generate a concise summary of the content.
-- Make it clear, informative, and easy to understand.
-- Use analogies from the hobby to explain domain concepts.
-"""
-                        }
-                        
-                        # Create domain-specific context
-                        domain_contexts = {
-                            "engineering-student": "Use examples in circuits, code snippets, algorithms, and technical implementations",
-                            "medical-student": "Use case studies in healthcare, patient scenarios, medical procedures, and clinical examples", 
-                            "business-student": "Use marketing examples, finance scenarios, business strategies, and corporate case studies",
-                            "teacher-trainer": "Use classroom storytelling, pedagogy techniques, educational methods, and teaching scenarios",
-                            "working-professional": "Use real-world workplace analogies, professional scenarios, industry examples, and practical applications"
-                        }
-                        
-                        domain_context = domain_contexts.get(domain, f"Use examples relevant to {domain}")
-                        
-                        # Create the AI prompt
-                        prompt = f"""You are an AI content transformer. 
-You will receive inputs for content transformation based on specific learner profiles.
-
-Domain Context: {domain_context}
-Hobby Context: Connect concepts to {hobby} for better relatability
-
-Your task is to generate content in the specified style:
-
-{style_prompts[style]}
-
-Now transform this content for {domain} who loves {hobby}:
-
-**Style:** {style}
-**Content:** "{original_content}"
-**Domain:** {domain} - {domain_context}
-**Hobby:** {hobby}
-
-Please provide ONLY the {style} output without any formatting or labels:"""
-
-                        # Generate response using Google Generative AI
-                        response = model.generate_content(prompt)
-                        
-                        if not response.text:
-                            raise ValueError("AI failed to generate content")
-                        
-                        output = response.text.strip()
-                        
-                        # Clean up any unwanted formatting
-                        if output.startswith('"') and output.endswith('"'):
-                            output = output[1:-1]
-                    
-                    # Insert the new generated content into assets collection
-                    from datetime import datetime
-                    
-                    try:
-                        code_as_objectid = ObjectId(code)
-                    except Exception:
-                        code_as_objectid = code
-                        
-                    new_asset_data = {
-                        "code": code_as_objectid,
-                        "content": output,
-                        "style": style,
-                        "domain": domain,
-                        "hobby": hobby,
-                        "created_at": datetime.utcnow(),
-                        "updated_at": datetime.utcnow(),
-                        "status": "not-started"
-                    }
-                    
-                    result = await db["assets"].insert_one(new_asset_data)
-                    new_asset_data["id"] = str(result.inserted_id)
-                    new_asset_data["code"] = str(new_asset_data["code"])
-                    
-                    # Convert datetime fields to ISO format strings
-                    if "created_at" in new_asset_data and hasattr(new_asset_data["created_at"], 'isoformat'):
-                        new_asset_data["created_at"] = new_asset_data["created_at"].isoformat()
-                    if "updated_at" in new_asset_data and hasattr(new_asset_data["updated_at"], 'isoformat'):
-                        new_asset_data["updated_at"] = new_asset_data["updated_at"].isoformat()
-                    
-                    # Remove the _id field if it exists (we already have id)
-                    if "_id" in new_asset_data:
-                        del new_asset_data["_id"]
-                    
-                    logger.info(f"Successfully generated and inserted new {style} content for code={code}")
-                    
-                    return {
+                if not generated:
+                    return BSONJSONResponse({
                         "found": True,
-                        "match_type": "generated",
-                        "asset": new_asset_data,
-                        "note": f"Generated new {style} content for asset code '{code}' using original content and inserted into database."
-                    }
-                    
-                except Exception as gen_error:
-                    logger.error(f"Failed to generate content: {str(gen_error)}")
-                    # If generation fails, return original as fallback
-                    fallback_match["id"] = str(fallback_match["_id"])
-                    del fallback_match["_id"]
-                    if "code" in fallback_match and hasattr(fallback_match["code"], 'generation_time'):
-                        fallback_match["code"] = str(fallback_match["code"])
-                    if "created_at" in fallback_match and hasattr(fallback_match["created_at"], 'isoformat'):
-                        fallback_match["created_at"] = fallback_match["created_at"].isoformat()
-                    
-                    return {
-                        "found": True,
-                        "match_type": "fallback_original",
-                        "asset": fallback_match,
-                        "note": f"Content generation failed, returning original style for asset code '{code}'. Error: {str(gen_error)}"
-                    }
+                        "match_type": "exact",
+                        "asset": new_asset_data
+                    })
+                logger.info(f"Successfully generated and inserted new {style} content for code={code}")
+                
+                return BSONJSONResponse({
+                    "found": True,
+                    "match_type": "generated",
+                    "asset": new_asset_data,
+                    "note": f"Generated new {style} content for asset code '{code}' using original content and inserted into database."
+                })
+                
+            except Exception as gen_error:
+                logger.error(f"Failed to generate content: {str(gen_error)}")
+                # If generation fails, return original as fallback
+                return BSONJSONResponse({
+                    "found": True,
+                    "match_type": "fallback_original",
+                    "asset": _rename_id(fallback_match),
+                    "note": f"Content generation failed, returning original style for asset code '{code}'. Error: {str(gen_error)}"
+                })
         
         # No match found at all (neither specific combination nor original style)
         logger.info(f"No asset found for code={code} (neither specific combination nor original style)")
@@ -815,6 +473,78 @@ Please provide ONLY the {style} output without any formatting or labels:"""
             detail=f"Failed to retrieve asset: {str(e)}"
         )
 
+@router.get(
+    "/getAssetStyles",
+    summary="Get Asset in Several Styles",
+    description="Get an asset in several styles for one domain and hobby. Styles without a stored variant are generated together in one structured LLM call and stored as separate assets."
+)
+async def get_asset_styles(
+    code: str,
+    domain: str,
+    hobby: str,
+    styles: str = Query(",".join(VARIANT_STYLES), description="Comma-separated styles (storytelling, visual_cue, summary)"),
+    db=Depends(get_database)
+):
+    """
+    Get asset variants for several styles at once.
+    
+    - **code**: Asset code identifier
+    - **domain**: Domain context
+    - **hobby**: Hobby context
+    - **styles**: Comma-separated styles; defaults to all three
+    
+    Returns each style's stored variant, generating the missing ones from the original in one call.
+    """
+    try:
+        domain, hobby = canonical_domain(domain), canonical_hobby(hobby)
+        requested = list(dict.fromkeys(canonical_style(style) for style in styles.split(",") if style.strip()))
+        unsupported = [style for style in requested if style not in VARIANT_STYLES]
+        if not requested or unsupported:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported styles: {', '.join(unsupported) or styles}"
+            )
+        logger.info(f"Searching for asset styles: code={code}, domain={domain}, hobby={hobby}, styles={requested}")
+        
+        assets_collection = db["assets"]
+        assets: Dict[str, Any] = {}
+        match_types: Dict[str, str] = {}
+        async for match in assets_collection.find(
+            {"code": {"$in": list({variant_code(code), code})}, "domain": domain, "hobby": hobby, "style": {"$in": requested}, "keywords": None}
+        ):
+            if match["style"] not in assets:
+                assets[match["style"]] = _rename_id(match)
+                match_types[match["style"]] = "exact"
+        
+        missing = [style for style in requested if style not in assets]
+        if missing:
+            original = await find_original(db, code)
+            if original is None:
+                return {
+                    "found": False,
+                    "assets": {},
+                    "message": f"No original style asset found with code='{code}' to generate {', '.join(missing)} from."
+                }
+            generated, _ = await generate_asset_variants(db, code, original.get("content", ""), missing, domain, hobby)
+            for style, document in generated.items():
+                assets[style] = _rename_id(document)
+                match_types[style] = "generated"
+        
+        return BSONJSONResponse({
+            "found": True,
+            "assets": {style: assets[style] for style in requested},
+            "match_types": {style: match_types[style] for style in requested}
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in get_asset_styles: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve asset styles: {str(e)}"
+        )
+
 @router.put(
     "/updateAsset",
     summary="Update User Asset Status",
@@ -826,6 +556,7 @@ async def update_asset(
     user: str = Query(..., description="User ID"),
     asset_status: str = Query(..., alias="status", description="Asset status ('not-started', 'in-progress', 'completed')"),
     progress: Optional[int] = Query(None, ge=0, le=100, description="Progress percentage (0-100)"),
+    buffered: bool = Query(False, description="Coalesce this update in the write-behind buffer (for frequent progress heartbeats)"),
     db=Depends(get_database)
 ):
     """
@@ -836,11 +567,13 @@ async def update_asset(
     - **user**: User ID
     - **status**: New status for the asset ('not-started', 'in-progress', 'completed')
     - **progress**: Optional progress percentage (0-100)
+    - **buffered**: Accept the update into the write-behind buffer instead of writing it now
     
-    Updates or creates a record in the userassetstatus collection for the specific user, course, and asset combination.
+    Updates or creates a record in the userassetstatus collection for the specific user, course, and asset combination
+    with a single atomic upsert. Buffered updates keep only the latest state per record and are flushed in bulk;
+    `completed` transitions are still written immediately unless configured otherwise.
     """
     try:
-        from bson import ObjectId
         from datetime import datetime
         from app.schemas.user_asset_status import AssetStatus
 
@@ -854,117 +587,148 @@ async def update_asset(
                 detail=f"Invalid status '{asset_status}'. Valid statuses are: {', '.join(valid_statuses)}"
             )
 
+        if buffered and await progress_buffer.submit(course, asset, user, asset_status, progress):
+            return {
+                "success": True,
+                "action": "buffered",
+                "message": "Progress update accepted and will be written shortly",
+                "course": course,
+                "asset": asset,
+                "user": user,
+                "newStatus": asset_status,
+                "progress": progress,
+                "timestamp": datetime.utcnow().isoformat()
+            }
+
         logger.info(f"Updating user asset status: course={course}, asset={asset}, user={user}, status={asset_status}")
 
-        # Create the search condition
-        search_condition = {
+        record, created = await user_asset_status_service.upsert_status(
+            db, course, asset, user, asset_status, progress
+        )
+        logger.info(f"{'Created' if created else 'Updated'} user asset status record")
+
+        return BSONJSONResponse({
+            "success": True,
+            "action": "created" if created else "updated",
+            "message": "Successfully created new user asset status record" if created else "Successfully updated user asset status",
             "course": course,
             "asset": asset,
-            "user": user
-        }
-
-        # Prepare update data
-        update_data = {
-            "status": asset_status,
-            "updated_at": datetime.utcnow(),
-            "last_accessed": datetime.utcnow()
-        }
-
-        # Add progress if provided
-        if progress is not None:
-            update_data["progress"] = progress
+            "user": user,
+            "newStatus": asset_status,
+            "progress": progress,
+            "record": _rename_id(record),
+            "timestamp": datetime.utcnow()
+        })
 
-        # Try to update existing record first
-        update_result = await db["userassetstatus"].update_one(
-            search_condition,
-            {"$set": update_data}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error updating user asset status: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update user asset status: {str(e)}"
         )
 
-        if update_result.matched_count > 0:
-            # Record was updated
-            logger.info(f"Updated existing user asset status record")
-            
-            # Get the updated record
-            updated_record = await db["userassetstatus"].find_one(search_condition)
-            
-            if updated_record:
-                # Convert ObjectId to string for JSON response
-                updated_record["id"] = str(updated_record["_id"])
-                del updated_record["_id"]
-                
-                # Convert any other ObjectId fields to strings
-                for key, value in list(updated_record.items()):
-                    if hasattr(value, 'generation_time'):  # Check if it's an ObjectId
-                        updated_record[key] = str(value)
-                
-                # Convert datetime fields to ISO format
-                for field in ["created_at", "updated_at", "last_accessed"]:
-                    if field in updated_record and hasattr(updated_record[field], 'isoformat'):
-                        updated_record[field] = updated_record[field].isoformat()
-
-                return {
-                    "success": True,
-                    "action": "updated",
-                    "message": f"Successfully updated user asset status",
-                    "course": course,
-                    "asset": asset,
-                    "user": user,
-                    "newStatus": asset_status,
-                    "progress": progress,
-                    "record": updated_record,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-        else:
-            # No existing record found, create a new one
-            logger.info(f"Creating new user asset status record")
-            
-            new_record_data = {
-                **search_condition,
-                **update_data,
-                "created_at": datetime.utcnow(),
-                "progress": progress if progress is not None else 0
-            }
+@router.put(
+    "/updateAssets",
+    response_model=UserAssetStatusBulkResponse,
+    summary="Bulk Update User Asset Statuses",
+    description="Apply many user asset status updates with one unordered bulk write."
+)
+async def update_assets(request: UserAssetStatusBulkRequest, db=Depends(get_database)):
+    """
+    Update or create many records in the userassetstatus collection.
+    
+    Each entry is an upsert keyed by (course, asset, user). Writes are unordered, so a failing entry
+    does not stop the others; failures are reported by their position in `updates`.
+    """
+    try:
+        logger.info(f"Bulk updating {len(request.updates)} user asset statuses")
+        result = await user_asset_status_service.bulk_upsert_statuses(
+            db, [update.dict() for update in request.updates]
+        )
+        return UserAssetStatusBulkResponse(
+            success=not result["errors"],
+            received=len(request.updates),
+            **result
+        )
+    except Exception as e:
+        logger.error(f"Error bulk updating user asset statuses: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update user asset statuses: {str(e)}"
+        )
 
-            insert_result = await db["userassetstatus"].insert_one(new_record_data)
-            
-            if insert_result.inserted_id:
-                new_record_data["id"] = str(insert_result.inserted_id)
-                
-                # Convert any ObjectId fields to strings
-                for key, value in list(new_record_data.items()):
-                    if hasattr(value, 'generation_time'):  # Check if it's an ObjectId
-                        new_record_data[key] = str(value)
-                
-                # Convert datetime fields to ISO format
-                for field in ["created_at", "updated_at", "last_accessed"]:
-                    if field in new_record_data and hasattr(new_record_data[field], 'isoformat'):
-                        new_record_data[field] = new_record_data[field].isoformat()
+@router.post(
+    "/canonicalize",
+    summary="Canonicalize Domain/Hobby/Style Keys",
+    description="Rewrite stored domain, hobby and style values to controlled-vocabulary keys and merge the duplicates this exposes."
+)
+async def canonicalize_keys(
+    apply: bool = Query(False, description="Rewrite and delete duplicates instead of only reporting them"),
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Backfill canonical keys into assets, transformed-assets and users (admin only).
+    
+    Duplicates that share (asset code, style, domain, hobby, language) once
+    canonicalized are merged into one document. Assets referenced by a course
+    module or a progress row are always kept.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    try:
+        return await vocabulary_backfill_service.backfill(db, apply)
+    except Exception as e:
+        logger.error(f"Error canonicalizing keys: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to canonicalize keys: {str(e)}"
+        )
 
-                return {
-                    "success": True,
-                    "action": "created",
-                    "message": f"Successfully created new user asset status record",
-                    "course": course,
-                    "asset": asset,
-                    "user": user,
-                    "newStatus": asset_status,
-                    "progress": progress,
-                    "record": new_record_data,
-                    "timestamp": datetime.utcnow().isoformat()
-                }
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Failed to create user asset status record"
-                )
+@router.get(
+    "/pregeneration",
+    summary="Pre-generation Status",
+    description="Popular (domain, hobby) combinations, today's pre-generation spend against the budget, and the last run."
+)
+async def get_pregeneration_status(db=Depends(get_database)):
+    """Status of off-peak variant pre-generation"""
+    try:
+        return BSONJSONResponse(await pregeneration_service.status(db))
+    except Exception as e:
+        logger.error(f"Error getting pre-generation status: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get pre-generation status: {str(e)}"
+        )
 
-    except HTTPException:
-        raise
+@router.post(
+    "/pregeneration/run",
+    summary="Run Pre-generation",
+    description="Generate missing variants for popular (domain, hobby) combinations now, within today's budget."
+)
+async def run_pregeneration(
+    force: bool = Query(False, description="Run even outside the off-peak window"),
+    db=Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+):
+    """Run one pre-generation pass (admin only); still yields to interactive generation"""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    try:
+        return await pregeneration_service.run(db, force)
     except Exception as e:
-        logger.error(f"Error updating user asset status: {str(e)}")
+        logger.error(f"Error running pre-generation: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update user asset status: {str(e)}"
+            detail=f"Failed to run pre-generation: {str(e)}"
         )
 
 @router.get(
@@ -976,7 +740,8 @@ async def health_check():
     """Health check for content transformer service"""
     try:
         api_status = "configured" if settings.google_api_key else "not configured"
-        model_status = "available" if model else "unavailable"
+        # Transformations reach the model through the LLM gateway
+        model_status = "available" if llm_service.available(transformation_provider()) else "unavailable"
         
         return {
             "status": "healthy",
@@ -1,15 +1,36 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from bson import ObjectId
 
 from app.core.mongodb import get_database
-from app.schemas.course import Course, CourseCreate, CourseUpdate, CourseWithAssets, CourseWithUserProgress, Asset, AssetCreate
+from app.schemas.course import (
+    Course, CourseCreate, CourseUpdate, CourseWithAssets, CourseWithUserProgress,
+    CourseListItem, Asset, AssetCreate, AssetListItem, UserCourseProgress
+)
+from app.utils.projection import build_projection
+from app.utils.response import BSONJSONResponse
 from app.services.course_service import CourseService
+from app.services.course_progress_service import course_progress_service
 from app.api.api_v1.endpoints.auth import get_current_user
 from app.models.user import User as UserModel
 
 router = APIRouter()
 
+# Lightweight defaults for list views; pass fields=* for whole documents
+COURSE_LIST_DEFAULT_FIELDS = ("name", "modules", "created_at", "updated_at")
+ASSET_LIST_DEFAULT_FIELDS = ("code", "name", "style", "language", "summary", "created_at", "updated_at")
+
+
+def _course_response(schema, course: dict) -> BSONJSONResponse:
+    """
+    Validate and filter course through its response schema, then render it.
+
+    Returning a response object skips FastAPI's response_model handling, so
+    the schema is applied here. Populated assets stay raw documents and the
+    response class serializes their ObjectIds.
+    """
+    return BSONJSONResponse(schema(**course).dict(by_alias=True))
+
 
 @router.get("/{course_id}/assets", response_model=CourseWithAssets)
 async def get_course_assets(
@@ -40,7 +61,7 @@ async def get_course_assets(
             detail="Course not found"
         )
     
-    return course
+    return _course_response(CourseWithAssets, course)
 
 
 @router.get("/{course_id}/assets/progress", response_model=CourseWithUserProgress)
@@ -64,9 +85,9 @@ async def get_course_assets_with_progress(
     db = get_database()
     course_service = CourseService(db)
     
-    # Use current user's ID for progress tracking
+    # Use current user's ID for progress tracking; their email finds their preferences
     user_id = str(current_user.id)
-    course = await course_service.get_course_with_user_progress(course_id, user_id)
+    course = await course_service.get_course_with_user_progress(course_id, user_id, current_user.email)
     
     if not course:
         raise HTTPException(
@@ -74,22 +95,73 @@ async def get_course_assets_with_progress(
             detail="Course not found"
         )
     
-    return course
+    return _course_response(CourseWithUserProgress, course)
+
+
+async def _user_course_progress(user_id: str) -> BSONJSONResponse:
+    db = get_database()
+    if db is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database connection not available"
+        )
+    try:
+        rollups = await course_progress_service.get_user_progress(db, user_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch course progress: {str(e)}"
+        )
+    for rollup in rollups:
+        rollup["_id"] = str(rollup["_id"])
+        rollup.pop("user", None)
+    return _course_response(UserCourseProgress, {"user": user_id, "count": len(rollups), "courses": rollups})
+
+
+@router.get("/progress/me", response_model=UserCourseProgress)
+async def get_my_course_progress(current_user: UserModel = Depends(get_current_user)):
+    """
+    Get the current user's progress in every course they have started.
+    Reads the maintained course_progress rollups in a single query, most recent activity first.
+    """
+    return await _user_course_progress(str(current_user.id))
+
+
+@router.get("/progress/user/{user_id}", response_model=UserCourseProgress)
+async def get_user_course_progress(
+    user_id: str,
+    current_user: UserModel = Depends(get_current_user)
+):
+    """
+    Get a user's progress in every course they have started.
+    Reads the maintained course_progress rollups in a single query, most recent activity first.
+    """
+    # Users can only access their own progress unless they're admin
+    if user_id != str(current_user.id) and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    return await _user_course_progress(user_id)
 
 
-@router.get("/", response_model=List[Course])
+@router.get("/", response_model=List[CourseListItem], response_model_exclude_unset=True)
 async def get_courses(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or * for all"),
     current_user: UserModel = Depends(get_current_user)
 ):
     """
     Get list of courses with pagination.
+    
+    - **fields**: Optional sparse fieldset, e.g. `fields=name`
     """
     db = get_database()
     course_service = CourseService(db)
     
-    courses = await course_service.get_courses(skip=skip, limit=limit)
+    projection = build_projection(fields, COURSE_LIST_DEFAULT_FIELDS)
+    courses = await course_service.get_courses(skip=skip, limit=limit, projection=projection)
     return courses
 
 
@@ -209,19 +281,23 @@ async def delete_course(
 
 
 # Asset endpoints
-@router.get("/assets/", response_model=List[Asset])
+@router.get("/assets/", response_model=List[AssetListItem], response_model_exclude_unset=True)
 async def get_assets(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or * for all (default omits content)"),
     current_user: UserModel = Depends(get_current_user)
 ):
     """
     Get list of assets with pagination.
+    
+    - **fields**: Optional sparse fieldset; `content` is only returned when asked for
     """
     db = get_database()
     course_service = CourseService(db)
     
-    assets = await course_service.get_assets(skip=skip, limit=limit)
+    projection = build_projection(fields, ASSET_LIST_DEFAULT_FIELDS)
+    assets = await course_service.get_assets(skip=skip, limit=limit, projection=projection)
     return assets
 
 
@@ -4,8 +4,13 @@ LLM API endpoints for content generation.
 
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 
+from app.core.config import settings
+from app.core.mongodb import get_database
+from app.services.context_retrieval_service import context_retrieval_service
+
 from app.services.llm_service import (
     LLMRequest, 
     LLMResponse, 
@@ -46,6 +51,8 @@ class ExplanationRequest(BaseModel):
     content: str = Field(description="Content to explain")
     style: Optional[str] = Field(default="clear and engaging")
     audience: Optional[str] = Field(default="general learners")
+    course_id: Optional[str] = Field(default=None, description="Ground the explanation in this course's material")
+    module_code: Optional[str] = Field(default=None, description="Only this module's material (requires course_id)")
 
 
 class StoryRequest(BaseModel):
@@ -136,19 +143,33 @@ async def generate_quiz_endpoint(
 @router.post("/generate/explanation", response_model=LLMResponse)
 async def generate_explanation_endpoint(
     request: ExplanationRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
     #current_user: User = Depends(get_current_user)
 ) -> LLMResponse:
     """
     Generate a clear explanation of the provided content.
     
+    With course_id (and optionally module_code), the course material most
+    relevant to the content is retrieved and included, within
+    explanation_context_token_budget.
+    
     Example usage:
     - Content: "Machine Learning"
     - Style: "beginner-friendly"
     - Result: Comprehensive explanation tailored to the audience
     """
     try:
+        content = request.content
+        if request.course_id and db is not None and settings.explanation_context_token_budget > 0:
+            asset_ids = await context_retrieval_service.module_asset_ids(db, request.course_id, request.module_code)
+            context, _ = await context_retrieval_service.module_context(
+                db, asset_ids, request.content, settings.explanation_context_token_budget
+            )
+            if context:
+                content = f"{request.content}\n\nRelevant course material:\n{context}"
+        
         response = await generate_explanation(
-            content=request.content,
+            content=content,
             style=request.style,
             audience=request.audience
         )
@@ -13,9 +13,16 @@ from app.schemas.quiz import (
     QuizCreate, QuizUpdate, QuizResponse, QuizListResponse,
     QuizGenerationRequest, QuizGenerationResponse,
     QuizAttemptCreate, QuizAttemptResponse,
-    QuizGenerationStatus, PersonalizedQuizRequest
+    QuizAttemptBatchCreate, QuizAttemptBatchResponse, QuizAttemptBatchResult,
+    QuizGenerationStatus, PersonalizedQuizRequest,
+    QuestionPoolGenerationRequest, QuestionPoolGenerationResponse, QuizAssembleRequest
 )
 from app.services.quiz_service import QuizService
+from app.services.quiz_regrade_service import quiz_regrade_service
+from app.services.quiz_analytics_service import quiz_analytics_service
+from app.services.irt_calibration_service import irt_calibration_service
+from app.services.question_pool_service import question_pool_service
+from app.services.question_dedupe_service import question_dedupe_service
 
 router = APIRouter()
 
@@ -177,18 +184,44 @@ async def get_quiz(
 async def update_quiz(
     quiz_id: str,
     quiz_update: QuizUpdate,
+    background_tasks: BackgroundTasks,
     db: AsyncIOMotorDatabase = Depends(get_database),
     current_user: UserModel = Depends(get_current_user)
 ) -> QuizResponse:
-    """Update an existing quiz."""
+    """Update an existing quiz. Changing questions regrades existing attempts in the background."""
     quiz_service = QuizService()
     quiz = await quiz_service.update_quiz(db, quiz_id, quiz_update)
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
+    if quiz_update.questions is not None:
+        background_tasks.add_task(quiz_regrade_service.regrade_quiz, db, quiz_id)
+    
     return QuizResponse(**quiz.to_dict())
 
 
+@router.post("/{quiz_id}/regrade")
+async def regrade_quiz(
+    quiz_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Rescore every attempt of a quiz that was graded against an older answer key.
+    
+    Returns how many attempts were processed and changed, and the throughput of the run.
+    """
+    try:
+        return await quiz_regrade_service.regrade_quiz(db, quiz_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error regrading quiz attempts: {str(e)}"
+        )
+
+
 @router.delete("/{quiz_id}")
 async def delete_quiz(
     quiz_id: str,
@@ -303,6 +336,66 @@ async def create_quiz_attempt(
         )
 
 
+@router.post("/attempts/batch", response_model=QuizAttemptBatchResponse)
+async def create_quiz_attempts_batch(
+    batch: QuizAttemptBatchCreate,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> QuizAttemptBatchResponse:
+    """
+    Sync many quiz attempts taken offline.
+    
+    Attempts are scored against cached answer keys and inserted together. Each attempt needs a
+    `client_attempt_id`; resending an attempt that was already stored returns it with status
+    `duplicate` instead of inserting it again, so a failed sync can simply be retried.
+    
+    **Example:**
+    ```json
+    {
+        "attempts": [
+            {
+                "client_attempt_id": "device-42-0001",
+                "quiz_id": "507f1f77bcf86cd799439011",
+                "user_program_id": "507f1f77bcf86cd799439012",
+                "answers": [{"question_index": 0, "selected_answer": 1}],
+                "completed_at": "2024-05-01T10:15:00"
+            }
+        ]
+    }
+    ```
+    """
+    try:
+        items = [
+            {**attempt.dict(), "answers": [answer.dict() for answer in attempt.answers]}
+            for attempt in batch.attempts
+        ]
+        
+        quiz_service = QuizService()
+        results = await quiz_service.create_quiz_attempts_batch(db, str(current_user.id), items)
+        
+        response_results = [
+            QuizAttemptBatchResult(
+                client_attempt_id=result["client_attempt_id"],
+                status=result["status"],
+                attempt=QuizAttemptResponse(**result["attempt"].to_dict()) if result.get("attempt") else None,
+                error=result.get("error")
+            )
+            for result in results
+        ]
+        return QuizAttemptBatchResponse(
+            created=sum(1 for result in results if result["status"] == "created"),
+            duplicates=sum(1 for result in results if result["status"] == "duplicate"),
+            rejected=sum(1 for result in results if result["status"] == "rejected"),
+            results=response_results
+        )
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error syncing quiz attempts: {str(e)}"
+        )
+
+
 @router.get("/attempts/my", response_model=List[QuizAttemptResponse])
 async def get_my_quiz_attempts(
     quiz_id: Optional[str] = Query(None, description="Filter by quiz ID"),
@@ -375,6 +468,202 @@ async def get_course_quiz_stats(
         )
 
 
+@router.get("/analytics/course/{course_id}")
+async def get_course_quiz_analytics(
+    course_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get attempt statistics for every quiz in a course, served from the analytics rollups."""
+    try:
+        quiz_service = QuizService()
+        quizzes = await quiz_service.get_quizzes_by_course(db, course_id)
+        summaries = await quiz_analytics_service.get_quizzes_summary(db, [quiz.id for quiz in quizzes])
+        
+        return {
+            "course_id": course_id,
+            "total_quizzes": len(quizzes),
+            "quizzes_with_attempts": len(summaries),
+            "quizzes": summaries
+        }
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting quiz analytics: {str(e)}"
+        )
+
+
+@router.post("/analytics/refresh")
+async def refresh_quiz_analytics(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Fold attempts recorded since the last run into the analytics rollups now."""
+    try:
+        return await quiz_analytics_service.refresh(db)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error refreshing quiz analytics: {str(e)}"
+        )
+
+
+@router.get("/{quiz_id}/analytics")
+async def get_quiz_analytics(
+    quiz_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get statistics for one quiz, served from the analytics rollups.
+    
+    Includes attempt count, mean score and, per question, the option distribution,
+    percent correct and discrimination index (point-biserial correlation with the total score).
+    Attempts from roughly the last minute are included on the next refresh.
+    """
+    try:
+        analytics = await quiz_analytics_service.get_quiz_analytics(db, quiz_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting quiz analytics: {str(e)}"
+        )
+    if not analytics:
+        raise HTTPException(status_code=404, detail="No analytics for this quiz yet")
+    return analytics
+
+
+@router.post("/calibration/run")
+async def run_irt_calibration(
+    full: bool = Query(False, description="Re-fit every question and learner instead of only those with new attempts"),
+    model: Optional[str] = Query(None, pattern="^(1pl|2pl)$", description="IRT model (defaults to the configured one)"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Fit IRT question difficulty/discrimination and learner ability from quiz attempts.
+    
+    Warm-started from the stored parameters; returns iteration count, convergence and timings.
+    """
+    try:
+        return await irt_calibration_service.calibrate(db, full=full, model=model)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error running IRT calibration: {str(e)}"
+        )
+
+
+@router.get("/calibration/ability/me")
+async def get_my_ability(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Get the current user's calibrated ability."""
+    ability = await irt_calibration_service.get_user_ability(db, str(current_user.id))
+    if not ability:
+        raise HTTPException(status_code=404, detail="No ability estimate for this user yet")
+    return ability
+
+
+@router.get("/{quiz_id}/calibration")
+async def get_quiz_calibration(
+    quiz_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Get calibrated IRT parameters for each question of a quiz.
+    
+    Each question has difficulty, discrimination, observed percent correct and review
+    flags such as too_easy or negative_discrimination (often a wrong answer key).
+    """
+    try:
+        questions = await irt_calibration_service.get_quiz_calibration(db, quiz_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error getting quiz calibration: {str(e)}"
+        )
+    if not questions:
+        raise HTTPException(status_code=404, detail="No calibration for this quiz yet")
+    return {"quiz_id": quiz_id, "questions": questions}
+
+
+@router.post("/dedupe")
+async def dedupe_quiz_questions(
+    course_id: Optional[str] = Query(None, description="Only quizzes of this course"),
+    apply: bool = Query(False, description="Mark duplicates with duplicate_of instead of only reporting them"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Find near-duplicate questions across existing quizzes (MinHash + LSH).
+    
+    Also rebuilds the signature index that new quizzes are checked against.
+    Duplicates are never removed, since attempts are scored by question position.
+    """
+    try:
+        return await question_dedupe_service.dedupe_quizzes(db, course_id, apply)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error deduplicating quiz questions: {str(e)}"
+        )
+
+
+@router.post("/pool/generate", response_model=QuestionPoolGenerationResponse)
+async def generate_question_pool(
+    request: QuestionPoolGenerationRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> QuestionPoolGenerationResponse:
+    """
+    Generate a question pool for a module, or for every module of a course.
+    
+    Questions are generated once, split across easy/medium/hard, and stored
+    individually; learner quizzes are then assembled from the pool without LLM calls.
+    """
+    try:
+        result = await question_pool_service.generate_pools_for_course(
+            db, request.course_id, request.module_code, request.pool_size, request.overwrite
+        )
+        return QuestionPoolGenerationResponse(**result)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generating question pool: {str(e)}"
+        )
+
+
+@router.post("/pool/assemble", response_model=QuizResponse)
+async def assemble_quiz_from_pool(
+    request: QuizAssembleRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> QuizResponse:
+    """
+    Assemble a quiz for the current user from a module's question pool.
+    
+    Questions are targeted to the user's ability estimate, avoid questions served
+    to them recently, and have their options shuffled. Submit answers with the
+    returned quiz id as for any other quiz.
+    """
+    try:
+        quiz = await question_pool_service.assemble_quiz(
+            db, str(current_user.id), request.course_id, request.module_code, request.num_questions
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error assembling quiz: {str(e)}"
+        )
+    if not quiz:
+        raise HTTPException(status_code=404, detail="No question pool for this module. Generate one first.")
+    return QuizResponse(**quiz.to_dict())
+
+
 @router.post("/generate-personalized", response_model=QuizResponse)
 async def generate_personalized_quiz(
     request: PersonalizedQuizRequest,
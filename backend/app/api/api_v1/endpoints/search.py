@@ -0,0 +1,65 @@
+"""
+Full-text search over course assets.
+"""
+
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.mongodb import get_database
+from app.api.api_v1.endpoints.auth import get_current_user
+from app.models.user import User as UserModel
+from app.services.asset_search_service import asset_search_service
+
+router = APIRouter()
+
+
+@router.get("")
+async def search_assets(
+    q: str = Query(..., min_length=1, description="Search query"),
+    course_id: Optional[str] = Query(None, description="Only assets of this course"),
+    module_code: Optional[str] = Query(None, description="Only assets of this module (requires course_id)"),
+    language: Optional[str] = Query(None, description="Only assets in this language, e.g. en, hi, te"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Search asset content of every style and language, ranked by BM25.
+    
+    Served from the in-process index; each result carries the asset's code,
+    language, style, score and a snippet around the first matching term.
+    """
+    if not asset_search_service.ready:
+        raise HTTPException(status_code=503, detail="Search index is still loading")
+    try:
+        return await asset_search_service.search(db, q, course_id, module_code, language, limit)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error searching assets: {str(e)}"
+        )
+
+
+@router.get("/stats")
+async def get_search_stats(current_user: UserModel = Depends(get_current_user)) -> Dict[str, Any]:
+    """Size and freshness of this worker's search index."""
+    return asset_search_service.stats()
+
+
+@router.post("/rebuild")
+async def rebuild_search_index(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    current_user: UserModel = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """Re-index every asset and rewrite the snapshot."""
+    try:
+        report = await asset_search_service.rebuild(db)
+        await asset_search_service.load_modules(db)
+        asset_search_service.ready = True
+        return report
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error rebuilding search index: {str(e)}"
+        )
@@ -1,5 +1,5 @@
-from typing import Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from bson import ObjectId
 
 from app.core.mongodb import get_database
@@ -7,9 +7,14 @@ from app.schemas.translation import TranslationRequest, TranslationResponse, Tra
 from app.services.translation_service import TranslationService
 from app.api.api_v1.endpoints.auth import get_current_user
 from app.models.user import User as UserModel
+from app.utils.projection import build_projection
 
 router = APIRouter()
 
+# Listing default omits translated bodies; pass fields=* (or fields=content,...) to include them
+TRANSLATION_LIST_DEFAULT_FIELDS = ("name", "style", "source_asset_id", "created_at", "updated_at")
+TRANSLATION_LIST_REQUIRED_FIELDS = ("code", "language")
+
 
 @router.post("/translate", response_model=TranslationResponse)
 async def translate_asset(
@@ -59,19 +64,22 @@ async def translate_asset(
 @router.get("/asset/{asset_code}/translations")
 async def get_asset_translations(
     asset_code: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields per translation, or * for all (default omits content)"),
     current_user: UserModel = Depends(get_current_user)
 ):
     """
     Get all available translations for a specific asset.
     
     - **asset_code**: The code of the asset to get translations for
+    - **fields**: Optional sparse fieldset, e.g. `fields=name,content`
     """
     try:
         db = get_database()
         translation_service = TranslationService(db)
         
         # Get available translations
-        translations = await translation_service.get_available_translations(asset_code)
+        projection = build_projection(fields, TRANSLATION_LIST_DEFAULT_FIELDS, TRANSLATION_LIST_REQUIRED_FIELDS)
+        translations = await translation_service.get_available_translations(asset_code, projection)
         
         return translations
         
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Response
+from typing import List, Optional, Dict, Any
 from datetime import datetime
 import logging
 from bson import ObjectId
@@ -11,6 +11,8 @@ from app.schemas.users_collection import (
     UsersCollectionNotFound
 )
 from app.core.mongodb import get_database
+from app.core.cache import user_preferences_cache, cache_invalidator
+from app.utils.pagination import MAX_PAGE_SIZE, keyset_query, fetch_page, stream_ndjson
 
 logger = logging.getLogger(__name__)
 
@@ -60,7 +62,10 @@ async def getUserPreferences(
             )
         
         # Find user in MongoDB users collection
-        user = await db.users.find_one({"_id": object_id})
+        user = await user_preferences_cache.get_or_load(
+            f"id:{user_id}",
+            lambda: db.users.find_one({"_id": object_id})
+        )
         
         if user:
             # Convert MongoDB ObjectId to string for the response
@@ -120,7 +125,10 @@ async def getUserPreferencesByEmail(
         logger.info(f"Fetching user preferences for email: {email}")
         
         # Find user in MongoDB users collection by email
-        user = await db.users.find_one({"email": email})
+        user = await user_preferences_cache.get_or_load(
+            f"email:{email}",
+            lambda: db.users.find_one({"email": email})
+        )
         
         if user:
             # Convert MongoDB ObjectId to string for the response
@@ -197,6 +205,8 @@ async def saveUserPreferences(
         result = await db.users.insert_one(user_data)
         
         if result.inserted_id:
+            await cache_invalidator.notify_write("users", result.inserted_id)
+            
             # Fetch the created document
             created_user = await db.users.find_one({"_id": result.inserted_id})
             created_user["id"] = str(created_user["_id"])
@@ -282,6 +292,8 @@ async def updateUserPreferences(
         )
         
         if result.modified_count > 0:
+            await cache_invalidator.notify_write("users", object_id)
+            
             # Fetch the updated document
             updated_user = await db.users.find_one({"_id": object_id})
             updated_user["id"] = str(updated_user["_id"])
@@ -304,12 +316,19 @@ async def updateUserPreferences(
             detail=f"Failed to update user preferences: {str(e)}"
         )
 
+def _serialize_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a users document into a UsersCollectionResponse-shaped dict"""
+    user["id"] = str(user["_id"])
+    del user["_id"]
+    return UsersCollectionResponse(**user).dict()
+
+
 @router.get(
     "/",
     response_model=List[UsersCollectionResponse],
     status_code=status.HTTP_200_OK,
     summary="Get All User Preferences",
-    description="Retrieve all user preferences from the users collection.",
+    description="Retrieve all user preferences from the users collection. Pass `after`/`limit` for keyset pagination (next cursor in the `X-Next-After` header) or `format=ndjson` to stream.",
     responses={
         200: {
             "description": "User preferences retrieved successfully",
@@ -321,15 +340,33 @@ async def updateUserPreferences(
     }
 )
 async def getAllUserPreferences(
+    response: Response,
+    after: Optional[str] = Query(None, description="Return users after this id (keyset cursor)"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+    response_format: str = Query("json", alias="format", pattern="^(json|ndjson)$", description="'json' or 'ndjson' (streamed)"),
     db=Depends(get_database)
 ):
     """
     Get all user preferences from the users collection.
     
+    - **after**: Optional keyset cursor (user id) to resume from
+    - **limit**: Optional page size; the next cursor is returned in `X-Next-After`
+    - **format**: `ndjson` streams one user per line instead of building a list
+    
     Returns a list of all user preferences in the database.
     """
     try:
         logger.info("Fetching all user preferences")
+        query = keyset_query(after)
+        
+        if response_format == "ndjson":
+            return stream_ndjson(db.users, query, _serialize_user, limit=limit)
+        
+        if after or limit:
+            users, next_after = await fetch_page(db.users, query, limit or MAX_PAGE_SIZE, _serialize_user)
+            if next_after:
+                response.headers["X-Next-After"] = next_after
+            return users
         
         # Find all users in MongoDB
         users_cursor = db.users.find({})
@@ -343,6 +380,8 @@ async def getAllUserPreferences(
         logger.info(f"Found {len(users)} user preferences")
         return [UsersCollectionResponse(**user) for user in users]
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching all user preferences: {str(e)}")
         raise HTTPException(
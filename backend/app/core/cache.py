@@ -0,0 +1,305 @@
+"""
+In-process read-through caches for documents that change rarely.
+
+Courses, original assets and `users` preference documents are read on almost
+every transformer/course request, quiz answer keys on every submission, and question-pool difficulty indexes on every assembled quiz. The caches below are size-bounded LRUs with
+a TTL backstop. Cross-process invalidation uses MongoDB change streams when the
+server is a replica set (or mongos), and falls back to polling per-collection
+version stamps in the `cache_versions` collection otherwise.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from prometheus_client import Counter, Gauge
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar("V")
+
+CACHE_HITS = Counter("cache_hits_total", "Read-through cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "Read-through cache misses", ["cache"])
+CACHE_INVALIDATIONS = Counter("cache_invalidations_total", "Cache invalidations", ["cache"])
+CACHE_HIT_RATIO = Gauge("cache_hit_ratio", "Read-through cache hit ratio", ["cache"])
+CACHE_ENTRIES = Gauge("cache_entries", "Entries currently held in the cache", ["cache"])
+
+
+class AsyncLRUCache(Generic[V]):
+    """Size-bounded LRU cache with per-entry TTL and single-flight loading."""
+
+    def __init__(self, name: str, collection: str, max_entries: int = None, ttl_seconds: float = None):
+        self.name = name
+        self.collection = collection
+        self.max_entries = max_entries or settings.cache_max_entries
+        self.ttl_seconds = ttl_seconds or settings.cache_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, V]]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+            CACHE_HITS.labels(self.name).inc()
+        else:
+            self.misses += 1
+            CACHE_MISSES.labels(self.name).inc()
+        CACHE_HIT_RATIO.labels(self.name).set(self.hit_ratio)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: str) -> Optional[V]:
+        """Return a copy of the cached value, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        # Callers mutate the documents they get back, so never hand out the cached object
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: V):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        CACHE_ENTRIES.labels(self.name).set(len(self._entries))
+
+    def invalidate(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            CACHE_INVALIDATIONS.labels(self.name).inc()
+            CACHE_ENTRIES.labels(self.name).set(len(self._entries))
+
+    def invalidate_prefix(self, prefix: str):
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self.invalidate(key)
+
+    def clear(self):
+        if self._entries:
+            CACHE_INVALIDATIONS.labels(self.name).inc()
+        self._entries.clear()
+        CACHE_ENTRIES.labels(self.name).set(0)
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Optional[V]]]) -> Optional[V]:
+        """
+        Return the cached value for key, calling loader on a miss.
+
+        Concurrent misses for the same key share one loader call. None results
+        are not cached so that newly created documents become visible at once.
+        """
+        if not settings.cache_enabled:
+            return await loader()
+
+        value = self.get(key)
+        if value is not None:
+            self._record(hit=True)
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            value = self.get(key)
+            if value is not None:
+                self._record(hit=True)
+                return value
+
+            self._record(hit=False)
+            value = await loader()
+            if value is not None:
+                self.set(key, value)
+        self._locks.pop(key, None)
+        return copy.deepcopy(value) if value is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+course_cache: AsyncLRUCache[Dict[str, Any]] = AsyncLRUCache("courses", collection="courses")
+asset_cache: AsyncLRUCache[Dict[str, Any]] = AsyncLRUCache("assets", collection="assets")
+user_preferences_cache: AsyncLRUCache[Dict[str, Any]] = AsyncLRUCache("users", collection="users")
+# Values are immutable AnswerKey objects (see app.services.quiz_scoring)
+answer_key_cache: AsyncLRUCache[Any] = AsyncLRUCache("answer_keys", collection="quizzes")
+# Values are immutable PoolIndex objects keyed by "<course_id>:<module_code>" (see app.services.question_pool_service)
+question_pool_cache: AsyncLRUCache[Any] = AsyncLRUCache("question_pools", collection="question_pool")
+
+# Serialized /get-asset responses; keyed like asset_cache so asset writes drop them too
+asset_json_cache: AsyncLRUCache[bytes] = AsyncLRUCache("asset_json", collection="assets")
+
+all_caches: Tuple[AsyncLRUCache, ...] = (
+    course_cache, asset_cache, asset_json_cache, user_preferences_cache, answer_key_cache, question_pool_cache
+)
+# Caches holding each collection's documents
+caches: Dict[str, List[AsyncLRUCache]] = {}
+for _cache in all_caches:
+    caches.setdefault(_cache.collection, []).append(_cache)
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Get hit/miss statistics for every registered cache."""
+    return {cache.name: cache.stats() for cache in all_caches}
+
+
+def _invalidate_from_change(collection: str, document_id: Any = None, document: Optional[Dict[str, Any]] = None):
+    """Drop the cache entries affected by a write to collection."""
+    for cache in caches.get(collection, []):
+        _invalidate_cache(cache, collection, document_id, document)
+
+
+def _invalidate_cache(cache: AsyncLRUCache, collection: str, document_id: Any, document: Optional[Dict[str, Any]]):
+    if collection in ("courses", "quizzes") and document_id is not None:
+        cache.invalidate(str(document_id))
+    elif collection == "assets" and document:
+        # Asset entries are keyed by "<code or _id>:<lookup>..."
+        if document_id is not None:
+            cache.invalidate_prefix(f"{document_id}:")
+        if document.get("code") is not None:
+            cache.invalidate_prefix(f"{document['code']}:")
+    elif collection == "question_pool" and document and "module_code" in document:
+        cache.invalidate(f"{document['course_id']}:{document['module_code']}")
+    else:
+        # Deletes and user updates don't carry enough to find every key (e.g. old emails)
+        cache.clear()
+
+
+class CacheInvalidator:
+    """Keeps the in-process caches coherent with writes made by other processes."""
+
+    def __init__(self):
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.mode: str = "disabled"
+        self._task: Optional[asyncio.Task] = None
+        self._versions: Dict[str, int] = {}
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        """Pick an invalidation strategy for the connected server and start it."""
+        if db is None or not settings.cache_enabled:
+            return
+
+        self.db = db
+        try:
+            hello = await db.client.admin.command("hello")
+            supports_change_streams = "setName" in hello or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            logger.warning(f"Could not detect MongoDB topology, using version stamps: {e}")
+            supports_change_streams = False
+
+        if supports_change_streams:
+            self.mode = "change_stream"
+            self._task = asyncio.create_task(self._watch_change_stream())
+        else:
+            self.mode = "version_stamp"
+            self._versions = await self._read_versions()
+            self._task = asyncio.create_task(self._poll_versions())
+        logger.info(f"Cache invalidation running in {self.mode} mode")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def notify_write(self, collection: str, document_id: Any = None, document: Optional[Dict[str, Any]] = None):
+        """
+        Record a local write to collection.
+
+        Local entries are dropped immediately so this process reads its own
+        writes; other processes learn about it from the change stream or from
+        the bumped version stamp.
+        """
+        _invalidate_from_change(collection, document_id, document)
+
+        if self.mode == "version_stamp" and self.db is not None:
+            try:
+                new_version = await self.db.cache_versions.find_one_and_update(
+                    {"_id": collection},
+                    {"$inc": {"version": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+                version = new_version.get("version", 0)
+                if version != self._versions.get(collection, 0) + 1:
+                    # Another process wrote since our last poll; its change has to be dropped too
+                    for cache in caches.get(collection, []):
+                        cache.clear()
+                # Don't clear our own cache again on the next poll
+                self._versions[collection] = version
+            except Exception as e:
+                logger.warning(f"Failed to bump cache version for {collection}: {e}")
+
+    async def _read_versions(self) -> Dict[str, int]:
+        versions = {}
+        async for doc in self.db.cache_versions.find({"_id": {"$in": list(caches)}}):
+            versions[doc["_id"]] = doc.get("version", 0)
+        return versions
+
+    async def _poll_versions(self):
+        while True:
+            await asyncio.sleep(settings.cache_version_poll_seconds)
+            try:
+                versions = await self._read_versions()
+                for collection, version in versions.items():
+                    if self._versions.get(collection) != version:
+                        for cache in caches[collection]:
+                            cache.clear()
+                self._versions = versions
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache version poll failed: {e}")
+
+    async def _watch_change_stream(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": list(caches)}}}]
+        resume_token = None
+        while True:
+            try:
+                async with self.db.watch(
+                    pipeline,
+                    full_document="updateLookup",
+                    resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        collection = change.get("ns", {}).get("coll")
+                        if change.get("operationType") in ("drop", "rename", "invalidate"):
+                            _invalidate_from_change(collection)
+                            continue
+                        _invalidate_from_change(
+                            collection,
+                            change.get("documentKey", {}).get("_id"),
+                            change.get("fullDocument")
+                        )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Events may have been missed while the stream was down
+                logger.warning(f"Cache change stream interrupted, clearing caches: {e}")
+                for cache in all_caches:
+                    cache.clear()
+                resume_token = None
+                await asyncio.sleep(settings.cache_version_poll_seconds)
+
+
+cache_invalidator = CacheInvalidator()
@@ -33,7 +33,89 @@ class Settings(BaseSettings):
     default_llm_model: str = "gemini-1.5-flash"
     max_tokens_default: int = 1000
     temperature_default: float = 0.7
+
+    # Read-through caches (courses, assets, user preferences)
+    cache_enabled: bool = True
+    cache_max_entries: int = 1024
+    cache_ttl_seconds: int = 300
+    cache_version_poll_seconds: int = 5
+
+    # Write-behind buffer for progress heartbeats (updateAsset?buffered=true)
+    progress_buffer_enabled: bool = True
+    progress_flush_interval_seconds: float = 5.0
+    progress_flush_max_pending: int = 1000
+    progress_flush_shutdown_timeout_seconds: float = 10.0
+    progress_completed_write_through: bool = True
+
+    # Quiz analytics rollups (quiz_stats / quiz_question_stats); 0 disables the periodic refresh
+    quiz_analytics_refresh_seconds: int = 300
+    quiz_analytics_settle_seconds: int = 60
+    
+    # IRT calibration of quiz questions ("1pl" or "2pl"); 0 disables the periodic re-fit
+    irt_model: str = "2pl"
+    irt_refit_seconds: int = 3600
+    irt_settle_seconds: int = 60
+    irt_max_iterations: int = 100
+    
+    # Knowledge tracing of per-module mastery; 0 disables the periodic refresh
+    mastery_refresh_seconds: int = 60
+    mastery_settle_seconds: int = 30
+    
+    # Spaced-repetition review scheduling; 0 disables the periodic refresh
+    review_refresh_seconds: int = 60
+    review_settle_seconds: int = 30
+    
+    # Adaptive quizzes from question pools: pool questions served within this many days are avoided
+    question_pool_recent_days: int = 14
     
+    # Near-duplicate questions at insert time: "flag", "reject" or "off"; estimated Jaccard similarity threshold
+    question_dedupe_mode: str = "flag"
+    question_dedupe_threshold: float = 0.8
+    
+    # In-process BM25 asset search: snapshot file, catch-up interval (0 disables), snapshot interval, and how
+    # old an insert must be before catch-up moves its high-water mark past it
+    search_enabled: bool = True
+    search_snapshot_path: str = "data/search_index.npz"
+    search_refresh_seconds: int = 60
+    search_snapshot_seconds: int = 600
+    search_settle_seconds: int = 30
+    
+    # Retrieved course material per prompt, in estimated tokens; 0 sends whole modules
+    quiz_context_token_budget: int = 3000
+    explanation_context_token_budget: int = 1200
+    
+    # Provider the transformation engine generates variants with (empty uses default_llm_provider)
+    transformation_llm_provider: str = ""
+    
+    # Semantic cache tier for transformation/summary outputs (off by default): cosine threshold,
+    # in-memory entry bound, catch-up interval for other workers' entries (0 loads once) and TTL
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_max_entries: int = 20000
+    semantic_cache_refresh_seconds: int = 60
+    semantic_cache_ttl_days: int = 30
+    
+    # Off-peak pre-generation of variants for the most common (domain, hobby) pairs (off by default): UTC hour
+    # window ("start-end", may wrap midnight), styles, daily spend cap in estimated tokens, how long interactive
+    # generation must have been quiet before each variant, and the run interval (0 disables)
+    pregeneration_enabled: bool = False
+    pregeneration_hours: str = "1-6"
+    pregeneration_styles: str = "storytelling,visual_cue,summary"
+    pregeneration_top_combinations: int = 5
+    pregeneration_active_days: int = 30
+    pregeneration_daily_token_budget: int = 500000
+    pregeneration_max_per_run: int = 500
+    pregeneration_idle_seconds: int = 30
+    pregeneration_interval_seconds: int = 900
+    
+    # Prefetch of a learner's next unfinished assets (variant, plus translation when not "en") on course open:
+    # how many assets, concurrent jobs across all learners, queue bound, and per-learner/course cooldown
+    prefetch_enabled: bool = True
+    prefetch_next_assets: int = 3
+    prefetch_max_concurrency: int = 2
+    prefetch_max_pending: int = 100
+    prefetch_user_cooldown_seconds: int = 300
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Fallback to environment variable if not set in .env
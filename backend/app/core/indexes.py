@@ -0,0 +1,138 @@
+"""
+MongoDB indexes the application relies on, created at startup.
+"""
+
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from app.core.config import settings
+from app.services.user_asset_status_service import user_asset_status_service
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase):
+    """Create missing indexes; failures are logged so the app can still start."""
+    if db is None:
+        return
+
+    try:
+        # One status row per (user, course, asset); also backs the updateAsset upsert
+        if "user_course_asset_unique" not in await db["userassetstatus"].index_information():
+            # Rows written before the index existed may repeat a key and would block the build
+            await user_asset_status_service.dedupe_rows(db)
+        await db["userassetstatus"].create_index(
+            [("user", ASCENDING), ("course", ASCENDING), ("asset", ASCENDING)],
+            unique=True,
+            name="user_course_asset_unique"
+        )
+    except Exception as e:
+        # Without the index, concurrent updateAsset upserts can write duplicate rows again
+        logger.error(f"Could not create userassetstatus unique index, status writes are not deduplicated: {e}")
+
+    try:
+        # One rollup per (user, course); the user prefix serves "all my courses" reads
+        await db["course_progress"].create_index(
+            [("user", ASCENDING), ("course", ASCENDING)],
+            unique=True,
+            name="user_course_unique"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create course_progress unique index: {e}")
+
+    try:
+        # Makes offline attempt sync idempotent; only attempts synced with a client id are covered
+        await db["quiz_attempts"].create_index(
+            [("user_id", ASCENDING), ("client_attempt_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"client_attempt_id": {"$type": "string"}},
+            name="user_client_attempt_unique"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create quiz_attempts client id index: {e}")
+
+    try:
+        # Regrades look up a quiz's attempts scored with an older answer key
+        await db["quiz_attempts"].create_index(
+            [("quiz_id", ASCENDING), ("answer_key_version", ASCENDING)],
+            name="quiz_answer_key_version"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create quiz_attempts regrade index: {e}")
+
+    try:
+        await db["quiz_question_stats"].create_index("quiz_id", name="quiz_id")
+    except Exception as e:
+        logger.warning(f"Could not create quiz_question_stats index: {e}")
+
+    try:
+        # IRT calibration loads every attempt of the users it re-fits
+        await db["quiz_attempts"].create_index("user_id", name="user_id")
+        await db["irt_item_params"].create_index("quiz_id", name="quiz_id")
+    except Exception as e:
+        logger.warning(f"Could not create IRT calibration indexes: {e}")
+
+    try:
+        # "All modules of this user (in this course)" reads, and the completions a mastery refresh picks up
+        await db["learner_mastery"].create_index(
+            [("user_id", ASCENDING), ("course_id", ASCENDING), ("module_code", ASCENDING)],
+            name="user_course_module"
+        )
+        await db["userassetstatus"].create_index("completed_at", sparse=True, name="completed_at")
+    except Exception as e:
+        logger.warning(f"Could not create learner mastery indexes: {e}")
+
+    try:
+        # Due queue: a user's due questions are one range scan in due_at order
+        await db["review_schedule"].create_index(
+            [("user_id", ASCENDING), ("due_at", ASCENDING)],
+            name="user_due_at"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create review_schedule index: {e}")
+
+    try:
+        # Per-difficulty pool index; PoolIndex loads a module's active pool in difficulty order from it
+        await db["question_pool"].create_index(
+            [("course_id", ASCENDING), ("module_code", ASCENDING), ("is_active", ASCENDING), ("difficulty", ASCENDING)],
+            name="course_module_active_difficulty"
+        )
+        # A learner's recently assembled quizzes, for excluding recently seen pool questions
+        await db["quizzes"].create_index(
+            [("assembled_for", ASCENDING), ("course_id", ASCENDING), ("module_code", ASCENDING), ("created_at", ASCENDING)],
+            partialFilterExpression={"assembled_for": {"$type": "string"}},
+            name="assembled_for_recent"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create question pool indexes: {e}")
+
+    try:
+        # LSH candidate lookup: any matching band key within the course
+        await db["question_signatures"].create_index(
+            [("course_id", ASCENDING), ("bands", ASCENDING)],
+            name="course_bands"
+        )
+        await db["question_signatures"].create_index("quiz_id", sparse=True, name="quiz_id")
+    except Exception as e:
+        logger.warning(f"Could not create question_signatures indexes: {e}")
+
+    try:
+        # Semantic cache entries expire after semantic_cache_ttl_days
+        await db["semantic_cache"].create_index(
+            "created_at",
+            expireAfterSeconds=settings.semantic_cache_ttl_days * 86400,
+            name="created_at_ttl"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create semantic_cache indexes: {e}")
+
+    try:
+        # Variant lookups by (code, style, domain, hobby): getAsset's exact match and pre-generation's gap scan
+        await db["assets"].create_index(
+            [("code", ASCENDING), ("style", ASCENDING), ("domain", ASCENDING), ("hobby", ASCENDING)],
+            name="code_style_domain_hobby"
+        )
+    except Exception as e:
+        logger.warning(f"Could not create assets variant index: {e}")
@@ -0,0 +1,95 @@
+"""
+High-water marks for incremental background jobs.
+
+A job processes documents whose `_id` lies between its stored mark and a new
+upper bound, then advances the mark. Marks live in `job_watermarks`, one
+document per job, together with a short lease so that only one worker runs
+the job at a time. The lease records the holder's owner token, and only
+that holder can renew it, commit or release it, so a worker whose lease ran
+out cannot clear the lease of the one that took over.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# ObjectId 0000... sorts before every real id
+MIN_OBJECT_ID = ObjectId("0" * 24)
+
+
+class JobWatermark:
+    """Lease-protected `_id` high-water mark for one job."""
+
+    def __init__(self, name: str, lease_seconds: int = 300):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.owner = str(ObjectId())
+
+    async def acquire(self, db: AsyncIOMotorDatabase) -> Tuple[bool, ObjectId]:
+        """
+        Take the job lease.
+
+        Returns (acquired, last_id). When another worker holds an unexpired
+        lease, acquired is False and the job should be skipped.
+        """
+        now = datetime.utcnow()
+        try:
+            doc = await db.job_watermarks.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [{"locked_until": None}, {"locked_until": {"$lt": now}}]
+                },
+                {
+                    "$set": {"locked_until": now + timedelta(seconds=self.lease_seconds), "owner": self.owner},
+                    "$setOnInsert": {"last_id": MIN_OBJECT_ID}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The document exists and is locked, so the upsert tried to insert a second one
+            return False, MIN_OBJECT_ID
+        return True, doc.get("last_id") or MIN_OBJECT_ID
+
+    async def renew(self, db: AsyncIOMotorDatabase) -> bool:
+        """Extend a held lease by lease_seconds; False when it has been lost to another worker."""
+        result = await db.job_watermarks.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"locked_until": datetime.utcnow() + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count == 1
+
+    async def commit(self, db: AsyncIOMotorDatabase, last_id: ObjectId):
+        """Advance the mark and release the lease, if this worker still holds it."""
+        result = await db.job_watermarks.update_one(
+            {"_id": self.name, "owner": self.owner},
+            {"$set": {"last_id": last_id, "locked_until": None, "updated_at": datetime.utcnow()}}
+        )
+        if not result.matched_count:
+            logger.warning(f"Lease for {self.name} was lost before commit; the mark was not moved")
+
+    async def release(self, db: AsyncIOMotorDatabase):
+        """Release the lease without moving the mark (e.g. after a failed run)."""
+        await db.job_watermarks.update_one({"_id": self.name, "owner": self.owner}, {"$set": {"locked_until": None}})
+
+    async def current(self, db: AsyncIOMotorDatabase) -> Optional[ObjectId]:
+        doc = await db.job_watermarks.find_one({"_id": self.name})
+        return doc.get("last_id") if doc else None
+
+
+def settled_upper_bound(settle_seconds: int) -> ObjectId:
+    """
+    Upper `_id` bound for a run.
+
+    ObjectIds from different processes are only roughly ordered, so documents
+    newer than settle_seconds are left for the next run instead of risking one
+    being inserted just below a mark that has already moved past it.
+    """
+    return ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=settle_seconds))
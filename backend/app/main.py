@@ -1,11 +1,26 @@
 from fastapi import FastAPI, Request, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+from typing import Optional
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 import time
+import orjson
 
 from app.core.config import settings
-from app.core.mongodb import connect_to_mongo, close_mongo_connection
+from app.core.mongodb import mongodb, connect_to_mongo, close_mongo_connection
+from app.core.cache import asset_json_cache, cache_invalidator, get_cache_stats
+from app.core.indexes import ensure_indexes
+from app.services.progress_buffer import progress_buffer
+from app.services.quiz_analytics_service import quiz_analytics_service
+from app.services.irt_calibration_service import irt_calibration_service
+from app.services.mastery_service import mastery_service
+from app.services.review_schedule_service import review_schedule_service
+from app.services.asset_search_service import asset_search_service
+from app.services.semantic_cache import semantic_cache
+from app.services.pregeneration_service import pregeneration_service
+from app.services.prefetch_service import prefetch_service
+from app.utils.response import BSONJSONResponse, dumps
 from app.api.api_v1.api import api_router
 
 
@@ -27,9 +42,51 @@ async def lifespan(app: FastAPI):
     # Store database connection in app state
     app.state.db = db
     
+    await ensure_indexes(db)
+    
+    # Keep in-process caches coherent with writes from other workers
+    try:
+        await cache_invalidator.start(db)
+    except Exception as e:
+        print(f"⚠️ Cache invalidation not started: {e}")
+    
+    # Coalesce progress heartbeats into periodic bulk writes
+    progress_buffer.start(db)
+    
+    # Fold new quiz attempts into the analytics rollups periodically
+    quiz_analytics_service.start(db)
+    
+    # Re-fit question difficulty and learner ability from new attempts periodically
+    irt_calibration_service.start(db)
+    
+    # Fold new quiz answers and asset completions into module mastery periodically
+    mastery_service.start(db)
+    
+    # Reschedule answered questions for spaced review periodically
+    review_schedule_service.start(db)
+    
+    # Load the asset search index from its snapshot and keep it caught up
+    asset_search_service.start(db)
+    
+    # Load semantic cache vectors (when enabled) and pick up other workers' entries
+    semantic_cache.start(db)
+    
+    # Pre-generate variants for popular (domain, hobby) pairs off-peak (when enabled)
+    pregeneration_service.start(db)
+    
     yield
     
-    # Cleanup on shutdown
+    # Cleanup on shutdown; flush buffered progress before the connection closes
+    await progress_buffer.stop()
+    await quiz_analytics_service.stop()
+    await irt_calibration_service.stop()
+    await mastery_service.stop()
+    await review_schedule_service.stop()
+    await asset_search_service.stop()
+    await semantic_cache.stop()
+    await pregeneration_service.stop()
+    await prefetch_service.stop()
+    await cache_invalidator.stop()
     try:
         if mongodb.client:
             await close_mongo_connection()
@@ -44,6 +101,7 @@ app = FastAPI(
     version=settings.version,
     description=settings.description,
     openapi_url=f"{settings.api_v1_prefix}/openapi.json",
+    default_response_class=BSONJSONResponse,
     lifespan=lifespan
 )
 
@@ -116,7 +174,12 @@ async def detailed_health_check():
         return {
             "status": "healthy", 
             "timestamp": time.time(),
-            "mongodb": "connected" if mongodb_status else "disconnected"
+            "mongodb": "connected" if mongodb_status else "disconnected",
+            "cache_invalidation": cache_invalidator.mode,
+            "caches": get_cache_stats(),
+            "progress_buffer": progress_buffer.stats(),
+            "semantic_cache": semantic_cache.stats(),
+            "prefetch": prefetch_service.status()
         }
     except Exception as e:
         return {
@@ -126,6 +189,12 @@ async def detailed_health_check():
         }
 
 
+# Prometheus metrics (cache hit ratios etc.)
+@app.get("/metrics")
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Test endpoint for course API (no authentication)
 @app.get("/course/{course_id}/assets")
 async def test_course_assets(course_id: str):
@@ -142,7 +211,7 @@ async def test_course_assets(course_id: str):
         course = await course_service.get_course_with_assets(course_id)
         
         if course:
-            return course
+            return BSONJSONResponse(course)
         else:
             return {"error": "Course not found"}
             
@@ -166,7 +235,7 @@ async def test_course_assets_with_progress(course_id: str, user_id: str):
         course = await course_service.get_course_with_user_progress(course_id, user_id)
         
         if course:
-            return course
+            return BSONJSONResponse(course)
         else:
             return {"error": "Course not found"}
             
@@ -240,18 +309,23 @@ async def test_translate_asset(
 
 # Test endpoint for getting translations (no authentication)
 @app.get("/test-translations/{asset_code}")
-async def test_get_translations(asset_code: str):
+async def test_get_translations(asset_code: str, fields: Optional[str] = None):
     """Test endpoint for getting available translations (no authentication)"""
     try:
         from app.core.mongodb import get_database
         from app.services.translation_service import TranslationService
+        from app.utils.projection import build_projection
+        from app.api.api_v1.endpoints.translations import (
+            TRANSLATION_LIST_DEFAULT_FIELDS, TRANSLATION_LIST_REQUIRED_FIELDS
+        )
         
         db = get_database()
         if db is None:
             return {"error": "Database not connected"}
         
         translation_service = TranslationService(db)
-        translations = await translation_service.get_available_translations(asset_code)
+        projection = build_projection(fields, TRANSLATION_LIST_DEFAULT_FIELDS, TRANSLATION_LIST_REQUIRED_FIELDS)
+        translations = await translation_service.get_available_translations(asset_code, projection)
         
         return translations
             
@@ -302,64 +376,73 @@ async def get_asset(asset_code: str, language: str = "en"):
         if db is None:
             return {"error": "Database connection failed"}
         
-        # Search for asset by code (as string first)
-        asset = await db.assets.find_one({"code": asset_code, "language": language})
-        
-        # If not found, try without language field (legacy assets)
-        if not asset:
-            asset = await db.assets.find_one({
-                "code": asset_code,
-                "$or": [
-                    {"language": {"$exists": False}},
-                    {"language": None},
-                    {"language": ""}
-                ]
-            })
-        
-        # If still not found, try with ObjectId conversion
-        if not asset:
-            from bson import ObjectId
-            try:
-                asset_code_obj = ObjectId(asset_code)
-                asset = await db.assets.find_one({"code": asset_code_obj, "language": language})
-                if not asset:
-                    asset = await db.assets.find_one({
-                        "code": asset_code_obj,
-                        "$or": [
-                            {"language": {"$exists": False}},
-                            {"language": None},
-                            {"language": ""}
-                        ]
-                    })
-            except:
-                pass
+        asset = await asset_json_cache.get_or_load(
+            f"{asset_code}:{language}:get-asset",
+            lambda: _find_asset_for_get_asset(db, asset_code, language)
+        )
         
         if not asset:
             return {"error": f"Asset with code '{asset_code}' not found"}
         
-        # Convert all ObjectId fields to strings for JSON serialization
-        from bson import ObjectId
-        def convert_objectids(obj):
-            if isinstance(obj, ObjectId):
-                return str(obj)
-            elif isinstance(obj, dict):
-                return {k: convert_objectids(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_objectids(item) for item in obj]
-            else:
-                return obj
-        
-        asset = convert_objectids(asset)
-        
-        return {
+        # The asset is cached as JSON bytes and embedded without re-encoding
+        return BSONJSONResponse({
             "success": True,
-            "asset": asset
-        }
+            "asset": orjson.Fragment(asset)
+        })
         
     except Exception as e:
         return {"error": f"Failed to retrieve asset: {str(e)}"}
 
 
+async def _find_asset_for_get_asset(db, asset_code: str, language: str) -> Optional[bytes]:
+    """
+    Resolve an asset the way /get-asset always has: string code, legacy language, then ObjectId code.
+    
+    The match is returned serialized, so a cache hit is embedded without re-encoding.
+    A miss decodes the document once and serializes it once. Reading it as
+    RawBSONDocument would not avoid that decode (no BSON-to-JSON transcoder
+    skips it), so there is deliberately no raw-BSON read path.
+    """
+    assets = db.assets
+    
+    # Search for asset by code (as string first)
+    asset = await assets.find_one({"code": asset_code, "language": language})
+    
+    # If not found, try without language field (legacy assets)
+    if asset is None:
+        asset = await assets.find_one({
+            "code": asset_code,
+            "$or": [
+                {"language": {"$exists": False}},
+                {"language": None},
+                {"language": ""}
+            ]
+        })
+    
+    # If still not found, try with ObjectId conversion
+    if asset is None:
+        from bson import ObjectId
+        try:
+            asset_code_obj = ObjectId(asset_code)
+            asset = await assets.find_one({"code": asset_code_obj, "language": language})
+            if asset is None:
+                asset = await assets.find_one({
+                    "code": asset_code_obj,
+                    "$or": [
+                        {"language": {"$exists": False}},
+                        {"language": None},
+                        {"language": ""}
+                    ]
+                })
+        except:
+            pass
+    
+    if asset is None:
+        return None
+    asset["id"] = asset.pop("_id")
+    return dumps(asset)
+
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
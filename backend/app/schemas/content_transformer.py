@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional
 from enum import Enum
 
+from app.utils.vocabulary import canonical_domain, canonical_hobby, canonical_style
+
 class TransformationStyle(str, Enum):
     """Enum for transformation styles"""
     storytelling = "storytelling"
@@ -18,6 +20,19 @@ class ContentTransformerRequest(BaseModel):
     hobby: str = Field(..., min_length=2, description="Hobby context (e.g., Movies, Cricket, Gaming, Music)")
     keywords: Optional[str] = Field(None, description="Optional keywords to guide content generation (e.g., 'beginner-friendly', 'advanced', 'practical examples', 'case studies')")
 
+    @validator('style', pre=True)
+    def canonicalize_style(cls, v):
+        """Accept style aliases (e.g. 'Visual Cues') for the enum values."""
+        return canonical_style(v) if isinstance(v, str) else v
+
+    @validator('domain')
+    def canonicalize_domain(cls, v):
+        return canonical_domain(v)
+
+    @validator('hobby')
+    def canonicalize_hobby(cls, v):
+        return canonical_hobby(v)
+
 class ContentTransformerResponse(BaseModel):
     """Response model for content transformation"""
     id: str = Field(..., description="Database document ID")
@@ -26,6 +26,23 @@ class Asset(AssetBase):
         populate_by_name = True
 
 
+class AssetListItem(BaseModel):
+    """Asset schema for list views; only the requested fields are returned"""
+    id: str = Field(alias="_id")
+    code: Optional[str] = None
+    name: Optional[str] = None
+    style: Optional[str] = None
+    language: Optional[str] = None
+    content: Optional[str] = None
+    summary: Optional[str] = None
+    summary_updated_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        populate_by_name = True
+
+
 class ModuleBase(BaseModel):
     """Base module schema"""
     id: str = Field(alias="_id")
@@ -72,6 +89,18 @@ class Course(CourseBase):
         populate_by_name = True
 
 
+class CourseListItem(BaseModel):
+    """Course schema for list views; only the requested fields are returned"""
+    id: str = Field(alias="_id")
+    name: Optional[str] = None
+    modules: Optional[List[Module]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        populate_by_name = True
+
+
 class CourseWithAssets(BaseModel):
     """Course schema with populated assets"""
     id: str = Field(alias="_id")
@@ -84,11 +113,34 @@ class CourseWithAssets(BaseModel):
         populate_by_name = True
 
 
+class CourseProgress(BaseModel):
+    """A user's progress rollup for one course"""
+    id: Optional[str] = Field(None, alias="_id")
+    course: Optional[str] = None
+    course_name: Optional[str] = None
+    completed_count: int = 0
+    in_progress_count: int = 0
+    total_assets: Optional[int] = None
+    percentage: float = 0
+    last_activity: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
+
+class UserCourseProgress(BaseModel):
+    """A user's progress across all of their courses"""
+    user: str
+    count: int
+    courses: List[CourseProgress]
+
+
 class CourseWithUserProgress(BaseModel):
     """Course schema with populated assets and user progress"""
     id: str = Field(alias="_id")
     name: str
     modules: List[dict] = []  # Will contain modules with populated assets and user progress
+    progress: Optional[CourseProgress] = None
     created_at: datetime
     updated_at: datetime
     
@@ -97,6 +97,30 @@ class QuizGenerationRequest(BaseModel):
         return v
 
 
+class QuestionPoolGenerationRequest(BaseModel):
+    """Schema for question pool generation request."""
+    course_id: str = Field(..., min_length=24, max_length=24, description="MongoDB ObjectId of the course")
+    module_code: Optional[str] = Field(None, description="Module code reference (all modules when omitted)")
+    pool_size: int = Field(30, ge=3, le=150, description="Questions to generate per module, split across difficulty levels")
+    overwrite: bool = Field(False, description="Whether to replace existing pools")
+
+
+class QuestionPoolGenerationResponse(BaseModel):
+    """Schema for question pool generation response."""
+    success: bool
+    message: str
+    pools: List[Dict[str, Any]] = []
+    skipped_modules: List[str] = []
+    errors: List[str] = []
+
+
+class QuizAssembleRequest(BaseModel):
+    """Schema for assembling a learner's quiz from a module's question pool."""
+    course_id: str = Field(..., min_length=24, max_length=24, description="MongoDB ObjectId of the course")
+    module_code: str = Field(..., description="Module code reference")
+    num_questions: int = Field(5, ge=1, le=20, description="Number of questions")
+
+
 class QuizGenerationResponse(BaseModel):
     """Schema for quiz generation response."""
     success: bool
@@ -120,6 +144,19 @@ class QuizAttemptCreate(BaseModel):
     answers: List[QuizAttemptAnswer] = Field(..., min_items=1, description="List of answers")
 
 
+class QuizAttemptBatchItem(QuizAttemptCreate):
+    """Schema for one attempt in an offline sync batch."""
+    client_attempt_id: str = Field(..., min_length=1, max_length=64, description="Client-generated attempt ID; retries with the same ID are not inserted twice")
+    started_at: Optional[datetime] = Field(None, description="When the attempt was started on the device")
+    completed_at: Optional[datetime] = Field(None, description="When the attempt was completed on the device")
+    time_taken_seconds: Optional[int] = Field(None, ge=0, description="Time taken on the device")
+
+
+class QuizAttemptBatchCreate(BaseModel):
+    """Schema for syncing many quiz attempts at once."""
+    attempts: List[QuizAttemptBatchItem] = Field(..., min_items=1, max_items=500, description="Attempts to sync")
+
+
 class QuizAttemptResponse(BaseModel):
     """Schema for quiz attempt response."""
     id: str
@@ -139,6 +176,22 @@ class QuizAttemptResponse(BaseModel):
         from_attributes = True
 
 
+class QuizAttemptBatchResult(BaseModel):
+    """Outcome for one attempt in an offline sync batch."""
+    client_attempt_id: str
+    status: str = Field(..., description="created, duplicate or rejected")
+    attempt: Optional[QuizAttemptResponse] = None
+    error: Optional[str] = None
+
+
+class QuizAttemptBatchResponse(BaseModel):
+    """Schema for offline sync batch results."""
+    created: int
+    duplicates: int
+    rejected: int
+    results: List[QuizAttemptBatchResult]
+
+
 # Course and Module Integration Schemas
 class CourseModuleInfo(BaseModel):
     """Schema for course and module information."""
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -35,3 +35,29 @@ class UserAssetStatusResponse(UserAssetStatusBase):
 
     class Config:
         from_attributes = True
+
+class UserAssetStatusBulkItem(BaseModel):
+    """One status change in a bulk update"""
+    course: str = Field(..., description="Course code identifier")
+    asset: str = Field(..., description="Asset code identifier")
+    user: str = Field(..., description="User ID")
+    status: AssetStatus = Field(..., description="New asset status")
+    progress: Optional[int] = Field(None, ge=0, le=100, description="Progress percentage (0-100)")
+
+class UserAssetStatusBulkRequest(BaseModel):
+    """Schema for bulk user asset status updates"""
+    updates: List[UserAssetStatusBulkItem] = Field(..., min_length=1, max_length=1000, description="Status changes to apply")
+
+class UserAssetStatusBulkError(BaseModel):
+    """A status change that could not be applied"""
+    index: int = Field(..., description="Position of the change in the request")
+    message: str = Field(..., description="Error reported by the database")
+
+class UserAssetStatusBulkResponse(BaseModel):
+    """Schema for bulk user asset status update results"""
+    success: bool
+    received: int = Field(..., description="Number of changes in the request")
+    matched: int = Field(..., description="Existing records matched")
+    modified: int = Field(..., description="Existing records changed")
+    upserted: int = Field(..., description="New records created")
+    errors: List[UserAssetStatusBulkError] = Field(default_factory=list)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import Optional
 from datetime import datetime
 
+from app.utils.vocabulary import canonical_domain, canonical_hobbies, canonical_style
+
 class UsersCollectionBase(BaseModel):
     """Base user schema for users collection"""
     name: str = Field(..., description="User's full name")
@@ -9,6 +11,20 @@ class UsersCollectionBase(BaseModel):
     domain: str = Field(..., description="User's domain/field of expertise")
     hobbies: str = Field(..., description="User's hobbies (comma-separated string)")
     learningStyle: str = Field(..., description="User's learning style")
+    language: Optional[str] = Field("en", description="User's preferred content language (e.g., en, hi, te)")
+
+    @validator('domain')
+    def canonicalize_domain(cls, v):
+        """Store preferences as controlled-vocabulary keys so they match transformed assets."""
+        return v if v is None else canonical_domain(v)
+
+    @validator('hobbies')
+    def canonicalize_hobbies(cls, v):
+        return v if v is None else canonical_hobbies(v)
+
+    @validator('learningStyle')
+    def canonicalize_learning_style(cls, v):
+        return v if v is None else canonical_style(v)
 
 class UsersCollectionCreate(UsersCollectionBase):
     """Schema for creating a user in users collection"""
@@ -21,6 +37,20 @@ class UsersCollectionUpdate(BaseModel):
     domain: Optional[str] = None
     hobbies: Optional[str] = None
     learningStyle: Optional[str] = None
+    language: Optional[str] = None
+
+    @validator('domain')
+    def canonicalize_domain(cls, v):
+        """Store preferences as controlled-vocabulary keys so they match transformed assets."""
+        return v if v is None else canonical_domain(v)
+
+    @validator('hobbies')
+    def canonicalize_hobbies(cls, v):
+        return v if v is None else canonical_hobbies(v)
+
+    @validator('learningStyle')
+    def canonicalize_learning_style(cls, v):
+        return v if v is None else canonical_style(v)
 
 class UsersCollectionResponse(UsersCollectionBase):
     """Schema for user response from users collection"""
@@ -0,0 +1,282 @@
+"""
+Full-text search over assets (every language and style) with an in-process BM25 index.
+
+At startup the index is loaded from its snapshot file, or built from the
+assets collection when there is none. Assets inserted since the snapshot are
+then added by scanning `_id` past the snapshot's high-water mark. If the
+collection count still disagrees (deletions while the process was down), the
+index is rebuilt.
+
+Asset write paths in this process call `index_asset` / `remove_asset`
+directly. The periodic refresh picks up inserts from other workers the same
+way as startup, reloads the course/module membership used for filtering,
+and re-saves the snapshot when the index changed. The high-water mark only
+moves with these scans, up to a settled bound (`search_settle_seconds` ago),
+so a slightly older id inserted by another worker is not skipped because
+this one indexed a newer asset of its own.
+
+Each asset is indexed with two group labels: its own id and its `code`, the
+id of the module asset it is a variant of. A course or module filter matches
+either, so originals, transformations and translations are all found.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.watermarks import settled_upper_bound
+from app.services.bm25 import BM25Index
+
+logger = logging.getLogger(__name__)
+
+BUILD_BATCH_SIZE = 1000
+# Tokenizing ~100 assets takes a few ms; yield to request handling that often during a build
+YIELD_EVERY = 100
+SNIPPET_CHARS = 240
+_TEXT_FIELDS = ("title", "name", "content", "transcript", "description")
+_PROJECTION = {field: 1 for field in _TEXT_FIELDS + ("code", "language", "style")}
+
+
+def asset_text(asset: Dict[str, Any]) -> str:
+    return "\n".join(str(asset[field]) for field in _TEXT_FIELDS if asset.get(field))
+
+
+def _snippet(content: str, terms: List[str]) -> str:
+    lowered = content.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(min(positions) - SNIPPET_CHARS // 4, 0) if positions else 0
+    snippet = content[start:start + SNIPPET_CHARS].strip()
+    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_CHARS < len(content) else "")
+
+
+class AssetSearchService:
+    """Keeps the asset search index current and answers queries."""
+
+    def __init__(self):
+        self.index = BM25Index()
+        self.ready = False
+        self.high_water_mark: Optional[ObjectId] = None
+        # course_id -> module code -> module asset ids
+        self.modules: Dict[str, Dict[str, Set[str]]] = {}
+        self._changed = False
+        self._saved_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._save_lock = asyncio.Lock()
+
+    def index_asset(self, asset: Dict[str, Any]):
+        """Add or replace one asset document (must include its _id)."""
+        asset_id = str(asset["_id"])
+        self.index.add(
+            asset_id,
+            asset_text(asset),
+            asset.get("language") or "en",
+            (asset_id, str(asset.get("code") or asset_id)),
+            {
+                "code": str(asset.get("code") or asset_id),
+                "language": asset.get("language") or "en",
+                "style": asset.get("style"),
+                "title": asset.get("title") or asset.get("name")
+            }
+        )
+        self._changed = True
+
+    def remove_asset(self, asset_id: Any):
+        if self.index.remove(str(asset_id)):
+            self._changed = True
+
+    async def _add_from(self, db: AsyncIOMotorDatabase, query: Dict[str, Any], skip_indexed: bool = False) -> int:
+        added = 0
+        async for asset in db.assets.find(query, _PROJECTION).sort("_id", 1).batch_size(BUILD_BATCH_SIZE):
+            if skip_indexed and str(asset["_id"]) in self.index:
+                continue
+            self.index_asset(asset)
+            added += 1
+            if added % YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+        return added
+
+    async def rebuild(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Index every asset from scratch."""
+        started = time.perf_counter()
+        upper_id = settled_upper_bound(settings.search_settle_seconds)
+        previous = self.index, self.high_water_mark
+        self.index, self.high_water_mark = BM25Index(), None
+        try:
+            added = await self._add_from(db, {})
+        except Exception:
+            self.index, self.high_water_mark = previous
+            raise
+        # Assets past the bound are seen again by the next catch-up, which skips them
+        self.high_water_mark = upper_id
+        await self.save_snapshot()
+        return {"indexed": added, "seconds": round(time.perf_counter() - started, 3)}
+
+    async def catch_up(self, db: AsyncIOMotorDatabase) -> int:
+        """Index assets inserted between the high-water mark and the settled bound (by other workers, or while down)."""
+        upper_id = settled_upper_bound(settings.search_settle_seconds)
+        if self.high_water_mark is not None and self.high_water_mark >= upper_id:
+            return 0
+        query: Dict[str, Any] = {"_id": {"$lte": upper_id}}
+        if self.high_water_mark is not None:
+            query["_id"]["$gt"] = self.high_water_mark
+        # Assets this worker wrote are already indexed
+        added = await self._add_from(db, query, skip_indexed=True)
+        self.high_water_mark = upper_id
+        return added
+
+    async def load_modules(self, db: AsyncIOMotorDatabase):
+        modules: Dict[str, Dict[str, Set[str]]] = {}
+        async for course in db.courses.find({}, {"modules.code": 1, "modules.assets": 1}):
+            course_modules = modules[str(course["_id"])] = {}
+            for module in course.get("modules", []):
+                assets = course_modules.setdefault(str(module.get("code", "")), set())
+                assets.update(str(asset_id) for asset_id in module.get("assets", []))
+        self.modules = modules
+
+    async def load(self, db: AsyncIOMotorDatabase):
+        """Load the snapshot (or build), catch up, and verify against the collection."""
+        path = settings.search_snapshot_path
+        loaded = False
+        if os.path.exists(path):
+            try:
+                self.index, info = await asyncio.to_thread(BM25Index.load, path)
+                mark = info.get("high_water_mark")
+                self.high_water_mark = ObjectId(mark) if mark else None
+                loaded = True
+                logger.info(f"Loaded search index snapshot with {len(self.index)} assets")
+            except Exception as e:
+                logger.warning(f"Could not load search index snapshot {path}, rebuilding: {e}")
+
+        if loaded:
+            added = await self.catch_up(db)
+            total = await db.assets.count_documents({})
+            if total != len(self.index):
+                logger.info(f"Search index has {len(self.index)} assets but the collection has {total}, rebuilding")
+                await self.rebuild(db)
+            elif added:
+                logger.info(f"Search index caught up with {added} new assets")
+        else:
+            report = await self.rebuild(db)
+            logger.info(f"Built search index: {report}")
+
+        await self.load_modules(db)
+        self.ready = True
+
+    async def save_snapshot(self):
+        async with self._save_lock:
+            info = {"high_water_mark": str(self.high_water_mark) if self.high_water_mark else None}
+            # Captured on the event loop so no write path can touch the index mid-snapshot; the file is written off it
+            snapshot = self.index.snapshot(info)
+            self._changed = False
+            self._saved_at = time.monotonic()
+            try:
+                await asyncio.to_thread(BM25Index.write, settings.search_snapshot_path, snapshot)
+            except Exception as e:
+                logger.warning(f"Could not save search index snapshot: {e}")
+
+    def _groups(self, course_id: Optional[str], module_code: Optional[str]) -> Optional[Set[str]]:
+        if not course_id:
+            return None
+        course_modules = self.modules.get(course_id, {})
+        if module_code:
+            return course_modules.get(module_code, set())
+        return set().union(*course_modules.values()) if course_modules else set()
+
+    async def search(
+        self,
+        db: AsyncIOMotorDatabase,
+        query: str,
+        course_id: Optional[str] = None,
+        module_code: Optional[str] = None,
+        language: Optional[str] = None,
+        limit: int = 10
+    ) -> Dict[str, Any]:
+        """Ranked assets for query, with a snippet of each; filters are optional."""
+        started = time.perf_counter()
+        hits = self.index.search(query, limit, language, self._groups(course_id, module_code))
+        search_ms = (time.perf_counter() - started) * 1000
+
+        contents: Dict[str, str] = {}
+        object_ids = [ObjectId(asset_id) for asset_id, _ in hits if ObjectId.is_valid(asset_id)]
+        async for asset in db.assets.find({"_id": {"$in": object_ids}}, {"content": 1}):
+            contents[str(asset["_id"])] = str(asset.get("content") or "")
+
+        terms = query.lower().split()
+        results: List[Dict[str, Any]] = []
+        for asset_id, score in hits:
+            if ObjectId.is_valid(asset_id) and asset_id not in contents:
+                # Deleted by another worker
+                self.remove_asset(asset_id)
+                continue
+            results.append({
+                "asset_id": asset_id,
+                **(self.index.get_meta(asset_id) or {}),
+                "score": round(score, 4),
+                "snippet": _snippet(contents.get(asset_id, ""), terms)
+            })
+        return {
+            "query": query,
+            "total": len(results),
+            "results": results,
+            "search_ms": round(search_ms, 3)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "assets": len(self.index),
+            "terms": len(self.index._postings) + len(self.index._pending),
+            "high_water_mark": str(self.high_water_mark) if self.high_water_mark else None
+        }
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Load the index in the background, then refresh it periodically (search_refresh_seconds, 0 disables)."""
+        if db is None or not settings.search_enabled:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.ready and self._changed:
+            await self.save_snapshot()
+
+    async def refresh(self, db: AsyncIOMotorDatabase):
+        added = await self.catch_up(db)
+        await self.load_modules(db)
+        if self._changed and time.monotonic() - self._saved_at >= settings.search_snapshot_seconds:
+            await self.save_snapshot()
+        return added
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        try:
+            await self.load(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Search index load failed: {e}")
+            return
+        if settings.search_refresh_seconds <= 0:
+            return
+        while True:
+            await asyncio.sleep(settings.search_refresh_seconds)
+            try:
+                await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Search index refresh failed: {e}")
+
+
+asset_search_service = AssetSearchService()
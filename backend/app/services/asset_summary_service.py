@@ -6,7 +6,9 @@ from bson import ObjectId
 
 import google.generativeai as genai
 from app.core.mongodb import get_database
+from app.core.cache import cache_invalidator
 from app.core.config import settings
+from app.services.semantic_cache import semantic_cache
 
 
 class AssetSummaryService:
@@ -70,6 +72,11 @@ SUMMARY:"""
             raise Exception("Gemini API not initialized")
         
         try:
+            # Near-identical asset content reuses an earlier summary
+            cached = await semantic_cache.get("asset_summary", (), content)
+            if cached is not None:
+                return cached
+            
             prompt = self._create_summary_prompt(content)
             response = await asyncio.to_thread(
                 self._gemini_model.generate_content, 
@@ -81,6 +88,7 @@ SUMMARY:"""
                 # Clean up the summary
                 summary = re.sub(r'\n\s*\n', ' ', summary)
                 summary = ' '.join(summary.split())
+                await semantic_cache.put("asset_summary", (), content, summary)
                 return summary
             else:
                 raise Exception("No summary received from Gemini API")
@@ -119,6 +127,7 @@ SUMMARY:"""
             if result.modified_count > 0:
                 # Return updated asset
                 updated_asset = await self.get_asset_by_id(asset_id)
+                await cache_invalidator.notify_write("assets", asset_id, updated_asset)
                 return updated_asset
             else:
                 raise Exception("Failed to update asset summary")
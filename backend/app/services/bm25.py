@@ -0,0 +1,287 @@
+"""
+In-process inverted index with BM25 ranking.
+
+Documents get integer slots in insertion order. Per-slot attributes (length,
+language, asset group labels) are numpy arrays, and each term's postings are
+a pair of (slot, term frequency) arrays. A query scores only the postings of
+its terms into a dense score array, masks it by the filters and takes the
+top k with argpartition.
+
+Updates are cheap: an added document appends to per-term pending lists that
+are merged into the arrays the next time the term is queried, and a removed
+document is only marked dead. Dead slots are dropped by `compact` once they
+outnumber live ones.
+
+Snapshots are a single .npz (no pickle) written atomically.
+"""
+
+import json
+import os
+import re
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+# \w misses Indic vowel signs and viramas, so the Devanagari-Malayalam blocks are listed explicitly
+_TOKEN = re.compile(r"[\w\u0900-\u0d7f]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the this to was were will with".split()
+)
+SNAPSHOT_VERSION = 1
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class BM25Index:
+    """Mutable BM25 index of text documents keyed by id, filterable by language and group label."""
+
+    def __init__(self):
+        self.ids: List[Optional[str]] = []
+        self.meta: List[Optional[Dict[str, Any]]] = []
+        self.slots: Dict[str, int] = {}
+        self.labels: Dict[str, int] = {}
+        self.length = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.language = np.zeros(0, dtype=np.int32)
+        self.groups = np.zeros((0, 2), dtype=np.int32)
+        self.total_length = 0
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._pending: Dict[str, Tuple[array, array]] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.slots
+
+    def _label(self, value: str) -> int:
+        label = self.labels.get(value)
+        if label is None:
+            label = self.labels[value] = len(self.labels)
+        return label
+
+    def add(self, doc_id: str, text: str, language: str, groups: Tuple[str, str], meta: Optional[Dict[str, Any]] = None):
+        """
+        Index (or re-index) a document.
+
+        A document belongs to two group labels (e.g. its own id and the code
+        of the asset it is a variant of); a group filter matches either.
+        """
+        if doc_id in self.slots:
+            self.remove(doc_id)
+        counts = Counter(tokenize(text))
+        slot = len(self.ids)
+        self.ids.append(doc_id)
+        self.meta.append(meta)
+        self.slots[doc_id] = slot
+
+        size = slot + 1
+        self.length = _grow(self.length, size)
+        self.alive = _grow(self.alive, size)
+        self.language = _grow(self.language, size)
+        if size > len(self.groups):
+            grown = np.zeros((max(size, 2 * len(self.groups), 1024), 2), dtype=np.int32)
+            grown[:len(self.groups)] = self.groups
+            self.groups = grown
+
+        length = sum(counts.values())
+        self.length[slot] = length
+        self.alive[slot] = True
+        self.language[slot] = self._label(language)
+        self.groups[slot] = [self._label(groups[0]), self._label(groups[1])]
+        self.total_length += length
+        for term, count in counts.items():
+            pending = self._pending.get(term)
+            if pending is None:
+                pending = self._pending[term] = (array("i"), array("i"))
+            pending[0].append(slot)
+            pending[1].append(count)
+
+    def remove(self, doc_id: str) -> bool:
+        slot = self.slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        self.alive[slot] = False
+        self.total_length -= int(self.length[slot])
+        self.ids[slot] = None
+        self.meta[slot] = None
+        if len(self.ids) > 1024 and len(self.ids) > 2 * len(self.slots):
+            self.compact()
+        return True
+
+    def get_meta(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        slot = self.slots.get(doc_id)
+        return None if slot is None else self.meta[slot]
+
+    def _postings_for(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        pending = self._pending.pop(term, None)
+        postings = self._postings.get(term)
+        if pending:
+            slots, tf = (np.frombuffer(values, dtype=np.intc).astype(np.int32) for values in pending)
+            if postings is not None:
+                slots, tf = np.concatenate([postings[0], slots]), np.concatenate([postings[1], tf])
+            postings = self._postings[term] = (slots, tf)
+        return postings
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        language: Optional[str] = None,
+        groups: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """Top documents for query as (id, score), optionally only in language and in any of groups."""
+        terms = set(tokenize(query))
+        n = len(self.slots)
+        if not terms or n == 0 or limit <= 0:
+            return []
+
+        size = len(self.ids)
+        avgdl = max(self.total_length / n, 1.0)
+        scores = np.zeros(size, dtype=np.float32)
+        for term in terms:
+            postings = self._postings_for(term)
+            if postings is None:
+                continue
+            slots, tf = postings
+            df = int(np.count_nonzero(self.alive[slots]))
+            if df == 0:
+                continue
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            tf = tf.astype(np.float32)
+            # Slots are unique within a term's postings, so fancy += is safe
+            scores[slots] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * self.length[slots] / avgdl))
+
+        candidates = np.flatnonzero(self.alive[:size] & (scores > 0))
+        if language is not None:
+            candidates = candidates[self.language[candidates] == self.labels.get(language, -1)]
+        if groups is not None:
+            wanted = np.zeros(len(self.labels), dtype=bool)
+            wanted[[self.labels[group] for group in groups if group in self.labels]] = True
+            candidates = candidates[wanted[self.groups[candidates]].any(axis=1)]
+
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.ids[slot], float(scores[slot])) for slot in candidates]
+
+    def _merge_all(self):
+        for term in list(self._pending):
+            self._postings_for(term)
+
+    def compact(self):
+        """Drop dead slots, renumbering the live ones in order."""
+        self._merge_all()
+        size = len(self.ids)
+        alive = self.alive[:size]
+        if alive.all():
+            return
+        new_slot = np.cumsum(alive, dtype=np.int64) - 1
+        for term, (slots, tf) in list(self._postings.items()):
+            keep = alive[slots]
+            if not keep.any():
+                del self._postings[term]
+            elif not keep.all():
+                self._postings[term] = (new_slot[slots[keep]].astype(np.int32), tf[keep])
+            else:
+                self._postings[term] = (new_slot[slots].astype(np.int32), tf)
+
+        live = np.flatnonzero(alive)
+        self.ids = [self.ids[slot] for slot in live]
+        self.meta = [self.meta[slot] for slot in live]
+        self.slots = {doc_id: slot for slot, doc_id in enumerate(self.ids)}
+        self.length = self.length[live]
+        self.alive = np.ones(len(live), dtype=bool)
+        self.language = self.language[live]
+        self.groups = self.groups[live]
+
+    def snapshot(self, info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Compact and capture what `write` needs.
+
+        Postings are replaced rather than modified in place and the per-slot
+        arrays are copied, so the snapshot stays consistent while the index
+        keeps changing and can be written from another thread.
+        """
+        self.compact()
+        size = len(self.ids)
+        return {
+            "header": {
+                "version": SNAPSHOT_VERSION,
+                "labels": list(self.labels),
+                "meta": list(self.meta),
+                "info": info or {}
+            },
+            "ids": list(self.ids),
+            "postings": dict(self._postings),
+            "length": self.length[:size].copy(),
+            "language": self.language[:size].copy(),
+            "groups": self.groups[:size].copy()
+        }
+
+    @staticmethod
+    def write(path: str, snapshot: Dict[str, Any]):
+        """Write a snapshot taken by `snapshot` to path atomically."""
+        postings = snapshot["postings"]
+        terms = sorted(postings)
+        offsets = np.cumsum([0] + [len(postings[term][0]) for term in terms], dtype=np.int64)
+        empty = np.zeros(0, dtype=np.int32)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            np.savez(
+                f,
+                header=np.array(json.dumps(snapshot["header"], default=str)),
+                ids=np.array(snapshot["ids"], dtype=str),
+                terms=np.array(terms, dtype=str),
+                offsets=offsets,
+                slots=np.concatenate([postings[term][0] for term in terms]) if terms else empty,
+                tf=np.concatenate([postings[term][1] for term in terms]) if terms else empty,
+                length=snapshot["length"],
+                language=snapshot["language"],
+                groups=snapshot["groups"]
+            )
+        os.replace(temporary, path)
+
+    def save(self, path: str, info: Optional[Dict[str, Any]] = None):
+        """Write the index (and caller info, e.g. a high-water mark) to path atomically."""
+        self.write(path, self.snapshot(info))
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["BM25Index", Dict[str, Any]]:
+        """Read a snapshot written by save; returns the index and its info."""
+        with np.load(path, allow_pickle=False) as data:
+            header = json.loads(str(data["header"]))
+            if header.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported search snapshot version {header.get('version')}")
+            index = cls()
+            index.ids = data["ids"].tolist()
+            index.meta = header["meta"]
+            index.slots = {doc_id: slot for slot, doc_id in enumerate(index.ids)}
+            index.labels = {label: i for i, label in enumerate(header["labels"])}
+            index.length = data["length"]
+            index.alive = np.ones(len(index.ids), dtype=bool)
+            index.language = data["language"]
+            index.groups = data["groups"].reshape(-1, 2)
+            index.total_length = int(index.length.sum())
+            offsets, slots, tf = data["offsets"], data["slots"], data["tf"]
+            for i, term in enumerate(data["terms"].tolist()):
+                index._postings[term] = (slots[offsets[i]:offsets[i + 1]], tf[offsets[i]:offsets[i + 1]])
+        return index, header["info"]
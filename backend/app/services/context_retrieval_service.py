@@ -0,0 +1,253 @@
+"""
+Retrieval of the most relevant course material for LLM prompts.
+
+Instead of sending every asset of a module, each asset's prompt text is
+split into chunks and embedded locally (see embeddings). The chunks are
+stored per asset in `asset_chunks` with a hash of the text they came from.
+Before retrieval the hashes are checked, and only assets whose text changed
+(or that were never chunked) are re-embedded.
+
+`ChunkIndex.select` picks chunks by maximal marginal relevance. Each step
+takes the chunk most similar to the query and least similar to chunks
+already taken, until the token budget is used. The result is relevant
+without repeating itself and covers the module. A module that fits the
+budget is sent whole.
+"""
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+
+from app.services.embeddings import DIM, chunk_text, embed, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+ASSET_CHUNKS = "asset_chunks"
+# Weight of query relevance against redundancy with chunks already selected
+MMR_LAMBDA = 0.7
+
+
+def asset_context_text(asset: Dict[str, Any]) -> str:
+    """Prompt text of one asset ("Asset (TYPE): title" plus its content), or "" if it has none."""
+    asset_type = asset.get("type", "text").lower()
+    title = asset.get("title", "Unknown Asset")
+    content = ""
+
+    # Extract content based on asset type
+    if asset_type == "text":
+        content = asset.get("content", "")
+    elif asset_type == "video":
+        # Priority: transcript > description > content > fallback
+        content = (
+            asset.get("transcript", "") or 
+            asset.get("description", "") or 
+            asset.get("content", "") or
+            f"Video content: {title}"
+        )
+        # Add video metadata if available
+        if asset.get("duration"):
+            duration_mins = asset.get("duration", 0) // 60
+            content += f" (Duration: {duration_mins} minutes)"
+    elif asset_type == "pdf":
+        # Priority: extracted_text > summary > content > fallback
+        content = (
+            asset.get("extracted_text", "") or
+            asset.get("summary", "") or
+            asset.get("content", "") or
+            f"PDF document: {title}"
+        )
+    elif asset_type == "audio":
+        # Priority: transcript > description > content > fallback
+        content = (
+            asset.get("transcript", "") or
+            asset.get("description", "") or
+            asset.get("content", "") or
+            f"Audio content: {title}"
+        )
+        # Add audio metadata if available
+        if asset.get("duration"):
+            duration_mins = asset.get("duration", 0) // 60
+            content += f" (Duration: {duration_mins} minutes)"
+    elif asset_type == "image":
+        # Priority: description > alt_text > content > fallback
+        content = (
+            asset.get("description", "") or
+            asset.get("alt_text", "") or
+            asset.get("content", "") or
+            f"Image: {title}"
+        )
+    else:
+        # Default fallback for unknown types
+        content = asset.get("content", "") or f"{asset_type.title()}: {title}"
+
+    # Add additional context if available
+    if asset.get("description") and asset_type != "image":
+        # Don't duplicate description for images since it's primary content
+        if content != asset.get("description"):
+            content += f"\nDescription: {asset.get('description')}"
+
+    # Add difficulty level if available
+    if asset.get("metadata", {}).get("difficulty"):
+        difficulty = asset.get("metadata", {}).get("difficulty")
+        content += f"\nDifficulty: {difficulty}"
+
+    if not content or not content.strip():
+        return ""
+    return f"Asset ({asset_type.upper()}): {title}\n{content.strip()}"
+
+
+def _source_hash(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class ChunkIndex:
+    """Chunks of an ordered set of assets with their embeddings."""
+
+    __slots__ = ("headers", "texts", "tokens", "asset", "vectors")
+
+    def __init__(self, headers: List[str], texts: List[str], tokens: np.ndarray, asset: np.ndarray, vectors: np.ndarray):
+        self.headers = headers
+        self.texts = texts
+        self.tokens = tokens
+        self.asset = asset
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def outline(self) -> str:
+        """Titles of the indexed assets, one per line (headers are "Asset (TYPE): title")."""
+        return "\n".join(header.split(": ", 1)[-1] for header in self.headers)
+
+    def select(self, query_vector: np.ndarray, token_budget: int, diversity: float = MMR_LAMBDA) -> np.ndarray:
+        """Chunk indices within token_budget chosen by maximal marginal relevance, in document order."""
+        if self.tokens.sum() <= token_budget:
+            return np.arange(len(self))
+        relevance = self.vectors @ query_vector
+        redundancy = np.zeros(len(self), dtype=np.float32)
+        available = np.ones(len(self), dtype=bool)
+        remaining = token_budget
+        selected: List[int] = []
+        while True:
+            available &= self.tokens <= remaining
+            if not available.any():
+                break
+            score = np.where(available, diversity * relevance - (1 - diversity) * redundancy, -np.inf)
+            pick = int(np.argmax(score))
+            selected.append(pick)
+            available[pick] = False
+            remaining -= int(self.tokens[pick])
+            redundancy = np.maximum(redundancy, self.vectors @ self.vectors[pick])
+        return np.sort(np.array(selected, dtype=np.int64))
+
+    def render(self, indices: np.ndarray) -> str:
+        """Selected chunks grouped under their asset's header, in document order."""
+        sections: List[str] = []
+        current = -1
+        for i in indices:
+            if self.asset[i] != current:
+                current = self.asset[i]
+                sections.append(self.headers[current])
+            sections.append(self.texts[i])
+        return "\n".join(sections)
+
+
+class ContextRetrievalService:
+    """Keeps asset chunks current and retrieves prompt context within a token budget."""
+
+    async def load_index(self, db: AsyncIOMotorDatabase, asset_ids: List[str]) -> Tuple[ChunkIndex, int]:
+        """Chunk index of the given assets in order; returns it with the number of assets (re-)embedded."""
+        object_ids = [ObjectId(asset_id) for asset_id in map(str, asset_ids) if ObjectId.is_valid(asset_id)]
+        assets = {str(asset["_id"]): asset async for asset in db.assets.find({"_id": {"$in": object_ids}})}
+        stored = {doc["_id"]: doc async for doc in db[ASSET_CHUNKS].find({"_id": {"$in": list(assets)}})}
+
+        headers: List[str] = []
+        texts: List[str] = []
+        tokens: List[int] = []
+        vectors: List[np.ndarray] = []
+        asset_index: List[int] = []
+        writes = []
+        for asset_id in map(str, asset_ids):
+            asset = assets.get(asset_id)
+            text = asset_context_text(asset) if asset else ""
+            if not text:
+                continue
+            source_hash = _source_hash(text)
+            doc = stored.get(asset_id)
+            if doc is None or doc.get("source_hash") != source_hash or doc.get("dim") != DIM:
+                header, _, body = text.partition("\n")
+                chunks = chunk_text(body)
+                doc = {
+                    "_id": asset_id,
+                    "header": header,
+                    "chunks": chunks,
+                    "tokens": [estimate_tokens(chunk) for chunk in chunks],
+                    "vectors": embed(chunks).astype(np.float16).tobytes(),
+                    "dim": DIM,
+                    "source_hash": source_hash
+                }
+                writes.append(ReplaceOne({"_id": asset_id}, doc, upsert=True))
+
+            headers.append(doc["header"])
+            texts.extend(doc["chunks"])
+            tokens.extend(doc["tokens"])
+            asset_index.extend([len(headers) - 1] * len(doc["chunks"]))
+            vectors.append(np.frombuffer(doc["vectors"], dtype=np.float16).reshape(-1, DIM))
+
+        if writes:
+            await db[ASSET_CHUNKS].bulk_write(writes, ordered=False)
+        index = ChunkIndex(
+            headers,
+            texts,
+            np.array(tokens, dtype=np.int64),
+            np.array(asset_index, dtype=np.int64),
+            np.concatenate(vectors).astype(np.float32) if vectors else np.zeros((0, DIM), dtype=np.float32)
+        )
+        return index, len(writes)
+
+    async def module_context(
+        self,
+        db: AsyncIOMotorDatabase,
+        asset_ids: List[str],
+        query: str,
+        token_budget: int,
+        outline: bool = False
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Most relevant material of the given assets for query, within token_budget.
+
+        With outline the assets' titles are added to the query, for callers
+        that have no question of their own (e.g. quiz generation for a module).
+        """
+        index, embedded = await self.load_index(db, asset_ids)
+        if outline:
+            query = f"{query}\n{index.outline()}"
+        selected = index.select(embed([query])[0], token_budget)
+        return index.render(selected), {
+            "chunks": len(index),
+            "chunks_used": len(selected),
+            "tokens": int(index.tokens.sum()),
+            "tokens_used": int(index.tokens[selected].sum()),
+            "assets_embedded": embedded
+        }
+
+    async def module_asset_ids(self, db: AsyncIOMotorDatabase, course_id: str, module_code: Optional[str] = None) -> List[str]:
+        """Asset ids of one module of a course, or of every module in order."""
+        course = await db.courses.find_one({"_id": ObjectId(course_id)}, {"modules.code": 1, "modules.assets": 1})
+        return [
+            str(asset_id)
+            for module in (course or {}).get("modules", [])
+            if module_code is None or str(module.get("code", "")) == module_code
+            for asset_id in module.get("assets", [])
+        ]
+
+    async def remove_asset(self, db: AsyncIOMotorDatabase, asset_id: str):
+        await db[ASSET_CHUNKS].delete_one({"_id": str(asset_id)})
+
+
+context_retrieval_service = ContextRetrievalService()
@@ -0,0 +1,177 @@
+"""
+Per-user course progress rollups in `course_progress`.
+
+One document per (user, course) holds completed/in-progress asset counts, the
+completion percentage and the last activity time. Status changes apply a
+delta computed from the previous status rows, one write per change or one
+bulk_write per batch. `recompute` recounts (user, course) pairs from
+`userassetstatus` in one aggregation, to repair rollups a failed write left
+behind.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING, UpdateOne
+
+from app.schemas.user_asset_status import AssetStatus
+from app.services.course_service import CourseService
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = AssetStatus.completed.value
+IN_PROGRESS = AssetStatus.in_progress.value
+
+# completed_count / total_assets as a percentage, computed server-side after the counts change
+_PERCENTAGE_STAGE = {
+    "$set": {
+        "percentage": {
+            "$cond": [
+                {"$gt": ["$total_assets", 0]},
+                {"$round": [{"$multiply": [{"$divide": ["$completed_count", "$total_assets"]}, 100]}, 1]},
+                0
+            ]
+        }
+    }
+}
+
+
+def status_deltas(previous_status: Optional[str], new_status: str) -> Tuple[int, int]:
+    """Return the (completed, in_progress) count changes for one status transition."""
+    previous_status = previous_status or AssetStatus.not_started.value
+    completed = int(new_status == COMPLETED) - int(previous_status == COMPLETED)
+    in_progress = int(new_status == IN_PROGRESS) - int(previous_status == IN_PROGRESS)
+    return completed, in_progress
+
+
+def _delta_update(
+    completed: int,
+    in_progress: int,
+    course_name: Optional[str],
+    total_assets: Optional[int],
+    at: datetime
+) -> List[Dict[str, Any]]:
+    """Pipeline form of $inc/$set, so the percentage is derived from the new counts atomically."""
+    return [
+        {
+            "$set": {
+                "completed_count": {"$add": [{"$ifNull": ["$completed_count", 0]}, completed]},
+                "in_progress_count": {"$add": [{"$ifNull": ["$in_progress_count", 0]}, in_progress]},
+                "total_assets": {"$literal": total_assets} if total_assets is not None else {"$ifNull": ["$total_assets", None]},
+                "course_name": {"$literal": course_name} if course_name is not None else {"$ifNull": ["$course_name", None]},
+                "last_activity": {"$max": [{"$ifNull": ["$last_activity", at]}, at]},
+                "updated_at": "$$NOW"
+            }
+        },
+        _PERCENTAGE_STAGE
+    ]
+
+
+class CourseProgressService:
+    """Service for maintaining and reading course progress rollups."""
+
+    async def _course_totals(self, db: AsyncIOMotorDatabase, course_id: str) -> Tuple[Optional[str], Optional[int]]:
+        """Course name and asset count, from the course cache."""
+        try:
+            course = await CourseService(db).get_course(course_id)
+        except Exception:
+            course = None
+        if not course:
+            return None, None
+        total = sum(len(module.get("assets", [])) for module in course.get("modules", []))
+        return course.get("name"), total
+
+    async def apply_status_change(
+        self,
+        db: AsyncIOMotorDatabase,
+        user: str,
+        course: str,
+        previous_status: Optional[str],
+        new_status: str,
+        at: datetime
+    ):
+        """Apply one asset status transition to the (user, course) rollup."""
+        completed, in_progress = status_deltas(previous_status, new_status)
+        course_name, total_assets = await self._course_totals(db, course)
+        await db["course_progress"].update_one(
+            {"user": user, "course": course},
+            _delta_update(completed, in_progress, course_name, total_assets, at),
+            upsert=True
+        )
+
+    async def apply_status_deltas(
+        self,
+        db: AsyncIOMotorDatabase,
+        deltas: Dict[Tuple[str, str], Tuple[int, int, datetime]]
+    ):
+        """Apply summed (completed, in_progress, last activity) changes per (user, course) with one bulk_write."""
+        if not deltas:
+            return
+        totals = {}
+        operations = []
+        for (user, course), (completed, in_progress, at) in deltas.items():
+            if course not in totals:
+                totals[course] = await self._course_totals(db, course)
+            course_name, total_assets = totals[course]
+            operations.append(UpdateOne(
+                {"user": user, "course": course},
+                _delta_update(completed, in_progress, course_name, total_assets, at),
+                upsert=True
+            ))
+        await db["course_progress"].bulk_write(operations, ordered=False)
+
+    async def recompute(self, db: AsyncIOMotorDatabase, pairs: Iterable[Tuple[str, str]]) -> int:
+        """Recount the rollups for (user, course) pairs from userassetstatus (repair; status writes apply deltas)."""
+        pairs = list(set(pairs))
+        if not pairs:
+            return 0
+
+        pipeline = [
+            {"$match": {"$or": [{"user": user, "course": course} for user, course in pairs]}},
+            {
+                "$group": {
+                    "_id": {"user": "$user", "course": "$course"},
+                    "completed_count": {"$sum": {"$cond": [{"$eq": ["$status", COMPLETED]}, 1, 0]}},
+                    "in_progress_count": {"$sum": {"$cond": [{"$eq": ["$status", IN_PROGRESS]}, 1, 0]}},
+                    "last_activity": {"$max": "$updated_at"}
+                }
+            }
+        ]
+        totals = {}
+        operations = []
+        async for row in db["userassetstatus"].aggregate(pipeline):
+            user, course = row["_id"]["user"], row["_id"]["course"]
+            if course not in totals:
+                totals[course] = await self._course_totals(db, course)
+            course_name, total_assets = totals[course]
+            percentage = round(row["completed_count"] / total_assets * 100, 1) if total_assets else 0
+            operations.append(UpdateOne(
+                {"user": user, "course": course},
+                {"$set": {
+                    "completed_count": row["completed_count"],
+                    "in_progress_count": row["in_progress_count"],
+                    "total_assets": total_assets,
+                    "course_name": course_name,
+                    "percentage": percentage,
+                    "last_activity": row["last_activity"],
+                    "updated_at": datetime.utcnow()
+                }},
+                upsert=True
+            ))
+
+        if operations:
+            await db["course_progress"].bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def get_user_progress(self, db: AsyncIOMotorDatabase, user: str) -> List[Dict[str, Any]]:
+        """All of a user's course rollups, most recently active first."""
+        cursor = db["course_progress"].find({"user": user}).sort("last_activity", DESCENDING)
+        return await cursor.to_list(length=None)
+
+    async def get_course_progress(self, db: AsyncIOMotorDatabase, user: str, course: str) -> Optional[Dict[str, Any]]:
+        return await db["course_progress"].find_one({"user": user, "course": course})
+
+
+course_progress_service = CourseProgressService()
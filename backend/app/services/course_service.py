@@ -4,22 +4,13 @@ from datetime import datetime
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.core.mongodb import get_database
+from app.core.cache import course_cache, asset_cache, cache_invalidator
 
-
-def convert_objectids_to_strings(data):
-    """Recursively convert ObjectId fields to strings in a dictionary"""
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, ObjectId):
-                data[key] = str(value)
-            elif isinstance(value, (dict, list)):
-                convert_objectids_to_strings(value)
-    elif isinstance(data, list):
-        for item in data:
-            convert_objectids_to_strings(item)
-    return data
 from app.models.course import Course, Asset, Module
 from app.schemas.course import CourseCreate, CourseUpdate, AssetCreate
+from app.services.asset_search_service import asset_search_service
+from app.services.context_retrieval_service import context_retrieval_service
+from app.services.prefetch_service import prefetch_service
 
 
 class CourseService:
@@ -58,24 +49,41 @@ class CourseService:
         return self.db.userassetstatus
 
     async def get_course(self, course_id: str) -> Optional[Dict[str, Any]]:
-        """Get a course by ID"""
+        """Get a course by ID (served from the course cache when warm)"""
         try:
-            course = await self.courses_collection.find_one({"_id": ObjectId(course_id)})
-            if course:
-                course["_id"] = str(course["_id"])
-                # Convert ObjectIds in modules to strings
-                for module in course.get("modules", []):
-                    if "assets" in module:
-                        module["assets"] = [str(asset_id) for asset_id in module["assets"]]
-                    # Convert any other ObjectId fields in module
-                    for key, value in module.items():
-                        if isinstance(value, ObjectId):
-                            module[key] = str(value)
-            return course
+            return await course_cache.get_or_load(course_id, lambda: self._load_course(course_id))
         except Exception as e:
             print(f"Error getting course: {e}")
             return None
 
+    async def _load_course(self, course_id: str) -> Optional[Dict[str, Any]]:
+        """Load a course from MongoDB with ObjectIds converted to strings"""
+        course = await self.courses_collection.find_one({"_id": ObjectId(course_id)})
+        if course:
+            course["_id"] = str(course["_id"])
+            # Convert ObjectIds in modules to strings
+            for module in course.get("modules", []):
+                if "assets" in module:
+                    module["assets"] = [str(asset_id) for asset_id in module["assets"]]
+                # Convert any other ObjectId fields in module
+                for key, value in module.items():
+                    if isinstance(value, ObjectId):
+                        module[key] = str(value)
+        return course
+
+    async def _resolve_asset(self, field: str, asset_id: str) -> Optional[Dict[str, Any]]:
+        """Resolve a module asset reference by `code` or `_id` through the asset cache"""
+        async def load():
+            asset = await self.assets_collection.find_one({field: ObjectId(asset_id)})
+            if asset:
+                asset["_id"] = str(asset["_id"])
+                # Convert ObjectId fields to strings
+                if isinstance(asset.get("code"), ObjectId):
+                    asset["code"] = str(asset["code"])
+            return asset
+
+        return await asset_cache.get_or_load(f"{asset_id}:{field}", load)
+
     async def get_course_with_assets(self, course_id: str) -> Optional[Dict[str, Any]]:
         """Get a course with populated assets"""
         try:
@@ -89,24 +97,22 @@ class CourseService:
                 assets = []
                 
                 for asset_id in asset_ids:
-                    asset = await self.assets_collection.find_one({"code": ObjectId(asset_id)})
+                    asset = await self._resolve_asset("code", asset_id)
                     if asset:
-                        asset["_id"] = str(asset["_id"])
-                        # Convert ObjectId fields to strings
-                        if isinstance(asset.get("code"), ObjectId):
-                            asset["code"] = str(asset["code"])
                         assets.append(asset)
                 
                 module["assets"] = assets
 
-            # Convert all ObjectIds to strings
-            return convert_objectids_to_strings(course)
+            # Remaining ObjectIds are serialized by BSONJSONResponse
+            return course
         except Exception as e:
             print(f"Error getting course with assets: {e}")
             return None
 
-    async def get_course_with_user_progress(self, course_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get a course with populated assets and user progress"""
+    async def get_course_with_user_progress(
+        self, course_id: str, user_id: str, email: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get a course with populated assets and user progress (email locates the learner's preferences for prefetch)"""
         try:
             course = await self.get_course(course_id)
             if not course:
@@ -127,20 +133,29 @@ class CourseService:
                 assets = []
                 
                 for asset_id in asset_ids:
-                    asset = await self.assets_collection.find_one({"_id": ObjectId(asset_id)})
+                    asset = await self._resolve_asset("_id", asset_id)
                     if asset:
-                        asset["_id"] = str(asset["_id"])
-                        # Convert ObjectId fields to strings
-                        if isinstance(asset.get("code"), ObjectId):
-                            asset["code"] = str(asset["code"])
                         # Add user progress status
                         asset["user_status"] = user_statuses.get(str(asset_id), "not-started")
                         assets.append(asset)
                 
                 module["assets"] = assets
 
-            # Convert all ObjectIds to strings
-            return convert_objectids_to_strings(course)
+            # Start generating the learner's next assets so their next click is a cache hit
+            try:
+                await prefetch_service.schedule(self.db, course, user_id, email)
+            except Exception as e:
+                print(f"Error scheduling prefetch: {e}")
+
+            # Course-level completion comes from the maintained rollup
+            progress = await self.db.course_progress.find_one(
+                {"user": user_id, "course": course_id},
+                {"_id": 0, "user": 0, "course": 0}
+            )
+            course["progress"] = progress
+
+            # Remaining ObjectIds are serialized by BSONJSONResponse
+            return course
         except Exception as e:
             print(f"Error getting course with user progress: {e}")
             return None
@@ -165,6 +180,7 @@ class CourseService:
             
             result = await self.courses_collection.insert_one(course_dict)
             course_dict["_id"] = str(result.inserted_id)
+            await cache_invalidator.notify_write("courses", result.inserted_id)
             return course_dict
         except Exception as e:
             print(f"Error creating course: {e}")
@@ -176,6 +192,8 @@ class CourseService:
             asset_dict = asset_data.dict()
             result = await self.assets_collection.insert_one(asset_dict)
             asset_dict["_id"] = str(result.inserted_id)
+            await cache_invalidator.notify_write("assets", result.inserted_id, asset_dict)
+            asset_search_service.index_asset({**asset_dict, "_id": result.inserted_id})
             return asset_dict
         except Exception as e:
             print(f"Error creating asset: {e}")
@@ -193,6 +211,7 @@ class CourseService:
             )
             
             if result.modified_count > 0:
+                await cache_invalidator.notify_write("courses", course_id)
                 return await self.get_course(course_id)
             return None
         except Exception as e:
@@ -203,6 +222,7 @@ class CourseService:
         """Delete a course"""
         try:
             result = await self.courses_collection.delete_one({"_id": ObjectId(course_id)})
+            await cache_invalidator.notify_write("courses", course_id)
             return result.deleted_count > 0
         except Exception as e:
             print(f"Error deleting course: {e}")
@@ -212,15 +232,18 @@ class CourseService:
         """Delete an asset"""
         try:
             result = await self.assets_collection.delete_one({"_id": ObjectId(asset_id)})
+            await cache_invalidator.notify_write("assets", asset_id)
+            asset_search_service.remove_asset(asset_id)
+            await context_retrieval_service.remove_asset(self.db, asset_id)
             return result.deleted_count > 0
         except Exception as e:
             print(f"Error deleting asset: {e}")
             return False
 
-    async def get_courses(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get list of courses with pagination"""
+    async def get_courses(self, skip: int = 0, limit: int = 100, projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """Get list of courses with pagination, optionally restricted to a projection"""
         try:
-            cursor = self.courses_collection.find().skip(skip).limit(limit)
+            cursor = self.courses_collection.find({}, projection).skip(skip).limit(limit)
             courses = []
             async for course in cursor:
                 course["_id"] = str(course["_id"])
@@ -234,13 +257,15 @@ class CourseService:
             print(f"Error getting courses: {e}")
             return []
 
-    async def get_assets(self, skip: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
-        """Get list of assets with pagination"""
+    async def get_assets(self, skip: int = 0, limit: int = 100, projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """Get list of assets with pagination, optionally restricted to a projection"""
         try:
-            cursor = self.assets_collection.find().skip(skip).limit(limit)
+            cursor = self.assets_collection.find({}, projection).skip(skip).limit(limit)
             assets = []
             async for asset in cursor:
                 asset["_id"] = str(asset["_id"])
+                if isinstance(asset.get("code"), ObjectId):
+                    asset["code"] = str(asset["code"])
                 assets.append(asset)
             return assets
         except Exception as e:
@@ -0,0 +1,83 @@
+"""
+Local text chunking and hashing embeddings for retrieval.
+
+Embeddings use the hashing trick: word unigrams and bigrams are hashed with
+CRC32 into DIM buckets, each with a hash-derived sign, weighted by
+sublinear term frequency, and L2-normalized. Cosine similarity of two vectors
+is then a dot product. There is no model or vocabulary to load, vectors are
+stable across processes (so they can be stored), and a batch is embedded
+with one bincount.
+
+Token counts are estimated at ~4 characters per token, close enough for
+budgeting prompts without a tokenizer dependency.
+"""
+
+import math
+import re
+import zlib
+from typing import Iterable, List
+
+import numpy as np
+
+DIM = 1024
+CHUNK_TOKENS = 200
+CHARS_PER_TOKEN = 4
+
+_WORD = re.compile(r"[\w\u0900-\u0d7f]+")
+# Sentence ends, or line breaks between paragraphs and list items
+_SENTENCE = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """Split text into chunks of whole sentences of at most ~max_tokens each."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    chunks: List[str] = []
+    current = ""
+    for sentence in _SENTENCE.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > limit:
+            chunks.append(current)
+            current = ""
+        # A single overlong sentence is cut on character boundaries
+        while len(sentence) > limit:
+            chunks.append(sentence[:limit])
+            sentence = sentence[limit:]
+        current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _features(text: str) -> List[int]:
+    words = _WORD.findall(text.lower())
+    return [zlib.crc32(word.encode()) for word in words] + [
+        zlib.crc32(f"{first} {second}".encode()) for first, second in zip(words, words[1:])
+    ]
+
+
+def embed(texts: Iterable[str]) -> np.ndarray:
+    """Unit-length hashing embeddings, one float32 row of DIM per text."""
+    texts = list(texts)
+    rows: List[np.ndarray] = []
+    hashes: List[np.ndarray] = []
+    for i, text in enumerate(texts):
+        features = np.array(_features(text), dtype=np.uint32)
+        rows.append(np.full(len(features), i, dtype=np.int64))
+        hashes.append(features)
+    if not texts:
+        return np.zeros((0, DIM), dtype=np.float32)
+    row = np.concatenate(rows)
+    hashed = np.concatenate(hashes)
+    # Low bits pick the bucket, a high bit the sign, so colliding features tend to cancel
+    sign = np.where(hashed & np.uint32(1 << 31), -1.0, 1.0).astype(np.float32)
+    flat = row * DIM + (hashed % DIM).astype(np.int64)
+    vectors = np.bincount(flat, weights=sign, minlength=len(texts) * DIM).reshape(len(texts), DIM).astype(np.float32)
+    vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
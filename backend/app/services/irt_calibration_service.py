@@ -0,0 +1,357 @@
+"""
+IRT calibration of quiz questions from `quiz_attempts`.
+
+An item is one question of one quiz, identified as "<quiz_id>:<question index>"
+because scoring is positional. Questions of quizzes assembled from the
+question pool are identified as "pool:<pool question id>" instead, so every
+learner's answers to a pool question calibrate the same item, and the fitted
+difficulty is copied back to the pool. Fitted parameters are stored in
+`irt_item_params` (difficulty, discrimination, response counts and review
+flags) and `irt_user_abilities` (ability per user), and every fit is
+warm-started from them.
+
+An incremental run (the default) looks at attempts recorded since the
+`irt_calibration` high-water mark. It loads every response of the quizzes
+and users those attempts touch, re-fits only those items and abilities, and
+holds every other parameter at its stored value. A full run re-fits
+everything from all attempts.
+"""
+
+import asyncio
+import logging
+import time
+from array import array
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.cache import cache_invalidator
+from app.core.config import settings
+from app.core.watermarks import JobWatermark, settled_upper_bound
+from app.services.irt import DIFFICULTY_PRIORS, IRTParams, Responses, fit, item_flags
+
+logger = logging.getLogger(__name__)
+
+IRT_ITEM_PARAMS = "irt_item_params"
+IRT_USER_ABILITIES = "irt_user_abilities"
+WRITE_BATCH_SIZE = 1000
+READ_BATCH_SIZE = 5000
+
+
+def item_id(quiz_id: str, question_index: int) -> str:
+    return f"{quiz_id}:{question_index}"
+
+
+def pool_item_id(pool_question_id: str) -> str:
+    return f"pool:{pool_question_id}"
+
+
+class IRTCalibrationService:
+    """Fits and serves IRT parameters for quiz questions and learners."""
+
+    def __init__(self):
+        self.watermark = JobWatermark("irt_calibration", lease_seconds=1800)
+        self._task: Optional[asyncio.Task] = None
+
+    async def calibrate(self, db: AsyncIOMotorDatabase, full: bool = False, model: Optional[str] = None) -> Dict[str, Any]:
+        """Fold new attempts into the calibration (or re-fit everything when full)."""
+        model = model or settings.irt_model
+        acquired, last_id = await self.watermark.acquire(db)
+        if not acquired:
+            return {"ran": False, "reason": "another calibration is running"}
+
+        try:
+            upper_id = settled_upper_bound(settings.irt_settle_seconds)
+            if full:
+                query: Dict[str, Any] = {"_id": {"$lt": upper_id}}
+                quiz_ids: Optional[set] = None
+                user_ids: Optional[set] = None
+            else:
+                new_match = {"_id": {"$gt": last_id, "$lt": upper_id}}
+                quiz_ids = set(await db.quiz_attempts.distinct("quiz_id", new_match))
+                user_ids = set(await db.quiz_attempts.distinct("user_id", new_match))
+                if not quiz_ids:
+                    await self.watermark.commit(db, max(last_id, upper_id))
+                    return {"ran": True, "new_attempts": 0, "high_water_mark": str(max(last_id, upper_id))}
+                query = {
+                    "_id": {"$lt": upper_id},
+                    "$or": [{"quiz_id": {"$in": list(quiz_ids)}}, {"user_id": {"$in": list(user_ids)}}]
+                }
+
+            report = await self._fit(db, query, model, quiz_ids, user_ids)
+        except Exception:
+            await self.watermark.release(db)
+            raise
+
+        await self.watermark.commit(db, upper_id)
+        report.update({"ran": True, "full": full, "high_water_mark": str(upper_id)})
+        logger.info(f"IRT calibration: {report}")
+        return report
+
+    async def _fit(
+        self,
+        db: AsyncIOMotorDatabase,
+        query: Dict[str, Any],
+        model: str,
+        quiz_ids: Optional[set],
+        user_ids: Optional[set]
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+        keys: Dict[str, Optional[Tuple[List[int], List[str], List[Optional[str]]]]] = {}
+
+        item_index: Dict[str, int] = {}
+        user_index: Dict[str, int] = {}
+        # (item id, quiz_id, question index, reported difficulty, pool question id)
+        items: List[Tuple[str, str, int, str, Optional[str]]] = []
+        touched_items = set()
+        users: List[str] = []
+        # Compact typed columns; attempts are folded in a batch at a time and never all held
+        user_column = array("q")
+        item_column = array("q")
+        correct_column = array("b")
+        attempt_count = 0
+        async for batch in self._attempt_batches(db, query):
+            attempt_count += len(batch)
+            new_quiz_ids = {attempt["quiz_id"] for attempt in batch} - keys.keys()
+            if new_quiz_ids:
+                loaded = await self._load_answer_keys(db, new_quiz_ids)
+                keys.update({quiz_id: loaded.get(quiz_id) for quiz_id in new_quiz_ids})
+            for attempt in batch:
+                key = keys.get(attempt["quiz_id"])
+                if key is None:
+                    continue
+                correct_answers, difficulties, pool_ids = key
+                user_id = attempt["user_id"]
+                u = user_index.get(user_id)
+                if u is None:
+                    u = user_index[user_id] = len(users)
+                    users.append(user_id)
+                touched = quiz_ids is None or attempt["quiz_id"] in quiz_ids
+                for position, answer in enumerate(attempt.get("answers", [])[:len(correct_answers)]):
+                    pool_id = pool_ids[position]
+                    iid = pool_item_id(pool_id) if pool_id else item_id(attempt["quiz_id"], position)
+                    i = item_index.get(iid)
+                    if i is None:
+                        i = item_index[iid] = len(items)
+                        items.append((iid, attempt["quiz_id"], position, difficulties[position], pool_id))
+                    if touched:
+                        touched_items.add(i)
+                    user_column.append(u)
+                    item_column.append(i)
+                    correct_column.append(int(answer.get("selected_answer") == correct_answers[position]))
+        load_seconds = time.perf_counter() - started
+
+        responses = Responses.from_lists(user_column, item_column, correct_column, len(users), len(items))
+        params, stored_items, stored_users = await self._warm_start(db, items, users)
+
+        # Parameters outside the touched quizzes/users stay as stored; unseen ones are always fitted
+        fixed_items = fixed_users = None
+        if quiz_ids is not None:
+            fixed_items = np.array(
+                [stored and i not in touched_items for i, stored in enumerate(stored_items)],
+                dtype=bool
+            )
+            fixed_users = np.array(
+                [stored and user_id not in user_ids for user_id, stored in zip(users, stored_users)],
+                dtype=bool
+            )
+
+        # NumPy releases the GIL for most of the fit, so run it off the event loop
+        fit_started = time.perf_counter()
+        fit_report = await asyncio.to_thread(
+            fit, responses, params, model,
+            max_iterations=settings.irt_max_iterations,
+            fixed_users=fixed_users,
+            fixed_items=fixed_items
+        )
+        fit_seconds = time.perf_counter() - fit_started
+
+        written_items, written_users = await self._store(
+            db, responses, params, model, items, users, fixed_items, fixed_users
+        )
+        return {
+            **fit_report.dict(),
+            "attempts": attempt_count,
+            "responses": len(responses),
+            "items_fitted": written_items,
+            "users_fitted": written_users,
+            "load_seconds": round(load_seconds, 3),
+            "fit_seconds": round(fit_seconds, 3),
+            "total_seconds": round(time.perf_counter() - started, 3)
+        }
+
+    async def _attempt_batches(self, db: AsyncIOMotorDatabase, query: Dict[str, Any]) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Matching attempts, READ_BATCH_SIZE at a time."""
+        cursor = db.quiz_attempts.find(
+            query, {"_id": 0, "quiz_id": 1, "user_id": 1, "answers.selected_answer": 1}
+        ).batch_size(READ_BATCH_SIZE)
+        batch: List[Dict[str, Any]] = []
+        async for attempt in cursor:
+            batch.append(attempt)
+            if len(batch) >= READ_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def _load_answer_keys(self, db: AsyncIOMotorDatabase, quiz_ids) -> Dict[str, Tuple[List[int], List[str], List[Optional[str]]]]:
+        """Correct answers, self-reported difficulty and pool question id per question of each quiz, in one query."""
+        object_ids = []
+        for quiz_id in quiz_ids:
+            try:
+                object_ids.append(ObjectId(quiz_id))
+            except Exception:
+                continue
+        keys = {}
+        async for quiz in db.quizzes.find(
+            {"_id": {"$in": object_ids}},
+            {
+                "questions.correct_answer": 1, "questions.difficulty": 1,
+                "questions.pool_question_id": 1, "difficulty": 1
+            }
+        ):
+            questions = quiz.get("questions", [])
+            quiz_difficulty = quiz.get("difficulty") or "medium"
+            keys[str(quiz["_id"])] = (
+                [question.get("correct_answer", -1) for question in questions],
+                [question.get("difficulty") or quiz_difficulty for question in questions],
+                [question.get("pool_question_id") for question in questions]
+            )
+        return keys
+
+    async def _warm_start(self, db: AsyncIOMotorDatabase, items, users) -> Tuple[IRTParams, List[bool], List[bool]]:
+        b_prior = np.array([DIFFICULTY_PRIORS.get(difficulty, 0.0) for _, _, _, difficulty, _ in items])
+        params = IRTParams.initial(len(users), len(items), b_prior)
+
+        positions = {iid: i for i, (iid, _, _, _, _) in enumerate(items)}
+        stored_items = [False] * len(items)
+        item_ids = list(positions)
+        for start in range(0, len(item_ids), READ_BATCH_SIZE):
+            async for doc in db[IRT_ITEM_PARAMS].find(
+                {"_id": {"$in": item_ids[start:start + READ_BATCH_SIZE]}},
+                {"difficulty": 1, "discrimination": 1}
+            ):
+                i = positions[doc["_id"]]
+                params.b[i] = doc["difficulty"]
+                params.a[i] = doc.get("discrimination", 1.0)
+                stored_items[i] = True
+
+        user_positions = {user_id: u for u, user_id in enumerate(users)}
+        stored_users = [False] * len(users)
+        for start in range(0, len(users), READ_BATCH_SIZE):
+            async for doc in db[IRT_USER_ABILITIES].find(
+                {"_id": {"$in": users[start:start + READ_BATCH_SIZE]}},
+                {"ability": 1}
+            ):
+                u = user_positions[doc["_id"]]
+                params.theta[u] = doc["ability"]
+                stored_users[u] = True
+        return params, stored_items, stored_users
+
+    async def _store(self, db, responses, params, model, items, users, fixed_items, fixed_users) -> Tuple[int, int]:
+        counts = np.bincount(responses.item, minlength=responses.n_items)
+        correct = np.bincount(responses.item, responses.correct, responses.n_items)
+        user_counts = np.bincount(responses.user, minlength=responses.n_users)
+        now = datetime.utcnow()
+
+        item_ops = []
+        pool_ops = []
+        for i, (iid, quiz_id, index, difficulty, pool_id) in enumerate(items):
+            if fixed_items is not None and fixed_items[i]:
+                continue
+            p_correct = float(correct[i] / counts[i]) if counts[i] else 0.0
+            # Pool items are answered through many assembled quizzes, so no single quiz owns them
+            location = {"pool_question_id": pool_id} if pool_id else {"quiz_id": quiz_id, "question_index": index}
+            item_ops.append(UpdateOne(
+                {"_id": iid},
+                {"$set": {
+                    **location,
+                    "model": model,
+                    "difficulty": float(params.b[i]),
+                    "discrimination": float(params.a[i]),
+                    "responses": int(counts[i]),
+                    "p_correct": round(p_correct, 4),
+                    "reported_difficulty": difficulty,
+                    "flags": item_flags(float(params.b[i]), float(params.a[i]), p_correct, model),
+                    "updated_at": now
+                }},
+                upsert=True
+            ))
+            if pool_id:
+                pool_ops.append(UpdateOne(
+                    {"_id": ObjectId(pool_id)},
+                    {"$set": {
+                        "difficulty": float(params.b[i]),
+                        "discrimination": float(params.a[i]),
+                        "calibrated": True
+                    }}
+                ))
+
+        user_ops = []
+        for u, user_id in enumerate(users):
+            if fixed_users is not None and fixed_users[u]:
+                continue
+            user_ops.append(UpdateOne(
+                {"_id": user_id},
+                {"$set": {
+                    "ability": float(params.theta[u]),
+                    "responses": int(user_counts[u]),
+                    "model": model,
+                    "updated_at": now
+                }},
+                upsert=True
+            ))
+
+        for collection, operations in (
+            (IRT_ITEM_PARAMS, item_ops), (IRT_USER_ABILITIES, user_ops), ("question_pool", pool_ops)
+        ):
+            for start in range(0, len(operations), WRITE_BATCH_SIZE):
+                await db[collection].bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=False)
+        if pool_ops:
+            # Pool difficulty indexes are rebuilt from the new difficulties
+            await cache_invalidator.notify_write("question_pool")
+        return len(item_ops), len(user_ops)
+
+    async def get_quiz_calibration(self, db: AsyncIOMotorDatabase, quiz_id: str) -> List[Dict[str, Any]]:
+        """Calibrated parameters for a quiz's questions, in question order."""
+        cursor = db[IRT_ITEM_PARAMS].find({"quiz_id": quiz_id}, {"_id": 0}).sort("question_index", 1)
+        return await cursor.to_list(length=None)
+
+    async def get_user_ability(self, db: AsyncIOMotorDatabase, user_id: str) -> Optional[Dict[str, Any]]:
+        doc = await db[IRT_USER_ABILITIES].find_one({"_id": user_id})
+        if not doc:
+            return None
+        doc["user_id"] = doc.pop("_id")
+        return doc
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Calibrate periodically (irt_refit_seconds, 0 disables)."""
+        if db is None or settings.irt_refit_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(settings.irt_refit_seconds)
+            try:
+                await self.calibrate(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"IRT calibration failed: {e}")
+
+
+irt_calibration_service = IRTCalibrationService()
@@ -0,0 +1,64 @@
+"""
+Bayesian Knowledge Tracing with vectorized batch updates.
+
+Each (user, module) pair holds one probability that the learner has mastered
+the module. An event is either a scored observation (a quiz answer, correct
+or not) or a learning opportunity without an observation (completing an
+asset). For an observation the probability is first conditioned on the
+answer, allowing for slips and guesses; every event then applies the
+learning transition.
+
+Events of one pair must be applied in order, but different pairs are
+independent, so `trace` advances every pair of a batch together one position
+at a time (see `app.utils.sequences`).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.utils.sequences import position_steps
+
+CORRECT = 1
+INCORRECT = 0
+LEARNING = -1  # Learning opportunity without an observation (e.g. a completed asset)
+
+MASTERED = 0.95
+
+
+@dataclass(frozen=True)
+class BKTParams:
+    p_init: float = 0.2
+    p_transit: float = 0.1
+    p_slip: float = 0.1
+    p_guess: float = 0.25
+
+
+DEFAULT_PARAMS = BKTParams()
+
+
+def update(mastery: np.ndarray, observation: np.ndarray, params: BKTParams = DEFAULT_PARAMS) -> np.ndarray:
+    """One BKT step for many independent pairs at once."""
+    slip, guess = params.p_slip, params.p_guess
+    if_correct = mastery * (1 - slip) / (mastery * (1 - slip) + (1 - mastery) * guess)
+    if_incorrect = mastery * slip / (mastery * slip + (1 - mastery) * (1 - guess))
+    posterior = np.where(
+        observation == CORRECT, if_correct,
+        np.where(observation == INCORRECT, if_incorrect, mastery)
+    )
+    return posterior + (1 - posterior) * params.p_transit
+
+
+def trace(mastery: np.ndarray, pair: np.ndarray, observation: np.ndarray, params: BKTParams = DEFAULT_PARAMS) -> np.ndarray:
+    """
+    Apply a batch of events to mastery, returning the updated array.
+
+    pair[i] indexes mastery for event i; events are given in time order.
+    """
+    mastery = np.array(mastery, dtype=np.float64)
+    pair = np.asarray(pair)
+    observation = np.asarray(observation)
+    for events in position_steps(pair):
+        pairs = pair[events]
+        mastery[pairs] = update(mastery[pairs], observation[events], params)
+    return mastery
@@ -322,6 +322,42 @@ class LLMService:
                 error_message=str(e)
             )
     
+    def available(self, provider: Optional[LLMProvider] = None) -> bool:
+        """Whether a client is configured for provider (default_llm_provider when omitted)."""
+        clients = {LLMProvider.GOOGLE: self.google_client, LLMProvider.OPENAI: self.openai_client}
+        return clients.get(LLMProvider(provider or settings.default_llm_provider)) is not None
+    
+    async def complete(self, prompt: str, provider: Optional[LLMProvider] = None, json_output: bool = False) -> str:
+        """
+        Send an already-built prompt and return the response text.
+        
+        For callers that keep their own prompt templates; provider defaults to
+        default_llm_provider. json_output asks the provider for a JSON object.
+        """
+        provider = LLMProvider(provider or settings.default_llm_provider)
+        if provider == LLMProvider.GOOGLE:
+            if not self.google_client:
+                raise ValueError("Google client not initialized")
+            kwargs = {"generation_config": {"response_mime_type": "application/json"}} if json_output else {}
+            response = await asyncio.to_thread(self.google_client.generate_content, prompt, **kwargs)
+            text = response.text
+        elif provider == LLMProvider.OPENAI:
+            if not self.openai_client:
+                raise ValueError("OpenAI client not initialized")
+            response = await asyncio.to_thread(
+                self.openai_client.chat.completions.create,
+                model="gpt-3.5-turbo",
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"} if json_output else None
+            )
+            text = response.choices[0].message.content
+        else:
+            raise NotImplementedError(f"{provider.value} provider not yet implemented")
+        
+        if not text:
+            raise ValueError("AI failed to generate content")
+        return text.strip()
+    
     async def _generate_google(self, prompt: str, request: LLMRequest) -> Any:
         """Generate content using Google Gemini API."""
         if not self.google_client:
@@ -0,0 +1,277 @@
+"""
+Learner mastery per (user, module) in `learner_mastery`, kept by knowledge tracing.
+
+A refresh folds in everything recorded since the `bkt_mastery` high-water
+mark, in time order:
+
+- quiz attempts: each answer to a quiz with a module_code is a scored
+  observation for that module
+- asset completions (`userassetstatus.completed_at`): a learning opportunity
+  for the module that contains the asset
+
+The touched pairs are loaded once, every event is applied with one
+vectorized `trace` call, and the results are written back with one
+unordered bulk_write per chunk.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.watermarks import JobWatermark, settled_upper_bound
+from app.services.course_service import CourseService
+from app.services.knowledge_tracing import (
+    CORRECT, DEFAULT_PARAMS, INCORRECT, LEARNING, MASTERED, trace
+)
+
+logger = logging.getLogger(__name__)
+
+LEARNER_MASTERY = "learner_mastery"
+CHUNK_SIZE = 5000
+READ_BATCH_SIZE = 5000
+
+# (time, user_id, course_id, module_code, observation)
+Event = Tuple[datetime, str, str, str, int]
+
+
+def mastery_id(user_id: str, course_id: str, module_code: str) -> str:
+    return f"{user_id}:{course_id}:{module_code}"
+
+
+async def _batches(cursor) -> AsyncIterator[List[Dict[str, Any]]]:
+    """A cursor's documents, READ_BATCH_SIZE at a time."""
+    batch: List[Dict[str, Any]] = []
+    async for document in cursor:
+        batch.append(document)
+        if len(batch) >= READ_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class MasteryService:
+    """Maintains and serves per-module mastery probabilities."""
+
+    def __init__(self):
+        self.watermark = JobWatermark("bkt_mastery")
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Apply quiz answers and asset completions recorded since the last run."""
+        acquired, last_id = await self.watermark.acquire(db)
+        if not acquired:
+            return {"ran": False, "reason": "another refresh is running"}
+
+        upper_id = settled_upper_bound(settings.mastery_settle_seconds)
+        if upper_id <= last_id:
+            await self.watermark.release(db)
+            return {"ran": True, "events": 0, "high_water_mark": str(last_id)}
+
+        try:
+            started = time.perf_counter()
+            events = await self._attempt_events(db, last_id, upper_id)
+            events += await self._completion_events(db, last_id, upper_id)
+            # Stable sort: answers within one attempt share a time and keep question order
+            events.sort(key=lambda event: event[0])
+            report = await self.apply_events(db, events)
+        except Exception:
+            await self.watermark.release(db)
+            raise
+
+        await self.watermark.commit(db, upper_id)
+        report.update({
+            "ran": True,
+            "high_water_mark": str(upper_id),
+            "total_seconds": round(time.perf_counter() - started, 3)
+        })
+        logger.info(f"Mastery refresh: {report}")
+        return report
+
+    async def _attempt_events(self, db: AsyncIOMotorDatabase, last_id: ObjectId, upper_id: ObjectId) -> List[Event]:
+        cursor = db.quiz_attempts.find(
+            {"_id": {"$gt": last_id, "$lt": upper_id}},
+            {"quiz_id": 1, "user_id": 1, "answers.selected_answer": 1}
+        ).sort("_id", 1).batch_size(READ_BATCH_SIZE)
+
+        # Attempts are turned into events a batch at a time; quizzes are loaded when first seen
+        quizzes: Dict[str, Optional[Tuple[str, str, List[int]]]] = {}
+        events: List[Event] = []
+        async for batch in _batches(cursor):
+            new_quiz_ids = {attempt["quiz_id"] for attempt in batch} - quizzes.keys()
+            if new_quiz_ids:
+                quizzes.update(dict.fromkeys(new_quiz_ids))
+                quizzes.update(await self._load_quizzes(db, new_quiz_ids))
+            for attempt in batch:
+                quiz = quizzes.get(attempt["quiz_id"])
+                if quiz is None:
+                    continue
+                course_id, module_code, correct_answers = quiz
+                at = attempt["_id"].generation_time.replace(tzinfo=None)
+                for position, answer in enumerate(attempt.get("answers", [])[:len(correct_answers)]):
+                    observation = CORRECT if answer.get("selected_answer") == correct_answers[position] else INCORRECT
+                    events.append((at, attempt["user_id"], course_id, module_code, observation))
+        return events
+
+    async def _load_quizzes(self, db: AsyncIOMotorDatabase, quiz_ids) -> Dict[str, Tuple[str, str, List[int]]]:
+        """Course, module and correct answers of each quiz that belongs to a module."""
+        object_ids = []
+        for quiz_id in quiz_ids:
+            try:
+                object_ids.append(ObjectId(quiz_id))
+            except Exception:
+                continue
+        quizzes = {}
+        async for quiz in db.quizzes.find(
+            {"_id": {"$in": object_ids}, "module_code": {"$nin": [None, ""]}},
+            {"course_id": 1, "module_code": 1, "questions.correct_answer": 1}
+        ):
+            quizzes[str(quiz["_id"])] = (
+                quiz["course_id"],
+                str(quiz["module_code"]),
+                [question.get("correct_answer", -1) for question in quiz.get("questions", [])]
+            )
+        return quizzes
+
+    async def _completion_events(self, db: AsyncIOMotorDatabase, last_id: ObjectId, upper_id: ObjectId) -> List[Event]:
+        # completed_at is the first completion time, so each asset counts once
+        cursor = db.userassetstatus.find(
+            {
+                "status": "completed",
+                "completed_at": {
+                    "$gte": last_id.generation_time.replace(tzinfo=None),
+                    "$lt": upper_id.generation_time.replace(tzinfo=None)
+                }
+            },
+            {"user": 1, "course": 1, "asset": 1, "completed_at": 1}
+        ).batch_size(READ_BATCH_SIZE)
+
+        course_service = CourseService(db)
+        loaded_courses = set()
+        asset_modules: Dict[Tuple[str, str], str] = {}
+        events: List[Event] = []
+        async for batch in _batches(cursor):
+            for course_id in {row["course"] for row in batch} - loaded_courses:
+                loaded_courses.add(course_id)
+                course = await course_service.get_course(course_id)
+                for module in (course or {}).get("modules", []):
+                    for asset_id in module.get("assets", []):
+                        asset_modules[(course_id, str(asset_id))] = str(module.get("code", ""))
+            for row in batch:
+                module_code = asset_modules.get((row["course"], row["asset"]))
+                if module_code:
+                    events.append((row["completed_at"], row["user"], row["course"], module_code, LEARNING))
+        return events
+
+    async def apply_events(self, db: AsyncIOMotorDatabase, events: List[Event]) -> Dict[str, Any]:
+        """Apply time-ordered events to the stored mastery of the pairs they touch."""
+        if not events:
+            return {"events": 0, "pairs": 0}
+
+        index: Dict[str, int] = {}
+        pairs: List[Tuple[str, str, str]] = []
+        pair_column = np.empty(len(events), dtype=np.int64)
+        observation = np.empty(len(events), dtype=np.int8)
+        for e, (_, user_id, course_id, module_code, observed) in enumerate(events):
+            key = mastery_id(user_id, course_id, module_code)
+            p = index.get(key)
+            if p is None:
+                p = index[key] = len(pairs)
+                pairs.append((user_id, course_id, module_code))
+            pair_column[e] = p
+            observation[e] = observed
+
+        mastery = np.full(len(pairs), DEFAULT_PARAMS.p_init)
+        keys = list(index)
+        for start in range(0, len(keys), CHUNK_SIZE):
+            async for doc in db[LEARNER_MASTERY].find(
+                {"_id": {"$in": keys[start:start + CHUNK_SIZE]}}, {"p_mastery": 1}
+            ):
+                mastery[index[doc["_id"]]] = doc["p_mastery"]
+
+        trace_started = time.perf_counter()
+        mastery = trace(mastery, pair_column, observation)
+        trace_seconds = time.perf_counter() - trace_started
+
+        correct = np.bincount(pair_column, observation == CORRECT, len(pairs))
+        answered = np.bincount(pair_column, observation != LEARNING, len(pairs))
+        learning = np.bincount(pair_column, observation == LEARNING, len(pairs))
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": keys[p]},
+                {
+                    "$set": {
+                        "user_id": user_id,
+                        "course_id": course_id,
+                        "module_code": module_code,
+                        "p_mastery": float(mastery[p]),
+                        "updated_at": now
+                    },
+                    "$inc": {
+                        "observations": int(answered[p]),
+                        "correct": int(correct[p]),
+                        "learning_events": int(learning[p])
+                    }
+                },
+                upsert=True
+            )
+            for p, (user_id, course_id, module_code) in enumerate(pairs)
+        ]
+        for start in range(0, len(operations), CHUNK_SIZE):
+            await db[LEARNER_MASTERY].bulk_write(operations[start:start + CHUNK_SIZE], ordered=False)
+
+        return {
+            "events": len(events),
+            "pairs": len(pairs),
+            "users": len({user_id for user_id, _, _ in pairs}),
+            "trace_seconds": round(trace_seconds, 4)
+        }
+
+    async def get_user_mastery(self, db: AsyncIOMotorDatabase, user_id: str, course_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Mastery of every module the user has activity in, optionally for one course."""
+        query = {"user_id": user_id}
+        if course_id:
+            query["course_id"] = course_id
+        modules = []
+        async for doc in db[LEARNER_MASTERY].find(query, {"_id": 0, "user_id": 0}).sort([("course_id", 1), ("module_code", 1)]):
+            doc["p_mastery"] = round(doc["p_mastery"], 4)
+            doc["mastered"] = doc["p_mastery"] >= MASTERED
+            modules.append(doc)
+        return modules
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Refresh mastery periodically (mastery_refresh_seconds, 0 disables)."""
+        if db is None or settings.mastery_refresh_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(settings.mastery_refresh_seconds)
+            try:
+                await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Mastery refresh failed: {e}")
+
+
+mastery_service = MasteryService()
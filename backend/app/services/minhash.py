@@ -0,0 +1,77 @@
+"""
+MinHash signatures and LSH banding for near-duplicate quiz questions.
+
+A question is reduced to the set of word 3-grams of its normalized text and
+options; options are sorted first, so reordered options still match. The
+MinHash signature estimates Jaccard similarity between those sets. The
+signature is cut into bands, and two questions become candidates when any
+band matches exactly.
+Candidates are confirmed by their estimated similarity.
+
+Hashes are stable across processes (CRC32 plus fixed permutation
+coefficients), so signatures can be stored and compared later. A batch of
+questions is hashed with one vectorized pass per chunk.
+"""
+
+import hashlib
+import re
+import zlib
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 16 bands x 4 rows: pairs from ~0.5 Jaccard on become candidates
+
+# Smallest prime above 2^32; a < 2^31 keeps a * x + b within uint64
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 2 ** 31, size=NUM_PERM).astype(np.uint64)
+
+_WORD = re.compile(r"[a-z0-9]+")
+_EMPTY_SHINGLE = zlib.crc32(b"")
+CHUNK_SIZE = 2000
+
+
+def question_text(question: Dict[str, Any]) -> str:
+    options = sorted(str(option) for option in question.get("options", []))
+    return " ".join([str(question.get("question", ""))] + options)
+
+
+def shingles(text: str, size: int = 3) -> np.ndarray:
+    """CRC32 hashes of the distinct word n-grams of text."""
+    words = _WORD.findall(text.lower())
+    if len(words) < size:
+        grams = {" ".join(words)}
+    else:
+        grams = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    return np.fromiter((zlib.crc32(gram.encode()) for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def signatures(texts: Iterable[str]) -> np.ndarray:
+    """MinHash signatures, one row of NUM_PERM values per text."""
+    texts = list(texts)
+    result = np.empty((len(texts), NUM_PERM), dtype=np.uint64)
+    for start in range(0, len(texts), CHUNK_SIZE):
+        chunk = [shingles(text) for text in texts[start:start + CHUNK_SIZE]]
+        chunk = [hashes if len(hashes) else np.array([_EMPTY_SHINGLE], dtype=np.uint64) for hashes in chunk]
+        offsets = np.cumsum([0] + [len(hashes) for hashes in chunk[:-1]])
+        values = np.concatenate(chunk)
+        permuted = (_A[:, None] * values[None, :] + _B[:, None]) % _PRIME
+        result[start:start + len(chunk)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return result
+
+
+def band_keys(signature: np.ndarray) -> List[str]:
+    """One key per LSH band; equal keys mean the band matched."""
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(np.asarray(first) == np.asarray(second))) / NUM_PERM
@@ -0,0 +1,186 @@
+"""
+Predictive prefetch of a learner's next assets when they open a course.
+
+Opening a course (get_course_with_user_progress) tells us the learner's
+preferences and which assets come next, so the variants they will ask for
+can be generated while they are still reading the course page. Up to
+`prefetch_next_assets` unfinished assets, in module order, get:
+- the variant for the learner's learning style, domain and hobby, as
+  getAsset would look it up;
+- a translation, when the learner's language is not "en".
+
+Jobs run in the background; scheduling them costs the course response one
+cached preferences lookup. Preferences live in the `users` collection, found
+by its ObjectId when the caller has one and otherwise by email (the
+authenticated course route only knows the SQL account's id and email). Limits:
+- A learner's course is prefetched at most once per
+  `prefetch_user_cooldown_seconds`.
+- A job already queued for another learner is not queued twice.
+- At most `prefetch_max_concurrency` jobs generate at once across all
+  learners.
+- At most `prefetch_max_pending` jobs are queued; later ones are dropped.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.cache import user_preferences_cache
+from app.core.config import settings
+from app.services.translation_service import TranslationService
+from app.services.transformation_service import VARIANT_STYLES, get_or_generate_variant
+from app.utils.vocabulary import canonical_domain, canonical_hobbies, canonical_style
+
+logger = logging.getLogger(__name__)
+
+# ("variant", code, style, domain, hobby) or ("translation", code, language)
+JobKey = Tuple[str, ...]
+
+
+def next_assets(course: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    """The first `limit` populated assets of course, in module order, that the learner has not completed."""
+    upcoming = []
+    for module in course.get("modules", []):
+        for asset in module.get("assets", []):
+            if isinstance(asset, dict) and asset.get("user_status") != "completed":
+                upcoming.append(asset)
+                if len(upcoming) >= limit:
+                    return upcoming
+    return upcoming
+
+
+def prefetch_jobs(assets: List[Dict[str, Any]], preferences: Dict[str, Any]) -> List[Tuple[JobKey, Dict[str, Any]]]:
+    """Job keys (with the asset each is for) that a learner with these preferences will need next."""
+    style = canonical_style(preferences.get("learningStyle"))
+    domain = canonical_domain(preferences.get("domain"))
+    # getAsset is called with the first of the learner's hobbies
+    hobby = canonical_hobbies(preferences.get("hobbies")).split(", ")[0]
+    language = preferences.get("language") or "en"
+
+    jobs = []
+    for asset in assets:
+        code = str(asset.get("code") or asset.get("_id"))
+        if not asset.get("content"):
+            continue
+        if style in VARIANT_STYLES and domain and hobby:
+            jobs.append((("variant", code, style, domain, hobby), asset))
+        if language != "en":
+            jobs.append((("translation", code, language), asset))
+    return jobs
+
+
+class PrefetchService:
+    """Queues background generation of the variants a learner is about to open."""
+
+    def __init__(self):
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self._pending: Set[JobKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._translation_service = None
+        self.stats = {"scheduled": 0, "generated": 0, "present": 0, "dropped": 0, "failed": 0}
+
+    def _claim_user(self, user_id: str, course_id: str) -> bool:
+        now = time.monotonic()
+        cooldown = settings.prefetch_user_cooldown_seconds
+        if len(self._recent) > 10000:
+            self._recent = {key: at for key, at in self._recent.items() if now - at < cooldown}
+        key = (user_id, course_id)
+        if now - self._recent.get(key, float("-inf")) < cooldown:
+            return False
+        self._recent[key] = now
+        return True
+
+    async def _preferences(self, db: AsyncIOMotorDatabase, user_id: str, email: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        # Same keys as the users-collection endpoints, so a warm entry is shared
+        if ObjectId.is_valid(user_id):
+            return await user_preferences_cache.get_or_load(
+                f"id:{user_id}",
+                lambda: db.users.find_one({"_id": ObjectId(user_id)})
+            )
+        if email:
+            return await user_preferences_cache.get_or_load(
+                f"email:{email}",
+                lambda: db.users.find_one({"email": email})
+            )
+        return None
+
+    async def schedule(self, db: AsyncIOMotorDatabase, course: Dict[str, Any], user_id: str, email: Optional[str] = None) -> int:
+        """
+        Queue prefetch jobs for the learner's next unfinished assets; returns how many were queued.
+
+        email finds the learner's preferences when user_id is not a users-collection id.
+        """
+        if db is None or not settings.prefetch_enabled or settings.prefetch_next_assets <= 0:
+            return 0
+        if not self._claim_user(user_id, str(course.get("_id"))):
+            return 0
+        preferences = await self._preferences(db, user_id, email)
+        if not preferences:
+            return 0
+
+        queued = 0
+        for key, asset in prefetch_jobs(next_assets(course, settings.prefetch_next_assets), preferences):
+            if key in self._pending:
+                continue
+            if len(self._pending) >= settings.prefetch_max_pending:
+                self.stats["dropped"] += 1
+                continue
+            self._pending.add(key)
+            task = asyncio.create_task(self._run_job(db, key, str(asset["content"])))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            queued += 1
+        self.stats["scheduled"] += queued
+        return queued
+
+    async def _run_job(self, db: AsyncIOMotorDatabase, key: JobKey, content: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(max(settings.prefetch_max_concurrency, 1))
+        try:
+            async with self._semaphore:
+                if key[0] == "variant":
+                    generated = await self._prefetch_variant(db, *key[1:], content)
+                else:
+                    generated = await self._prefetch_translation(db, *key[1:])
+            self.stats["generated" if generated else "present"] += 1
+        except Exception as e:
+            logger.warning(f"Prefetch {key} failed: {e}")
+            self.stats["failed"] += 1
+        finally:
+            self._pending.discard(key)
+
+    async def _prefetch_variant(self, db: AsyncIOMotorDatabase, code: str, style: str, domain: str, hobby: str, content: str) -> bool:
+        _, generated = await get_or_generate_variant(db, code, content, style, domain, hobby, interactive=False)
+        return generated
+
+    async def _prefetch_translation(self, db: AsyncIOMotorDatabase, code: str, language: str) -> bool:
+        if self._translation_service is None:
+            self._translation_service = TranslationService(db)
+        if await self._translation_service.get_asset_by_code(code, language):
+            return False
+        await self._translation_service.create_translation(code, language, "")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.prefetch_enabled,
+            "pending": len(self._pending),
+            "max_concurrency": settings.prefetch_max_concurrency,
+            **self.stats
+        }
+
+    async def stop(self):
+        """Cancel queued and running prefetches on shutdown."""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._pending.clear()
+
+
+prefetch_service = PrefetchService()
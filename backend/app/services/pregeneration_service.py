@@ -0,0 +1,264 @@
+"""
+Off-peak pre-generation of transformed asset variants.
+
+Learners mostly share a handful of (domain, hobby) combinations, yet a
+variant is generated on the first learner's click and that learner waits for
+the model. The scheduler generates the variants those learners are likely to
+ask for before they do.
+
+Combinations are ranked by the number of learners in `users` holding them.
+A learner who accessed an asset in the last `pregeneration_active_days`
+counts twice. Courses are walked module by module, so every popular
+combination gets a course's first assets before any combination gets its
+later ones. The missing styles of each (asset, domain, hobby) are generated
+together in one model call and stored like getAsset's variants.
+
+Pre-generation is kept below interactive traffic:
+- it only runs inside the UTC hour window `pregeneration_hours`;
+- it generates for one asset at a time;
+- before each asset it waits until no interactive generation has run in
+  this process for `pregeneration_idle_seconds`.
+
+Spend is counted in estimated tokens per UTC day in `pregeneration_spend`,
+shared by all workers. A run stops once the day's spend reaches
+`pregeneration_daily_token_budget`. A job lease keeps runs to one worker at
+a time.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.watermarks import JobWatermark
+from app.services.transformation_service import (
+    VARIANT_STYLES, generate_asset_variants, generation_gate, variant_code
+)
+from app.utils.vocabulary import canonical_domain, canonical_hobbies, canonical_style
+
+logger = logging.getLogger(__name__)
+
+PREGENERATION_SPEND = "pregeneration_spend"
+
+Combination = Tuple[str, str]
+
+
+def in_window(hours: str, now: datetime) -> bool:
+    """
+    Whether now's hour is inside a "start-end" hour window.
+
+    The end hour is exclusive and the window may wrap midnight ("22-6").
+    An empty window means always.
+    """
+    if not hours.strip():
+        return True
+    start, end = (int(hour) % 24 for hour in hours.split("-"))
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def rank_combinations(users: Sequence[Dict[str, Any]], active: Set[str], limit: int) -> List[Tuple[Combination, int]]:
+    """Most common canonical (domain, hobby) pairs; active learners count twice."""
+    counts: Counter = Counter()
+    for user in users:
+        domain = canonical_domain(user.get("domain"))
+        if not domain:
+            continue
+        weight = 2 if str(user["_id"]) in active else 1
+        for hobby in canonical_hobbies(user.get("hobbies")).split(", "):
+            if hobby:
+                counts[(domain, hobby)] += weight
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def configured_styles() -> List[str]:
+    styles = [canonical_style(style) for style in settings.pregeneration_styles.split(",")]
+    return [style for style in styles if style in VARIANT_STYLES]
+
+
+class PregenerationService:
+    """Fills `assets` with variants for popular combinations during off-peak hours."""
+
+    def __init__(self):
+        self.lease = JobWatermark("pregeneration", lease_seconds=3600)
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def top_combinations(self, db: AsyncIOMotorDatabase, limit: int) -> List[Tuple[Combination, int]]:
+        since = datetime.utcnow() - timedelta(days=settings.pregeneration_active_days)
+        active = {str(user) for user in await db["userassetstatus"].distinct("user", {"last_accessed": {"$gte": since}})}
+        users = await db.users.find({}, {"domain": 1, "hobbies": 1}).to_list(length=None)
+        return rank_combinations(users, active, limit)
+
+    async def missing_variants(
+        self,
+        db: AsyncIOMotorDatabase,
+        combinations: Sequence[Combination],
+        styles: Sequence[str]
+    ) -> AsyncIterator[Tuple[Dict[str, Any], List[str], str, str]]:
+        """Yield (original asset, styles, domain, hobby) for styles without a stored variant, in module order."""
+        seen: Set[str] = set()
+        async for course in db.courses.find({}, {"modules.assets": 1}).sort("_id", 1):
+            for module in course.get("modules", []):
+                asset_ids = [ObjectId(str(asset_id)) for asset_id in module.get("assets", []) if ObjectId.is_valid(str(asset_id))]
+                originals = {
+                    asset["_id"]: asset
+                    async for asset in db.assets.find({"_id": {"$in": asset_ids}}, {"code": 1, "content": 1, "style": 1})
+                }
+                for asset_id in asset_ids:
+                    asset = originals.get(asset_id)
+                    if not asset or not asset.get("content") or asset.get("style", "original") != "original":
+                        continue
+                    code = str(asset.get("code") or asset_id)
+                    if code in seen:
+                        continue
+                    seen.add(code)
+                    existing = {
+                        (variant.get("style"), variant.get("domain"), variant.get("hobby"))
+                        async for variant in db.assets.find(
+                            {"code": {"$in": list({variant_code(code), code})}, "style": {"$in": list(styles)}, "keywords": None},
+                            {"style": 1, "domain": 1, "hobby": 1}
+                        )
+                    }
+                    for domain, hobby in combinations:
+                        missing = [style for style in styles if (style, domain, hobby) not in existing]
+                        if missing:
+                            yield asset, missing, domain, hobby
+
+    async def spent_today(self, db: AsyncIOMotorDatabase) -> int:
+        doc = await db[PREGENERATION_SPEND].find_one({"_id": datetime.utcnow().strftime("%Y-%m-%d")})
+        return int(doc.get("tokens", 0)) if doc else 0
+
+    async def _record_spend(self, db: AsyncIOMotorDatabase, tokens: int, variants: int):
+        await db[PREGENERATION_SPEND].update_one(
+            {"_id": datetime.utcnow().strftime("%Y-%m-%d")},
+            {"$inc": {"tokens": tokens, "variants": variants}},
+            upsert=True
+        )
+
+    async def _existing_styles(self, db: AsyncIOMotorDatabase, code: str, styles: List[str], domain: str, hobby: str) -> Set[str]:
+        return {
+            variant["style"]
+            async for variant in db.assets.find(
+                {
+                    "code": {"$in": list({variant_code(code), code})},
+                    "style": {"$in": styles},
+                    "domain": domain,
+                    "hobby": hobby,
+                    "keywords": None
+                },
+                {"style": 1}
+            )
+        }
+
+    async def run(self, db: AsyncIOMotorDatabase, force: bool = False) -> Dict[str, Any]:
+        """
+        Generate missing variants until done, out of budget or out of the window.
+
+        force ignores the off-peak window (not the budget).
+        """
+        if not force and not in_window(settings.pregeneration_hours, datetime.utcnow()):
+            return {"skipped": "outside the off-peak window"}
+        acquired, _ = await self.lease.acquire(db)
+        if not acquired:
+            return {"skipped": "another worker is pre-generating"}
+
+        report: Dict[str, Any] = {"generated": 0, "cached": 0, "skipped_existing": 0, "failed": 0, "tokens": 0}
+        try:
+            combinations = await self.top_combinations(db, settings.pregeneration_top_combinations)
+            report["combinations"] = [{"domain": domain, "hobby": hobby, "learners": count} for (domain, hobby), count in combinations]
+            budget = settings.pregeneration_daily_token_budget
+            spent = await self.spent_today(db)
+            stopped = "done"
+            async for asset, styles, domain, hobby in self.missing_variants(db, [pair for pair, _ in combinations], configured_styles()):
+                if not force and not in_window(settings.pregeneration_hours, datetime.utcnow()):
+                    stopped = "off-peak window ended"
+                    break
+                if spent >= budget:
+                    stopped = "daily budget reached"
+                    break
+                if report["generated"] + report["cached"] >= settings.pregeneration_max_per_run:
+                    stopped = "run limit reached"
+                    break
+                # A run can outlast one lease period; renew it before each asset
+                if not await self.lease.renew(db):
+                    stopped = "lease lost"
+                    break
+                await generation_gate.wait_idle(settings.pregeneration_idle_seconds)
+
+                code = str(asset.get("code") or asset["_id"])
+                # A learner may have generated some while this run waited
+                existing = await self._existing_styles(db, code, styles, domain, hobby)
+                report["skipped_existing"] += len(existing)
+                styles = [style for style in styles if style not in existing]
+                if not styles:
+                    continue
+                try:
+                    # All missing styles of the asset in one model call
+                    _, tokens = await generate_asset_variants(
+                        db, code, asset["content"], styles, domain, hobby, interactive=False
+                    )
+                except Exception as e:
+                    logger.warning(f"Pre-generation of {', '.join(styles)} for {code} ({domain}, {hobby}) failed: {e}")
+                    report["failed"] += len(styles)
+                    continue
+                report["generated" if tokens else "cached"] += len(styles)
+                if tokens:
+                    spent += tokens
+                    report["tokens"] += tokens
+                    await self._record_spend(db, tokens, len(styles))
+            report["stopped"] = stopped
+            report["spent_today"] = spent
+        finally:
+            await self.lease.release(db)
+
+        self.last_report = {**report, "finished_at": datetime.utcnow()}
+        logger.info(f"Pre-generation run: {report['generated']} generated, {report['cached']} from cache, stopped: {report['stopped']}")
+        return report
+
+    async def status(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        combinations = await self.top_combinations(db, settings.pregeneration_top_combinations)
+        return {
+            "enabled": settings.pregeneration_enabled,
+            "window": settings.pregeneration_hours,
+            "in_window": in_window(settings.pregeneration_hours, datetime.utcnow()),
+            "styles": configured_styles(),
+            "combinations": [{"domain": domain, "hobby": hobby, "learners": count} for (domain, hobby), count in combinations],
+            "budget": settings.pregeneration_daily_token_budget,
+            "spent_today": await self.spent_today(db),
+            "last_run": self.last_report
+        }
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Run pre-generation every pregeneration_interval_seconds inside the window (0 disables)."""
+        if db is None or not settings.pregeneration_enabled or settings.pregeneration_interval_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(settings.pregeneration_interval_seconds)
+            try:
+                await self.run(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Pre-generation run failed: {e}")
+
+
+pregeneration_service = PregenerationService()
@@ -0,0 +1,169 @@
+"""
+Write-behind buffer for high-frequency progress heartbeats.
+
+Players report progress every few seconds per learner. Only the latest state
+per (user, course, asset) matters, so heartbeats are coalesced in memory and
+written to `userassetstatus` with one unordered bulk_write per flush. Flushes
+run on an interval, early when the buffer reaches its size threshold, and once
+more (bounded by a timeout) at shutdown.
+
+Each buffered upsert only applies if the row was last written before the
+heartbeat. A batch that lands late, in flight during a written-through
+completion or retried after a failed flush, can't overwrite a newer state.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from prometheus_client import Counter
+
+from app.core.config import settings
+from app.schemas.user_asset_status import AssetStatus
+from app.services.user_asset_status_service import user_asset_status_service, utcnow_ms
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_HEARTBEATS = Counter("progress_heartbeats_total", "Progress updates accepted by the write-behind buffer")
+PROGRESS_WRITES = Counter("progress_buffer_writes_total", "userassetstatus upserts issued by buffer flushes")
+
+StatusKey = Tuple[str, str, str]
+
+
+class ProgressWriteBuffer:
+    """Coalesces progress updates and flushes them in bulk."""
+
+    def __init__(self, flush_interval: float = None, max_pending: int = None):
+        self.flush_interval = flush_interval or settings.progress_flush_interval_seconds
+        self.max_pending = max_pending or settings.progress_flush_max_pending
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._pending: Dict[StatusKey, Dict[str, Any]] = {}
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.heartbeats = 0
+        self.writes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, db: AsyncIOMotorDatabase):
+        if db is None or not settings.progress_buffer_enabled:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Progress write buffer flushing every {self.flush_interval}s or {self.max_pending} entries")
+
+    async def stop(self, timeout: float = None):
+        """Stop the flush loop and write whatever is still buffered, waiting at most timeout seconds."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        timeout = timeout or settings.progress_flush_shutdown_timeout_seconds
+        try:
+            await asyncio.wait_for(self.flush(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Progress buffer shutdown flush timed out; {len(self._pending)} updates dropped")
+
+    async def submit(
+        self,
+        course: str,
+        asset: str,
+        user: str,
+        status: str,
+        progress: Optional[int] = None
+    ) -> bool:
+        """
+        Record a progress update.
+
+        Returns True if it was buffered. Returns False if the caller should
+        write it directly: the buffer isn't running, or this is a `completed`
+        transition and those are configured to be written through.
+        """
+        key = (user, course, asset)
+        if not self.running:
+            return False
+        if status == AssetStatus.completed.value and settings.progress_completed_write_through:
+            # Drop any older heartbeat so a later flush can't overwrite the completion
+            self._pending.pop(key, None)
+            return False
+
+        previous = self._pending.get(key)
+        if progress is None and previous is not None:
+            progress = previous.get("progress")
+        self._pending[key] = {
+            "course": course,
+            "asset": asset,
+            "user": user,
+            "status": status,
+            "progress": progress,
+            "at": utcnow_ms()
+        }
+        self.heartbeats += 1
+        PROGRESS_HEARTBEATS.inc()
+
+        if len(self._pending) >= self.max_pending:
+            self._flush_requested.set()
+        return True
+
+    async def flush(self) -> int:
+        """Write all buffered updates; returns the number of upserts issued."""
+        async with self._flush_lock:
+            if not self._pending or self.db is None:
+                return 0
+            batch, self._pending = self._pending, {}
+
+            try:
+                result = await user_asset_status_service.bulk_upsert_statuses(self.db, batch.values())
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                self._requeue(batch)
+                logger.error(f"Progress buffer flush failed, will retry: {e}")
+                return 0
+
+            self.writes += len(batch)
+            PROGRESS_WRITES.inc(len(batch))
+            if result["errors"]:
+                logger.warning(f"Progress buffer flush had {len(result['errors'])} failed updates")
+            return len(batch)
+
+    def _requeue(self, batch: Dict[StatusKey, Dict[str, Any]]):
+        # Keep any newer heartbeat that arrived while the batch was in flight
+        for key, update in batch.items():
+            self._pending.setdefault(key, update)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Progress buffer flush loop error: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": len(self._pending),
+            "heartbeats": self.heartbeats,
+            "writes": self.writes,
+            "coalescing_ratio": round(self.heartbeats / self.writes, 2) if self.writes else None
+        }
+
+
+progress_buffer = ProgressWriteBuffer()
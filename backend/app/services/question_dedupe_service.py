@@ -0,0 +1,253 @@
+"""
+Near-duplicate detection for quiz and pool questions.
+
+`question_signatures` holds one document per indexed question with its
+MinHash signature and LSH band keys; a multikey (course_id, bands) index
+makes the candidate lookup for new questions one query. Quiz questions are
+keyed "<quiz_id>:<question index>" and pool questions "pool:<id>".
+
+New questions are checked against the course's indexed questions and against
+each other before insertion. Depending on `question_dedupe_mode` duplicates
+are dropped ("reject"), kept with a `duplicate_of` marker ("flag"), or not
+checked ("off"). The batch pass re-indexes existing quizzes and groups
+duplicates in memory; it only flags them, since removing questions would
+shift positional scoring of past attempts.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteMany, InsertOne, UpdateOne
+
+from app.core.cache import cache_invalidator
+from app.core.config import settings
+from app.services.minhash import band_keys, question_text, signatures, similarity
+
+logger = logging.getLogger(__name__)
+
+QUESTION_SIGNATURES = "question_signatures"
+WRITE_BATCH_SIZE = 1000
+
+
+def quiz_question_key(quiz_id: str, question_index: int) -> str:
+    return f"{quiz_id}:{question_index}"
+
+
+class QuestionDedupeService:
+    """Maintains the question signature index and finds near-duplicates."""
+
+    async def check_questions(
+        self,
+        db: AsyncIOMotorDatabase,
+        course_id: str,
+        questions: List[Dict[str, Any]],
+        keys: List[str],
+        ignore_keys: Sequence[str] = ()
+    ) -> Tuple[List[Dict[str, Any]], np.ndarray, List[Dict[str, Any]]]:
+        """
+        Apply the dedupe policy to questions about to be inserted.
+
+        keys are the index keys the questions will be stored under, so a
+        duplicate of an earlier question in the same batch points at that
+        question's key. Indexed questions under ignore_keys (ones about to be
+        replaced) are not matched against. Returns the questions to insert,
+        their signatures, and one report per duplicate found.
+        """
+        mode = settings.question_dedupe_mode
+        if mode == "off" or not questions:
+            return questions, signatures(question_text(question) for question in questions), []
+
+        threshold = settings.question_dedupe_threshold
+        sigs = signatures(question_text(question) for question in questions)
+        bands = [band_keys(sig) for sig in sigs]
+
+        query: Dict[str, Any] = {"course_id": course_id, "bands": {"$in": sorted({key for keys in bands for key in keys})}}
+        if ignore_keys:
+            query["_id"] = {"$nin": list(ignore_keys)}
+        candidates = await db[QUESTION_SIGNATURES].find(query, {"signature": 1, "bands": 1}).to_list(length=None)
+
+        kept: List[int] = []
+        duplicates = []
+        for i, sig in enumerate(sigs):
+            band_set = set(bands[i])
+            match: Optional[Tuple[str, float]] = None
+            for candidate in candidates:
+                if band_set.isdisjoint(candidate["bands"]):
+                    continue
+                score = similarity(sig, candidate["signature"])
+                if score >= threshold and (match is None or score > match[1]):
+                    match = (candidate["_id"], score)
+            # Earlier questions of the same batch count too
+            for j in kept:
+                if not band_set.isdisjoint(bands[j]):
+                    score = similarity(sig, sigs[j])
+                    if score >= threshold and (match is None or score > match[1]):
+                        # Flag mode keeps every position, so keys[j] is where question j ends up
+                        match = (keys[j], score)
+
+            if match is None:
+                kept.append(i)
+                continue
+            duplicates.append({"index": i, "duplicate_of": match[0], "similarity": round(match[1], 3)})
+            if mode == "flag":
+                questions[i] = {**questions[i], "duplicate_of": match[0], "duplicate_similarity": round(match[1], 3)}
+                kept.append(i)
+
+        if duplicates:
+            logger.info(f"Found {len(duplicates)} near-duplicate questions for course {course_id} ({mode})")
+        return [questions[i] for i in kept], sigs[kept], duplicates
+
+    async def index_questions(
+        self,
+        db: AsyncIOMotorDatabase,
+        course_id: str,
+        keys: List[str],
+        sigs: np.ndarray,
+        extra: Optional[List[Dict[str, Any]]] = None
+    ):
+        """Add (or replace) signature documents for the given question keys."""
+        if not keys:
+            return
+        now = datetime.utcnow()
+        operations = [DeleteMany({"_id": {"$in": keys}})] + [
+            InsertOne({
+                "_id": key,
+                "course_id": course_id,
+                "signature": sig.astype(np.int64).tolist(),
+                "bands": band_keys(sig),
+                **(extra[i] if extra else {}),
+                "created_at": now
+            })
+            for i, (key, sig) in enumerate(zip(keys, sigs))
+        ]
+        for start in range(0, len(operations), WRITE_BATCH_SIZE):
+            await db[QUESTION_SIGNATURES].bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=True)
+
+    async def index_quiz(
+        self,
+        db: AsyncIOMotorDatabase,
+        quiz_id: str,
+        course_id: str,
+        module_code: Optional[str],
+        questions: List[Dict[str, Any]],
+        sigs: Optional[np.ndarray] = None
+    ):
+        """Replace a quiz's signature documents with ones for its current questions."""
+        await self.remove_quiz(db, quiz_id)
+        if sigs is None:
+            sigs = signatures(question_text(question) for question in questions)
+        await self.index_questions(
+            db, course_id,
+            [quiz_question_key(quiz_id, i) for i in range(len(questions))],
+            sigs,
+            [{"quiz_id": quiz_id, "module_code": module_code, "question_index": i} for i in range(len(questions))]
+        )
+
+    async def remove_quiz(self, db: AsyncIOMotorDatabase, quiz_id: str):
+        """Drop a deleted quiz from the index so its questions no longer count as duplicates."""
+        await db[QUESTION_SIGNATURES].delete_many({"quiz_id": quiz_id})
+
+    async def remove_module_quizzes(self, db: AsyncIOMotorDatabase, course_id: str, module_code: str):
+        await db[QUESTION_SIGNATURES].delete_many(
+            {"course_id": course_id, "module_code": module_code, "quiz_id": {"$exists": True}}
+        )
+
+    async def remove_module_pool(self, db: AsyncIOMotorDatabase, course_id: str, module_code: str):
+        await db[QUESTION_SIGNATURES].delete_many(
+            {"course_id": course_id, "module_code": module_code, "pool_question_id": {"$exists": True}}
+        )
+
+    async def remove_pool_questions(self, db: AsyncIOMotorDatabase, question_ids: List[str]):
+        await db[QUESTION_SIGNATURES].delete_many({"_id": {"$in": [f"pool:{question_id}" for question_id in question_ids]}})
+
+    async def dedupe_quizzes(self, db: AsyncIOMotorDatabase, course_id: Optional[str] = None, apply: bool = False) -> Dict[str, Any]:
+        """
+        Re-index every active quiz (of one course, or all) and group near-duplicate questions.
+
+        With apply, every question after the first of a group gets a `duplicate_of` marker.
+        """
+        started = datetime.utcnow()
+        query: Dict[str, Any] = {"is_deleted": False, "assembled_for": {"$exists": False}}
+        if course_id:
+            query["course_id"] = course_id
+        quizzes = await db.quizzes.find(
+            query, {"course_id": 1, "module_code": 1, "questions.question": 1, "questions.options": 1, "created_at": 1}
+        ).sort("created_at", 1).to_list(length=None)
+
+        keys: List[str] = []
+        courses: List[str] = []
+        locations: List[Dict[str, Any]] = []
+        texts: List[str] = []
+        for quiz in quizzes:
+            for i, question in enumerate(quiz.get("questions", [])):
+                keys.append(quiz_question_key(str(quiz["_id"]), i))
+                courses.append(quiz["course_id"])
+                locations.append({"quiz_id": str(quiz["_id"]), "module_code": quiz.get("module_code"), "question_index": i})
+                texts.append(question_text(question))
+        sigs = signatures(texts)
+
+        # Bucket by (course, band key); the earliest question of a group is the original
+        threshold = settings.question_dedupe_threshold
+        buckets: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        original = list(range(len(keys)))
+        best = [0.0] * len(keys)
+        for i, sig in enumerate(sigs):
+            for key in band_keys(sig):
+                bucket = buckets[(courses[i], key)]
+                for j in bucket:
+                    if original[j] != j or original[i] == j:
+                        continue
+                    score = similarity(sig, sigs[j])
+                    if score >= threshold and score > best[i]:
+                        original[i], best[i] = j, score
+                bucket.append(i)
+
+        groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for i, j in enumerate(original):
+            if j != i:
+                groups[keys[j]].append({"question": keys[i], "similarity": round(best[i], 3)})
+
+        await db[QUESTION_SIGNATURES].delete_many({"quiz_id": {"$exists": True}, **({"course_id": course_id} if course_id else {})})
+        by_course: Dict[str, List[int]] = defaultdict(list)
+        for i, course in enumerate(courses):
+            by_course[course].append(i)
+        for course, indexes in by_course.items():
+            await self.index_questions(
+                db, course, [keys[i] for i in indexes], sigs[indexes], [locations[i] for i in indexes]
+            )
+
+        flagged = 0
+        if apply and groups:
+            operations = []
+            for original_key, members in groups.items():
+                for member in members:
+                    quiz_id, index = member["question"].rsplit(":", 1)
+                    operations.append(UpdateOne(
+                        {"_id": ObjectId(quiz_id)},
+                        {"$set": {
+                            f"questions.{index}.duplicate_of": original_key,
+                            f"questions.{index}.duplicate_similarity": member["similarity"]
+                        }}
+                    ))
+            for start in range(0, len(operations), WRITE_BATCH_SIZE):
+                await db.quizzes.bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=False)
+            flagged = len(operations)
+            await cache_invalidator.notify_write("quizzes")
+
+        return {
+            "quizzes": len(quizzes),
+            "questions": len(keys),
+            "duplicate_groups": len(groups),
+            "duplicates": sum(len(members) for members in groups.values()),
+            "flagged": flagged,
+            "groups": [{"original": key, "duplicates": members} for key, members in groups.items()],
+            "elapsed_seconds": round((datetime.utcnow() - started).total_seconds(), 3)
+        }
+
+
+question_dedupe_service = QuestionDedupeService()
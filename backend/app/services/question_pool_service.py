@@ -0,0 +1,380 @@
+"""
+Per-module question pools and adaptive quiz assembly.
+
+A pool is generated once per module with a few LLM calls (one per difficulty
+level) and stored one question per document in `question_pool`. Each question
+carries a difficulty on the IRT ability scale. It starts from its
+self-reported level and is replaced by the calibrated value once learners
+have answered it (see irt_calibration_service).
+
+Serving a quiz never calls the LLM. A learner's quiz is assembled from the
+module's `PoolIndex`, the pool's difficulties sorted once and cached, as
+follows:
+
+- exclude questions the learner was given recently
+- binary-search the window of questions around the learner's ability
+- sample by Fisher information
+- shuffle each question's options
+
+The result is stored as a regular quiz document marked `assembled_for` the
+learner, so attempts, scoring, analytics and reviews work unchanged.
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+
+from app.core.cache import cache_invalidator, question_pool_cache
+from app.core.config import settings
+from app.models.quiz import Quiz
+from app.schemas.quiz import QuizQuestion
+from app.services.course_service import CourseService
+from app.services.irt import DIFFICULTY_PRIORS
+from app.services.llm_service import llm_service, LLMRequest, ResultType, LLMProvider
+from app.services.question_dedupe_service import question_dedupe_service
+from app.services.quiz_service import QuizService
+
+logger = logging.getLogger(__name__)
+
+QUESTION_POOL = "question_pool"
+DIFFICULTY_LEVELS = ("easy", "medium", "hard")
+
+# Candidates considered per question served, nearest to the learner's ability
+WINDOW_PER_QUESTION = 3
+
+
+def pool_key(course_id: str, module_code: str) -> str:
+    return f"{course_id}:{module_code}"
+
+
+class PoolIndex:
+    """Immutable difficulty-sorted view of one module's active pool questions."""
+
+    __slots__ = ("ids", "difficulty", "discrimination")
+
+    def __init__(self, ids: Sequence[str], difficulty: Sequence[float], discrimination: Sequence[float]):
+        order = np.argsort(np.asarray(difficulty, dtype=np.float64), kind="stable")
+        self.ids = [ids[i] for i in order]
+        self.difficulty = np.asarray(difficulty, dtype=np.float64)[order]
+        self.discrimination = np.asarray(discrimination, dtype=np.float64)[order]
+        self.difficulty.setflags(write=False)
+        self.discrimination.setflags(write=False)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __deepcopy__(self, memo):
+        # Read-only, so the cache can hand out the same instance
+        return self
+
+    def select(self, ability: float, count: int, exclude: Set[str], rng: np.random.Generator) -> List[str]:
+        """
+        Pick count questions for a learner of the given ability.
+
+        Unseen questions come first; recently seen ones only fill the quiz
+        when too few unseen questions remain.
+        """
+        seen = np.array([question_id in exclude for question_id in self.ids], dtype=bool)
+        chosen = self._select_from(np.flatnonzero(~seen), ability, count, rng)
+        if len(chosen) < count:
+            chosen += self._select_from(np.flatnonzero(seen), ability, count - len(chosen), rng)
+        return [self.ids[i] for i in chosen]
+
+    def _select_from(self, candidates: np.ndarray, ability: float, count: int, rng: np.random.Generator) -> List[int]:
+        if count <= 0 or len(candidates) == 0:
+            return []
+        if len(candidates) <= count:
+            return candidates.tolist()
+
+        # Candidates are in difficulty order, so the nearest ones are a contiguous window
+        width = min(len(candidates), count * WINDOW_PER_QUESTION)
+        center = int(np.searchsorted(self.difficulty[candidates], ability))
+        start = min(max(center - width // 2, 0), len(candidates) - width)
+        window = candidates[start:start + width]
+
+        # Fisher information of each question at this ability
+        a = self.discrimination[window]
+        p = 1 / (1 + np.exp(-a * (ability - self.difficulty[window])))
+        information = a * a * p * (1 - p) + 1e-9
+        return rng.choice(window, size=count, replace=False, p=information / information.sum()).tolist()
+
+
+def shuffle_options(question: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    """Copy of question with its options in random order and correct_answer remapped."""
+    options = question["options"]
+    order = rng.permutation(len(options))
+    return {
+        **question,
+        "options": [options[i] for i in order],
+        "correct_answer": int(np.flatnonzero(order == question["correct_answer"])[0])
+    }
+
+
+class QuestionPoolService:
+    """Generates question pools and assembles learner quizzes from them."""
+
+    async def generate_pool(
+        self,
+        db: AsyncIOMotorDatabase,
+        course_id: str,
+        module_code: str,
+        module_title: str,
+        module_content: str,
+        pool_size: int,
+        replacing: Sequence[str] = ()
+    ) -> Dict[str, int]:
+        """
+        Generate and store a module's pool; returns the number stored per difficulty.
+
+        replacing lists the ids of pool questions this pool will supersede; they
+        stay active but new questions are not rejected as duplicates of them.
+        """
+        per_level = math.ceil(pool_size / len(DIFFICULTY_LEVELS))
+        content = f"Module: {module_title}\n\nContent:\n{module_content}"
+        responses = await asyncio.gather(*[
+            llm_service.generate_content(LLMRequest(
+                content=content,
+                result_type=ResultType.QUIZ_MCQ,
+                additional_params={"num_questions": per_level, "difficulty": level, "num_options": 4},
+                provider=LLMProvider.GOOGLE,
+                max_tokens=min(400 * per_level, 8000),
+                temperature=0.7
+            ))
+            for level in DIFFICULTY_LEVELS
+        ])
+
+        now = datetime.utcnow()
+        docs = []
+        counts = {}
+        for level, response in zip(DIFFICULTY_LEVELS, responses):
+            counts[level] = 0
+            if not response.success or not isinstance(response.result, dict):
+                logger.error(f"Pool generation failed for {course_id}/{module_code} ({level}): {response.error_message}")
+                continue
+            for raw in response.result.get("questions", []):
+                try:
+                    question = QuizQuestion(**raw).dict()
+                except (ValidationError, TypeError) as e:
+                    logger.warning(f"Skipping invalid pool question: {e}")
+                    continue
+                docs.append({
+                    "_id": ObjectId(),
+                    "course_id": course_id,
+                    "module_code": module_code,
+                    **question,
+                    "difficulty_level": level,
+                    "difficulty": DIFFICULTY_PRIORS[level],
+                    "discrimination": 1.0,
+                    "calibrated": False,
+                    "is_active": True,
+                    "created_at": now
+                })
+
+        # Levels are generated independently, so overlap between (and within) them is common
+        docs, signatures, _ = await question_dedupe_service.check_questions(
+            db, course_id, docs,
+            keys=[f"pool:{doc['_id']}" for doc in docs],
+            ignore_keys=[f"pool:{question_id}" for question_id in replacing]
+        )
+        for doc in docs:
+            counts[doc["difficulty_level"]] += 1
+
+        if docs:
+            await db[QUESTION_POOL].insert_many(docs, ordered=False)
+            await question_dedupe_service.index_questions(
+                db, course_id,
+                [f"pool:{doc['_id']}" for doc in docs],
+                signatures,
+                [{"pool_question_id": str(doc["_id"]), "module_code": module_code} for doc in docs]
+            )
+            await cache_invalidator.notify_write(QUESTION_POOL, None, {"course_id": course_id, "module_code": module_code})
+        logger.info(f"Generated question pool for {course_id}/{module_code}: {counts}")
+        return counts
+
+    async def deactivate_pool(
+        self,
+        db: AsyncIOMotorDatabase,
+        course_id: str,
+        module_code: str,
+        question_ids: Optional[List[str]] = None
+    ) -> int:
+        """Deactivate a module's active pool, or only the given questions of it."""
+        query: Dict[str, Any] = {"course_id": course_id, "module_code": module_code, "is_active": True}
+        if question_ids is not None:
+            query["_id"] = {"$in": [ObjectId(question_id) for question_id in question_ids]}
+        result = await db[QUESTION_POOL].update_many(query, {"$set": {"is_active": False, "updated_at": datetime.utcnow()}})
+        if question_ids is None:
+            await question_dedupe_service.remove_module_pool(db, course_id, module_code)
+        else:
+            await question_dedupe_service.remove_pool_questions(db, question_ids)
+        await cache_invalidator.notify_write(QUESTION_POOL, None, {"course_id": course_id, "module_code": module_code})
+        return result.modified_count
+
+    async def pool_size(self, db: AsyncIOMotorDatabase, course_id: str, module_code: str) -> int:
+        return len(await self.get_pool_index(db, course_id, module_code) or [])
+
+    async def get_pool_index(self, db: AsyncIOMotorDatabase, course_id: str, module_code: str) -> Optional[PoolIndex]:
+        """The module's difficulty index, loaded from the (course, module, active, difficulty) index on a miss."""
+        async def load() -> Optional[PoolIndex]:
+            docs = await db[QUESTION_POOL].find(
+                {"course_id": course_id, "module_code": module_code, "is_active": True},
+                {"difficulty": 1, "discrimination": 1}
+            ).sort("difficulty", 1).to_list(length=None)
+            if not docs:
+                return None
+            return PoolIndex(
+                [str(doc["_id"]) for doc in docs],
+                [doc["difficulty"] for doc in docs],
+                [doc.get("discrimination", 1.0) for doc in docs]
+            )
+
+        return await question_pool_cache.get_or_load(pool_key(course_id, module_code), load)
+
+    async def _recent_question_ids(self, db: AsyncIOMotorDatabase, user_id: str, course_id: str, module_code: str) -> Set[str]:
+        since = datetime.utcnow() - timedelta(days=settings.question_pool_recent_days)
+        recent = set()
+        async for quiz in db.quizzes.find(
+            {
+                "assembled_for": user_id,
+                "course_id": course_id,
+                "module_code": module_code,
+                "created_at": {"$gte": since}
+            },
+            {"questions.pool_question_id": 1}
+        ):
+            recent.update(question.get("pool_question_id") for question in quiz.get("questions", []))
+        return recent
+
+    async def assemble_quiz(
+        self,
+        db: AsyncIOMotorDatabase,
+        user_id: str,
+        course_id: str,
+        module_code: str,
+        num_questions: int
+    ) -> Optional[Quiz]:
+        """Assemble and store a quiz for user_id from the module's pool; None when there is no pool."""
+        index = await self.get_pool_index(db, course_id, module_code)
+        if not index:
+            return None
+
+        ability_doc = await db.irt_user_abilities.find_one({"_id": user_id}, {"ability": 1})
+        ability = ability_doc["ability"] if ability_doc else 0.0
+        recent = await self._recent_question_ids(db, user_id, course_id, module_code)
+
+        rng = np.random.default_rng()
+        selected = index.select(ability, num_questions, recent, rng)
+        docs = {
+            str(doc["_id"]): doc
+            async for doc in db[QUESTION_POOL].find({"_id": {"$in": [ObjectId(i) for i in selected]}})
+        }
+
+        questions = []
+        for question_id in selected:
+            doc = docs.get(question_id)
+            if doc is None:
+                continue
+            question = shuffle_options({
+                "question": doc["question"],
+                "options": doc["options"],
+                "correct_answer": doc["correct_answer"],
+                "explanation": doc.get("explanation")
+            }, rng)
+            question["pool_question_id"] = question_id
+            question["difficulty"] = doc.get("difficulty_level")
+            questions.append(question)
+        if not questions:
+            return None
+
+        course = await CourseService(db).get_course(course_id)
+        module_title = next(
+            (module.get("title") for module in (course or {}).get("modules", []) if str(module.get("code")) == module_code),
+            None
+        ) or module_code
+
+        now = datetime.utcnow()
+        quiz_doc = {
+            "_id": ObjectId(),
+            "course_id": course_id,
+            "module_code": module_code,
+            "title": f"Quiz: {module_title}",
+            "description": f"Adaptive quiz for module: {module_title}",
+            "difficulty": "medium",
+            "questions": questions,
+            "total_questions": len(questions),
+            "estimated_time_minutes": len(questions) * 2,
+            "is_active": True,
+            "is_deleted": False,
+            "generated_by_ai": True,
+            "assembled_for": user_id,
+            "target_ability": round(float(ability), 4),
+            "created_at": now,
+            "updated_at": now
+        }
+        await db.quizzes.insert_one(quiz_doc)
+        return Quiz.from_mongo_dict(quiz_doc)
+
+    async def generate_pools_for_course(
+        self,
+        db: AsyncIOMotorDatabase,
+        course_id: str,
+        module_code: Optional[str],
+        pool_size: int,
+        overwrite: bool
+    ) -> Dict[str, Any]:
+        """Generate pools for one module or every module of a course."""
+        result = {"success": True, "message": "", "pools": [], "skipped_modules": [], "errors": []}
+        modules = await QuizService().get_course_modules_info(db, course_id, module_code)
+        if not modules:
+            result["success"] = False
+            result["message"] = "Course or module not found"
+            return result
+
+        for module in modules:
+            if not module.module_code:
+                continue
+            # Read from the collection, not the cached index, so no active question is left behind
+            replacing = [
+                str(doc["_id"])
+                async for doc in db[QUESTION_POOL].find(
+                    {"course_id": course_id, "module_code": module.module_code, "is_active": True}, {"_id": 1}
+                )
+            ]
+            if replacing and not overwrite:
+                result["skipped_modules"].append(module.module_code)
+                continue
+            # The old pool keeps serving until its replacement is stored
+            try:
+                counts = await self.generate_pool(
+                    db, course_id, module.module_code,
+                    module.module_title or module.module_code,
+                    module.assets_content or "",
+                    pool_size,
+                    replacing=replacing
+                )
+            except Exception as e:
+                logger.error(f"Error generating question pool for module {module.module_code}: {e}")
+                result["errors"].append(f"Failed to generate pool for module {module.module_code}: {str(e)}")
+                continue
+            if sum(counts.values()):
+                if replacing:
+                    await self.deactivate_pool(db, course_id, module.module_code, replacing)
+                result["pools"].append({"module_code": module.module_code, "questions": counts})
+            else:
+                result["errors"].append(f"No valid questions generated for module {module.module_code}")
+
+        result["success"] = bool(result["pools"]) or (not result["errors"] and bool(result["skipped_modules"]))
+        result["message"] = (
+            f"Generated {len(result['pools'])} pools, skipped {len(result['skipped_modules'])} existing pools"
+        )
+        return result
+
+
+question_pool_service = QuestionPoolService()
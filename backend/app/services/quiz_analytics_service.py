@@ -0,0 +1,284 @@
+"""
+Materialized quiz analytics.
+
+Two rollups are maintained from `quiz_attempts` with `$merge` aggregation runs:
+
+- `quiz_stats`: one document per quiz with the attempt count and score sums.
+- `quiz_question_stats`: one document per (quiz, question position, selected
+  option) with the answer count and the sums of the attempts' total scores.
+
+Each run finds the quizzes with attempts between the `quiz_stats` high-water
+mark and a settled upper bound, and recomputes their rollups from all of
+their attempts up to that bound, replacing the stored documents. A run that
+fails or loses its lease part-way can therefore be repeated without counting
+any attempt twice. Per-question figures
+(option distribution, percent correct, point-biserial discrimination) are
+derived from those sums and the current answer key when read, so they stay
+correct when the answer key changes. A regrade changes stored scores, so it
+rebuilds the affected quiz from scratch.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+from app.core.watermarks import JobWatermark, settled_upper_bound
+from app.services.quiz_scoring import get_answer_key
+
+logger = logging.getLogger(__name__)
+
+QUIZ_STATS = "quiz_stats"
+QUIZ_QUESTION_STATS = "quiz_question_stats"
+# Quizzes recomputed per pipeline run
+QUIZ_BATCH_SIZE = 100
+
+
+def _quiz_stats_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": "$quiz_id",
+                "attempts": {"$sum": 1},
+                "score_sum": {"$sum": "$score"},
+                "score_sq_sum": {"$sum": {"$multiply": ["$score", "$score"]}},
+                "percentage_sum": {"$sum": "$percentage"},
+                "max_score": {"$max": "$max_score"},
+                "last_attempt_at": {"$max": "$completed_at"}
+            }
+        },
+        {"$merge": {"into": QUIZ_STATS, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+
+def _question_stats_pipeline(match: Dict[str, Any]) -> List[Dict[str, Any]]:
+    # Scoring is positional, so the question is the answer's position in the attempt
+    return [
+        {"$match": match},
+        {"$project": {"quiz_id": 1, "score": 1, "answers.selected_answer": 1}},
+        {"$unwind": {"path": "$answers", "includeArrayIndex": "question_index"}},
+        {
+            "$group": {
+                "_id": {
+                    "quiz_id": "$quiz_id",
+                    "question_index": "$question_index",
+                    "option": "$answers.selected_answer"
+                },
+                "attempts": {"$sum": 1},
+                "score_sum": {"$sum": "$score"},
+                "score_sq_sum": {"$sum": {"$multiply": ["$score", "$score"]}}
+            }
+        },
+        {
+            "$project": {
+                "_id": {
+                    "$concat": [
+                        "$_id.quiz_id", ":",
+                        {"$toString": "$_id.question_index"}, ":",
+                        {"$toString": {"$ifNull": ["$_id.option", "none"]}}
+                    ]
+                },
+                "quiz_id": "$_id.quiz_id",
+                "question_index": "$_id.question_index",
+                "option": "$_id.option",
+                "attempts": 1,
+                "score_sum": 1,
+                "score_sq_sum": 1
+            }
+        },
+        {"$merge": {"into": QUIZ_QUESTION_STATS, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]
+
+
+def point_biserial(n: float, correct: float, score_sum: float, score_sq_sum: float, correct_score_sum: float) -> Optional[float]:
+    """
+    Correlation between answering one question correctly and the total score.
+
+    Computed from additive sums: n answers, `correct` of them right, the sum
+    and sum of squares of total scores, and the total-score sum of the right ones.
+    """
+    if n < 2:
+        return None
+    p = correct / n
+    mean = score_sum / n
+    variance = score_sq_sum / n - mean * mean
+    if p in (0.0, 1.0) or variance <= 0:
+        return None
+    covariance = correct_score_sum / n - p * mean
+    return covariance / math.sqrt(p * (1 - p) * variance)
+
+
+def option_distribution(options: Dict[Any, Dict[str, Any]]) -> Dict[str, int]:
+    """Answer count per selected option, keyed by the option as a string (legacy unanswered rows have None)."""
+    return {str(option): row["attempts"] for option, row in sorted(options.items(), key=lambda item: str(item[0]))}
+
+
+class QuizAnalyticsService:
+    """Maintains and serves the quiz analytics rollups."""
+
+    def __init__(self):
+        self.watermark = JobWatermark(QUIZ_STATS)
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Recompute the rollups of quizzes attempted since the last run."""
+        acquired, last_id = await self.watermark.acquire(db)
+        if not acquired:
+            return {"ran": False, "reason": "another refresh is running"}
+
+        upper_id = settled_upper_bound(settings.quiz_analytics_settle_seconds)
+        if upper_id <= last_id:
+            await self.watermark.release(db)
+            return {"ran": True, "attempts": 0, "high_water_mark": str(last_id)}
+
+        window = {"_id": {"$gt": last_id, "$lt": upper_id}}
+        try:
+            quiz_ids = sorted(await db.quiz_attempts.distinct("quiz_id", window))
+            attempts = await db.quiz_attempts.count_documents(window) if quiz_ids else 0
+            for start in range(0, len(quiz_ids), QUIZ_BATCH_SIZE):
+                batch = quiz_ids[start:start + QUIZ_BATCH_SIZE]
+                if not await self._run_pipelines(db, {"quiz_id": {"$in": batch}, "_id": {"$lt": upper_id}}):
+                    # Recomputing is idempotent, so the next run simply repeats this window
+                    logger.warning("Quiz analytics refresh lost its lease; the mark was not moved")
+                    return {"ran": False, "reason": "lease lost"}
+        except Exception:
+            await self.watermark.release(db)
+            raise
+
+        await self.watermark.commit(db, upper_id)
+        logger.info(f"Quiz analytics recomputed {len(quiz_ids)} quizzes for {attempts} new attempts up to {upper_id}")
+        return {"ran": True, "attempts": attempts, "quizzes": len(quiz_ids), "high_water_mark": str(upper_id)}
+
+    async def rebuild_quiz(self, db: AsyncIOMotorDatabase, quiz_id: str, wait_seconds: float = 30) -> bool:
+        """
+        Recompute one quiz's rollups from all attempts up to the current mark (e.g. after a regrade).
+
+        Holds the refresh lease, so a refresh can't move the mark and fold in
+        attempts between the delete and the recompute. Waits up to
+        wait_seconds for a running refresh; returns whether the rebuild ran to the end.
+        """
+        deadline = time.monotonic() + wait_seconds
+        acquired, last_id = await self.watermark.acquire(db)
+        while not acquired and time.monotonic() < deadline:
+            await asyncio.sleep(1)
+            acquired, last_id = await self.watermark.acquire(db)
+        if not acquired:
+            logger.warning(f"Quiz analytics rebuild of {quiz_id} skipped: a refresh held the lease for {wait_seconds}s")
+            return False
+
+        try:
+            await db[QUIZ_STATS].delete_one({"_id": quiz_id})
+            await db[QUIZ_QUESTION_STATS].delete_many({"quiz_id": quiz_id})
+            rebuilt = await self._run_pipelines(db, {"quiz_id": quiz_id, "_id": {"$lte": last_id}})
+        finally:
+            await self.watermark.release(db)
+        return rebuilt
+
+    async def _run_pipelines(self, db: AsyncIOMotorDatabase, match: Dict[str, Any]) -> bool:
+        """Run both rollup pipelines over match, renewing the lease before each; False if it was lost."""
+        for pipeline in (_quiz_stats_pipeline(match), _question_stats_pipeline(match)):
+            if not await self.watermark.renew(db):
+                return False
+            # $merge writes server-side; iterating the (empty) cursor runs the pipeline
+            await db.quiz_attempts.aggregate(pipeline).to_list(length=None)
+        return True
+
+    async def get_quiz_analytics(self, db: AsyncIOMotorDatabase, quiz_id: str) -> Optional[Dict[str, Any]]:
+        """Quiz-level and per-question statistics for one quiz, read from the rollups."""
+        stats = await db[QUIZ_STATS].find_one({"_id": quiz_id})
+        if not stats:
+            return None
+
+        attempts = stats.get("attempts", 0)
+        mean_score = stats["score_sum"] / attempts if attempts else 0
+        variance = stats["score_sq_sum"] / attempts - mean_score ** 2 if attempts else 0
+        summary = {
+            "quiz_id": quiz_id,
+            "attempts": attempts,
+            "max_score": stats.get("max_score"),
+            "mean_score": round(mean_score, 3),
+            "score_std": round(math.sqrt(max(variance, 0)), 3),
+            "mean_percentage": round(stats["percentage_sum"] / attempts, 1) if attempts else 0,
+            "last_attempt_at": stats.get("last_attempt_at")
+        }
+
+        answer_key = await get_answer_key(db, quiz_id)
+        questions: Dict[int, Dict[str, Any]] = {}
+        async for row in db[QUIZ_QUESTION_STATS].find({"quiz_id": quiz_id}):
+            question = questions.setdefault(row["question_index"], {
+                "n": 0, "score_sum": 0, "score_sq_sum": 0, "options": {}
+            })
+            question["n"] += row["attempts"]
+            question["score_sum"] += row["score_sum"]
+            question["score_sq_sum"] += row["score_sq_sum"]
+            question["options"][row["option"]] = row
+
+        summary["questions"] = []
+        for index in sorted(questions):
+            question = questions[index]
+            correct_option = (
+                int(answer_key.correct[index]) if answer_key and index < answer_key.max_score else None
+            )
+            correct_row = question["options"].get(correct_option, {})
+            correct = correct_row.get("attempts", 0)
+            discrimination = point_biserial(
+                question["n"], correct, question["score_sum"], question["score_sq_sum"],
+                correct_row.get("score_sum", 0)
+            )
+            summary["questions"].append({
+                "question_index": index,
+                "answers": question["n"],
+                "correct_answer": correct_option,
+                "percent_correct": round(correct / question["n"] * 100, 1) if question["n"] else 0,
+                "option_distribution": option_distribution(question["options"]),
+                "discrimination_index": round(discrimination, 3) if discrimination is not None else None
+            })
+        return summary
+
+    async def get_quizzes_summary(self, db: AsyncIOMotorDatabase, quiz_ids: List[str]) -> List[Dict[str, Any]]:
+        """Quiz-level statistics for many quizzes in one query."""
+        summaries = []
+        async for stats in db[QUIZ_STATS].find({"_id": {"$in": quiz_ids}}):
+            attempts = stats.get("attempts", 0)
+            summaries.append({
+                "quiz_id": stats["_id"],
+                "attempts": attempts,
+                "max_score": stats.get("max_score"),
+                "mean_score": round(stats["score_sum"] / attempts, 3) if attempts else 0,
+                "mean_percentage": round(stats["percentage_sum"] / attempts, 1) if attempts else 0,
+                "last_attempt_at": stats.get("last_attempt_at")
+            })
+        return summaries
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Refresh the rollups periodically (quiz_analytics_refresh_seconds, 0 disables)."""
+        if db is None or settings.quiz_analytics_refresh_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(settings.quiz_analytics_refresh_seconds)
+            try:
+                await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Quiz analytics refresh failed: {e}")
+
+
+quiz_analytics_service = QuizAnalyticsService()
@@ -0,0 +1,118 @@
+"""
+Regrade quiz attempts after a quiz's answer key changes.
+
+Attempts record the `answer_key_version` they were scored against. A regrade
+streams the attempts whose version differs from the quiz's current one,
+rescores them a batch at a time with one NumPy comparison per batch, and writes
+the new scores with an unordered bulk_write per batch.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.services.quiz_scoring import (
+    UNANSWERED, AnswerKey, get_answer_key, percentage, score_matrix
+)
+from app.services.quiz_analytics_service import quiz_analytics_service
+
+logger = logging.getLogger(__name__)
+
+REGRADE_BATCH_SIZE = 1000
+
+
+class QuizRegradeService:
+    """Service for rescoring stored quiz attempts."""
+
+    async def regrade_quiz(
+        self,
+        db: AsyncIOMotorDatabase,
+        quiz_id: str,
+        batch_size: int = REGRADE_BATCH_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Rescore every attempt of quiz_id that was graded with an older answer key.
+
+        Returns counts and throughput for the run.
+        """
+        answer_key = await get_answer_key(db, quiz_id)
+        if not answer_key:
+            raise ValueError("Quiz not found")
+
+        started = time.perf_counter()
+        processed = changed = batches = 0
+
+        cursor = db.quiz_attempts.find(
+            {"quiz_id": quiz_id, "answer_key_version": {"$ne": answer_key.version}},
+            {"answers.selected_answer": 1, "score": 1, "percentage": 1}
+        ).batch_size(batch_size)
+
+        batch: List[Dict[str, Any]] = []
+        async for attempt in cursor:
+            batch.append(attempt)
+            if len(batch) == batch_size:
+                changed += await self._regrade_batch(db, answer_key, batch)
+                processed += len(batch)
+                batches += 1
+                batch = []
+        if batch:
+            changed += await self._regrade_batch(db, answer_key, batch)
+            processed += len(batch)
+            batches += 1
+
+        elapsed = time.perf_counter() - started
+        if changed:
+            # Analytics sums include total scores, so rebuild this quiz's rollups
+            await quiz_analytics_service.rebuild_quiz(db, quiz_id)
+
+        report = {
+            "quiz_id": quiz_id,
+            "answer_key_version": answer_key.version,
+            "processed": processed,
+            "changed": changed,
+            "batches": batches,
+            "elapsed_seconds": round(elapsed, 3),
+            "attempts_per_second": round(processed / elapsed, 1) if elapsed > 0 else None
+        }
+        logger.info(
+            f"Regraded quiz {quiz_id}: {processed} attempts ({changed} changed) in {elapsed:.2f}s, "
+            f"{report['attempts_per_second']} attempts/s"
+        )
+        return report
+
+    async def _regrade_batch(self, db: AsyncIOMotorDatabase, answer_key: AnswerKey, batch: List[Dict[str, Any]]) -> int:
+        """Rescore and write one batch; returns how many scores changed."""
+        max_score = answer_key.max_score
+        selected = np.full((len(batch), max_score), UNANSWERED, dtype=np.int32)
+        for row, attempt in enumerate(batch):
+            values = [answer.get("selected_answer", UNANSWERED) for answer in attempt.get("answers", [])[:max_score]]
+            selected[row, :len(values)] = values
+
+        scores = score_matrix(answer_key, selected)
+        percentages = percentage(scores, max_score)
+        old_scores = np.array([attempt.get("score", -1) for attempt in batch])
+
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": attempt["_id"]},
+                {"$set": {
+                    "score": int(scores[row]),
+                    "max_score": max_score,
+                    "percentage": int(percentages[row]),
+                    "answer_key_version": answer_key.version,
+                    "regraded_at": now
+                }}
+            )
+            for row, attempt in enumerate(batch)
+        ]
+        await db.quiz_attempts.bulk_write(operations, ordered=False)
+        return int(np.count_nonzero(scores != old_scores))
+
+
+quiz_regrade_service = QuizRegradeService()
@@ -0,0 +1,98 @@
+"""
+Answer keys and vectorized scoring for quiz attempts.
+
+An answer key is the compact array of correct option indices for a quiz plus
+the quiz's `answer_key_version`, which `update_quiz` bumps whenever questions
+change. Keys are cached in `answer_key_cache`, so a submission against a warm
+key never reads the quiz document.
+
+Scoring is positional, as it has always been: the i-th answer in an attempt is
+compared with the i-th question's correct answer.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.cache import answer_key_cache
+
+logger = logging.getLogger(__name__)
+
+# Fills unanswered slots; never equal to a correct answer (which is >= 0) or to a missing key (-1)
+UNANSWERED = -2
+
+
+class AnswerKey:
+    """Immutable correct-answer array for one version of a quiz."""
+
+    __slots__ = ("quiz_id", "version", "correct")
+
+    def __init__(self, quiz_id: str, version: int, correct: Sequence[int]):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.correct = np.asarray(correct, dtype=np.int32)
+        self.correct.setflags(write=False)
+
+    @property
+    def max_score(self) -> int:
+        return int(self.correct.shape[0])
+
+    def __deepcopy__(self, memo):
+        # Read-only, so caches can hand out the same instance
+        return self
+
+    @classmethod
+    def from_quiz_doc(cls, quiz_doc: Dict[str, Any]) -> "AnswerKey":
+        return cls(
+            str(quiz_doc["_id"]),
+            quiz_doc.get("answer_key_version", 0),
+            [question.get("correct_answer", -1) for question in quiz_doc.get("questions", [])]
+        )
+
+
+def selected_answers(answers: List[Dict[str, Any]], length: int) -> np.ndarray:
+    """Selected option indices by position, padded or truncated to length."""
+    selected = np.full(length, UNANSWERED, dtype=np.int32)
+    values = [answer.get("selected_answer", UNANSWERED) for answer in answers[:length]]
+    selected[:len(values)] = values
+    return selected
+
+
+def score_answers(key: AnswerKey, answers: List[Dict[str, Any]]) -> int:
+    """Number of positions where the selected answer matches the key."""
+    return int(np.count_nonzero(selected_answers(answers, key.max_score) == key.correct))
+
+
+def score_matrix(key: AnswerKey, selected: np.ndarray) -> np.ndarray:
+    """Scores for many attempts at once; selected has one row per attempt."""
+    return np.count_nonzero(selected == key.correct, axis=1)
+
+
+def percentage(score, max_score: int):
+    """Integer percentage, truncated like QuizAttempt.calculate_percentage; works on arrays too."""
+    if max_score <= 0:
+        return np.zeros_like(score) if isinstance(score, np.ndarray) else 0
+    if isinstance(score, np.ndarray):
+        # Same float expression as the scalar path, so batch and single scores agree exactly
+        return ((score / max_score) * 100).astype(np.int64)
+    return int((score / max_score) * 100)
+
+
+async def _load_answer_key(db: AsyncIOMotorDatabase, quiz_id: str) -> Optional[AnswerKey]:
+    try:
+        object_id = ObjectId(quiz_id)
+    except Exception:
+        return None
+    quiz_doc = await db.quizzes.find_one(
+        {"_id": object_id},
+        {"questions.correct_answer": 1, "answer_key_version": 1}
+    )
+    return AnswerKey.from_quiz_doc(quiz_doc) if quiz_doc else None
+
+
+async def get_answer_key(db: AsyncIOMotorDatabase, quiz_id: str) -> Optional[AnswerKey]:
+    """Answer key for quiz_id, loading only correct answers on a cache miss."""
+    return await answer_key_cache.get_or_load(quiz_id, lambda: _load_answer_key(db, quiz_id))
@@ -11,6 +11,13 @@ from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.models.quiz import Quiz, QuizAttempt
 from app.schemas.quiz import QuizCreate, QuizUpdate, QuizGenerationRequest, CourseModuleInfo
 from app.services.llm_service import llm_service, LLMRequest, ResultType, LLMProvider
+from app.services.quiz_scoring import get_answer_key, score_answers, percentage as score_percentage
+from app.services.question_dedupe_service import question_dedupe_service, quiz_question_key
+from app.services.context_retrieval_service import asset_context_text, context_retrieval_service
+from app.services.review_schedule_service import review_schedule_service
+from app.core.cache import cache_invalidator
+from app.core.config import settings
+from pymongo.errors import BulkWriteError
 import json
 
 logger = logging.getLogger(__name__)
@@ -37,9 +44,19 @@ class QuizService:
                 else:
                     questions_dict.append(question)
             
+            # Drop or flag near-duplicates of questions already in the course
+            quiz_id = ObjectId()
+            questions_dict, signatures, duplicates = await question_dedupe_service.check_questions(
+                db, quiz_data.course_id, questions_dict,
+                keys=[quiz_question_key(str(quiz_id), i) for i in range(len(questions_dict))]
+            )
+            if not questions_dict:
+                raise ValueError("All questions are near-duplicates of existing questions")
+            total_questions = len(questions_dict)
+            
             # Create quiz document
             quiz_doc = {
-                "_id": ObjectId(),
+                "_id": quiz_id,
                 "course_id": quiz_data.course_id,
                 "module_code": quiz_data.module_code,
                 "title": quiz_data.title,
@@ -59,10 +76,14 @@ class QuizService:
             result = await db.quizzes.insert_one(quiz_doc)
             quiz_doc["_id"] = result.inserted_id
             
+            await question_dedupe_service.index_quiz(
+                db, str(quiz_doc["_id"]), quiz_data.course_id, quiz_data.module_code, questions_dict, signatures
+            )
+            
             # Create Quiz instance
             quiz = Quiz.from_mongo_dict(quiz_doc)
             
-            logger.info(f"Created quiz: {quiz.id} for course: {quiz.course_id}")
+            logger.info(f"Created quiz: {quiz.id} for course: {quiz.course_id} ({len(duplicates)} near-duplicates found)")
             return quiz
             
         except Exception as e:
@@ -83,7 +104,8 @@ class QuizService:
     async def get_quizzes_by_course(self, db: AsyncIOMotorDatabase, course_id: str, module_code: Optional[str] = None) -> List[Quiz]:
         """Get all quizzes for a course, optionally filtered by module code."""
         try:
-            query = {"course_id": course_id, "is_active": True, "is_deleted": False}
+            # Per-learner quizzes assembled from a question pool aren't listed
+            query = {"course_id": course_id, "is_active": True, "is_deleted": False, "assembled_for": {"$exists": False}}
             
             if module_code:
                 query["module_code"] = module_code
@@ -117,17 +139,29 @@ class QuizService:
             # Add updated timestamp
             update_data['updated_at'] = datetime.utcnow()
             
+            update = {"$set": update_data}
+            if 'questions' in update_data:
+                # New answer key version: cached keys are dropped and old attempts become stale
+                update["$inc"] = {"answer_key_version": 1}
+            
             # Update in MongoDB
             result = await db.quizzes.update_one(
                 {"_id": ObjectId(quiz_id)},
-                {"$set": update_data}
+                update
             )
             
             if result.matched_count == 0:
                 return None
             
+            await cache_invalidator.notify_write("quizzes", quiz_id)
+            
             # Return updated quiz
             updated_quiz = await self.get_quiz(db, quiz_id)
+            if updated_quiz and 'questions' in update_data:
+                await question_dedupe_service.index_quiz(
+                    db, quiz_id, updated_quiz.course_id, updated_quiz.module_code, update_data['questions']
+                )
+                await review_schedule_service.remove_quiz(db, quiz_id, keep_questions=len(update_data['questions']))
             logger.info(f"Updated quiz: {quiz_id}")
             return updated_quiz
             
@@ -146,6 +180,9 @@ class QuizService:
             if result.matched_count == 0:
                 return False
             
+            await cache_invalidator.notify_write("quizzes", quiz_id)
+            await question_dedupe_service.remove_quiz(db, quiz_id)
+            await review_schedule_service.remove_quiz(db, quiz_id)
             logger.info(f"Soft deleted quiz: {quiz_id}")
             return True
             
@@ -173,6 +210,9 @@ class QuizService:
             
             deleted_count = result.modified_count
             if deleted_count > 0:
+                await cache_invalidator.notify_write("quizzes")
+                await question_dedupe_service.remove_module_quizzes(db, course_id, module_code)
+                await review_schedule_service.remove_module_quizzes(db, course_id, module_code)
                 logger.info(f"Marked {deleted_count} existing quizzes as deleted for course: {course_id}, module: {module_code}")
             
             return deleted_count
@@ -437,7 +477,7 @@ class QuizService:
                         break
                 
                 if target_module:
-                    assets_content = await self._get_module_assets_content(db, target_module.get("assets", []))
+                    assets_content = await self._get_module_context(db, course_title, target_module)
                     result.append(CourseModuleInfo(
                         course_id=course_id,
                         course_title=course_title,
@@ -449,7 +489,7 @@ class QuizService:
             else:
                 # Get all modules
                 for module in modules:
-                    assets_content = await self._get_module_assets_content(db, module.get("assets", []))
+                    assets_content = await self._get_module_context(db, course_title, module)
                     result.append(CourseModuleInfo(
                         course_id=course_id,
                         course_title=course_title,
@@ -465,6 +505,23 @@ class QuizService:
             logger.error(f"Error getting course modules info: {e}")
             return []
     
+    async def _get_module_context(self, db: AsyncIOMotorDatabase, course_title: str, module: Dict[str, Any]) -> str:
+        """Prompt material for a module: the most relevant chunks within the token budget."""
+        asset_ids = module.get("assets", [])
+        budget = settings.quiz_context_token_budget
+        if budget <= 0:
+            return await self._get_module_assets_content(db, asset_ids)
+        try:
+            # Modules have no title of their own; the query is the course title and the module's asset titles
+            context, report = await context_retrieval_service.module_context(
+                db, asset_ids, course_title, budget, outline=True
+            )
+            logger.info(f"Retrieved context for module {module.get('code')}: {report}")
+            return context
+        except Exception as e:
+            logger.warning(f"Context retrieval failed for module {module.get('code')}, using whole module: {e}")
+            return await self._get_module_assets_content(db, asset_ids)
+    
     async def _get_module_assets_content(self, db: AsyncIOMotorDatabase, asset_ids: List[str]) -> str:
         """Get content from assets collection by asset IDs with support for different asset types."""
         try:
@@ -487,74 +544,11 @@ class QuizService:
             # Get assets from assets collection
             assets_content = []
             async for asset in db.assets.find({"_id": {"$in": object_ids}}):
-                asset_type = asset.get("type", "text").lower()
-                title = asset.get("title", "Unknown Asset")
-                content = ""
-                
-                # Extract content based on asset type
-                if asset_type == "text":
-                    content = asset.get("content", "")
-                elif asset_type == "video":
-                    # Priority: transcript > description > content > fallback
-                    content = (
-                        asset.get("transcript", "") or 
-                        asset.get("description", "") or 
-                        asset.get("content", "") or
-                        f"Video content: {title}"
-                    )
-                    # Add video metadata if available
-                    if asset.get("duration"):
-                        duration_mins = asset.get("duration", 0) // 60
-                        content += f" (Duration: {duration_mins} minutes)"
-                elif asset_type == "pdf":
-                    # Priority: extracted_text > summary > content > fallback
-                    content = (
-                        asset.get("extracted_text", "") or
-                        asset.get("summary", "") or
-                        asset.get("content", "") or
-                        f"PDF document: {title}"
-                    )
-                elif asset_type == "audio":
-                    # Priority: transcript > description > content > fallback
-                    content = (
-                        asset.get("transcript", "") or
-                        asset.get("description", "") or
-                        asset.get("content", "") or
-                        f"Audio content: {title}"
-                    )
-                    # Add audio metadata if available
-                    if asset.get("duration"):
-                        duration_mins = asset.get("duration", 0) // 60
-                        content += f" (Duration: {duration_mins} minutes)"
-                elif asset_type == "image":
-                    # Priority: description > alt_text > content > fallback
-                    content = (
-                        asset.get("description", "") or
-                        asset.get("alt_text", "") or
-                        asset.get("content", "") or
-                        f"Image: {title}"
-                    )
+                text = asset_context_text(asset)
+                if text:
+                    assets_content.append(text)
                 else:
-                    # Default fallback for unknown types
-                    content = asset.get("content", "") or f"{asset_type.title()}: {title}"
-                
-                # Add additional context if available
-                if asset.get("description") and asset_type != "image":
-                    # Don't duplicate description for images since it's primary content
-                    if content != asset.get("description"):
-                        content += f"\nDescription: {asset.get('description')}"
-                
-                # Add difficulty level if available
-                if asset.get("metadata", {}).get("difficulty"):
-                    difficulty = asset.get("metadata", {}).get("difficulty")
-                    content += f"\nDifficulty: {difficulty}"
-                
-                # Only add if we have meaningful content
-                if content and content.strip():
-                    asset_header = f"Asset ({asset_type.upper()}): {title}"
-                    assets_content.append(f"{asset_header}\n{content.strip()}")
-                else:
-                    logger.warning(f"No content found for asset: {title} (type: {asset_type})")
+                    logger.warning(f"No content found for asset: {asset.get('title', 'Unknown Asset')}")
             
             if not assets_content:
                 logger.warning("No content extracted from any assets")
@@ -571,22 +565,15 @@ class QuizService:
     async def create_quiz_attempt(self, db: AsyncIOMotorDatabase, user_id: str, quiz_id: str, user_program_id: str, answers: List[Dict]) -> QuizAttempt:
         """Create a new quiz attempt in MongoDB."""
         try:
-            quiz = await self.get_quiz(db, quiz_id)
-            if not quiz:
+            # Cached answer key; the quiz document is only read on a cold cache
+            answer_key = await get_answer_key(db, quiz_id)
+            if not answer_key:
                 raise ValueError("Quiz not found")
             
             # Calculate score
-            score = 0
-            max_score = len(quiz.questions)
-            
-            for i, answer in enumerate(answers):
-                if i < len(quiz.questions):
-                    correct_answer = quiz.questions[i].get('correct_answer', -1)
-                    if answer.get('selected_answer') == correct_answer:
-                        score += 1
-            
-            # Calculate percentage
-            percentage = int((score / max_score) * 100) if max_score > 0 else 0
+            max_score = answer_key.max_score
+            score = score_answers(answer_key, answers)
+            percentage = score_percentage(score, max_score)
             
             # Create attempt document
             attempt_doc = {
@@ -598,6 +585,7 @@ class QuizService:
                 "score": score,
                 "max_score": max_score,
                 "percentage": percentage,
+                "answer_key_version": answer_key.version,
                 "started_at": datetime.utcnow(),
                 "completed_at": datetime.utcnow(),
                 "is_completed": True
@@ -617,6 +605,93 @@ class QuizService:
             logger.error(f"Error creating quiz attempt: {e}")
             raise
     
+    async def create_quiz_attempts_batch(self, db: AsyncIOMotorDatabase, user_id: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Score and insert many attempts (offline sync) with one insert_many.
+        
+        Each item carries a client_attempt_id. Items already stored for this user, or repeated
+        within the batch, are returned as duplicates with the stored attempt instead of being
+        inserted again, so a retried sync is safe.
+        
+        Returns one {client_attempt_id, status, attempt, error} result per distinct item.
+        """
+        try:
+            results: Dict[str, Dict[str, Any]] = {}
+            unique_items: Dict[str, Dict[str, Any]] = {}
+            for item in items:
+                unique_items.setdefault(item["client_attempt_id"], item)
+            
+            # Attempts stored by an earlier sync of the same batch
+            async for doc in db.quiz_attempts.find({
+                "user_id": user_id,
+                "client_attempt_id": {"$in": list(unique_items)}
+            }):
+                results[doc["client_attempt_id"]] = {"status": "duplicate", "attempt": QuizAttempt.from_mongo_dict(doc)}
+            
+            answer_keys = {}
+            new_docs = []
+            for client_attempt_id, item in unique_items.items():
+                if client_attempt_id in results:
+                    continue
+                quiz_id = item["quiz_id"]
+                if quiz_id not in answer_keys:
+                    answer_keys[quiz_id] = await get_answer_key(db, quiz_id)
+                answer_key = answer_keys[quiz_id]
+                if not answer_key:
+                    results[client_attempt_id] = {"status": "rejected", "error": "Quiz not found"}
+                    continue
+                
+                score = score_answers(answer_key, item["answers"])
+                now = datetime.utcnow()
+                new_docs.append({
+                    "_id": ObjectId(),
+                    "client_attempt_id": client_attempt_id,
+                    "quiz_id": quiz_id,
+                    "user_id": user_id,
+                    "user_program_id": item["user_program_id"],
+                    "answers": item["answers"],
+                    "score": score,
+                    "max_score": answer_key.max_score,
+                    "percentage": score_percentage(score, answer_key.max_score),
+                    "answer_key_version": answer_key.version,
+                    "started_at": item.get("started_at") or now,
+                    "completed_at": item.get("completed_at") or now,
+                    "time_taken_seconds": item.get("time_taken_seconds"),
+                    "is_completed": True,
+                    "synced_at": now
+                })
+            
+            failed_ids = set()
+            if new_docs:
+                try:
+                    await db.quiz_attempts.insert_many(new_docs, ordered=False)
+                except BulkWriteError as e:
+                    for error in e.details.get("writeErrors", []):
+                        failed_ids.add(new_docs[error["index"]]["client_attempt_id"])
+                        # 11000: a concurrent retry stored it first
+                        if error.get("code") != 11000:
+                            results[new_docs[error["index"]]["client_attempt_id"]] = {
+                                "status": "rejected", "error": error.get("errmsg")
+                            }
+                    raced = [cid for cid in failed_ids if cid not in results]
+                    if raced:
+                        async for doc in db.quiz_attempts.find({"user_id": user_id, "client_attempt_id": {"$in": raced}}):
+                            results[doc["client_attempt_id"]] = {"status": "duplicate", "attempt": QuizAttempt.from_mongo_dict(doc)}
+                    for cid in raced:
+                        # The conflicting row is gone or belongs to another key; the client should retry
+                        results.setdefault(cid, {"status": "rejected", "error": "Duplicate key but no stored attempt found"})
+            
+            for doc in new_docs:
+                if doc["client_attempt_id"] not in failed_ids:
+                    results[doc["client_attempt_id"]] = {"status": "created", "attempt": QuizAttempt.from_mongo_dict(doc)}
+            
+            logger.info(f"Synced {len(new_docs) - len(failed_ids)} of {len(unique_items)} quiz attempts for user: {user_id}")
+            return [{"client_attempt_id": cid, **results[cid]} for cid in unique_items]
+            
+        except Exception as e:
+            logger.error(f"Error syncing quiz attempts for user {user_id}: {e}")
+            raise
+    
     async def get_user_quiz_attempts(self, db: AsyncIOMotorDatabase, user_id: str, quiz_id: Optional[str] = None, user_program_id: Optional[str] = None) -> List[QuizAttempt]:
         """Get quiz attempts for a user from MongoDB."""
         try:
@@ -0,0 +1,270 @@
+"""
+Per-question review schedules in `review_schedule`, driven by `quiz_attempts`.
+
+One document per (user, quiz, question position) holds the SM-2 state and
+the next `due_at`. With the (user_id, due_at) index, "this user's N due
+questions" is one index range scan.
+
+The batch scheduler reads attempts recorded since the `review_schedule`
+high-water mark, loads the state of every item they touch, applies all
+reviews with one vectorized `schedule` call, and writes the new state back
+with unordered bulk_writes, a batch of attempts at a time.
+
+Items of deleted quizzes, and of questions a quiz no longer has, are removed
+when the quiz changes and whenever the due queue comes across one.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.core.watermarks import JobWatermark, settled_upper_bound
+from app.services.spaced_repetition import QUALITY_CORRECT, QUALITY_INCORRECT, ReviewState, schedule
+
+logger = logging.getLogger(__name__)
+
+REVIEW_SCHEDULE = "review_schedule"
+CHUNK_SIZE = 5000
+READ_BATCH_SIZE = 5000
+
+
+def review_item_id(user_id: str, quiz_id: str, question_index: int) -> str:
+    return f"{user_id}:{quiz_id}:{question_index}"
+
+
+def _object_ids(ids) -> List[ObjectId]:
+    object_ids = []
+    for value in ids:
+        try:
+            object_ids.append(ObjectId(value))
+        except Exception:
+            continue
+    return object_ids
+
+
+class ReviewScheduleService:
+    """Schedules quiz questions for review and serves due queues."""
+
+    def __init__(self):
+        self.watermark = JobWatermark(REVIEW_SCHEDULE)
+        self._task: Optional[asyncio.Task] = None
+
+    async def refresh(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        """Reschedule every question answered since the last run."""
+        acquired, last_id = await self.watermark.acquire(db)
+        if not acquired:
+            return {"ran": False, "reason": "another refresh is running"}
+
+        upper_id = settled_upper_bound(settings.review_settle_seconds)
+        if upper_id <= last_id:
+            await self.watermark.release(db)
+            return {"ran": True, "reviews": 0, "high_water_mark": str(last_id)}
+
+        try:
+            started = time.perf_counter()
+            cursor = db.quiz_attempts.find(
+                {"_id": {"$gt": last_id, "$lt": upper_id}},
+                {"quiz_id": 1, "user_id": 1, "answers.selected_answer": 1}
+            ).sort("_id", 1).batch_size(READ_BATCH_SIZE)
+            # Batches are applied in order; each one loads the state the previous one wrote
+            report = {"reviews": 0, "items": 0, "schedule_seconds": 0.0}
+            users = set()
+            batch: List[Dict[str, Any]] = []
+            async for attempt in cursor:
+                users.add(attempt["user_id"])
+                batch.append(attempt)
+                if len(batch) >= READ_BATCH_SIZE:
+                    self._add_report(report, await self.apply_attempts(db, batch))
+                    batch = []
+            if batch:
+                self._add_report(report, await self.apply_attempts(db, batch))
+            report["users"] = len(users)
+        except Exception:
+            await self.watermark.release(db)
+            raise
+
+        await self.watermark.commit(db, upper_id)
+        report.update({
+            "ran": True,
+            "high_water_mark": str(upper_id),
+            "total_seconds": round(time.perf_counter() - started, 3)
+        })
+        logger.info(f"Review schedule refresh: {report}")
+        return report
+
+    @staticmethod
+    def _add_report(report: Dict[str, Any], batch_report: Dict[str, Any]):
+        report["reviews"] += batch_report["reviews"]
+        report["items"] += batch_report["items"]
+        report["schedule_seconds"] = round(report["schedule_seconds"] + batch_report.get("schedule_seconds", 0.0), 4)
+
+    async def apply_attempts(self, db: AsyncIOMotorDatabase, attempts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply the answers of time-ordered attempts as reviews of their questions."""
+        quizzes = {}
+        async for quiz in db.quizzes.find(
+            {"_id": {"$in": _object_ids({attempt["quiz_id"] for attempt in attempts})}},
+            {"course_id": 1, "module_code": 1, "questions.correct_answer": 1}
+        ):
+            quizzes[str(quiz["_id"])] = quiz
+
+        index: Dict[str, int] = {}
+        items: List[Tuple[str, str, int]] = []
+        item_column: List[int] = []
+        quality: List[int] = []
+        at: List[datetime] = []
+        for attempt in attempts:
+            quiz = quizzes.get(attempt["quiz_id"])
+            if quiz is None:
+                continue
+            correct_answers = [question.get("correct_answer", -1) for question in quiz.get("questions", [])]
+            reviewed_at = attempt["_id"].generation_time.replace(tzinfo=None)
+            for position, answer in enumerate(attempt.get("answers", [])[:len(correct_answers)]):
+                key = review_item_id(attempt["user_id"], attempt["quiz_id"], position)
+                i = index.get(key)
+                if i is None:
+                    i = index[key] = len(items)
+                    items.append((attempt["user_id"], attempt["quiz_id"], position))
+                item_column.append(i)
+                correct = answer.get("selected_answer") == correct_answers[position]
+                quality.append(QUALITY_CORRECT if correct else QUALITY_INCORRECT)
+                at.append(reviewed_at)
+        if not items:
+            return {"reviews": 0, "items": 0}
+
+        state = ReviewState.initial(len(items))
+        keys = list(index)
+        for start in range(0, len(keys), CHUNK_SIZE):
+            async for doc in db[REVIEW_SCHEDULE].find(
+                {"_id": {"$in": keys[start:start + CHUNK_SIZE]}},
+                {"easiness": 1, "interval_days": 1, "repetitions": 1}
+            ):
+                i = index[doc["_id"]]
+                state.easiness[i] = doc["easiness"]
+                state.interval[i] = doc["interval_days"]
+                state.repetitions[i] = doc["repetitions"]
+
+        item_column = np.array(item_column, dtype=np.int64)
+        quality = np.array(quality, dtype=np.int64)
+        schedule_started = time.perf_counter()
+        schedule(state, item_column, quality, np.array(at, dtype="datetime64[ms]"))
+        schedule_seconds = time.perf_counter() - schedule_started
+
+        reviews = np.bincount(item_column, minlength=len(items))
+        lapses = np.bincount(item_column, quality < 3, len(items))
+        due_at = state.due_at.astype(datetime)
+        reviewed_at = state.reviewed_at.astype(datetime)
+        operations = []
+        for i, (user_id, quiz_id, position) in enumerate(items):
+            quiz = quizzes[quiz_id]
+            operations.append(UpdateOne(
+                {"_id": keys[i]},
+                {
+                    "$set": {
+                        "user_id": user_id,
+                        "quiz_id": quiz_id,
+                        "question_index": position,
+                        "course_id": quiz.get("course_id"),
+                        "module_code": quiz.get("module_code"),
+                        "easiness": round(float(state.easiness[i]), 4),
+                        "interval_days": int(state.interval[i]),
+                        "repetitions": int(state.repetitions[i]),
+                        "last_reviewed_at": reviewed_at[i],
+                        "due_at": due_at[i]
+                    },
+                    "$inc": {"reviews": int(reviews[i]), "lapses": int(lapses[i])}
+                },
+                upsert=True
+            ))
+        for start in range(0, len(operations), CHUNK_SIZE):
+            await db[REVIEW_SCHEDULE].bulk_write(operations[start:start + CHUNK_SIZE], ordered=False)
+
+        return {
+            "reviews": len(item_column),
+            "items": len(items),
+            "users": len({user_id for user_id, _, _ in items}),
+            "schedule_seconds": round(schedule_seconds, 4)
+        }
+
+    async def get_due(self, db: AsyncIOMotorDatabase, user_id: str, limit: int = 20) -> Dict[str, Any]:
+        """The user's most overdue questions, with question text and options but no answers."""
+        query = {"user_id": user_id, "due_at": {"$lte": datetime.utcnow()}}
+        while True:
+            items = await db[REVIEW_SCHEDULE].find(
+                query, {"user_id": 0}
+            ).sort("due_at", 1).limit(limit).to_list(length=limit)
+
+            quizzes = {}
+            async for quiz in db.quizzes.find(
+                {"_id": {"$in": _object_ids({item["quiz_id"] for item in items})}, "is_deleted": {"$ne": True}},
+                {"title": 1, "questions.question": 1, "questions.options": 1}
+            ):
+                quizzes[str(quiz["_id"])] = quiz
+
+            due = []
+            stale = []
+            for item in items:
+                item_id = item.pop("_id")
+                quiz = quizzes.get(item["quiz_id"])
+                questions = quiz.get("questions", []) if quiz else []
+                if item["question_index"] >= len(questions):
+                    stale.append(item_id)
+                    continue
+                question = questions[item["question_index"]]
+                due.append({
+                    **item,
+                    "quiz_title": quiz.get("title"),
+                    "question": question.get("question"),
+                    "options": question.get("options", [])
+                })
+            if not stale:
+                break
+            # Items of deleted quizzes or removed questions would otherwise hold the head of the queue forever
+            await db[REVIEW_SCHEDULE].delete_many({"_id": {"$in": stale}})
+            if len(items) < limit:
+                break
+
+        total_due = await db[REVIEW_SCHEDULE].count_documents(query)
+        return {"user_id": user_id, "total_due": total_due, "items": due}
+
+    async def remove_quiz(self, db: AsyncIOMotorDatabase, quiz_id: str, keep_questions: int = 0):
+        """Drop the review items of a quiz, or of its questions past the first keep_questions."""
+        await db[REVIEW_SCHEDULE].delete_many({"quiz_id": quiz_id, "question_index": {"$gte": keep_questions}})
+
+    async def remove_module_quizzes(self, db: AsyncIOMotorDatabase, course_id: str, module_code: str):
+        await db[REVIEW_SCHEDULE].delete_many({"course_id": course_id, "module_code": module_code})
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Reschedule periodically (review_refresh_seconds, 0 disables)."""
+        if db is None or settings.review_refresh_seconds <= 0:
+            return
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(settings.review_refresh_seconds)
+            try:
+                await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Review schedule refresh failed: {e}")
+
+
+review_schedule_service = ReviewScheduleService()
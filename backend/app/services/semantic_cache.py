@@ -0,0 +1,241 @@
+"""
+Semantic cache tier for LLM transformation and summary outputs.
+
+Requests are split into a scope and a text. The scope is the parameters
+that must match exactly, such as style, domain and hobby. The text is the
+content being transformed. Both are normalized first (Unicode NFKC,
+case-folded, whitespace collapsed), so "Cricket" and "cricket " share a
+scope. Within a scope, the text's hashing embedding is compared with cached
+requests, and the cached output is returned when the nearest one is at
+least `semantic_cache_threshold` similar. This also covers assets whose
+content is almost identical.
+
+Entries live in the `semantic_cache` collection (TTL on created_at), so
+they are shared by workers and survive restarts. Each process keeps only
+the vectors in memory, grouped by scope, and picks up other workers'
+entries by `_id` high-water mark. Outputs are read from MongoDB on a hit.
+
+Every lookup records the best similarity seen in a histogram and its
+outcome in a counter, so the threshold can be tuned from real traffic
+before it is lowered.
+"""
+
+import asyncio
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from prometheus_client import Counter, Histogram
+
+from app.core.config import settings
+from app.services.embeddings import DIM, embed
+
+logger = logging.getLogger(__name__)
+
+SEMANTIC_CACHE = "semantic_cache"
+
+SEMANTIC_LOOKUPS = Counter("semantic_cache_lookups_total", "Semantic cache lookups by outcome", ["namespace", "result"])
+SEMANTIC_SIMILARITY = Histogram(
+    "semantic_cache_best_similarity",
+    "Similarity of the nearest cached request per lookup",
+    ["namespace"],
+    buckets=(0.5, 0.7, 0.8, 0.85, 0.9, 0.93, 0.95, 0.97, 0.98, 0.99, 1.0)
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", str(text or "")).casefold()).strip()
+
+
+def scope_key(namespace: str, parts: Sequence[Any]) -> str:
+    return "|".join([namespace] + [normalize(part) for part in parts])
+
+
+class _ScopeIndex:
+    """Vectors of one scope's cached requests; float16 to halve memory."""
+
+    __slots__ = ("ids", "vectors")
+
+    def __init__(self):
+        self.ids: List[ObjectId] = []
+        self.vectors = np.zeros((0, DIM), dtype=np.float16)
+
+    def add(self, entry_id: ObjectId, vector: np.ndarray):
+        n = len(self.ids)
+        if n == len(self.vectors):
+            grown = np.zeros((max(8, 2 * n), DIM), dtype=np.float16)
+            grown[:n] = self.vectors
+            self.vectors = grown
+        self.vectors[n] = vector
+        self.ids.append(entry_id)
+
+    def remove(self, entry_id: ObjectId):
+        """Drop an entry, moving the last one into its slot."""
+        try:
+            i = self.ids.index(entry_id)
+        except ValueError:
+            return
+        last = len(self.ids) - 1
+        self.vectors[i] = self.vectors[last]
+        self.ids[i] = self.ids[last]
+        self.ids.pop()
+
+    def nearest(self, vector: np.ndarray) -> Tuple[Optional[ObjectId], float]:
+        if not self.ids:
+            return None, 0.0
+        similarity = self.vectors[:len(self.ids)].astype(np.float32) @ vector
+        best = int(np.argmax(similarity))
+        return self.ids[best], float(similarity[best])
+
+
+class SemanticCache:
+    """Nearest-neighbour cache of LLM outputs keyed by normalized request."""
+
+    def __init__(self):
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self._scopes: Dict[str, _ScopeIndex] = {}
+        self._known: Set[ObjectId] = set()
+        self._last_id: Optional[ObjectId] = None
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.semantic_cache_enabled and self.db is not None
+
+    def _record(self, namespace: str, result: str, similarity: Optional[float] = None):
+        SEMANTIC_LOOKUPS.labels(namespace, result).inc()
+        stats = self._stats.setdefault(namespace, {"lookups": 0, "hits": 0, "similarity_sum": 0.0})
+        stats["lookups"] += 1
+        stats["hits"] += result == "hit"
+        if similarity is not None:
+            SEMANTIC_SIMILARITY.labels(namespace).observe(similarity)
+            stats["similarity_sum"] += similarity
+
+    async def get(self, namespace: str, scope: Sequence[Any], text: str) -> Optional[str]:
+        """Cached output for the nearest request in scope, if it is similar enough."""
+        if not self.enabled:
+            return None
+        index = self._scopes.get(scope_key(namespace, scope))
+        if index is None:
+            self._record(namespace, "miss")
+            return None
+
+        vector = embed([normalize(text)])[0]
+        expired = False
+        while True:
+            entry_id, similarity = index.nearest(vector)
+            if similarity < settings.semantic_cache_threshold:
+                self._record(namespace, "expired" if expired else "miss", similarity)
+                return None
+            entry = await self.db[SEMANTIC_CACHE].find_one_and_update(
+                {"_id": entry_id},
+                {"$inc": {"hits": 1}, "$set": {"last_hit_at": datetime.utcnow()}},
+                projection={"output": 1}
+            )
+            if entry is not None:
+                break
+            # Expired by the TTL index since it was loaded; forget it so a newer entry can be found
+            expired = True
+            index.remove(entry_id)
+            self._known.discard(entry_id)
+        self._record(namespace, "hit", similarity)
+        logger.info(f"Semantic cache hit in {namespace} (similarity {similarity:.3f})")
+        return entry["output"]
+
+    async def put(self, namespace: str, scope: Sequence[Any], text: str, output: str):
+        """Cache output for this request; failures are logged, never raised."""
+        if not self.enabled or not output:
+            return
+        key = scope_key(namespace, scope)
+        vector = embed([normalize(text)])[0]
+        try:
+            result = await self.db[SEMANTIC_CACHE].insert_one({
+                "namespace": namespace,
+                "scope": key,
+                "vector": vector.astype(np.float16).tobytes(),
+                "output": output,
+                "hits": 0,
+                "created_at": datetime.utcnow()
+            })
+        except Exception as e:
+            logger.warning(f"Could not store semantic cache entry: {e}")
+            return
+        self._scopes.setdefault(key, _ScopeIndex()).add(result.inserted_id, vector)
+        self._known.add(result.inserted_id)
+
+    async def load(self, db: AsyncIOMotorDatabase, reload: bool = False) -> int:
+        """Add entries written since the last load (by any worker); reload keeps only the newest."""
+        if reload:
+            self._scopes, self._known, self._last_id = {}, set(), None
+        query = {"_id": {"$gt": self._last_id}} if self._last_id else {}
+        cursor = db[SEMANTIC_CACHE].find(query, {"scope": 1, "vector": 1}).sort("_id", -1).limit(
+            settings.semantic_cache_max_entries
+        )
+        entries = await cursor.to_list(length=None)
+        for entry in reversed(entries):
+            vector = np.frombuffer(entry["vector"], dtype=np.float16)
+            # Entries this process stored itself are already indexed
+            if len(vector) != DIM or entry["_id"] in self._known:
+                continue
+            self._scopes.setdefault(entry["scope"], _ScopeIndex()).add(entry["_id"], vector)
+            self._known.add(entry["_id"])
+        if entries:
+            self._last_id = max(entries[0]["_id"], self._last_id or entries[0]["_id"])
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "threshold": settings.semantic_cache_threshold,
+            "entries": len(self._known),
+            "scopes": len(self._scopes),
+            "namespaces": {
+                namespace: {
+                    "lookups": int(stats["lookups"]),
+                    "hits": int(stats["hits"]),
+                    "hit_ratio": round(stats["hits"] / stats["lookups"], 4) if stats["lookups"] else 0.0,
+                    "mean_similarity": round(stats["similarity_sum"] / stats["lookups"], 4) if stats["lookups"] else 0.0
+                }
+                for namespace, stats in self._stats.items()
+            }
+        }
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Load cached vectors and keep them caught up (semantic_cache_refresh_seconds, 0 disables)."""
+        if db is None or not settings.semantic_cache_enabled:
+            return
+        self.db = db
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        while True:
+            try:
+                # Past the memory bound, start over from the newest entries
+                await self.load(db, reload=len(self._known) > settings.semantic_cache_max_entries)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Semantic cache load failed: {e}")
+            if settings.semantic_cache_refresh_seconds <= 0:
+                return
+            await asyncio.sleep(settings.semantic_cache_refresh_seconds)
+
+
+semantic_cache = SemanticCache()
@@ -0,0 +1,80 @@
+"""
+SM-2 spaced repetition, vectorized over many review items.
+
+Each item (one quiz question for one user) has an easiness factor, the
+current interval in days and the number of consecutive successful reviews.
+A review with quality 0-5 updates them as in SuperMemo 2:
+
+- quality < 3 resets the repetition count and schedules the item for the next day
+- otherwise the interval goes 1 day, 6 days, then the previous interval x easiness
+- easiness moves by 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02), never below 1.3
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.utils.sequences import position_steps
+
+INITIAL_EASINESS = 2.5
+MIN_EASINESS = 1.3
+MAX_INTERVAL_DAYS = 365
+
+# Quiz answers carry no self-rating, so correctness maps to a fixed quality
+QUALITY_CORRECT = 4
+QUALITY_INCORRECT = 1
+
+
+@dataclass
+class ReviewState:
+    """Scheduling state of many items as parallel arrays."""
+    easiness: np.ndarray
+    interval: np.ndarray
+    repetitions: np.ndarray
+    reviewed_at: np.ndarray  # datetime64[ms]
+
+    @classmethod
+    def initial(cls, n: int) -> "ReviewState":
+        return cls(
+            np.full(n, INITIAL_EASINESS),
+            np.zeros(n, dtype=np.int64),
+            np.zeros(n, dtype=np.int64),
+            np.full(n, np.datetime64("NaT"), dtype="datetime64[ms]")
+        )
+
+    @property
+    def due_at(self) -> np.ndarray:
+        return self.reviewed_at + self.interval.astype("timedelta64[D]")
+
+
+def review(easiness: np.ndarray, interval: np.ndarray, repetitions: np.ndarray, quality: np.ndarray):
+    """One SM-2 review for many items at once; returns new (easiness, interval, repetitions)."""
+    passed = quality >= 3
+    repetitions = np.where(passed, repetitions + 1, 0)
+    interval = np.where(
+        ~passed | (repetitions == 1), 1,
+        np.where(repetitions == 2, 6, np.rint(interval * easiness).astype(np.int64))
+    )
+    interval = np.minimum(interval, MAX_INTERVAL_DAYS)
+    lapse = 5 - quality
+    easiness = np.maximum(MIN_EASINESS, easiness + 0.1 - lapse * (0.08 + lapse * 0.02))
+    return easiness, interval, repetitions
+
+
+def schedule(state: ReviewState, item: np.ndarray, quality: np.ndarray, at: np.ndarray) -> ReviewState:
+    """
+    Apply a batch of reviews to state in place and return it.
+
+    item[i] indexes state for review i, at[i] is when it happened; reviews are
+    given in time order.
+    """
+    item = np.asarray(item)
+    quality = np.asarray(quality)
+    at = np.asarray(at, dtype="datetime64[ms]")
+    for events in position_steps(item):
+        items = item[events]
+        state.easiness[items], state.interval[items], state.repetitions[items] = review(
+            state.easiness[items], state.interval[items], state.repetitions[items], quality[events]
+        )
+        state.reviewed_at[items] = at[events]
+    return state
@@ -2,6 +2,7 @@ import google.generativeai as genai
 from typing import Optional
 import logging
 from app.core.config import settings
+from app.services.semantic_cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 
@@ -55,21 +56,25 @@ class SummaryService:
             }
 
         try:
-            # Create prompt based on style
-            prompt = self._create_prompt(text, max_length, style)
-            
-            # Generate summary
-            response = self.model.generate_content(prompt)
-            
-            if not response.text:
-                return {
-                    "error": "No summary generated",
-                    "summary": None,
-                    "word_count": 0,
-                    "original_word_count": len(text.split())
-                }
-            
-            summary = response.text.strip()
+            # Near-identical text with the same options reuses an earlier summary
+            summary = await semantic_cache.get("summary", (max_length, style), text)
+            if summary is None:
+                # Create prompt based on style
+                prompt = self._create_prompt(text, max_length, style)
+                
+                # Generate summary
+                response = self.model.generate_content(prompt)
+                
+                if not response.text:
+                    return {
+                        "error": "No summary generated",
+                        "summary": None,
+                        "word_count": 0,
+                        "original_word_count": len(text.split())
+                    }
+                
+                summary = response.text.strip()
+                await semantic_cache.put("summary", (max_length, style), text, summary)
             word_count = len(summary.split())
             original_word_count = len(text.split())
             
@@ -0,0 +1,441 @@
+"""
+The transformation engine: styled variants of an asset's content.
+
+A variant is an `assets` document holding content rewritten in one style
+(storytelling, visual_cue or summary) for one domain and hobby. Its `code` is
+the original's code, which is how getAsset finds it. Every route that
+transforms content goes through this module: /transform, /get-or-generate,
+getAsset's fallback, /getAssetStyles, pre-generation and prefetch. They share
+the prompts, the semantic cache scope and the stored document shape, so an
+optimization here applies to all of them. A variant is shared by every
+learner with the same domain and hobby, so routes generate it from the stored
+original's content, never from content sent with the request.
+
+Prompts come from per-style templates compiled once at import; a request
+only fills in the learner fields. The model is reached through the LLM
+gateway (`llm_service`) with `transformation_llm_provider`.
+
+`generate_asset_variants` produces several styles of one asset with a single
+structured (JSON) model call. The content and learner context are then sent
+once instead of once per style.
+
+Model calls run in a worker thread. `generation_gate` counts interactive
+generations in flight so background work can wait until they are done.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.cache import cache_invalidator
+from app.core.config import settings
+from app.services.asset_search_service import asset_search_service
+from app.services.embeddings import estimate_tokens
+from app.services.llm_service import LLMProvider, llm_service
+from app.services.semantic_cache import semantic_cache
+
+logger = logging.getLogger(__name__)
+
+VARIANT_STYLES = ("storytelling", "visual_cue", "summary")
+
+STYLE_PROMPTS = {
+    "storytelling": """
+### Storytelling Mode:
+- Convert the given content into a short storytelling analogy.
+- Make it relevant to the given domain and hobby.
+- Use simple, engaging language.
+- Create a narrative that helps explain the concept through a relatable story.
+""",
+    "visual_cue": """
+### Visual Cue Mode:
+- Convert the content into simple, symbolic visual representations (emoji flows, ASCII diagrams, metaphors).
+- Focus on clarity, simplicity, and instant understanding at a glance.
+- Provide 3–4 different cues for the same concept.
+- Each visual cue must connect the concept to the user's domain and hobby.
+- Use emojis, arrows, or short symbolic flows instead of long text.
+- Keep it fun, relatable, and visually intuitive.
+
+Format your response as:
+VISUAL CUE 1: [Emoji flow or diagram]
+VISUAL CUE 2: [Emoji flow or diagram]
+VISUAL CUE 3: [Emoji flow or diagram]
+VISUAL CUE 4: [Optional extra if needed]
+""",
+    "summary": """
+### Summary Mode:
+- Generate a concise summary of the content.
+- Keep it framed in the context of the given domain and hobby.
+- Make it clear, informative, and easy to understand.
+- Use analogies from the hobby to explain domain concepts.
+"""
+}
+
+# Worked example per style, for "Neural networks learn patterns from data." (engineering-student, Cricket)
+STYLE_EXAMPLES = {
+    "storytelling": "\"Imagine writing a machine learning algorithm that analyzes cricket player performance data - just like how you'd code a neural network that processes input data through layers of nodes, learning patterns to predict the best batting order for the next match.\"",
+    "visual_cue": """VISUAL CUE 1: 💻📊➡️🧠➡️🏏 (Code processing data → Neural Network → Cricket prediction)
+VISUAL CUE 2: ```python\nmodel.fit(cricket_data)``` ➡️ 🎯 (Training code → Accurate predictions)
+VISUAL CUE 3: Input Layer ➡️ Hidden Layers ➡️ Output = Best Team (Network architecture)
+VISUAL CUE 4: for epoch in range(100): train() ➡️ 🏆 (Training loop → Victory)""",
+    "summary": "\"Neural networks are like coding a smart cricket analytics program - they process data through multiple layers (like nested functions) to learn patterns and make predictions about player performance.\""
+}
+
+DOMAIN_CONTEXTS = {
+    "engineering-student": "Use examples in circuits, code snippets, algorithms, and technical implementations",
+    "medical-student": "Use case studies in healthcare, patient scenarios, medical procedures, and clinical examples",
+    "business-student": "Use marketing examples, finance scenarios, business strategies, and corporate case studies",
+    "teacher-trainer": "Use classroom storytelling, pedagogy techniques, educational methods, and teaching scenarios",
+    "working-professional": "Use real-world workplace analogies, professional scenarios, industry examples, and practical applications"
+}
+
+
+class GenerationGate:
+    """Tracks interactive LLM generations so background work can stay out of their way."""
+
+    def __init__(self):
+        self.active = 0
+        self.last_finished = float("-inf")
+
+    @asynccontextmanager
+    async def interactive(self):
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.last_finished = time.monotonic()
+
+    def idle(self, quiet_seconds: float) -> bool:
+        return self.active == 0 and time.monotonic() - self.last_finished >= quiet_seconds
+
+    async def wait_idle(self, quiet_seconds: float, poll_seconds: float = 1.0):
+        """Return once no interactive generation has run for quiet_seconds."""
+        while not self.idle(quiet_seconds):
+            await asyncio.sleep(poll_seconds)
+
+
+generation_gate = GenerationGate()
+
+
+def variant_code(code: Any) -> Any:
+    """Stored form of a variant's code: an ObjectId when the code is one, else the string."""
+    try:
+        return ObjectId(str(code))
+    except Exception:
+        return code
+
+
+def transformation_provider() -> LLMProvider:
+    return LLMProvider(settings.transformation_llm_provider or settings.default_llm_provider)
+
+
+# Templates are compiled with their style's fixed parts filled in; {content}, {domain},
+# {domain_context}, {hobby} and {guidance} are left for str.format per request, so the
+# style prompts and examples must not contain braces.
+
+def _learner_context() -> str:
+    return """You are an AI content transformer.
+You will receive inputs for content transformation based on specific learner profiles.
+
+Domain Context: {domain_context}
+Hobby Context: Connect concepts to {hobby} for better relatability{guidance}
+"""
+
+
+def _example(style: str) -> str:
+    return f"""
+**{style.replace("_", " ").title()} Mode Example:**
+{STYLE_EXAMPLES[style]}
+"""
+
+
+def _compile_style_template(style: str) -> str:
+    return _learner_context() + f"""
+Your task is to generate content in the specified style:
+{STYLE_PROMPTS[style]}
+### Example (Content: "Neural networks learn patterns from data.", Domain: engineering-student, Hobby: Cricket):
+{_example(style)}
+---
+
+Now transform this content for {{domain}} who loves {{hobby}}:
+
+**Style:** {style}
+**Content:** "{{content}}"
+**Domain:** {{domain}} - {{domain_context}}
+**Hobby:** {{hobby}}{{guidance}}
+
+Please provide ONLY the {style} output without any formatting or labels:"""
+
+
+STYLE_TEMPLATES = {style: _compile_style_template(style) for style in VARIANT_STYLES}
+
+
+@lru_cache(maxsize=None)
+def _multi_style_template(styles: Tuple[str, ...]) -> str:
+    keys = ", ".join(f'"{style}"' for style in styles)
+    return _learner_context() + f"""
+Your task is to generate the content in each of these styles:
+{"".join(STYLE_PROMPTS[style] for style in styles)}
+### Examples (Content: "Neural networks learn patterns from data.", Domain: engineering-student, Hobby: Cricket):
+{"".join(_example(style) for style in styles)}
+---
+
+Now transform this content for {{domain}} who loves {{hobby}}:
+
+**Content:** "{{content}}"
+**Domain:** {{domain}} - {{domain_context}}
+**Hobby:** {{hobby}}{{guidance}}
+
+Respond with a JSON object with exactly these keys: {keys}. Each value is the output in that style as a plain string, without formatting or labels."""
+
+
+def _prompt_fields(content: str, domain: str, hobby: str, keywords: Optional[str]) -> Dict[str, str]:
+    return {
+        "content": content,
+        "domain": domain,
+        "domain_context": DOMAIN_CONTEXTS.get(domain, f"Use examples relevant to {domain}"),
+        "hobby": hobby,
+        "guidance": f"\nAdditional guidance: {keywords}" if keywords else ""
+    }
+
+
+def build_variant_prompt(content: str, style: str, domain: str, hobby: str, keywords: Optional[str] = None) -> str:
+    return STYLE_TEMPLATES[style].format(**_prompt_fields(content, domain, hobby, keywords))
+
+
+def build_multi_style_prompt(
+    content: str, styles: Sequence[str], domain: str, hobby: str, keywords: Optional[str] = None
+) -> str:
+    """One prompt for several styles: the content and learner context are sent once."""
+    return _multi_style_template(tuple(styles)).format(**_prompt_fields(content, domain, hobby, keywords))
+
+
+def parse_multi_style_output(text: str, styles: Sequence[str]) -> Dict[str, str]:
+    """Outputs per style from a multi-style JSON response; styles that are missing or empty are left out."""
+    cleaned = text.strip()
+    if cleaned.startswith("```"):
+        cleaned = cleaned.strip("`").strip()
+        if cleaned.startswith("json"):
+            cleaned = cleaned[4:]
+    try:
+        parsed = json.loads(cleaned)
+    except json.JSONDecodeError:
+        logger.warning("Multi-style response was not valid JSON")
+        return {}
+    if not isinstance(parsed, dict):
+        return {}
+    return {
+        style: parsed[style].strip()
+        for style in styles
+        if isinstance(parsed.get(style), str) and parsed[style].strip()
+    }
+
+
+async def _call_model(prompt: str, interactive: bool, json_output: bool = False) -> str:
+    call = llm_service.complete(prompt, transformation_provider(), json_output=json_output)
+    if interactive:
+        async with generation_gate.interactive():
+            return await call
+    return await call
+
+
+async def _generate_output(
+    content: str, style: str, domain: str, hobby: str, keywords: Optional[str], interactive: bool
+) -> Tuple[str, int]:
+    prompt = build_variant_prompt(content, style, domain, hobby, keywords)
+    output = await _call_model(prompt, interactive)
+    # Clean up any unwanted formatting
+    if output.startswith('"') and output.endswith('"'):
+        output = output[1:-1]
+    return output, estimate_tokens(prompt) + estimate_tokens(output)
+
+
+def _cache_scope(style: str, domain: str, hobby: str, keywords: Optional[str]) -> Tuple[str, str, str, str]:
+    return (style, domain, hobby, keywords or "")
+
+
+def _variant_document(
+    code: Any, output: str, style: str, domain: str, hobby: str, keywords: Optional[str] = None
+) -> Dict[str, Any]:
+    document = {
+        "code": variant_code(code),
+        "content": output,
+        "style": style,
+        "domain": domain,
+        "hobby": hobby,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "status": "not-started"
+    }
+    # Keyword-guided outputs are only served to the same keywords; shared lookups match {"keywords": None}
+    if keywords:
+        document["keywords"] = keywords
+    return document
+
+
+async def _after_insert(documents: List[Dict[str, Any]]):
+    for document in documents:
+        await cache_invalidator.notify_write("assets", document["_id"], document)
+        asset_search_service.index_asset(document)
+
+
+def _check_request(original_content: str, styles: Sequence[str]):
+    if not original_content:
+        raise ValueError("Original content is empty")
+    for style in styles:
+        if style not in STYLE_TEMPLATES and style != "original":
+            raise ValueError(f"Unsupported style: {style}")
+
+
+# Variant generations running in this process, by (code, style, domain, hobby, keywords)
+_in_flight: Dict[Tuple[str, str, str, str, str], "asyncio.Task[Tuple[Dict[str, Any], int]]"] = {}
+
+
+async def find_variant(
+    db: AsyncIOMotorDatabase, code: Any, style: str, domain: str, hobby: str, keywords: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """The stored variant of code for style, domain, hobby and keywords (none by default), under either form of the code."""
+    return await db["assets"].find_one({
+        "code": {"$in": list({variant_code(code), str(code)})},
+        "style": style,
+        "domain": domain,
+        "hobby": hobby,
+        "keywords": keywords or None
+    })
+
+
+async def find_original(db: AsyncIOMotorDatabase, code: Any) -> Optional[Dict[str, Any]]:
+    """The stored original-style asset of code, under either form of the code."""
+    return await db["assets"].find_one({"code": {"$in": list({variant_code(code), str(code)})}, "style": "original"})
+
+
+async def generate_asset_variant(
+    db: AsyncIOMotorDatabase,
+    code: Any,
+    original_content: str,
+    style: str,
+    domain: str,
+    hobby: str,
+    interactive: bool = True,
+    keywords: Optional[str] = None
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Generate and insert one variant of an original asset.
+
+    Returns the inserted document (with its _id) and the estimated tokens
+    spent, which is 0 when the output came from the semantic cache. The
+    "original" style stores the content unchanged without a model call.
+    """
+    _check_request(original_content, [style])
+
+    tokens = 0
+    if style == "original":
+        output = original_content
+        keywords = None
+    else:
+        # Near-identical content for the same style/domain/hobby reuses an earlier output
+        cache_scope = _cache_scope(style, domain, hobby, keywords)
+        output = await semantic_cache.get("transform", cache_scope, original_content)
+        if output is None:
+            output, tokens = await _generate_output(original_content, style, domain, hobby, keywords, interactive)
+            await semantic_cache.put("transform", cache_scope, original_content, output)
+
+    new_asset_data = _variant_document(code, output, style, domain, hobby, keywords)
+    await db["assets"].insert_one(new_asset_data)
+    await _after_insert([new_asset_data])
+    return new_asset_data, tokens
+
+
+async def get_or_generate_variant(
+    db: AsyncIOMotorDatabase,
+    code: Any,
+    original_content: str,
+    style: str,
+    domain: str,
+    hobby: str,
+    interactive: bool = True,
+    keywords: Optional[str] = None
+) -> Tuple[Dict[str, Any], bool]:
+    """
+    The stored variant, or a newly generated one; the flag says whether this call generated it.
+
+    A generation already running in this process for the same variant (a
+    prefetch, or another request) is awaited instead of starting a second
+    model call and inserting a duplicate.
+    """
+    existing = await find_variant(db, code, style, domain, hobby, keywords)
+    if existing is not None:
+        return existing, False
+
+    key = (str(code), style, domain, hobby, keywords or "")
+    task = _in_flight.get(key)
+    generated = task is None
+    if task is None:
+        task = asyncio.create_task(
+            generate_asset_variant(db, code, original_content, style, domain, hobby, interactive, keywords)
+        )
+        _in_flight[key] = task
+        task.add_done_callback(lambda done: _in_flight.pop(key) if _in_flight.get(key) is done else None)
+    # A caller going away must not cancel the generation others are waiting on
+    document, _ = await asyncio.shield(task)
+    # Each caller gets its own copy, since endpoints rename _id in place
+    return dict(document), generated
+
+
+async def generate_asset_variants(
+    db: AsyncIOMotorDatabase,
+    code: Any,
+    original_content: str,
+    styles: Sequence[str],
+    domain: str,
+    hobby: str,
+    interactive: bool = True
+) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """
+    Generate and insert variants of an original asset in several styles.
+
+    Styles not in the semantic cache are generated together in one
+    structured (JSON) model call, so the content and learner context are sent
+    once. A style the response leaves out is generated on its own. Each style
+    is inserted as its own document; returns them by style, and the estimated
+    tokens spent.
+    """
+    styles = list(dict.fromkeys(styles))
+    _check_request(original_content, styles)
+    if "original" in styles:
+        raise ValueError("Unsupported style: original")
+
+    outputs: Dict[str, str] = {}
+    for style in styles:
+        cached = await semantic_cache.get("transform", _cache_scope(style, domain, hobby, None), original_content)
+        if cached is not None:
+            outputs[style] = cached
+
+    tokens = 0
+    missing = [style for style in styles if style not in outputs]
+    generated: Dict[str, str] = {}
+    if len(missing) > 1:
+        prompt = build_multi_style_prompt(original_content, missing, domain, hobby)
+        text = await _call_model(prompt, interactive, json_output=True)
+        tokens += estimate_tokens(prompt) + estimate_tokens(text)
+        generated = parse_multi_style_output(text, missing)
+    for style in missing:
+        if style not in generated:
+            generated[style], style_tokens = await _generate_output(original_content, style, domain, hobby, None, interactive)
+            tokens += style_tokens
+    for style, output in generated.items():
+        await semantic_cache.put("transform", _cache_scope(style, domain, hobby, None), original_content, output)
+    outputs.update(generated)
+
+    documents = [_variant_document(code, outputs[style], style, domain, hobby) for style in styles]
+    await db["assets"].insert_many(documents)
+    await _after_insert(documents)
+    return {document["style"]: document for document in documents}, tokens
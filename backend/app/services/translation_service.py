@@ -7,7 +7,9 @@ from bson import ObjectId
 
 import google.generativeai as genai
 from app.core.mongodb import get_database
+from app.core.cache import asset_cache, cache_invalidator
 from app.core.config import settings
+from app.services.asset_search_service import asset_search_service
 
 
 class TranslationService:
@@ -110,45 +112,50 @@ TRANSLATED CONTENT:"""
             raise Exception(f"Translation failed: {str(e)}")
     
     async def get_asset_by_code(self, asset_code: str, language: str = "en") -> Optional[Dict[str, Any]]:
-        """Get asset by code and language"""
+        """Get asset by code and language (served from the asset cache when warm)"""
         try:
-            from bson import ObjectId
-            
-            # Try to convert asset_code to ObjectId if it looks like one
-            try:
-                asset_code_obj = ObjectId(asset_code)
-            except:
-                asset_code_obj = asset_code
-            
-            # First try to find asset with specific language
-            asset = await self.assets_collection.find_one({
-                "code": asset_code_obj,
-                "language": language
-            })
-            
-            # If not found and looking for English, try without language field (legacy assets)
-            if not asset and language == "en":
-                asset = await self.assets_collection.find_one({
-                    "code": asset_code_obj,
-                    "$or": [
-                        {"language": {"$exists": False}},
-                        {"language": "en"}
-                    ]
-                })
-            
-            if asset:
-                asset["_id"] = str(asset["_id"])
-                # Convert code to string if it's an ObjectId
-                if isinstance(asset.get("code"), ObjectId):
-                    asset["code"] = str(asset["code"])
-                # Ensure language field exists
-                if "language" not in asset:
-                    asset["language"] = "en"
-            
-            return asset
+            return await asset_cache.get_or_load(
+                f"{asset_code}:{language}",
+                lambda: self._load_asset_by_code(asset_code, language)
+            )
         except Exception as e:
             print(f"❌ Error getting asset: {e}")
             return None
+
+    async def _load_asset_by_code(self, asset_code: str, language: str) -> Optional[Dict[str, Any]]:
+        """Load asset by code and language from MongoDB"""
+        # Try to convert asset_code to ObjectId if it looks like one
+        try:
+            asset_code_obj = ObjectId(asset_code)
+        except:
+            asset_code_obj = asset_code
+        
+        # First try to find asset with specific language
+        asset = await self.assets_collection.find_one({
+            "code": asset_code_obj,
+            "language": language
+        })
+        
+        # If not found and looking for English, try without language field (legacy assets)
+        if not asset and language == "en":
+            asset = await self.assets_collection.find_one({
+                "code": asset_code_obj,
+                "$or": [
+                    {"language": {"$exists": False}},
+                    {"language": "en"}
+                ]
+            })
+        
+        if asset:
+            asset["_id"] = str(asset["_id"])
+            # Convert code to string if it's an ObjectId
+            if isinstance(asset.get("code"), ObjectId):
+                asset["code"] = str(asset["code"])
+            # Ensure language field exists
+            if "language" not in asset:
+                asset["language"] = "en"
+        
+        return asset
     
     async def create_translation(self, asset_code: str, target_language: str, content: str) -> Optional[Dict[str, Any]]:
         """Create a new translation for an asset"""
@@ -182,6 +189,8 @@ TRANSLATED CONTENT:"""
             result = await self.assets_collection.insert_one(translation_asset)
             
             if result.inserted_id:
+                await cache_invalidator.notify_write("assets", result.inserted_id, translation_asset)
+                asset_search_service.index_asset(translation_asset)
                 # Get the created translation
                 created_translation = await self.assets_collection.find_one({"_id": result.inserted_id})
                 if created_translation:
@@ -202,8 +211,13 @@ TRANSLATED CONTENT:"""
             print(f"❌ Error creating translation: {e}")
             raise Exception(f"Translation creation failed: {str(e)}")
     
-    async def get_available_translations(self, asset_code: str) -> Dict[str, Any]:
-        """Get all available translations for an asset"""
+    async def get_available_translations(self, asset_code: str, projection: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        Get all available translations for an asset.
+        
+        When a projection is given only those fields are read from MongoDB and
+        returned for each language.
+        """
         try:
             from bson import ObjectId
             
@@ -214,7 +228,7 @@ TRANSLATED CONTENT:"""
                 asset_code_obj = asset_code
             
             # Get all assets with the same code
-            cursor = self.assets_collection.find({"code": asset_code_obj})
+            cursor = self.assets_collection.find({"code": asset_code_obj}, projection)
             assets = []
             
             async for asset in cursor:
@@ -230,17 +244,23 @@ TRANSLATED CONTENT:"""
                 if isinstance(code, ObjectId):
                     code = str(code)
                 
-                translations[lang] = {
+                translation = {
                     "id": asset["_id"],
-                    "name": asset["name"],
-                    "style": asset["style"],
-                    "content": asset["content"],
+                    "name": asset.get("name"),
+                    "style": asset.get("style"),
+                    "content": asset.get("content"),
                     "code": code,
                     "language": lang,
                     "source_asset_id": asset.get("source_asset_id"),
                     "created_at": asset.get("created_at").isoformat() if asset.get("created_at") else None,
                     "updated_at": asset.get("updated_at").isoformat() if asset.get("updated_at") else None
                 }
+                if projection is not None:
+                    translation = {
+                        key: value for key, value in translation.items()
+                        if key in ("id", "code", "language") or key in projection
+                    }
+                translations[lang] = translation
             
             return {
                 "asset_code": asset_code,
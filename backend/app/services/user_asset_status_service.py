@@ -0,0 +1,289 @@
+"""
+User asset status service: per-user progress rows in `userassetstatus`.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteMany, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.services.course_progress_service import course_progress_service, status_deltas
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 1000
+
+
+def utcnow_ms() -> datetime:
+    """Current time at MongoDB's millisecond precision, so it compares equal after a round trip."""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def build_status_update(status: str, progress: Optional[int], now: datetime) -> Dict[str, Any]:
+    """Build the upsert update for one (user, course, asset) status change."""
+    update_data = {
+        "status": status,
+        "updated_at": now,
+        "last_accessed": now
+    }
+    set_on_insert = {"created_at": now}
+
+    if progress is not None:
+        update_data["progress"] = progress
+    else:
+        # New rows start at 0, existing rows keep their progress
+        set_on_insert["progress"] = 0
+
+    update = {"$set": update_data, "$setOnInsert": set_on_insert}
+    if status == "completed":
+        # First completion time; repeated completed writes keep it
+        update["$min"] = {"completed_at": now}
+    return update
+
+
+def build_conditional_status_update(status: str, progress: Optional[int], at: datetime) -> List[Dict[str, Any]]:
+    """
+    Pipeline update for a status change that happened at `at`.
+
+    Same fields as build_status_update, but rows already written at or
+    after `at` are left as they are. A heartbeat that was buffered or
+    retried can then land after a newer write (e.g. a written-through
+    completion) without overwriting it.
+    """
+    newer = {"$lt": [{"$ifNull": ["$updated_at", None]}, at]}
+
+    def when_newer(value: Any, field: str) -> Dict[str, Any]:
+        return {"$cond": [newer, value, f"${field}"]}
+
+    fields = {
+        "status": when_newer({"$literal": status}, "status"),
+        "updated_at": when_newer(at, "updated_at"),
+        "last_accessed": when_newer(at, "last_accessed"),
+        "created_at": {"$ifNull": ["$created_at", at]},
+        "progress": (
+            when_newer({"$literal": progress}, "progress") if progress is not None
+            else {"$ifNull": ["$progress", 0]}
+        )
+    }
+    if status == "completed":
+        fields["completed_at"] = when_newer({"$min": ["$completed_at", at]}, "completed_at")
+    return [{"$set": fields}]
+
+
+StatusKey = Tuple[str, str, str]
+
+
+def rollup_deltas(
+    previous: Dict[StatusKey, Dict[str, Any]],
+    updates: Iterable[Dict[str, Any]],
+    now: datetime
+) -> Dict[Tuple[str, str], Tuple[int, int, datetime]]:
+    """
+    Summed rollup changes per (user, course) for a batch of status updates.
+
+    previous holds the status rows as they were before the batch, by (user,
+    course, asset). Updates are replayed in time order with the same rule as
+    build_conditional_status_update: one that is not newer than the row is
+    skipped, so it changes no counts.
+    """
+    state = {key: (row.get("status"), row.get("updated_at")) for key, row in previous.items()}
+    deltas: Dict[Tuple[str, str], Tuple[int, int, datetime]] = {}
+    for update in sorted(updates, key=lambda update: update.get("at") or now):
+        key = (update["user"], update["course"], update["asset"])
+        at = update.get("at") or now
+        status, updated_at = state.get(key, (None, None))
+        if updated_at is not None and updated_at >= at:
+            continue
+        state[key] = (update["status"], at)
+        completed, in_progress = status_deltas(status, update["status"])
+        pair = (update["user"], update["course"])
+        total_completed, total_in_progress, last_activity = deltas.get(pair, (0, 0, at))
+        deltas[pair] = (total_completed + completed, total_in_progress + in_progress, max(last_activity, at))
+    return deltas
+
+
+class UserAssetStatusService:
+    """Service for userassetstatus writes."""
+
+    async def upsert_status(
+        self,
+        db: AsyncIOMotorDatabase,
+        course: str,
+        asset: str,
+        user: str,
+        status: str,
+        progress: Optional[int] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Create or update the status row in one round trip.
+
+        Returns the stored document and whether it was created by this call.
+        The previous row is read atomically with the write, so the course
+        progress rollup can be adjusted by the exact status transition.
+        """
+        now = utcnow_ms()
+        search_condition = {"course": course, "asset": asset, "user": user}
+        update = build_status_update(status, progress, now)
+        # Choose the _id up front so the stored document is known without another read
+        update["$setOnInsert"]["_id"] = ObjectId()
+
+        previous = await db["userassetstatus"].find_one_and_update(
+            search_condition,
+            update,
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        created = previous is None
+        if created:
+            record = {**search_condition, **update["$set"], **update["$setOnInsert"]}
+        else:
+            record = {**previous, **update["$set"]}
+
+        try:
+            await course_progress_service.apply_status_change(
+                db, user, course, previous.get("status") if previous else None, status, now
+            )
+        except Exception as e:
+            logger.error(f"Failed to update course progress rollup for user={user}, course={course}: {e}")
+
+        return record, created
+
+    async def bulk_upsert_statuses(
+        self,
+        db: AsyncIOMotorDatabase,
+        updates: Iterable[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+        Apply many status changes with one unordered bulk_write.
+
+        An update may carry its own `at` timestamp (e.g. when it was buffered);
+        otherwise the time of the write is used. An update is skipped for rows
+        already written at or after its timestamp. Course rollups move by the
+        status transitions, worked out from the rows read just before the write.
+        """
+        now = utcnow_ms()
+        updates = list(updates)
+        operations = [
+            UpdateOne(
+                {"course": update["course"], "asset": update["asset"], "user": update["user"]},
+                build_conditional_status_update(update["status"], update.get("progress"), update.get("at") or now),
+                upsert=True
+            )
+            for update in updates
+        ]
+        if not operations:
+            return {"matched": 0, "modified": 0, "upserted": 0, "errors": []}
+
+        previous = await self._previous_rows(db, updates)
+        # Unordered: one bad row doesn't stop the rest, and the server can parallelize
+        try:
+            result = await db["userassetstatus"].bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            details = e.details
+            logger.warning(f"Bulk status update finished with {len(details['writeErrors'])} errors")
+            # Which updates applied isn't known row by row, so recount the touched pairs
+            await self._update_rollups(db, updates, None, now)
+            return {
+                "matched": details["nMatched"],
+                "modified": details["nModified"],
+                "upserted": details["nUpserted"],
+                "errors": [
+                    {"index": error["index"], "message": error["errmsg"]}
+                    for error in details["writeErrors"]
+                ]
+            }
+
+        logger.info(
+            f"Bulk status update: {result.matched_count} matched, "
+            f"{result.modified_count} modified, {result.upserted_count} upserted"
+        )
+        await self._update_rollups(db, updates, previous, now)
+        return {
+            "matched": result.matched_count,
+            "modified": result.modified_count,
+            "upserted": result.upserted_count,
+            "errors": []
+        }
+
+
+    async def _previous_rows(self, db: AsyncIOMotorDatabase, updates: List[Dict[str, Any]]) -> Optional[Dict[StatusKey, Dict[str, Any]]]:
+        """Status rows of the updated keys before the write, or None if they couldn't be read."""
+        keys = {(update["user"], update["course"], update["asset"]) for update in updates}
+        try:
+            rows = {}
+            async for row in db["userassetstatus"].find(
+                {"$or": [{"user": user, "course": course, "asset": asset} for user, course, asset in keys]},
+                {"_id": 0, "user": 1, "course": 1, "asset": 1, "status": 1, "updated_at": 1}
+            ):
+                rows[(row["user"], row["course"], row["asset"])] = row
+            return rows
+        except Exception as e:
+            logger.error(f"Failed to read previous status rows, rollups will be recounted: {e}")
+            return None
+
+    async def _update_rollups(
+        self,
+        db: AsyncIOMotorDatabase,
+        updates: List[Dict[str, Any]],
+        previous: Optional[Dict[StatusKey, Dict[str, Any]]],
+        now: datetime
+    ):
+        """Apply the batch's status transitions to the rollups; without previous rows, recount them."""
+        try:
+            if previous is None:
+                await course_progress_service.recompute(
+                    db, {(update["user"], update["course"]) for update in updates}
+                )
+            else:
+                await course_progress_service.apply_status_deltas(db, rollup_deltas(previous, updates, now))
+        except Exception as e:
+            logger.error(f"Failed to update course progress rollups: {e}")
+
+
+    async def dedupe_rows(self, db: AsyncIOMotorDatabase) -> Dict[str, int]:
+        """
+        Keep one status row per (user, course, asset) so the unique index can be built.
+
+        Rows written before the index existed may repeat a key. The most
+        recently updated row is kept, with the earliest completed_at of the
+        group, and the rollups of the affected (user, course) pairs are recounted.
+        """
+        pipeline = [
+            {"$sort": {"updated_at": -1, "_id": -1}},
+            {
+                "$group": {
+                    "_id": {"user": "$user", "course": "$course", "asset": "$asset"},
+                    "ids": {"$push": "$_id"},
+                    "count": {"$sum": 1},
+                    "completed_at": {"$min": "$completed_at"}
+                }
+            },
+            {"$match": {"count": {"$gt": 1}}}
+        ]
+        operations = []
+        pairs = set()
+        duplicate_keys = 0
+        async for group in db["userassetstatus"].aggregate(pipeline, allowDiskUse=True):
+            keep, *duplicates = group["ids"]
+            operations.append(DeleteMany({"_id": {"$in": duplicates}}))
+            if group.get("completed_at") is not None:
+                operations.append(UpdateOne({"_id": keep}, {"$min": {"completed_at": group["completed_at"]}}))
+            pairs.add((group["_id"]["user"], group["_id"]["course"]))
+            duplicate_keys += 1
+
+        removed = 0
+        for start in range(0, len(operations), WRITE_BATCH_SIZE):
+            result = await db["userassetstatus"].bulk_write(operations[start:start + WRITE_BATCH_SIZE], ordered=False)
+            removed += result.deleted_count
+        if pairs:
+            await course_progress_service.recompute(db, pairs)
+            logger.warning(f"Removed {removed} duplicate userassetstatus rows across {len(pairs)} (user, course) pairs")
+        return {"duplicate_keys": duplicate_keys, "removed": removed}
+
+
+user_asset_status_service = UserAssetStatusService()
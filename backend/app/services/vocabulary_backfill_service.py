@@ -0,0 +1,171 @@
+"""
+Backfill of controlled-vocabulary keys into stored transformations and user preferences.
+
+Before domain, hobby and style were canonicalized on write, each casing or
+synonym variant got its own document in `assets` and `transformed-assets`.
+The backfill rewrites those fields to their canonical keys. Documents that
+then share (asset code, style, domain, hobby, language) are duplicates:
+one is kept and the others are deleted. The kept one is an asset that a
+course module or progress row references, or else the oldest. Referenced
+assets are never deleted. Original-style assets without a domain and hobby
+are rewritten but never merged.
+
+`users` preferences are rewritten the same way.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.cache import cache_invalidator
+from app.services.asset_search_service import asset_search_service
+from app.services.context_retrieval_service import context_retrieval_service
+from app.utils.vocabulary import canonical_domain, canonical_hobbies, canonical_hobby, canonical_style
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# collection -> field holding the code of the module asset a document is a variant of
+VARIANT_COLLECTIONS = (("assets", "code"), ("transformed-assets", "assetCode"))
+_ASSET_FIELDS = (("domain", canonical_domain), ("hobby", canonical_hobby), ("style", canonical_style))
+_USER_FIELDS = (("domain", canonical_domain), ("hobbies", canonical_hobbies), ("learningStyle", canonical_style))
+
+
+def canonical_changes(doc: Dict[str, Any], fields=_ASSET_FIELDS) -> Dict[str, str]:
+    """Fields of doc whose canonical value differs from the stored one."""
+    changes = {}
+    for field, canonical in fields:
+        value = doc.get(field)
+        if isinstance(value, str) and value:
+            fixed = canonical(value)
+            if fixed and fixed != value:
+                changes[field] = fixed
+    return changes
+
+
+def variant_key(doc: Dict[str, Any], code_field: str) -> Optional[Tuple[str, str, str, str, str, str]]:
+    """Merge key of a canonicalized document, or None when it is not a domain/hobby variant."""
+    if doc.get(code_field) is None or not doc.get("domain") or not doc.get("hobby"):
+        return None
+    return (
+        str(doc[code_field]),
+        str(doc.get("style") or ""),
+        doc["domain"],
+        doc["hobby"],
+        doc.get("language") or "en",
+        doc.get("keywords") or ""
+    )
+
+
+def plan_merges(docs: List[Dict[str, Any]], code_field: str, referenced: Set[str]) -> Dict[Any, List[Any]]:
+    """
+    Group canonicalized documents by variant key; returns keeper _id -> duplicate _ids.
+
+    docs must be in _id order. The first referenced document of a group is the
+    keeper, else the oldest; other referenced documents are left alone.
+    """
+    groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = defaultdict(list)
+    for doc in docs:
+        key = variant_key(doc, code_field)
+        if key is not None:
+            groups[key].append(doc)
+
+    merges: Dict[Any, List[Any]] = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        keeper = next((doc for doc in members if str(doc["_id"]) in referenced), members[0])
+        duplicates = [
+            doc["_id"] for doc in members
+            if doc is not keeper and str(doc["_id"]) not in referenced
+        ]
+        if duplicates:
+            merges[keeper["_id"]] = duplicates
+    return merges
+
+
+class VocabularyBackfillService:
+    """Rewrites stored domain/hobby/style values to canonical keys and merges duplicates."""
+
+    async def _referenced_assets(self, db: AsyncIOMotorDatabase) -> Set[str]:
+        referenced: Set[str] = set()
+        async for course in db.courses.find({}, {"modules.assets": 1}):
+            for module in course.get("modules", []):
+                referenced.update(str(asset_id) for asset_id in module.get("assets", []))
+        referenced.update(str(asset_id) for asset_id in await db["userassetstatus"].distinct("asset"))
+        return referenced
+
+    async def _backfill_collection(
+        self,
+        db: AsyncIOMotorDatabase,
+        name: str,
+        code_field: str,
+        referenced: Set[str],
+        apply: bool
+    ) -> Dict[str, Any]:
+        projection = {code_field: 1, "style": 1, "domain": 1, "hobby": 1, "language": 1, "keywords": 1}
+        docs: List[Dict[str, Any]] = []
+        updates: List[UpdateOne] = []
+        async for doc in db[name].find({}, projection).sort("_id", 1).batch_size(BATCH_SIZE):
+            changes = canonical_changes(doc)
+            if changes:
+                updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": changes}))
+                doc.update(changes)
+            docs.append(doc)
+
+        merges = plan_merges(docs, code_field, referenced)
+        duplicates = [duplicate for members in merges.values() for duplicate in members]
+        if apply:
+            for start in range(0, len(updates), BATCH_SIZE):
+                await db[name].bulk_write(updates[start:start + BATCH_SIZE], ordered=False)
+            if duplicates:
+                await db[name].delete_many({"_id": {"$in": duplicates}})
+            if name == "assets":
+                for asset_id in duplicates:
+                    asset_search_service.remove_asset(asset_id)
+                    await context_retrieval_service.remove_asset(db, asset_id)
+                if updates or duplicates:
+                    await cache_invalidator.notify_write("assets")
+
+        return {
+            "scanned": len(docs),
+            "canonicalized": len(updates),
+            "duplicate_groups": len(merges),
+            "duplicates_removed": len(duplicates) if apply else 0,
+            "groups": [
+                {"kept": str(keeper), "duplicates": [str(duplicate) for duplicate in members]}
+                for keeper, members in list(merges.items())[:50]
+            ]
+        }
+
+    async def _backfill_users(self, db: AsyncIOMotorDatabase, apply: bool) -> Dict[str, int]:
+        projection = {field: 1 for field, _ in _USER_FIELDS}
+        updates: List[UpdateOne] = []
+        async for user in db.users.find({}, projection).batch_size(BATCH_SIZE):
+            changes = canonical_changes(user, _USER_FIELDS)
+            if changes:
+                updates.append(UpdateOne({"_id": user["_id"]}, {"$set": changes}))
+        if apply and updates:
+            for start in range(0, len(updates), BATCH_SIZE):
+                await db.users.bulk_write(updates[start:start + BATCH_SIZE], ordered=False)
+            await cache_invalidator.notify_write("users")
+        return {"canonicalized": len(updates)}
+
+    async def backfill(self, db: AsyncIOMotorDatabase, apply: bool = False) -> Dict[str, Any]:
+        """Report (or, with apply, perform) the rewrite and merge across all collections."""
+        referenced = await self._referenced_assets(db)
+        report: Dict[str, Any] = {"applied": apply}
+        for name, code_field in VARIANT_COLLECTIONS:
+            report[name] = await self._backfill_collection(db, name, code_field, referenced, apply)
+        report["users"] = await self._backfill_users(db, apply)
+        logger.info(
+            f"Vocabulary backfill ({'applied' if apply else 'dry run'}): "
+            + ", ".join(f"{name} {report[name]['canonicalized']} canonicalized" for name, _ in VARIANT_COLLECTIONS)
+        )
+        return report
+
+
+vocabulary_backfill_service = VocabularyBackfillService()
@@ -0,0 +1,77 @@
+"""
+Keyset pagination and NDJSON streaming for "get all" endpoints.
+
+Both modes walk the collection in `_id` order straight off the Motor cursor,
+so memory stays flat no matter how large the collection is.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from app.utils.response import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 500
+MAX_PAGE_SIZE = 1000
+
+
+def keyset_query(after: Optional[str], query: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Add an `_id > after` bound to query."""
+    query = dict(query or {})
+    if after:
+        try:
+            query["_id"] = {"$gt": ObjectId(after)}
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid 'after' cursor: {after}"
+            )
+    return query
+
+
+async def fetch_page(
+    collection,
+    query: Dict[str, Any],
+    limit: int,
+    transform: Callable[[Dict[str, Any]], Dict[str, Any]],
+    projection: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Fetch one keyset page.
+
+    Returns the transformed documents and the `after` cursor for the next
+    page, or None when this is the last page.
+    """
+    cursor = collection.find(query, projection).sort("_id", 1).limit(limit + 1)
+
+    items = []
+    last_id = None
+    async for doc in cursor:
+        if len(items) == limit:
+            # One extra document only tells us another page exists
+            return items, str(last_id)
+        last_id = doc["_id"]
+        items.append(transform(doc))
+    return items, None
+
+
+def stream_ndjson(
+    collection,
+    query: Dict[str, Any],
+    transform: Callable[[Dict[str, Any]], Dict[str, Any]],
+    limit: Optional[int] = None,
+    projection: Optional[Dict[str, Any]] = None
+) -> StreamingResponse:
+    """Stream documents as newline-delimited JSON while the cursor yields them."""
+    cursor = collection.find(query, projection).sort("_id", 1).batch_size(STREAM_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+
+    async def generate():
+        async for doc in cursor:
+            yield dumps(transform(doc)) + b"\n"
+
+    return StreamingResponse(generate(), media_type=NDJSON_MEDIA_TYPE)
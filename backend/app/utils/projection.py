@@ -0,0 +1,46 @@
+"""
+Sparse fieldsets: map a `fields=` query parameter onto a MongoDB projection.
+"""
+
+from typing import Dict, Iterable, Optional
+
+from fastapi import HTTPException, status
+
+ALL_FIELDS = "*"
+
+
+def build_projection(
+    fields: Optional[str],
+    default: Optional[Iterable[str]] = None,
+    required: Iterable[str] = ()
+) -> Optional[Dict[str, int]]:
+    """
+    Build an inclusion projection from a comma-separated field list.
+
+    - `fields=None` uses `default` (None means the whole document)
+    - `fields=*` always returns the whole document
+    - `required` fields are added to any projection because the caller needs them
+
+    `_id` is always returned by MongoDB.
+    """
+    if fields is None:
+        names = list(default) if default is not None else None
+    elif fields.strip() == ALL_FIELDS:
+        names = None
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        for name in names:
+            if name.startswith("$"):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Invalid field name in 'fields': {name}"
+                )
+
+    if names is None:
+        return None
+
+    projection = {name: 1 for name in names if name not in ("_id", "id")}
+    for name in required:
+        projection[name] = 1
+    # An empty projection would return the whole document
+    return projection or {"_id": 1}
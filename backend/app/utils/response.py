@@ -1,6 +1,44 @@
 from typing import Any, Dict, Optional
+from decimal import Decimal
+
+import orjson
+from bson import ObjectId
+from bson.decimal128 import Decimal128
 from fastapi.responses import JSONResponse
 
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _bson_default(value: Any) -> Any:
+    """Serialize the BSON types orjson doesn't know about."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return str(value.to_decimal())
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content (MongoDB documents included) to JSON bytes."""
+    return orjson.dumps(content, default=_bson_default, option=ORJSON_OPTIONS)
+
+
+class BSONJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson that understands ObjectId and datetime.
+
+    Endpoints can return raw MongoDB documents wrapped in this class instead of
+    walking them to stringify ObjectIds first. Returning the response object
+    directly also skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
 
 def success_response(
     data: Any = None,
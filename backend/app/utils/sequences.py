@@ -0,0 +1,38 @@
+"""
+Batch processing of many independent event sequences with NumPy.
+
+Events of one sequence (e.g. one learner's answers to one question) must be
+applied in order, but different sequences are independent. `position_steps`
+groups a batch so that step k holds the k-th event of every sequence: one
+vector operation per step then advances all sequences at once, and the
+Python loop runs as many times as the longest sequence, not once per event.
+"""
+
+from typing import Iterator
+
+import numpy as np
+
+
+def position_steps(group: np.ndarray) -> Iterator[np.ndarray]:
+    """
+    Yield event index arrays, one per position within a sequence.
+
+    group[i] identifies the sequence of event i; events are given in order.
+    Each yielded array holds at most one event per sequence.
+    """
+    group = np.asarray(group)
+    if len(group) == 0:
+        return
+
+    # Group by sequence, keeping event order within each sequence
+    order = np.argsort(group, kind="stable")
+    sorted_group = group[order]
+    starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+    lengths = np.diff(np.r_[starts, len(sorted_group)])
+    position = np.arange(len(sorted_group)) - np.repeat(starts, lengths)
+
+    # Regroup by position
+    by_position = order[np.argsort(position, kind="stable")]
+    bounds = np.r_[0, np.cumsum(np.bincount(position))]
+    for step in range(len(bounds) - 1):
+        yield by_position[bounds[step]:bounds[step + 1]]
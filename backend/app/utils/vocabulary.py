@@ -0,0 +1,103 @@
+"""
+Controlled vocabulary for the domain, hobby and style of transformations.
+
+Transformed content is stored and looked up by these values exactly, so
+"Movies", "movies " and "Films" would otherwise each get their own LLM
+generation and document. Every input is normalized (Unicode NFKC,
+case-folded, punctuation and separators collapsed) and then mapped through
+an alias table to its canonical key. The canonical keys are the values the
+frontend selects send. A value that is not in a table keeps its normalized
+form, so free-text input still collapses casing and spacing variants.
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, Optional
+
+DOMAIN_ALIASES: Dict[str, Iterable[str]] = {
+    "engineering-student": (
+        "engineering", "engineer", "engineers", "engineering students", "btech", "b tech", "be student",
+        "computer science", "cs student", "cse student", "tech student"
+    ),
+    "medical-student": (
+        "medical", "medicine", "med student", "medical students", "mbbs", "mbbs student", "doctor", "doctors",
+        "healthcare", "nursing student"
+    ),
+    "business-student": (
+        "business", "business students", "mba", "mba student", "commerce", "commerce student", "management student"
+    ),
+    "teacher-trainer": (
+        "teacher", "teachers", "trainer", "trainers", "teacher trainer", "teaching", "educator", "educators",
+        "education", "faculty"
+    ),
+    "working-professional": (
+        "professional", "professionals", "working professionals", "working", "employee", "employees",
+        "industry professional", "corporate"
+    )
+}
+
+HOBBY_ALIASES: Dict[str, Iterable[str]] = {
+    "cricket": ("ipl", "cricket fan", "cricketer"),
+    "movies": ("movie", "movie buff", "films", "film", "cinema", "watching movies", "bollywood", "hollywood"),
+    "gaming": ("gamer", "games", "game", "video games", "video game", "videogames", "esports", "playing games"),
+    "music": ("music lover", "songs", "singing", "listening to music"),
+    "cooking": ("chef", "cook", "baking", "culinary", "food"),
+    "sports": ("sport", "football", "soccer"),
+    "reading": ("books", "book", "novels", "reader")
+}
+
+STYLE_ALIASES: Dict[str, Iterable[str]] = {
+    "storytelling": ("story", "stories", "story telling", "narrative"),
+    "visual_cue": ("visual", "visuals", "visual cues", "visual cue", "visual learner"),
+    "summary": ("summaries", "summarize", "summarise", "summarized", "brief"),
+    "original": ("default", "raw")
+}
+
+_SEPARATORS = re.compile(r"[^\w\u0900-\u0d7f]+")
+
+
+def normalize_term(value: Optional[str]) -> str:
+    """Lookup form of a term: NFKC, case-folded, runs of punctuation/separators as one space."""
+    text = unicodedata.normalize("NFKC", str(value or "")).casefold()
+    return _SEPARATORS.sub(" ", text.replace("_", " ")).strip()
+
+
+def _table(aliases: Dict[str, Iterable[str]]) -> Dict[str, str]:
+    table: Dict[str, str] = {}
+    for canonical, names in aliases.items():
+        for name in (canonical, *names):
+            table[normalize_term(name)] = canonical
+    return table
+
+
+_DOMAINS = _table(DOMAIN_ALIASES)
+_HOBBIES = _table(HOBBY_ALIASES)
+_STYLES = _table(STYLE_ALIASES)
+
+
+def _canonical(value: Optional[str], table: Dict[str, str], separator: str) -> str:
+    term = normalize_term(value)
+    return table.get(term) or term.replace(" ", separator)
+
+
+def canonical_domain(value: Optional[str]) -> str:
+    return _canonical(value, _DOMAINS, "-")
+
+
+def canonical_hobby(value: Optional[str]) -> str:
+    return _canonical(value, _HOBBIES, "-")
+
+
+def canonical_style(value: Optional[str]) -> str:
+    # TransformationStyle members are str subclasses; use their value, not their repr
+    return _canonical(getattr(value, "value", value), _STYLES, "_")
+
+
+def canonical_hobbies(value: Optional[str]) -> str:
+    """Canonicalize a comma-separated hobbies string, dropping empty and repeated entries."""
+    hobbies = []
+    for part in str(value or "").split(","):
+        hobby = canonical_hobby(part)
+        if hobby and hobby not in hobbies:
+            hobbies.append(hobby)
+    return ", ".join(hobbies)
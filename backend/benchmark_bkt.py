@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Benchmark vectorized knowledge-tracing updates.
+
+Simulates one refresh batch: every learner answers a quiz in a few modules
+and completes some assets, then times `trace` over the whole batch against
+a per-event Python loop on a sample.
+
+Usage: python benchmark_bkt.py [learners] [modules_per_learner] [events_per_module]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.knowledge_tracing import CORRECT, DEFAULT_PARAMS, INCORRECT, LEARNING, trace, update
+
+
+def main():
+    learners = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    modules = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    per_module = int(sys.argv[3]) if len(sys.argv) > 3 else 12
+
+    rng = np.random.default_rng(0)
+    pairs = learners * modules
+    pair = rng.permutation(np.repeat(np.arange(pairs), per_module))
+    observation = rng.choice([CORRECT, INCORRECT, LEARNING], size=pair.shape[0], p=[0.5, 0.3, 0.2])
+    mastery = np.full(pairs, DEFAULT_PARAMS.p_init)
+    print(f"{learners} learners, {pairs} (learner, module) pairs, {len(pair)} events")
+
+    started = time.perf_counter()
+    trace(mastery, pair, observation)
+    vectorized = time.perf_counter() - started
+    print(f"vectorized trace     {vectorized:7.3f}s  {len(pair) / vectorized / 1e6:6.2f}M events/s")
+
+    sample = 100000
+    state = mastery.copy()
+    started = time.perf_counter()
+    for p, o in zip(pair[:sample], observation[:sample]):
+        state[p] = update(state[p:p + 1], np.array([o]))[0]
+    per_event = (time.perf_counter() - started) / sample
+    print(f"per-event loop       {per_event * len(pair):7.3f}s  (extrapolated from {sample} events)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark retrieval-based prompt context against whole-module prompts.
+
+Builds a synthetic module of many long assets, then reports prompt tokens
+for the whole module vs the retrieved context, the one-off cost of chunking
+and embedding (paid again only for assets whose text changes), and the
+per-prompt selection latency.
+
+Usage: python benchmark_context.py [assets] [sentences_per_asset] [token_budget]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.context_retrieval_service import ChunkIndex
+from app.services.embeddings import chunk_text, embed, estimate_tokens
+
+
+def main():
+    assets = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    sentences = int(sys.argv[2]) if len(sys.argv) > 2 else 400
+    budget = int(sys.argv[3]) if len(sys.argv) > 3 else 3000
+
+    rng = np.random.default_rng(0)
+    vocabulary = [f"term{i}" for i in range(3000)]
+    texts = [
+        " ".join(
+            " ".join(rng.choice(vocabulary, size=rng.integers(8, 20))) + "."
+            for _ in range(sentences)
+        )
+        for _ in range(assets)
+    ]
+    whole = sum(estimate_tokens(text) for text in texts)
+
+    started = time.perf_counter()
+    chunks, owner = [], []
+    for i, text in enumerate(texts):
+        for chunk in chunk_text(text):
+            chunks.append(chunk)
+            owner.append(i)
+    vectors = embed(chunks)
+    build = time.perf_counter() - started
+    index = ChunkIndex(
+        [f"Asset (TEXT): {i}" for i in range(assets)],
+        chunks,
+        np.array([estimate_tokens(chunk) for chunk in chunks]),
+        np.array(owner),
+        vectors
+    )
+    print(f"{assets} assets, {len(chunks)} chunks: chunk + embed {build:.3f}s")
+
+    samples = []
+    for _ in range(50):
+        started = time.perf_counter()
+        selected = index.select(embed([" ".join(rng.choice(vocabulary, size=4))])[0], budget)
+        context = index.render(selected)
+        samples.append(time.perf_counter() - started)
+    print(f"prompt tokens: whole module {whole}, retrieved {estimate_tokens(context)} ({len(selected)} chunks)")
+    print(f"selection p50 {np.percentile(samples, 50) * 1000:.2f}ms  p95 {np.percentile(samples, 95) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
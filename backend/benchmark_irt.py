@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark IRT fitting on synthetic quiz responses.
+
+Draws abilities, difficulties and discriminations, simulates responses from
+the 2PL model, then reports fit time and parameter recovery (correlation with
+the true values) for a cold 1PL fit, a cold 2PL fit, and a warm-started 2PL
+re-fit after 10% more responses arrive.
+
+Usage: python benchmark_irt.py [users] [items] [responses_per_user]
+"""
+import sys
+import time
+
+import numpy as np
+
+from app.services.irt import IRTParams, Responses, fit
+
+
+def simulate(users: int, items: int, per_user: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(size=users)
+    b = rng.normal(size=items)
+    a = rng.lognormal(0, 0.3, size=items)
+    user = np.repeat(np.arange(users), per_user)
+    item = rng.integers(0, items, size=users * per_user)
+    p = 1 / (1 + np.exp(-a[item] * (theta[user] - b[item])))
+    correct = (rng.random(user.shape[0]) < p).astype(np.float64)
+    return theta, b, a, user, item, correct
+
+
+def run(label, responses, params, model, truth):
+    started = time.perf_counter()
+    report = fit(responses, params, model)
+    elapsed = time.perf_counter() - started
+    theta, b, a = truth
+    recovery = f"r(theta)={np.corrcoef(params.theta, theta)[0, 1]:.3f} r(b)={np.corrcoef(params.b, b)[0, 1]:.3f}"
+    if model == "2pl":
+        recovery += f" r(a)={np.corrcoef(params.a, a)[0, 1]:.3f}"
+    print(
+        f"{label:<22} {elapsed:7.2f}s  {report.iterations:3d} iterations  "
+        f"{len(responses) / elapsed / 1e6:6.1f}M responses/s  {recovery}"
+    )
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    items = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    per_user = int(sys.argv[3]) if len(sys.argv) > 3 else 40
+
+    theta, b, a, user, item, correct = simulate(users, items, per_user)
+    truth = (theta, b, a)
+    print(f"{users} users, {items} items, {len(correct)} responses")
+
+    responses = Responses(user, item, correct, users, items)
+    run("1pl cold", responses, IRTParams.initial(users, items), "1pl", truth)
+    params = IRTParams.initial(users, items)
+    run("2pl cold", responses, params, "2pl", truth)
+
+    # 10% more responses from the same population, fitted from the previous parameters
+    _, _, _, extra_user, extra_item, _ = simulate(users, items, max(per_user // 10, 1), seed=1)
+    p = 1 / (1 + np.exp(-a[extra_item] * (theta[extra_user] - b[extra_item])))
+    extra_correct = (np.random.default_rng(2).random(p.shape[0]) < p).astype(np.float64)
+    grown = Responses(
+        np.concatenate([user, extra_user]), np.concatenate([item, extra_item]),
+        np.concatenate([correct, extra_correct]), users, items
+    )
+    run("2pl warm (+10%)", grown, params, "2pl", truth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON serialization of a large course payload.
+
+Compares the old path (walk the document converting ObjectIds, then
+jsonable_encoder + json.dumps as FastAPI's JSONResponse does) with
+BSONJSONResponse (orjson with a BSON-aware default).
+
+Usage: python benchmark_json_response.py [modules] [assets_per_module]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.response import BSONJSONResponse
+
+
+def build_course(modules: int, assets_per_module: int):
+    """Build a course document shaped like get_course_with_user_progress output"""
+    return {
+        "_id": ObjectId(),
+        "name": "Benchmark Course",
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "modules": [
+            {
+                "name": f"Module {m}",
+                "assets": [
+                    {
+                        "_id": ObjectId(),
+                        "code": ObjectId(),
+                        "name": f"Asset {m}.{a}",
+                        "style": "original",
+                        "content": "Lorem ipsum dolor sit amet " * 40,
+                        "created_at": datetime.utcnow(),
+                        "user_progress": {
+                            "status": "in-progress",
+                            "progress": 40,
+                            "last_accessed": datetime.utcnow(),
+                        },
+                    }
+                    for a in range(assets_per_module)
+                ],
+            }
+            for m in range(modules)
+        ],
+    }
+
+
+def convert_objectids_to_strings(obj):
+    """The recursive walk the endpoints used to run before returning"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, dict):
+        return {key: convert_objectids_to_strings(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [convert_objectids_to_strings(item) for item in obj]
+    return obj
+
+
+def old_path(course):
+    walked = convert_objectids_to_strings(course)
+    return json.dumps(
+        jsonable_encoder(walked), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def new_path(course):
+    return BSONJSONResponse(course).body
+
+
+def run(label, fn, course, iterations):
+    fn(course)  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = fn(course)
+    elapsed = time.perf_counter() - start
+    per_call_ms = elapsed / iterations * 1000
+    print(f"{label:<32} {per_call_ms:8.2f} ms/response  ({len(body) / 1024:.0f} KiB)")
+    return per_call_ms
+
+
+def main():
+    modules = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    assets_per_module = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    iterations = 20
+
+    course = build_course(modules, assets_per_module)
+    print(f"Course with {modules} modules x {assets_per_module} assets, {iterations} iterations\n")
+
+    old_ms = run("walk + jsonable_encoder + json", old_path, course, iterations)
+    new_ms = run("BSONJSONResponse (orjson)", new_path, course, iterations)
+    print(f"\nSpeedup: {old_ms / new_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
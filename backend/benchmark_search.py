@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the in-process BM25 asset search index.
+
+Builds an index over synthetic assets (Zipf-distributed vocabulary, a few
+languages, many modules), times the build, a snapshot save/load round trip,
+and query latency with and without course/module and language filters.
+
+Usage: python benchmark_search.py [assets] [words_per_asset] [queries]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.bm25 import BM25Index
+
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return f"p50 {np.percentile(samples, 50):6.3f}ms  p95 {np.percentile(samples, 95):6.3f}ms  p99 {np.percentile(samples, 99):6.3f}ms"
+
+
+def main():
+    assets = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    words = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+
+    rng = np.random.default_rng(0)
+    vocabulary = np.array([f"w{i}" for i in range(50000)])
+    zipf = 1 / np.arange(1, len(vocabulary) + 1)
+    zipf /= zipf.sum()
+    languages = np.array(["en", "hi", "te"])
+    modules = [f"m{i}" for i in range(assets // 20)]
+
+    texts = [" ".join(rng.choice(vocabulary, size=words, p=zipf)) for _ in range(assets)]
+    index = BM25Index()
+    started = time.perf_counter()
+    for i, text in enumerate(texts):
+        index.add(f"a{i}", text, str(languages[i % 3]), (f"a{i}", modules[(i // 3) % len(modules)]))
+    build = time.perf_counter() - started
+    print(f"{assets} assets x {words} words: build {build:.2f}s")
+
+    path = os.path.join(tempfile.mkdtemp(), "search_index.npz")
+    started = time.perf_counter()
+    index.save(path)
+    save = time.perf_counter() - started
+    started = time.perf_counter()
+    index, _ = BM25Index.load(path)
+    load = time.perf_counter() - started
+    print(f"snapshot {os.path.getsize(path) / 1e6:.1f}MB: save {save:.2f}s, load {load:.2f}s")
+
+    # Queries mix common and rare terms
+    query_terms = [" ".join(rng.choice(vocabulary[:5000], size=rng.integers(1, 5))) for _ in range(queries)]
+    course = set(modules[:10])
+    for label, kwargs in [
+        ("no filters", {}),
+        ("language", {"language": "hi"}),
+        ("course (10 modules)", {"groups": course}),
+        ("module + language", {"groups": {modules[0]}, "language": "en"})
+    ]:
+        samples = []
+        for query in query_terms:
+            started = time.perf_counter()
+            index.search(query, 10, **kwargs)
+            samples.append(time.perf_counter() - started)
+        print(f"{label:22s} {percentiles(samples)}")
+
+    # Incremental updates between queries merge pending postings lazily
+    samples = []
+    for i, query in enumerate(query_terms[:200]):
+        index.add(f"new{i}", texts[i], "en", (f"new{i}", modules[0]))
+        started = time.perf_counter()
+        index.search(query, 10)
+        samples.append(time.perf_counter() - started)
+    print(f"{'after each insert':22s} {percentiles(samples)}")
+
+
+if __name__ == "__main__":
+    main()
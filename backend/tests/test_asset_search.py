@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core.config import settings
+from app.services.asset_search_service import AssetSearchService
+from app.services.bm25 import BM25Index
+
+
+def _matches(doc, query):
+    condition = query.get("_id", {})
+    return ("$gt" not in condition or doc["_id"] > condition["$gt"]) and (
+        "$lte" not in condition or doc["_id"] <= condition["$lte"]
+    )
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in sorted(self.docs, key=lambda doc: doc["_id"]):
+            yield doc
+
+
+class FakeAssets:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, query, projection=None):
+        return FakeCursor([doc for doc in self.docs if _matches(doc, query)])
+
+
+class FakeDB:
+    def __init__(self, assets):
+        self.assets = FakeAssets(assets)
+
+
+def _asset(seconds_ago, content):
+    return {"_id": ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=seconds_ago)), "content": content}
+
+
+def test_catch_up_finds_older_inserts_from_other_workers(monkeypatch):
+    monkeypatch.setattr(settings, "search_settle_seconds", 30)
+    service = AssetSearchService()
+    db = FakeDB([_asset(600, "photosynthesis")])
+    asyncio.run(service.catch_up(db))
+
+    # This worker indexes its own fresh insert, then another worker's slightly older one lands
+    local = _asset(5, "mitochondria")
+    service.index_asset(local)
+    remote = _asset(20, "chlorophyll")
+    db.assets.docs += [local, remote]
+    # Once both have settled
+    monkeypatch.setattr(settings, "search_settle_seconds", 0)
+
+    assert asyncio.run(service.catch_up(db)) == 1
+    assert {str(remote["_id"]), str(local["_id"])} <= set(service.index.slots)
+
+
+def test_catch_up_leaves_unsettled_inserts_for_the_next_run(monkeypatch):
+    monkeypatch.setattr(settings, "search_settle_seconds", 30)
+    service = AssetSearchService()
+    fresh = _asset(5, "respiration")
+
+    assert asyncio.run(service.catch_up(FakeDB([fresh]))) == 0
+    assert service.high_water_mark < fresh["_id"]
+
+
+def test_snapshot_is_written_off_the_event_loop_from_a_copy(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "search_snapshot_path", str(tmp_path / "index.npz"))
+    service = AssetSearchService()
+    first = _asset(600, "photosynthesis in plants")
+    service.index_asset(first)
+
+    async def save_while_indexing():
+        saving = asyncio.create_task(service.save_snapshot())
+        await asyncio.sleep(0)
+        service.index_asset(_asset(500, "plants and light"))
+        await saving
+
+    asyncio.run(save_while_indexing())
+    loaded, _ = BM25Index.load(settings.search_snapshot_path)
+
+    assert list(loaded.slots) == [str(first["_id"])]
+    assert len(service.index) == 2
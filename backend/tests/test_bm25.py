@@ -0,0 +1,62 @@
+from app.services.bm25 import BM25Index, tokenize
+
+
+def _index() -> BM25Index:
+    index = BM25Index()
+    index.add("a1", "Photosynthesis converts light energy into chemical energy in plants", "en", ("a1", "m1"))
+    index.add("a2", "Plants need water and sunlight", "en", ("a2", "m1"))
+    index.add("a3", "Newton's laws describe motion and force", "en", ("a3", "m2"))
+    index.add("a4", "प्रकाश संश्लेषण photosynthesis पौधों में", "hi", ("a4", "m1"))
+    return index
+
+
+def test_tokenize_keeps_indic_words_whole():
+    assert tokenize("The पौधों and తెలుగు plants") == ["पौधों", "తెలుగు", "plants"]
+
+
+def test_search_ranks_by_bm25_and_applies_filters():
+    index = _index()
+
+    assert index.search("photosynthesis plants energy")[0][0] == "a1"
+    assert [doc_id for doc_id, _ in index.search("photosynthesis", language="hi")] == ["a4"]
+    assert [doc_id for doc_id, _ in index.search("plants", groups={"a2"})] == ["a2"]
+    assert {doc_id for doc_id, _ in index.search("plants", groups={"m1"})} == {"a1", "a2"}
+    assert index.search("plants", groups={"unknown"}) == []
+
+
+def test_remove_and_reindex_replace_documents():
+    index = _index()
+    index.remove("a1")
+    index.add("a2", "Gravity and motion", "en", ("a2", "m1"))
+
+    assert index.search("photosynthesis", language="en") == []
+    assert [doc_id for doc_id, _ in index.search("motion")] in (["a2", "a3"], ["a3", "a2"])
+    assert len(index) == 3
+
+
+def test_snapshot_round_trip_preserves_results(tmp_path):
+    index = _index()
+    index.remove("a3")
+    path = str(tmp_path / "index.npz")
+    index.save(path, {"high_water_mark": "abc"})
+
+    loaded, info = BM25Index.load(path)
+
+    assert info == {"high_water_mark": "abc"}
+    assert len(loaded) == 3
+    assert loaded.search("photosynthesis plants") == index.search("photosynthesis plants")
+    loaded.add("a5", "More about plants", "en", ("a5", "m3"))
+    assert "a5" in {doc_id for doc_id, _ in loaded.search("plants")}
+
+
+def test_snapshot_of_a_grown_index_has_one_row_per_document(tmp_path):
+    index = BM25Index()
+    for i in range(1500):
+        index.add(f"d{i}", f"topic{i % 7} shared words", "en", (f"d{i}", "m"))
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+
+    loaded, _ = BM25Index.load(path)
+
+    assert len(loaded) == 1500
+    assert loaded.search("topic3", limit=500) == index.search("topic3", limit=500)
@@ -0,0 +1,101 @@
+import asyncio
+
+from app.core.cache import (
+    AsyncLRUCache, CacheInvalidator, _invalidate_from_change, asset_cache, asset_json_cache, course_cache
+)
+
+
+def test_get_or_load_caches_and_counts_hits():
+    """A second read is served from the cache and recorded as a hit."""
+    cache = AsyncLRUCache("test-hits", collection="test", max_entries=4, ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"_id": "c1", "modules": []}
+
+    async def run():
+        first = await cache.get_or_load("c1", loader)
+        first["modules"].append("mutated")
+        second = await cache.get_or_load("c1", loader)
+        return second
+
+    second = asyncio.run(run())
+    assert len(calls) == 1
+    assert second["modules"] == []
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_lru_eviction_and_prefix_invalidation():
+    """Oldest entries are evicted and prefix invalidation drops matching keys."""
+    cache = AsyncLRUCache("test-evict", collection="test", max_entries=2, ttl_seconds=60)
+    cache.set("a:en", {"v": 1})
+    cache.set("b:en", {"v": 2})
+    cache.set("b:hi", {"v": 3})
+
+    assert cache.get("a:en") is None
+    cache.invalidate_prefix("b:")
+    assert cache.get("b:en") is None
+    assert cache.get("b:hi") is None
+
+
+def test_none_results_are_not_cached():
+    """Missing documents are looked up again on the next read."""
+    cache = AsyncLRUCache("test-none", collection="test", max_entries=2, ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return None
+
+    async def run():
+        await cache.get_or_load("missing", loader)
+        await cache.get_or_load("missing", loader)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_asset_writes_invalidate_document_and_json_caches():
+    """Serialized asset responses live in their own cache but are dropped by the same writes."""
+    asset_cache.set("A1:code", {"code": "A1"})
+    asset_json_cache.set("A1:en:get-asset", b'{"code":"A1"}')
+
+    _invalidate_from_change("assets", "asset-id", {"code": "A1"})
+
+    assert asset_cache.get("A1:code") is None
+    assert asset_json_cache.get("A1:en:get-asset") is None
+
+
+class FakeVersions:
+    def __init__(self, version):
+        self.version = version
+
+    async def find_one_and_update(self, query, update, upsert=False, return_document=None):
+        self.version += update["$inc"]["version"]
+        return {"_id": query["_id"], "version": self.version}
+
+
+class FakeDB:
+    def __init__(self, version):
+        self.cache_versions = FakeVersions(version)
+
+
+def test_version_stamp_write_after_another_workers_write_clears_the_cache():
+    """Seen 4, another worker bumps to 5, ours to 6: recording 6 alone would hide the other write."""
+    invalidator = CacheInvalidator()
+    invalidator.mode = "version_stamp"
+    invalidator.db = FakeDB(version=4)
+    invalidator._versions = {"courses": 4}
+
+    asyncio.run(invalidator.notify_write("courses", "course-1"))
+    course_cache.set("course-2", {"name": "kept"})
+    assert course_cache.get("course-2") == {"name": "kept"}
+    assert invalidator._versions["courses"] == 5
+
+    invalidator.db.cache_versions.version += 1  # another worker's write
+    asyncio.run(invalidator.notify_write("courses", "course-1"))
+
+    assert course_cache.get("course-2") is None
+    assert invalidator._versions["courses"] == 7
@@ -0,0 +1,82 @@
+import numpy as np
+
+from app.services.context_retrieval_service import ChunkIndex, asset_context_text
+from app.services.embeddings import chunk_text, embed, estimate_tokens
+
+
+def _index(texts, assets):
+    return ChunkIndex(
+        [f"Asset (TEXT): {i}" for i in range(max(assets) + 1)],
+        texts,
+        np.array([estimate_tokens(text) for text in texts]),
+        np.array(assets),
+        embed(texts)
+    )
+
+
+def test_chunks_respect_the_token_budget_and_keep_all_text():
+    text = " ".join(f"Sentence number {i} talks about topic {i % 5}." for i in range(200))
+    chunks = chunk_text(text, max_tokens=50)
+
+    assert all(estimate_tokens(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+
+def test_embeddings_rank_related_text_higher():
+    query, related, unrelated = embed([
+        "photosynthesis in plants",
+        "Plants use photosynthesis to turn light into sugar",
+        "Newton's second law relates force and acceleration"
+    ])
+
+    assert query @ related > query @ unrelated
+    assert abs(float(np.linalg.norm(related)) - 1) < 1e-5
+
+
+def test_select_stays_within_budget_and_skips_redundant_chunks():
+    texts = [
+        "Photosynthesis converts light energy into chemical energy.",
+        "Photosynthesis converts light energy into chemical energy.",
+        "Chlorophyll in the leaves absorbs light for photosynthesis.",
+        "The French revolution began in 1789."
+    ]
+    index = _index(texts, [0, 0, 1, 2])
+    budget = estimate_tokens(texts[0]) + estimate_tokens(texts[2])
+
+    selected = index.select(embed(["photosynthesis light energy"])[0], budget, diversity=0.5)
+
+    assert selected.tolist() == [0, 2]
+    assert index.render(selected) == f"Asset (TEXT): 0\n{texts[0]}\nAsset (TEXT): 1\n{texts[2]}"
+
+
+def test_module_within_budget_is_sent_whole():
+    index = _index(["One.", "Two."], [0, 0])
+
+    assert index.select(embed(["anything"])[0], 100).tolist() == [0, 1]
+
+
+def test_outline_query_follows_the_module_asset_titles():
+    texts = [
+        "Photosynthesis turns light into chemical energy.",
+        "Remember to submit your forms by Friday.",
+        "Chlorophyll absorbs light in the leaves."
+    ]
+    index = ChunkIndex(
+        ["Asset (TEXT): Photosynthesis", "Asset (PDF): Chlorophyll"],
+        texts,
+        np.array([estimate_tokens(text) for text in texts]),
+        np.array([0, 0, 1]),
+        embed(texts)
+    )
+    budget = estimate_tokens(texts[0]) + estimate_tokens(texts[2])
+
+    assert index.outline() == "Photosynthesis\nChlorophyll"
+    # The course title alone says nothing about the module; its asset titles do
+    assert index.select(embed([f"Biology 101\n{index.outline()}"])[0], budget).tolist() == [0, 2]
+
+
+def test_asset_context_text_uses_the_type_specific_field():
+    video = {"type": "video", "title": "Intro", "transcript": "Hello there", "duration": 120}
+
+    assert asset_context_text(video) == "Asset (VIDEO): Intro\nHello there (Duration: 2 minutes)"
+    assert asset_context_text({"type": "text", "title": "Empty", "content": "  "}) == ""
@@ -0,0 +1,49 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+from bson import ObjectId
+
+from app.api.api_v1.endpoints import courses
+from app.services.course_progress_service import course_progress_service, status_deltas
+from app.utils.response import dumps
+
+
+def test_status_deltas_follow_transitions():
+    """Rollup counters move by the difference between the old and new status."""
+    assert status_deltas(None, "in-progress") == (0, 1)
+    assert status_deltas("in-progress", "completed") == (1, -1)
+    assert status_deltas("completed", "completed") == (0, 0)
+    assert status_deltas("completed", "not-started") == (-1, 0)
+
+
+def test_progress_route_renders_rollups_through_the_schema(monkeypatch):
+    rollup_id = ObjectId()
+    rollups = [{
+        "_id": rollup_id, "user": "7", "course": "c1", "course_name": "Course", "completed_count": 2,
+        "in_progress_count": 1, "total_assets": 4, "percentage": 50.0,
+        "last_activity": datetime(2024, 5, 1, 12, 30), "internal_note": "not in the schema"
+    }]
+
+    async def get_user_progress(db, user):
+        return rollups
+
+    monkeypatch.setattr(courses, "get_database", lambda: object())
+    monkeypatch.setattr(course_progress_service, "get_user_progress", get_user_progress)
+    user = SimpleNamespace(id=7, is_superuser=False)
+
+    body = orjson.loads(asyncio.run(courses.get_my_course_progress(current_user=user)).body)
+
+    assert (body["user"], body["count"]) == ("7", 1)
+    (course,) = body["courses"]
+    assert course["_id"] == str(rollup_id) and course["last_activity"] == "2024-05-01T12:30:00"
+    assert "internal_note" not in course and "user" not in course
+
+
+def test_dumps_encodes_object_ids_and_datetimes():
+    object_id = ObjectId()
+
+    encoded = orjson.loads(dumps({"_id": object_id, "at": datetime(2024, 1, 2, 3, 4, 5), "ids": [object_id]}))
+
+    assert encoded == {"_id": str(object_id), "at": "2024-01-02T03:04:05", "ids": [str(object_id)]}
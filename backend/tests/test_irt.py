@@ -0,0 +1,125 @@
+import asyncio
+
+import numpy as np
+from bson import ObjectId
+
+from app.services import irt_calibration_service as module
+from app.services.irt import IRTParams, Responses, fit, item_flags
+
+
+def _simulate(users=400, items=20, seed=0):
+    rng = np.random.default_rng(seed)
+    theta = rng.normal(size=users)
+    b = np.linspace(-1.5, 1.5, items)
+    user = np.repeat(np.arange(users), items)
+    item = np.tile(np.arange(items), users)
+    p = 1 / (1 + np.exp(-(theta[user] - b[item])))
+    correct = (rng.random(user.shape[0]) < p).astype(np.float64)
+    return theta, b, Responses(user, item, correct, users, items)
+
+
+def test_fit_recovers_difficulty_order():
+    """Fitted difficulties track the simulated ones."""
+    _, b, responses = _simulate()
+    params = IRTParams.initial(responses.n_users, responses.n_items)
+
+    report = fit(responses, params, "2pl")
+
+    assert report.converged
+    assert np.corrcoef(params.b, b)[0, 1] > 0.95
+
+
+def test_warm_start_converges_quickly():
+    """A re-fit from converged parameters needs very few iterations."""
+    _, _, responses = _simulate()
+    params = IRTParams.initial(responses.n_users, responses.n_items)
+    cold = fit(responses, params, "1pl")
+
+    warm = fit(responses, params, "1pl")
+
+    assert warm.iterations < cold.iterations
+    assert warm.iterations <= 2
+
+
+def test_fixed_parameters_are_not_moved():
+    """Incremental re-fits hold parameters outside the touched set."""
+    _, _, responses = _simulate()
+    params = IRTParams.initial(responses.n_users, responses.n_items)
+    fixed_items = np.zeros(responses.n_items, dtype=bool)
+    fixed_items[:5] = True
+    params.b[:5] = 0.25
+
+    fit(responses, params, "2pl", fixed_items=fixed_items)
+
+    assert np.all(params.b[:5] == 0.25)
+    assert np.all(params.a[:5] == 1.0)
+
+
+def test_item_flags():
+    assert item_flags(0.0, -0.5, 0.5, "2pl") == ["negative_discrimination"]
+    assert item_flags(-3.5, 1.0, 0.97, "2pl") == ["too_easy"]
+    assert item_flags(0.0, 0.1, 0.5, "1pl") == []
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class _Collection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+        self.in_sizes = []
+
+    def find(self, query, projection=None):
+        ids = query.get("_id", {}).get("$in") if isinstance(query.get("_id"), dict) else None
+        if ids is not None:
+            self.in_sizes.append(len(ids))
+            return _Cursor([doc for doc in self.docs if doc["_id"] in ids])
+        return _Cursor(self.docs)
+
+
+def test_calibration_streams_attempts_and_batches_lookups(monkeypatch):
+    """Attempts are folded a batch at a time and stored abilities are read in bounded $in batches."""
+    monkeypatch.setattr(module, "READ_BATCH_SIZE", 2)
+    quiz_id = ObjectId()
+    rng = np.random.default_rng(1)
+    attempts = [
+        {"quiz_id": str(quiz_id), "user_id": f"u{n}",
+         "answers": [{"selected_answer": int(rng.integers(0, 2))} for _ in range(3)]}
+        for n in range(5)
+    ]
+    abilities = _Collection([{"_id": "u0", "ability": 1.5}])
+    db = {
+        "quiz_attempts": _Collection(attempts),
+        "quizzes": _Collection([{"_id": quiz_id, "questions": [{"correct_answer": 1}] * 3}]),
+        module.IRT_ITEM_PARAMS: _Collection(),
+        module.IRT_USER_ABILITIES: abilities,
+    }
+
+    class FakeDB(dict):
+        __getattr__ = dict.__getitem__
+
+    async def fake_store(db, responses, params, model, items, users, fixed_items, fixed_users):
+        return len(items), len(users)
+
+    service = module.IRTCalibrationService()
+    monkeypatch.setattr(service, "_store", fake_store)
+
+    report = asyncio.run(service._fit(FakeDB(db), {}, "1pl", None, None))
+
+    assert report["attempts"] == 5 and report["responses"] == 15
+    assert (report["items_fitted"], report["users_fitted"]) == (3, 5)
+    assert abilities.in_sizes == [2, 2, 1]
+    # One answer-key lookup for the quiz, not one per batch
+    assert db["quizzes"].in_sizes == [1]
@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.api_v1.endpoints.adaptive import get_user_mastery
+from app.services import mastery_service as module
+from app.services.knowledge_tracing import CORRECT, INCORRECT, LEARNING, BKTParams, trace, update
+
+
+def _sequential(mastery, pair, observation, params):
+    mastery = list(mastery)
+    for p, o in zip(pair, observation):
+        mastery[p] = float(update(np.array([mastery[p]]), np.array([o]), params)[0])
+    return mastery
+
+
+def test_trace_matches_event_by_event_updates():
+    """The vectorized batch gives the same result as applying events one at a time."""
+    rng = np.random.default_rng(0)
+    params = BKTParams()
+    mastery = rng.random(50)
+    pair = rng.integers(0, 50, size=1000)
+    observation = rng.choice([CORRECT, INCORRECT, LEARNING], size=1000)
+
+    result = trace(mastery, pair, observation, params)
+
+    assert np.allclose(result, _sequential(mastery, pair, observation, params))
+
+
+def test_correct_answers_raise_and_incorrect_lower_mastery():
+    start = np.array([0.5, 0.5, 0.5])
+
+    result = trace(start, np.array([0, 1, 2]), np.array([CORRECT, INCORRECT, LEARNING]))
+
+    assert result[0] > result[2] > 0.5 > result[1]
+
+
+def test_trace_leaves_untouched_pairs_and_input_alone():
+    start = np.array([0.3, 0.3])
+
+    result = trace(start, np.array([1]), np.array([CORRECT]))
+
+    assert result[0] == 0.3
+    assert start[1] == 0.3
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        ids = query.get("_id", {}).get("$in")
+        return _Cursor([doc for doc in self.docs if ids is None or doc["_id"] in ids])
+
+
+def test_attempt_events_are_read_in_batches_and_quizzes_loaded_once(monkeypatch):
+    monkeypatch.setattr(module, "READ_BATCH_SIZE", 2)
+    quiz_id, other_id = ObjectId(), ObjectId()
+    quizzes = _Collection([
+        {"_id": quiz_id, "course_id": "c1", "module_code": "m1", "questions": [{"correct_answer": 1}, {"correct_answer": 0}]},
+        {"_id": other_id, "course_id": "c1", "module_code": "m2", "questions": [{"correct_answer": 2}]}
+    ])
+    attempts = [
+        {"_id": ObjectId(), "quiz_id": str(quiz_id), "user_id": "u1", "answers": [{"selected_answer": 1}, {"selected_answer": 1}]},
+        {"_id": ObjectId(), "quiz_id": str(quiz_id), "user_id": "u2", "answers": [{"selected_answer": 1}]},
+        {"_id": ObjectId(), "quiz_id": str(other_id), "user_id": "u1", "answers": [{"selected_answer": 2}]},
+        {"_id": ObjectId(), "quiz_id": "not-an-id", "user_id": "u1", "answers": [{"selected_answer": 0}]}
+    ]
+    db = SimpleNamespace(quiz_attempts=_Collection(attempts), quizzes=quizzes)
+
+    events = asyncio.run(module.MasteryService()._attempt_events(db, ObjectId("0" * 24), ObjectId("f" * 24)))
+
+    assert [(user, code, observation) for _, user, _, code, observation in events] == [
+        ("u1", "m1", CORRECT), ("u1", "m1", INCORRECT), ("u2", "m1", CORRECT), ("u1", "m2", CORRECT)
+    ]
+    # One quiz lookup per batch with unseen quizzes
+    assert len(quizzes.queries) == 2
+
+
+def test_learners_only_see_their_own_mastery():
+    learner = SimpleNamespace(id=7, is_superuser=False)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(get_user_mastery("8", db=object(), current_user=learner))
+
+    assert error.value.status_code == 403
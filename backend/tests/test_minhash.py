@@ -0,0 +1,34 @@
+from app.services.minhash import band_keys, question_text, signatures, similarity
+
+QUESTION = {
+    "question": "Which data structure gives constant time average lookup by key in Python programs?",
+    "options": ["A list", "A dictionary", "A tuple", "A string"]
+}
+
+
+def test_reordered_options_have_identical_signatures():
+    """Options are sorted before hashing, so shuffling them changes nothing."""
+    shuffled = {**QUESTION, "options": list(reversed(QUESTION["options"]))}
+    first, second = signatures([question_text(QUESTION), question_text(shuffled)])
+
+    assert similarity(first, second) == 1.0
+    assert band_keys(first) == band_keys(second)
+
+
+def test_small_rewording_is_a_candidate_with_high_similarity():
+    """A one-word edit keeps most shingles, so some band matches and similarity stays high."""
+    reworded = {**QUESTION, "question": QUESTION["question"].replace("programs", "code")}
+    first, second = signatures([question_text(QUESTION), question_text(reworded)])
+
+    assert similarity(first, second) >= 0.6
+    assert set(band_keys(first)) & set(band_keys(second))
+
+
+def test_unrelated_questions_are_not_similar():
+    other = {
+        "question": "What is the capital city of France and its largest metropolitan area?",
+        "options": ["Paris", "Lyon", "Marseille", "Nice"]
+    }
+    first, second = signatures([question_text(QUESTION), question_text(other)])
+
+    assert similarity(first, second) < 0.2
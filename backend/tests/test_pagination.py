@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime
+
+import orjson
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.utils.pagination import NDJSON_MEDIA_TYPE, fetch_page, keyset_query, stream_ndjson
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field], reverse=direction < 0)
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.projections = []
+
+    def find(self, query, projection=None):
+        self.projections.append(projection)
+        bound = query.get("_id", {}).get("$gt")
+        return FakeCursor([doc for doc in self.docs if bound is None or doc["_id"] > bound])
+
+
+def _docs(count):
+    # Same created_at everywhere, stored out of order: only _id decides the order
+    created_at = datetime(2024, 1, 1)
+    docs = [{"_id": ObjectId(), "name": f"doc-{i}", "created_at": created_at} for i in range(count)]
+    return docs, list(reversed(docs))
+
+
+def _walk(collection, limit):
+    pages = []
+    after = None
+    while True:
+        items, after = asyncio.run(fetch_page(collection, keyset_query(after), limit, lambda doc: doc["name"]))
+        pages.append(items)
+        if after is None:
+            return pages
+
+
+def test_pages_follow_id_order_without_gaps_or_repeats():
+    _, stored = _docs(5)
+
+    pages = _walk(FakeCollection(stored), limit=2)
+
+    assert pages == [["doc-0", "doc-1"], ["doc-2", "doc-3"], ["doc-4"]]
+
+
+def test_a_full_last_page_has_no_next_cursor():
+    docs, stored = _docs(4)
+
+    pages = _walk(FakeCollection(stored), limit=2)
+
+    assert pages == [["doc-0", "doc-1"], ["doc-2", "doc-3"]]
+    items, after = asyncio.run(fetch_page(FakeCollection(stored), keyset_query(str(docs[1]["_id"])), 2, lambda doc: doc["name"]))
+    assert (items, after) == (["doc-2", "doc-3"], None)
+
+
+def test_keyset_query_keeps_filters_and_rejects_bad_cursors():
+    after = ObjectId()
+
+    assert keyset_query(None, {"style": "original"}) == {"style": "original"}
+    assert keyset_query(str(after), {"style": "original"}) == {"style": "original", "_id": {"$gt": after}}
+    with pytest.raises(HTTPException) as error:
+        keyset_query("not-a-cursor")
+    assert error.value.status_code == 400
+
+
+def test_stream_ndjson_writes_one_document_per_line():
+    docs, stored = _docs(3)
+    collection = FakeCollection(stored)
+
+    async def read():
+        response = stream_ndjson(collection, {}, lambda doc: doc, limit=2, projection={"name": 1})
+        return response, [chunk async for chunk in response.body_iterator]
+
+    response, chunks = asyncio.run(read())
+
+    assert response.media_type == NDJSON_MEDIA_TYPE
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+    lines = [orjson.loads(chunk) for chunk in chunks]
+    assert [line["_id"] for line in lines] == [str(doc["_id"]) for doc in docs[:2]]
+    assert lines[0]["created_at"] == "2024-01-01T00:00:00"
+    assert collection.projections == [{"name": 1}]
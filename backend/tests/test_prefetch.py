@@ -0,0 +1,136 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.api.api_v1.endpoints import courses
+from app.core.config import settings
+from app.services.course_service import CourseService
+from app.services.prefetch_service import PrefetchService, next_assets, prefetch_jobs, prefetch_service
+
+PREFERENCES = {"domain": "Engineering", "hobbies": "Films, cricket", "learningStyle": "summary", "language": "hi"}
+
+
+def _course(statuses):
+    assets = [
+        {"_id": str(ObjectId()), "code": f"A{i}", "content": f"Content {i}", "user_status": status}
+        for i, status in enumerate(statuses)
+    ]
+    return {"_id": "course-1", "modules": [{"assets": assets[:2]}, {"assets": assets[2:]}]}
+
+
+def test_next_assets_skips_completed_in_module_order():
+    course = _course(["completed", "in-progress", "not-started", "not-started"])
+
+    assert [asset["code"] for asset in next_assets(course, 2)] == ["A1", "A2"]
+
+
+def test_jobs_use_canonical_preferences_and_translate_non_english():
+    asset = _course(["not-started"])["modules"][0]["assets"][0]
+
+    keys = [key for key, _ in prefetch_jobs([asset], PREFERENCES)]
+
+    assert keys == [("variant", "A0", "summary", "engineering-student", "movies"), ("translation", "A0", "hi")]
+    assert prefetch_jobs([asset], {**PREFERENCES, "language": "en"})[0][0][0] == "variant"
+
+
+def test_schedule_dedupes_per_user_and_across_users_and_caps_concurrency(monkeypatch):
+    monkeypatch.setattr(settings, "prefetch_enabled", True)
+    monkeypatch.setattr(settings, "prefetch_next_assets", 2)
+    monkeypatch.setattr(settings, "prefetch_max_concurrency", 1)
+    monkeypatch.setattr(settings, "prefetch_user_cooldown_seconds", 300)
+    service = PrefetchService()
+    running, peak, generated = [0], [0], []
+
+    async def fake_preferences(db, user_id, email=None):
+        return {**PREFERENCES, "language": "en"}
+
+    async def fake_variant(db, code, style, domain, hobby, content):
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.01)
+        generated.append(code)
+        running[0] -= 1
+        return True
+
+    monkeypatch.setattr(service, "_preferences", fake_preferences)
+    monkeypatch.setattr(service, "_prefetch_variant", fake_variant)
+    course = _course(["not-started", "not-started", "not-started"])
+
+    async def run():
+        first = await service.schedule(object(), course, "user-1")
+        again = await service.schedule(object(), course, "user-1")
+        other_user = await service.schedule(object(), course, "user-2")
+        await asyncio.gather(*service._tasks)
+        return first, again, other_user
+
+    assert asyncio.run(run()) == (2, 0, 0)
+    assert sorted(generated) == ["A0", "A1"]
+    assert peak[0] == 1
+    assert service.status()["generated"] == 2
+
+
+class FakeCursor:
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        return
+        yield
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, query, projection=None):
+        return FakeCursor()
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs if all(doc.get(k) == v for k, v in query.items())), None)
+
+
+class FakeDB(dict):
+    __getattr__ = dict.__getitem__
+
+
+def test_course_route_prefetches_for_the_authenticated_account(monkeypatch):
+    """The route knows the SQL account (integer id); its preferences are found by email."""
+    monkeypatch.setattr(settings, "prefetch_enabled", True)
+    monkeypatch.setattr(settings, "prefetch_next_assets", 2)
+    monkeypatch.setattr(settings, "cache_enabled", False)
+    now = datetime.utcnow()
+    assets = {asset["_id"]: asset for asset in _course(["not-started", "not-started"])["modules"][0]["assets"]}
+    # Stored courses hold asset ids; the service resolves them
+    course = {"_id": str(ObjectId()), "name": "Course", "modules": [{"assets": list(assets)}], "created_at": now, "updated_at": now}
+    db = FakeDB({
+        "userassetstatus": FakeCollection(),
+        "course_progress": FakeCollection(),
+        "users": FakeCollection([{"_id": ObjectId(), "email": "learner@example.com", **PREFERENCES, "language": "en"}])
+    })
+    generated = []
+
+    async def get_course(self, course_id):
+        return course
+
+    async def resolve_asset(self, field, asset_id):
+        return dict(assets[asset_id])
+
+    async def fake_variant(db, code, style, domain, hobby, content):
+        generated.append(code)
+        return True
+
+    monkeypatch.setattr(courses, "get_database", lambda: db)
+    monkeypatch.setattr(CourseService, "get_course", get_course)
+    monkeypatch.setattr(CourseService, "_resolve_asset", resolve_asset)
+    monkeypatch.setattr(prefetch_service, "_prefetch_variant", fake_variant)
+    user = SimpleNamespace(id=7, email="learner@example.com", is_superuser=False)
+
+    async def run():
+        await courses.get_course_assets_with_progress(course["_id"], current_user=user)
+        await asyncio.gather(*prefetch_service._tasks)
+
+    asyncio.run(run())
+
+    assert sorted(generated) == ["A0", "A1"]
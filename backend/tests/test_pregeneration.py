@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.api_v1.endpoints.content_transformer import run_pregeneration
+
+from app.core.config import settings
+from app.services import pregeneration_service as module
+from app.services.pregeneration_service import PregenerationService, in_window, rank_combinations
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict) and "$in" in condition:
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([doc for doc in self.docs if _matches(doc, query or {})])
+
+    async def find_one(self, query, projection=None):
+        return next((doc for doc in self.docs if _matches(doc, query)), None)
+
+    async def distinct(self, field, query=None):
+        return []
+
+    async def update_one(self, query, update, upsert=False):
+        doc = await self.find_one(query)
+        if doc is None:
+            doc = {**query}
+            self.docs.append(doc)
+        for key, amount in update["$inc"].items():
+            doc[key] = doc.get(key, 0) + amount
+
+
+class FakeDB(dict):
+    __getattr__ = dict.__getitem__
+
+
+class FakeLease:
+    def __init__(self, renewals=None):
+        self.renewals = renewals
+
+    async def acquire(self, db):
+        return True, None
+
+    async def renew(self, db):
+        if self.renewals is None:
+            return True
+        self.renewals -= 1
+        return self.renewals >= 0
+
+    async def release(self, db):
+        pass
+
+
+def test_window_wraps_midnight():
+    assert in_window("1-6", datetime(2026, 1, 1, 3))
+    assert not in_window("1-6", datetime(2026, 1, 1, 6))
+    assert in_window("22-6", datetime(2026, 1, 1, 23)) and in_window("22-6", datetime(2026, 1, 1, 2))
+    assert not in_window("22-6", datetime(2026, 1, 1, 12))
+    assert in_window("", datetime(2026, 1, 1, 12))
+
+
+def test_combinations_are_canonical_and_weighted_by_activity():
+    users = [
+        {"_id": ObjectId(), "domain": "Engineering", "hobbies": "Films"},
+        {"_id": ObjectId(), "domain": "engineering-student", "hobbies": "movies"},
+        {"_id": ObjectId(), "domain": "medical-student", "hobbies": "cricket"},
+    ]
+    active = {str(users[2]["_id"]), str(users[1]["_id"])}
+
+    ranked = rank_combinations(users, active, limit=5)
+
+    assert ranked == [(("engineering-student", "movies"), 3), (("medical-student", "cricket"), 2)]
+
+
+def _db(asset_ids):
+    assets = [{"_id": asset_id, "code": str(asset_id), "content": f"Content {i}", "style": "original"}
+              for i, asset_id in enumerate(asset_ids)]
+    # The first asset already has its summary variant
+    assets.append({"_id": ObjectId(), "code": asset_ids[0], "style": "summary", "domain": "engineering-student", "hobby": "movies"})
+    return {
+        "courses": FakeCollection([{"_id": ObjectId(), "modules": [{"assets": asset_ids[:1]}, {"assets": asset_ids[1:]}]}]),
+        "assets": FakeCollection(assets),
+        "users": FakeCollection([{"_id": ObjectId(), "domain": "engineering-student", "hobbies": "movies"}]),
+        "userassetstatus": FakeCollection(),
+        "pregeneration_spend": FakeCollection()
+    }
+
+
+def test_run_batches_styles_in_module_order_and_stops_at_the_budget(monkeypatch):
+    asset_ids = [ObjectId(), ObjectId()]
+    db = FakeDB(_db(asset_ids))
+    generated = []
+
+    async def fake_generate(db, code, content, styles, domain, hobby, interactive=True):
+        generated.append((code, styles))
+        return {}, 400
+
+    monkeypatch.setattr(module, "generate_asset_variants", fake_generate)
+    monkeypatch.setattr(settings, "pregeneration_styles", "storytelling,visual_cue,summary")
+    monkeypatch.setattr(settings, "pregeneration_daily_token_budget", 600)
+    monkeypatch.setattr(settings, "pregeneration_idle_seconds", 0)
+    service = PregenerationService()
+    service.lease = FakeLease()
+
+    report = asyncio.run(service.run(db, force=True))
+
+    first, second = str(asset_ids[0]), str(asset_ids[1])
+    # Each asset's missing styles go out in one call
+    assert generated == [(first, ["storytelling", "visual_cue"]), (second, ["storytelling", "visual_cue", "summary"])]
+    assert report["stopped"] == "done"
+    assert report["generated"] == 5
+    spend = db["pregeneration_spend"].docs[0]
+    assert (spend["tokens"], spend["variants"]) == (800, 5)
+
+    monkeypatch.setattr(settings, "pregeneration_daily_token_budget", 300)
+    generated.clear()
+    report = asyncio.run(service.run(FakeDB(_db(asset_ids)), force=True))
+
+    assert generated == [(first, ["storytelling", "visual_cue"])]
+    assert report["stopped"] == "daily budget reached"
+
+
+def test_run_stops_when_the_lease_is_lost(monkeypatch):
+    asset_ids = [ObjectId(), ObjectId()]
+    generated = []
+
+    async def fake_generate(db, code, content, styles, domain, hobby, interactive=True):
+        generated.append(code)
+        return {}, 100
+
+    monkeypatch.setattr(module, "generate_asset_variants", fake_generate)
+    monkeypatch.setattr(settings, "pregeneration_styles", "storytelling")
+    monkeypatch.setattr(settings, "pregeneration_daily_token_budget", 10000)
+    monkeypatch.setattr(settings, "pregeneration_idle_seconds", 0)
+    service = PregenerationService()
+    # Renewed for the first asset, then another worker takes over
+    service.lease = FakeLease(renewals=1)
+
+    report = asyncio.run(service.run(FakeDB(_db(asset_ids)), force=True))
+
+    assert generated == [str(asset_ids[0])]
+    assert report["stopped"] == "lease lost"
+
+
+def test_manual_run_is_admin_only():
+    learner = SimpleNamespace(id=7, is_superuser=False)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run_pregeneration(force=True, db=object(), current_user=learner))
+
+    assert error.value.status_code == 403
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.services import progress_buffer as progress_buffer_module
+from app.services.progress_buffer import ProgressWriteBuffer
+
+
+def test_heartbeats_coalesce_to_one_write_per_asset(monkeypatch):
+    """Many heartbeats for the same asset flush as a single upsert with the latest state."""
+    written = []
+
+    async def fake_bulk_upsert(db, updates):
+        written.extend(updates)
+        return {"matched": 0, "modified": 0, "upserted": len(written), "errors": []}
+
+    monkeypatch.setattr(
+        progress_buffer_module.user_asset_status_service, "bulk_upsert_statuses", fake_bulk_upsert
+    )
+
+    async def run():
+        buffer = ProgressWriteBuffer(flush_interval=60, max_pending=100)
+        buffer.start(db=object())
+        for progress in range(0, 100, 5):
+            assert await buffer.submit("c1", "a1", "u1", "in-progress", progress)
+            assert await buffer.submit("c1", "a2", "u1", "in-progress", progress)
+        # Completions bypass the buffer by default
+        assert not await buffer.submit("c1", "a3", "u1", "completed", 100)
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(run())
+
+    assert len(written) == 2
+    assert {update["progress"] for update in written} == {95}
+    assert buffer.heartbeats == 40
+    assert buffer.writes == 2
+
+
+MISSING = object()
+
+
+def _evaluate(expression, doc):
+    """Just enough of the aggregation expression language for the status update pipeline."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return doc.get(expression[1:], MISSING)
+    if not isinstance(expression, dict):
+        return expression
+    (operator, args), = expression.items()
+    if operator == "$literal":
+        return args
+    values = [_evaluate(arg, doc) for arg in args]
+    if operator == "$ifNull":
+        return values[1] if values[0] in (None, MISSING) else values[0]
+    if operator == "$lt":
+        # null and missing sort before dates
+        return values[0] in (None, MISSING) or values[0] < values[1]
+    if operator == "$cond":
+        return values[1] if values[0] else values[2]
+    if operator == "$min":
+        present = [value for value in values if value not in (None, MISSING)]
+        return min(present) if present else None
+    raise NotImplementedError(operator)
+
+
+class FakeStatusCollection:
+    def __init__(self):
+        self.docs = []
+        self.before_write = None
+
+    def row(self, key):
+        for doc in self.docs:
+            if all(doc.get(field) == value for field, value in key.items()):
+                return doc
+        doc = dict(key)
+        self.docs.append(doc)
+        return doc
+
+    async def bulk_write(self, operations, ordered=True):
+        if self.before_write:
+            await self.before_write()
+        for operation in operations:
+            doc = self.row(operation._filter)
+            (stage,) = operation._doc
+            values = {field: _evaluate(expression, doc) for field, expression in stage["$set"].items()}
+            doc.update({field: value for field, value in values.items() if value is not MISSING})
+
+        class Result:
+            matched_count = modified_count = upserted_count = len(operations)
+        return Result()
+
+
+async def _no_rollups(db, updates, previous, now):
+    pass
+
+
+def _complete(collection, at):
+    # What the written-through completed update leaves behind
+    collection.row({"course": "c1", "asset": "a1", "user": "u1"}).update(status="completed", updated_at=at, progress=100)
+
+
+def test_stale_heartbeat_cannot_overwrite_a_later_completion(monkeypatch):
+    """A batch in flight, or requeued after a failure, lands after the completion without undoing it."""
+    monkeypatch.setattr(progress_buffer_module.user_asset_status_service, "_update_rollups", _no_rollups)
+    collection = FakeStatusCollection()
+    db = {"userassetstatus": collection}
+
+    async def in_flight():
+        buffer = ProgressWriteBuffer(flush_interval=60, max_pending=100)
+        buffer.db = db
+        buffer._task = object()  # running, without the flush loop
+        await buffer.submit("c1", "a1", "u1", "in-progress", 40)
+        heartbeat_at = buffer._pending[("u1", "c1", "a1")]["at"]
+
+        async def completion_lands_first():
+            collection.before_write = None
+            _complete(collection, heartbeat_at + timedelta(seconds=1))
+
+        collection.before_write = completion_lands_first
+        await buffer.flush()
+
+    asyncio.run(in_flight())
+    assert collection.docs[0]["status"] == "completed"
+    assert collection.docs[0]["progress"] == 100
+
+    collection = FakeStatusCollection()
+    db = {"userassetstatus": collection}
+
+    async def requeued():
+        buffer = ProgressWriteBuffer(flush_interval=60, max_pending=100)
+        buffer.db = db
+        buffer._task = object()
+        await buffer.submit("c1", "a1", "u1", "in-progress", 40)
+        heartbeat_at = buffer._pending[("u1", "c1", "a1")]["at"]
+
+        async def fail():
+            raise RuntimeError("primary stepped down")
+
+        collection.before_write = fail
+        await buffer.flush()
+        collection.before_write = None
+        _complete(collection, heartbeat_at + timedelta(seconds=1))
+        await buffer.flush()
+
+    asyncio.run(requeued())
+    assert collection.docs[0]["status"] == "completed"
+
+
+def test_newer_heartbeat_still_updates_the_row(monkeypatch):
+    monkeypatch.setattr(progress_buffer_module.user_asset_status_service, "_update_rollups", _no_rollups)
+    collection = FakeStatusCollection()
+    _complete(collection, datetime(2026, 1, 1))
+
+    asyncio.run(progress_buffer_module.user_asset_status_service.bulk_upsert_statuses(
+        {"userassetstatus": collection},
+        [{"course": "c1", "asset": "a1", "user": "u1", "status": "in-progress", "progress": 10, "at": datetime(2026, 1, 2)}]
+    ))
+
+    assert (collection.docs[0]["status"], collection.docs[0]["progress"]) == ("in-progress", 10)
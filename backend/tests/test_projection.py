@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+
+from app.utils.projection import build_projection
+
+
+def test_no_fields_uses_the_default_or_the_whole_document():
+    assert build_projection(None, ["title", "code"]) == {"title": 1, "code": 1}
+    assert build_projection(None) is None
+
+
+def test_star_returns_the_whole_document_even_with_a_default():
+    assert build_projection("*", ["title"], required=["code"]) is None
+    assert build_projection(" * ", ["title"]) is None
+
+
+def test_requested_fields_are_trimmed_and_required_ones_added():
+    projection = build_projection(" title, ,description ", ["name"], required=["code"])
+
+    assert projection == {"title": 1, "description": 1, "code": 1}
+
+
+def test_id_alone_still_projects_rather_than_returning_everything():
+    assert build_projection("id,_id") == {"_id": 1}
+    assert build_projection("", ["title"]) == {"_id": 1}
+
+
+def test_unknown_fields_pass_through_and_operators_are_rejected():
+    # MongoDB returns nothing for a field that doesn't exist, so it isn't an error
+    assert build_projection("no_such_field") == {"no_such_field": 1}
+    with pytest.raises(HTTPException) as error:
+        build_projection("title,$where")
+    assert error.value.status_code == 400
@@ -0,0 +1,201 @@
+import asyncio
+
+import numpy as np
+from bson import ObjectId
+
+from app.core.config import settings
+from app.schemas.quiz import CourseModuleInfo
+from app.services import question_pool_service as module
+from app.services.llm_service import LLMProvider, LLMResponse, ResultType
+from app.services.minhash import band_keys, question_text, signatures
+from app.services.question_pool_service import PoolIndex, QuestionPoolService, shuffle_options
+
+
+def _pool(n=30):
+    ids = [f"q{i}" for i in range(n)]
+    return PoolIndex(ids, np.linspace(-3, 3, n), np.ones(n))
+
+
+def test_select_targets_ability():
+    """Selected questions come from the window nearest the learner's ability."""
+    pool = _pool()
+    rng = np.random.default_rng(0)
+
+    hard = pool.select(2.5, 3, set(), rng)
+    easy = pool.select(-2.5, 3, set(), rng)
+
+    assert all(int(question_id[1:]) >= 20 for question_id in hard)
+    assert all(int(question_id[1:]) < 10 for question_id in easy)
+
+
+def test_select_avoids_recent_until_exhausted():
+    """Recently seen questions are only used once unseen ones run out."""
+    pool = _pool(6)
+    rng = np.random.default_rng(0)
+    recent = {"q0", "q1", "q2", "q3"}
+
+    chosen = pool.select(0.0, 4, recent, rng)
+
+    assert len(chosen) == len(set(chosen)) == 4
+    assert {"q4", "q5"} <= set(chosen)
+
+
+def test_shuffle_options_keeps_correct_answer():
+    question = {"question": "?", "options": ["a", "b", "c", "d"], "correct_answer": 2}
+
+    for seed in range(10):
+        shuffled = shuffle_options(question, np.random.default_rng(seed))
+        assert sorted(shuffled["options"]) == ["a", "b", "c", "d"]
+        assert shuffled["options"][shuffled["correct_answer"]] == "c"
+    assert question["options"] == ["a", "b", "c", "d"]
+
+
+QUESTIONS = [
+    {
+        "question": "Which data structure gives constant time average lookup by key in Python programs?",
+        "options": ["A list", "A dictionary", "A tuple", "A string"],
+        "correct_answer": 1,
+        "explanation": "Dictionaries are hash tables."
+    },
+    {
+        "question": "What is the capital city of France and its largest metropolitan area?",
+        "options": ["Paris", "Lyon", "Marseille", "Nice"],
+        "correct_answer": 0,
+        "explanation": "Paris."
+    }
+]
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and not (set(value) if isinstance(value, list) else {value}) & set(condition["$in"]):
+                return False
+            if "$nin" in condition and value in condition["$nin"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+    async def to_list(self, length=None):
+        return self.docs
+
+
+class FakeCollection:
+    def __init__(self, docs=()):
+        self.docs = list(docs)
+
+    def find(self, query=None, projection=None):
+        return FakeCursor([doc for doc in self.docs if _matches(doc, query or {})])
+
+    async def insert_many(self, docs, ordered=True):
+        self.docs.extend(docs)
+
+    async def update_many(self, query, update):
+        matched = [doc for doc in self.docs if _matches(doc, query)]
+        for doc in matched:
+            doc.update(update["$set"])
+        return type("Result", (), {"modified_count": len(matched)})()
+
+    async def delete_many(self, query):
+        self.docs = [doc for doc in self.docs if not _matches(doc, query)]
+
+    async def bulk_write(self, operations, ordered=True):
+        for operation in operations:
+            if hasattr(operation, "_filter"):
+                await self.delete_many(operation._filter)
+            else:
+                self.docs.append(operation._doc)
+
+
+class FakeDB(dict):
+    __getattr__ = dict.__getitem__
+
+
+def _existing_pool():
+    """An active pool holding QUESTIONS, indexed like generate_pool would."""
+    pool = [
+        {"_id": ObjectId(), "course_id": "c1", "module_code": "m1", **question, "is_active": True}
+        for question in QUESTIONS
+    ]
+    sigs = signatures(question_text(question) for question in QUESTIONS)
+    indexed = [
+        {"_id": f"pool:{doc['_id']}", "course_id": "c1", "module_code": "m1", "pool_question_id": str(doc["_id"]),
+         "signature": sig.astype(np.int64).tolist(), "bands": band_keys(sig)}
+        for doc, sig in zip(pool, sigs)
+    ]
+    return FakeDB({"question_pool": FakeCollection(pool), "question_signatures": FakeCollection(indexed)})
+
+
+def _stub_generation(monkeypatch, response):
+    async def modules_info(self, db, course_id, module_code=None):
+        return [CourseModuleInfo(course_id=course_id, course_title="Course", module_code="m1", module_title="Module")]
+
+    async def generate_content(request):
+        return response
+
+    async def notify_write(*args):
+        pass
+
+    monkeypatch.setattr(module.QuizService, "get_course_modules_info", modules_info)
+    monkeypatch.setattr(module.llm_service, "generate_content", generate_content)
+    monkeypatch.setattr(module.cache_invalidator, "notify_write", notify_write)
+    monkeypatch.setattr(settings, "question_dedupe_mode", "reject")
+
+
+def test_overwrite_keeps_the_old_pool_when_generation_fails(monkeypatch):
+    db = _existing_pool()
+    _stub_generation(monkeypatch, LLMResponse(
+        success=False, result={}, result_type=ResultType.QUIZ_MCQ, provider=LLMProvider.GOOGLE, error_message="quota"
+    ))
+
+    result = asyncio.run(QuestionPoolService().generate_pools_for_course(db, "c1", "m1", 6, overwrite=True))
+
+    assert not result["pools"] and result["errors"]
+    assert all(doc["is_active"] for doc in db["question_pool"].docs)
+    assert len(db["question_signatures"].docs) == 2
+
+
+def test_overwrite_replaces_the_old_pool_after_storing_the_new_one(monkeypatch):
+    db = _existing_pool()
+    old_ids = {doc["_id"] for doc in db["question_pool"].docs}
+    # Regenerating the same questions must not reject them as duplicates of the pool being replaced
+    _stub_generation(monkeypatch, LLMResponse(
+        success=True, result={"questions": QUESTIONS[:1]}, result_type=ResultType.QUIZ_MCQ, provider=LLMProvider.GOOGLE
+    ))
+
+    result = asyncio.run(QuestionPoolService().generate_pools_for_course(db, "c1", "m1", 6, overwrite=True))
+
+    assert result["pools"][0]["questions"] == {"easy": 1, "medium": 0, "hard": 0}
+    active = [doc for doc in db["question_pool"].docs if doc["is_active"]]
+    assert len(active) == 1 and active[0]["_id"] not in old_ids
+    assert [doc["_id"] for doc in db["question_signatures"].docs] == [f"pool:{active[0]['_id']}"]
+
+
+def test_in_batch_duplicates_point_at_the_stored_question(monkeypatch):
+    db = FakeDB({"question_pool": FakeCollection(), "question_signatures": FakeCollection()})
+    _stub_generation(monkeypatch, LLMResponse(
+        success=True, result={"questions": QUESTIONS[:1]}, result_type=ResultType.QUIZ_MCQ, provider=LLMProvider.GOOGLE
+    ))
+    monkeypatch.setattr(settings, "question_dedupe_mode", "flag")
+
+    asyncio.run(QuestionPoolService().generate_pool(db, "c1", "m1", "Module", "", 3))
+
+    first, *rest = db["question_pool"].docs
+    indexed = {doc["_id"] for doc in db["question_signatures"].docs}
+    assert "duplicate_of" not in first
+    assert [doc["duplicate_of"] for doc in rest] == [f"pool:{first['_id']}"] * 2
+    assert f"pool:{first['_id']}" in indexed
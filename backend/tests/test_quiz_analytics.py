@@ -0,0 +1,140 @@
+import asyncio
+
+import numpy as np
+from bson import ObjectId
+
+from app.services import quiz_analytics_service as module
+from app.services.quiz_analytics_service import option_distribution, point_biserial
+
+
+def test_point_biserial_matches_direct_correlation():
+    """The figure built from additive sums equals the correlation computed on raw data."""
+    correct = np.array([1, 1, 0, 1, 0, 0, 1, 0])
+    totals = np.array([5, 4, 2, 3, 1, 3, 5, 2])
+
+    result = point_biserial(
+        len(totals), correct.sum(), totals.sum(), (totals ** 2).sum(), totals[correct == 1].sum()
+    )
+
+    assert abs(result - np.corrcoef(correct, totals)[0, 1]) < 1e-9
+
+
+def test_point_biserial_undefined_without_spread():
+    """Everyone right, or identical totals, gives no discrimination figure."""
+    assert point_biserial(3, 3, 9, 27, 9) is None
+    assert point_biserial(4, 2, 8, 16, 4) is None
+    assert point_biserial(1, 1, 3, 9, 3) is None
+
+
+def test_option_distribution_sorts_legacy_none_options():
+    """Unanswered legacy rows have a None option and sort alongside the numbered ones."""
+    options = {2: {"attempts": 4}, None: {"attempts": 1}, 0: {"attempts": 3}}
+
+    assert option_distribution(options) == {"0": 3, "2": 4, "None": 1}
+
+
+def test_rebuild_waits_for_the_refresh_lease(monkeypatch):
+    """The delete and recompute run only while the rebuild holds the lease."""
+    events = []
+
+    class FakeWatermark:
+        held = [True]
+
+        async def acquire(self, db):
+            if self.held[0]:
+                self.held[0] = False  # the running refresh finishes
+                events.append("busy")
+                return False, None
+            events.append("acquired")
+            return True, "mark"
+
+        async def release(self, db):
+            events.append("released")
+
+    class FakeCollection:
+        def __init__(self, name):
+            self.name = name
+
+        async def delete_one(self, query):
+            events.append(f"delete {self.name}")
+
+        async def delete_many(self, query):
+            events.append(f"delete {self.name}")
+
+    async def fake_pipelines(db, match):
+        events.append(("recompute", match["_id"]["$lte"]))
+        return True
+
+    async def no_sleep(seconds):
+        pass
+
+    service = module.QuizAnalyticsService()
+    service.watermark = FakeWatermark()
+    monkeypatch.setattr(service, "_run_pipelines", fake_pipelines)
+    monkeypatch.setattr(module.asyncio, "sleep", no_sleep)
+    db = {name: FakeCollection(name) for name in (module.QUIZ_STATS, module.QUIZ_QUESTION_STATS)}
+
+    assert asyncio.run(service.rebuild_quiz(db, "quiz-1"))
+    assert events == [
+        "busy", "acquired", "delete quiz_stats", "delete quiz_question_stats", ("recompute", "mark"), "released"
+    ]
+
+
+def test_refresh_recomputes_touched_quizzes_and_is_safe_to_repeat(monkeypatch):
+    """A run that loses its lease after one pipeline leaves the mark alone; the repeat replaces, never adds."""
+    marks = []
+
+    class FakeWatermark:
+        def __init__(self, renewals):
+            self.renewals = renewals
+
+        async def acquire(self, db):
+            return True, ObjectId("0" * 24)
+
+        async def renew(self, db):
+            self.renewals -= 1
+            return self.renewals >= 0
+
+        async def commit(self, db, last_id):
+            marks.append(last_id)
+
+        async def release(self, db):
+            pass
+
+    class FakeCursor:
+        async def to_list(self, length=None):
+            return []
+
+    class FakeAttempts:
+        def __init__(self):
+            self.pipelines = []
+
+        async def distinct(self, field, query):
+            return ["quiz-2", "quiz-1"]
+
+        async def count_documents(self, query):
+            return 3
+
+        def aggregate(self, pipeline):
+            self.pipelines.append(pipeline)
+            return FakeCursor()
+
+    class FakeDB:
+        quiz_attempts = FakeAttempts()
+
+    db = FakeDB()
+    service = module.QuizAnalyticsService()
+    service.watermark = FakeWatermark(renewals=1)
+
+    assert asyncio.run(service.refresh(db)) == {"ran": False, "reason": "lease lost"}
+    assert marks == [] and len(db.quiz_attempts.pipelines) == 1
+
+    service.watermark = FakeWatermark(renewals=2)
+    report = asyncio.run(service.refresh(db))
+
+    assert report["ran"] and report["quizzes"] == 2 and len(marks) == 1
+    first, repeated, question_stats = db.quiz_attempts.pipelines
+    assert first == repeated
+    for pipeline in (repeated, question_stats):
+        assert pipeline[0]["$match"] == {"quiz_id": {"$in": ["quiz-1", "quiz-2"]}, "_id": {"$lt": marks[0]}}
+        assert pipeline[-1]["$merge"]["whenMatched"] == "replace"
@@ -0,0 +1,206 @@
+import asyncio
+from types import SimpleNamespace
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.schemas.quiz import QuizUpdate
+from app.services import quiz_service as module
+from app.services.question_dedupe_service import question_dedupe_service
+from app.services.quiz_analytics_service import quiz_analytics_service
+from app.services.quiz_regrade_service import quiz_regrade_service
+from app.services.quiz_scoring import AnswerKey
+from app.services.quiz_service import QuizService
+from app.services.review_schedule_service import review_schedule_service
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeAttempts:
+    def __init__(self):
+        self.docs = []
+        # Rows another request stores between our duplicate check and our insert
+        self.raced = []
+        # Client ids that hit a duplicate key without a matching stored row
+        self.conflicts = ()
+
+    def find(self, query):
+        ids = query["client_attempt_id"]["$in"]
+        return FakeCursor([
+            dict(doc) for doc in self.docs if doc["user_id"] == query["user_id"] and doc["client_attempt_id"] in ids
+        ])
+
+    async def insert_many(self, documents, ordered=True):
+        self.docs.extend(self.raced)
+        taken = {doc["client_attempt_id"] for doc in self.docs}
+        errors = []
+        for i, document in enumerate(documents):
+            if document["client_attempt_id"] in taken or document["client_attempt_id"] in self.conflicts:
+                errors.append({"index": i, "code": 11000, "errmsg": "E11000 duplicate key"})
+            else:
+                self.docs.append(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+def _answer_keys(monkeypatch):
+    keys = {"q1": AnswerKey("q1", 1, [0, 1])}
+
+    async def fake_get_answer_key(db, quiz_id):
+        return keys.get(quiz_id)
+
+    monkeypatch.setattr(module, "get_answer_key", fake_get_answer_key)
+
+
+def _item(client_attempt_id, quiz_id="q1", answers=(0, 1)):
+    return {
+        "client_attempt_id": client_attempt_id,
+        "quiz_id": quiz_id,
+        "user_program_id": "p1",
+        "answers": [{"selected_answer": answer} for answer in answers]
+    }
+
+
+def _sync(db, items):
+    results = asyncio.run(QuizService().create_quiz_attempts_batch(db, "u1", items))
+    return {result["client_attempt_id"]: result for result in results}
+
+
+def test_retried_batch_returns_stored_attempts_as_duplicates(monkeypatch):
+    _answer_keys(monkeypatch)
+    db = SimpleNamespace(quiz_attempts=FakeAttempts())
+    items = [_item("a"), _item("b", answers=(0, 0))]
+
+    first = _sync(db, items)
+    retried = _sync(db, items)
+
+    assert {cid: result["status"] for cid, result in first.items()} == {"a": "created", "b": "created"}
+    assert {cid: result["status"] for cid, result in retried.items()} == {"a": "duplicate", "b": "duplicate"}
+    assert retried["b"]["attempt"].id == first["b"]["attempt"].id and retried["b"]["attempt"].score == 1
+    assert len(db.quiz_attempts.docs) == 2
+
+
+def test_repeats_in_one_batch_are_stored_once_and_unknown_quizzes_rejected(monkeypatch):
+    _answer_keys(monkeypatch)
+    db = SimpleNamespace(quiz_attempts=FakeAttempts())
+
+    results = asyncio.run(QuizService().create_quiz_attempts_batch(
+        db, "u1", [_item("a"), _item("a", answers=(1, 1)), _item("c", quiz_id="missing")]
+    ))
+
+    assert [(result["client_attempt_id"], result["status"]) for result in results] == [("a", "created"), ("c", "rejected")]
+    # The first copy of a repeated id wins
+    assert results[0]["attempt"].score == 2
+    assert results[1]["error"] == "Quiz not found"
+    assert len(db.quiz_attempts.docs) == 1
+
+
+def test_attempts_stored_concurrently_come_back_as_duplicates(monkeypatch):
+    _answer_keys(monkeypatch)
+    db = SimpleNamespace(quiz_attempts=FakeAttempts())
+    stored = _sync(SimpleNamespace(quiz_attempts=FakeAttempts()), [_item("a")])["a"]["attempt"]
+    db.quiz_attempts.raced = [{
+        "_id": stored._id, "client_attempt_id": "a", "quiz_id": "q1", "user_id": "u1", "score": stored.score
+    }]
+
+    results = _sync(db, [_item("a"), _item("b")])
+
+    assert results["a"]["status"] == "duplicate" and results["a"]["attempt"].id == stored.id
+    assert results["b"]["status"] == "created"
+
+
+def test_duplicate_key_without_a_stored_row_is_rejected(monkeypatch):
+    _answer_keys(monkeypatch)
+    db = SimpleNamespace(quiz_attempts=FakeAttempts())
+    db.quiz_attempts.conflicts = ("a",)
+
+    results = _sync(db, [_item("a"), _item("b")])
+
+    assert results["a"]["status"] == "rejected" and "no stored attempt" in results["a"]["error"]
+    assert results["b"]["status"] == "created"
+
+
+class FakeQuizzes:
+    def __init__(self, doc):
+        self.doc = doc
+
+    async def find_one(self, query, projection=None):
+        return dict(self.doc) if query["_id"] == self.doc["_id"] else None
+
+    async def update_one(self, query, update):
+        self.doc.update(update["$set"])
+        for field, amount in update.get("$inc", {}).items():
+            self.doc[field] = self.doc.get(field, 0) + amount
+        return SimpleNamespace(matched_count=1)
+
+
+class FakeRegradeAttempts:
+    def __init__(self, docs):
+        self.docs = docs
+        self.batches = 0
+
+    def find(self, query, projection=None):
+        version = query["answer_key_version"]["$ne"]
+        cursor = FakeCursor([
+            dict(doc) for doc in self.docs if doc["quiz_id"] == query["quiz_id"] and doc["answer_key_version"] != version
+        ])
+        cursor.batch_size = lambda size: cursor
+        return cursor
+
+    async def bulk_write(self, operations, ordered=True):
+        self.batches += 1
+        by_id = {doc["_id"]: doc for doc in self.docs}
+        for operation in operations:
+            by_id[operation._filter["_id"]].update(operation._doc["$set"])
+
+
+def test_changing_the_key_bumps_its_version_and_regrade_rescores_stale_attempts(monkeypatch):
+    rebuilt = []
+
+    async def no_op(*args, **kwargs):
+        pass
+
+    async def fake_rebuild_quiz(db, quiz_id):
+        rebuilt.append(quiz_id)
+
+    monkeypatch.setattr(question_dedupe_service, "index_quiz", no_op)
+    monkeypatch.setattr(review_schedule_service, "remove_quiz", no_op)
+    monkeypatch.setattr(quiz_analytics_service, "rebuild_quiz", fake_rebuild_quiz)
+    quiz_id = ObjectId()
+    options = ["a", "b"]
+    quiz = {"_id": quiz_id, "title": "Quiz", "course_id": "c1", "answer_key_version": 1, "questions": [
+        {"question": "Q0", "options": options, "correct_answer": 0},
+        {"question": "Q1", "options": options, "correct_answer": 1}
+    ]}
+
+    def attempt(answers, score, version=1):
+        return {"_id": ObjectId(), "quiz_id": str(quiz_id), "answers": [{"selected_answer": a} for a in answers],
+                "score": score, "percentage": score * 50, "answer_key_version": version}
+
+    # Scored against [0, 1]; the last one was already scored against the new key
+    attempts = [attempt((0, 1), 2), attempt((1, 1), 1), attempt((1, 0), 0), attempt((1, 1), 2, version=2)]
+    db = SimpleNamespace(quizzes=FakeQuizzes(quiz), quiz_attempts=FakeRegradeAttempts(attempts))
+
+    update = QuizUpdate(questions=[
+        {"question": "Q0", "options": options, "correct_answer": 1},
+        {"question": "Q1", "options": options, "correct_answer": 1}
+    ])
+    asyncio.run(QuizService().update_quiz(db, str(quiz_id), update))
+    report = asyncio.run(quiz_regrade_service.regrade_quiz(db, str(quiz_id), batch_size=2))
+
+    assert quiz["answer_key_version"] == 2
+    assert [doc["score"] for doc in attempts] == [1, 2, 1, 2]
+    assert [doc["percentage"] for doc in attempts] == [50, 100, 50, 100]
+    assert all(doc["answer_key_version"] == 2 for doc in attempts)
+    assert (report["processed"], report["changed"], report["batches"]) == (3, 3, 2)
+    assert rebuilt == [str(quiz_id)]
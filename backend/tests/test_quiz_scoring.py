@@ -0,0 +1,33 @@
+import numpy as np
+
+from app.services.quiz_scoring import AnswerKey, percentage, score_answers, score_matrix
+
+
+def test_score_answers_is_positional():
+    """The i-th answer is checked against the i-th question, like the original loop."""
+    key = AnswerKey("q1", 2, [1, 0, 3])
+
+    assert score_answers(key, [{"selected_answer": 1}, {"selected_answer": 2}, {"selected_answer": 3}]) == 2
+    # Missing and extra answers never score
+    assert score_answers(key, [{"selected_answer": 1}]) == 1
+    assert score_answers(key, [{"selected_answer": 1}] * 5) == 1
+
+
+def test_score_matrix_matches_single_scoring():
+    """Batch scores and percentages agree with the per-attempt path."""
+    key = AnswerKey("q1", 1, [0, 1, 2])
+    selected = np.array([[0, 1, 2], [0, 0, 0], [-2, -2, -2]])
+
+    scores = score_matrix(key, selected)
+
+    assert scores.tolist() == [3, 1, 0]
+    assert percentage(scores, key.max_score).tolist() == [percentage(int(s), 3) for s in scores]
+
+
+def test_answer_key_is_shared_not_copied():
+    """Keys are read-only, so the cache can hand out the same object."""
+    import copy
+    key = AnswerKey("q1", 1, [0, 1])
+
+    assert copy.deepcopy(key) is key
+    assert not key.correct.flags.writeable
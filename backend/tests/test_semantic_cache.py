@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.services.semantic_cache import SemanticCache, normalize, scope_key
+from app.core.config import settings
+
+CONTENT = (
+    "Neural networks learn patterns from data by adjusting the weights of connections "
+    "between layers of nodes, using gradient descent to reduce the prediction error."
+)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    async def insert_one(self, doc):
+        doc = {"_id": ObjectId(), **doc}
+        self.docs[doc["_id"]] = doc
+        return SimpleNamespace(inserted_id=doc["_id"])
+
+    async def find_one_and_update(self, query, update, projection=None):
+        doc = self.docs.get(query["_id"])
+        if doc is not None:
+            doc["hits"] += update["$inc"]["hits"]
+        return doc
+
+
+def _cache(monkeypatch) -> SemanticCache:
+    monkeypatch.setattr(settings, "semantic_cache_enabled", True)
+    monkeypatch.setattr(settings, "semantic_cache_threshold", 0.9)
+    cache = SemanticCache()
+    cache.db = {"semantic_cache": FakeCollection()}
+    return cache
+
+
+def test_normalize_ignores_case_and_whitespace():
+    assert normalize("  Cricket \n") == normalize("cricket") == "cricket"
+    assert scope_key("transform", ["summary", "Engineering-Student", "Cricket "]) == "transform|summary|engineering-student|cricket"
+
+
+def test_near_identical_content_in_the_same_scope_hits(monkeypatch):
+    cache = _cache(monkeypatch)
+
+    async def run():
+        await cache.put("transform", ("summary", "engineering", "Cricket"), CONTENT, "cached output")
+        near = await cache.get("transform", ("summary", "engineering", "cricket "), CONTENT.replace("data", "data,") + " ")
+        other_hobby = await cache.get("transform", ("summary", "engineering", "Movies"), CONTENT)
+        other_text = await cache.get("transform", ("summary", "engineering", "Cricket"), "Photosynthesis in plants")
+        return near, other_hobby, other_text
+
+    near, other_hobby, other_text = asyncio.run(run())
+
+    assert near == "cached output"
+    assert other_hobby is None
+    assert other_text is None
+    stats = cache.stats()["namespaces"]["transform"]
+    assert (stats["lookups"], stats["hits"]) == (3, 1)
+
+
+def test_disabled_cache_never_stores_or_hits(monkeypatch):
+    cache = _cache(monkeypatch)
+    monkeypatch.setattr(settings, "semantic_cache_enabled", False)
+
+    async def run():
+        await cache.put("summary", (), CONTENT, "summary")
+        return await cache.get("summary", (), CONTENT)
+
+    assert asyncio.run(run()) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entry_is_dropped_so_a_re_put_hits(monkeypatch):
+    cache = _cache(monkeypatch)
+    collection = cache.db["semantic_cache"]
+    scope = ("summary", "engineering", "cricket")
+
+    async def run():
+        await cache.put("transform", scope, CONTENT, "first output")
+        first = await cache.get("transform", scope, CONTENT)
+        collection.docs.clear()  # the TTL index removes it
+        expired = await cache.get("transform", scope, CONTENT)
+        await cache.put("transform", scope, CONTENT, "second output")
+        return first, expired, await cache.get("transform", scope, CONTENT)
+
+    assert asyncio.run(run()) == ("first output", None, "second output")
+    assert cache.stats()["entries"] == 1
+    stats = cache.stats()["namespaces"]["transform"]
+    assert (stats["lookups"], stats["hits"]) == (3, 2)
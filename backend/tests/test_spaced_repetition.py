@@ -0,0 +1,112 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import numpy as np
+from bson import ObjectId
+
+from app.services.review_schedule_service import REVIEW_SCHEDULE, ReviewScheduleService
+from app.services.spaced_repetition import MIN_EASINESS, ReviewState, review, schedule
+
+
+def test_review_follows_sm2_intervals():
+    """Successful reviews go 1, 6, then interval x easiness; a lapse resets to 1 day."""
+    easiness, interval, repetitions = np.array([2.5]), np.array([0]), np.array([0])
+    intervals = []
+    for quality in (4, 4, 4, 1):
+        easiness, interval, repetitions = review(easiness, interval, repetitions, np.array([quality]))
+        intervals.append(int(interval[0]))
+
+    assert intervals == [1, 6, 15, 1]
+    assert repetitions[0] == 0
+    assert easiness[0] >= MIN_EASINESS
+
+
+def test_schedule_applies_each_items_reviews_in_order():
+    """Batched items match reviewing each one separately, and due_at follows the last review."""
+    state = ReviewState.initial(2)
+    at = np.array(["2024-01-01", "2024-01-02", "2024-01-09", "2024-01-03"], dtype="datetime64[ms]")
+
+    schedule(state, np.array([0, 1, 0, 1]), np.array([4, 4, 4, 1]), at)
+
+    assert state.interval.tolist() == [6, 1]
+    assert state.repetitions.tolist() == [2, 0]
+    assert state.due_at.astype(datetime).tolist() == [datetime(2024, 1, 15), datetime(2024, 1, 4)]
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+            if "$lte" in condition and not value <= condition["$lte"]:
+                return False
+            if "$ne" in condition and value == condition["$ne"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, field, direction):
+        self.docs = sorted(self.docs, key=lambda doc: doc[field])
+        return self
+
+    def limit(self, count):
+        self.docs = self.docs[:count]
+        return self
+
+    async def to_list(self, length):
+        return [dict(doc) for doc in self.docs]
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self.docs:
+            yield doc
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return _Cursor([doc for doc in self.docs if _matches(doc, query)])
+
+    async def count_documents(self, query):
+        return sum(1 for doc in self.docs if _matches(doc, query))
+
+    async def delete_many(self, query):
+        self.docs[:] = [doc for doc in self.docs if not _matches(doc, query)]
+
+
+class _DB(dict):
+    __getattr__ = dict.__getitem__
+
+
+def test_due_queue_removes_items_of_deleted_and_shortened_quizzes():
+    live, deleted = ObjectId(), ObjectId()
+    now = datetime.utcnow()
+
+    def item(quiz_id, index, days_overdue):
+        return {"_id": f"u1:{quiz_id}:{index}", "user_id": "u1", "quiz_id": str(quiz_id), "question_index": index,
+                "due_at": now - timedelta(days=days_overdue)}
+
+    # The most overdue items point at a deleted quiz and a question the quiz no longer has
+    items = [item(deleted, 0, 9), item(deleted, 1, 8), item(live, 5, 7), item(live, 0, 2), item(live, 1, 1)]
+    quizzes = [
+        {"_id": live, "title": "Live", "questions": [{"question": "Q0", "options": ["a"]}, {"question": "Q1", "options": ["b"]}]},
+        {"_id": deleted, "title": "Gone", "is_deleted": True, "questions": [{"question": "X"}, {"question": "Y"}]}
+    ]
+    db = _DB({REVIEW_SCHEDULE: _Collection(items), "quizzes": _Collection(quizzes)})
+
+    result = asyncio.run(ReviewScheduleService().get_due(db, "u1", limit=2))
+
+    assert [entry["question"] for entry in result["items"]] == ["Q0", "Q1"]
+    assert result["total_due"] == 2
+    assert [doc["question_index"] for doc in db[REVIEW_SCHEDULE].docs] == [0, 1]
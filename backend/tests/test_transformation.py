@@ -0,0 +1,172 @@
+import asyncio
+import json
+
+from app.api.api_v1.endpoints import content_transformer
+from app.schemas.content_transformer import ContentTransformerRequest
+from app.services import transformation_service as module
+from app.services.transformation_service import (
+    STYLE_TEMPLATES, build_variant_prompt, find_variant, generate_asset_variants, get_or_generate_variant,
+    parse_multi_style_output
+)
+
+
+def _matches(doc, query):
+    for field, condition in query.items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakeAssets:
+    def __init__(self):
+        self.docs = []
+
+    async def find_one(self, query):
+        return next((doc for doc in self.docs if _matches(doc, query)), None)
+
+    async def insert_one(self, document):
+        await self.insert_many([document])
+
+    async def insert_many(self, documents):
+        for i, document in enumerate(documents):
+            document["_id"] = f"variant-{len(self.docs) + i}"
+        self.docs.extend(documents)
+
+
+def test_templates_are_compiled_per_style_and_keep_braces_in_content():
+    prompt = build_variant_prompt("Use {x} for sets", "summary", "engineering-student", "movies", "beginner-friendly")
+
+    assert set(STYLE_TEMPLATES) == {"storytelling", "visual_cue", "summary"}
+    assert '"Use {x} for sets"' in prompt and "Additional guidance: beginner-friendly" in prompt
+    assert "### Summary Mode" in prompt and "Storytelling Mode" not in prompt
+
+
+def test_multi_style_output_tolerates_fences_and_drops_empty_styles():
+    text = '```json\n{"storytelling": " A story ", "summary": ""}\n```'
+
+    assert parse_multi_style_output(text, ["storytelling", "summary"]) == {"storytelling": "A story"}
+    assert parse_multi_style_output("not json", ["summary"]) == {}
+
+
+def test_styles_share_one_call_and_missing_ones_fall_back(monkeypatch):
+    calls = []
+
+    async def fake_call_model(prompt, interactive, json_output=False):
+        calls.append(json_output)
+        if json_output:
+            return '{"storytelling": "Story", "visual_cue": "Cue"}'
+        return "Summary"
+
+    async def fake_after_insert(documents):
+        pass
+
+    monkeypatch.setattr(module, "_call_model", fake_call_model)
+    monkeypatch.setattr(module, "_after_insert", fake_after_insert)
+    db = {"assets": FakeAssets()}
+
+    variants, tokens = asyncio.run(generate_asset_variants(
+        db, "A1", "Ohm's law", ["storytelling", "visual_cue", "summary"], "engineering-student", "movies"
+    ))
+
+    # One JSON call for all three, then a single call for the style it left out
+    assert calls == [True, False]
+    assert {style: doc["content"] for style, doc in variants.items()} == {
+        "storytelling": "Story", "visual_cue": "Cue", "summary": "Summary"
+    }
+    assert [doc["style"] for doc in db["assets"].docs] == ["storytelling", "visual_cue", "summary"]
+    assert tokens > 0
+
+
+def test_transform_reuses_stored_variants_per_keywords(monkeypatch):
+    outputs = iter(["Plain summary", "Guided summary"])
+    prompts = []
+
+    async def fake_call_model(prompt, interactive, json_output=False):
+        prompts.append(prompt)
+        return next(outputs)
+
+    async def fake_after_insert(documents):
+        pass
+
+    monkeypatch.setattr(module, "_call_model", fake_call_model)
+    monkeypatch.setattr(module, "_after_insert", fake_after_insert)
+    monkeypatch.setattr(content_transformer.llm_service, "available", lambda provider: True)
+    db = {"assets": FakeAssets()}
+    db["assets"].docs.append({"_id": "original", "code": "A1", "style": "original", "content": "Ohm's law: V = IR."})
+    request = {"assetCode": "A1", "style": "summary", "content": "Text sent by the client, not the asset.",
+               "domain": "engineering-student", "hobby": "movies"}
+
+    def transform(**overrides):
+        return asyncio.run(content_transformer.transform_content(ContentTransformerRequest(**request, **overrides), db=db))
+
+    first, again = transform(), transform()
+    guided, guided_again = transform(keywords="beginner-friendly"), transform(keywords="beginner-friendly")
+
+    assert first.id == again.id and guided.id == guided_again.id != first.id
+    assert (first.output, guided.output) == ("Plain summary", "Guided summary")
+    assert len(db["assets"].docs) == 3
+    # Shared variants come from the stored original, whatever the client sent
+    assert all("V = IR" in prompt and "sent by the client" not in prompt for prompt in prompts)
+    # Lookups without keywords never serve the keyword-guided variant
+    plain = asyncio.run(find_variant(db, "A1", "summary", "engineering-student", "movies"))
+    assert plain["_id"] == first.id and "keywords" not in plain
+
+
+def test_concurrent_requests_share_one_generation(monkeypatch):
+    calls = []
+
+    async def fake_call_model(prompt, interactive, json_output=False):
+        calls.append(interactive)
+        await asyncio.sleep(0.01)
+        return "Summary"
+
+    async def fake_after_insert(documents):
+        pass
+
+    monkeypatch.setattr(module, "_call_model", fake_call_model)
+    monkeypatch.setattr(module, "_after_insert", fake_after_insert)
+    db = {"assets": FakeAssets()}
+
+    async def run():
+        # A prefetch is generating when the learner opens the asset
+        args = (db, "A1", "Ohm's law", "summary", "engineering-student", "movies")
+        return await asyncio.gather(
+            get_or_generate_variant(*args, interactive=False), get_or_generate_variant(*args)
+        )
+
+    (prefetched, prefetch_generated), (clicked, click_generated) = asyncio.run(run())
+
+    assert calls == [False]
+    assert len(db["assets"].docs) == 1
+    assert prefetched["_id"] == clicked["_id"] and prefetched is not clicked
+    assert (prefetch_generated, click_generated) == (True, False)
+    assert module._in_flight == {}
+
+
+def test_get_asset_finds_variants_under_either_code_form(monkeypatch):
+    async def fake_call_model(prompt, interactive, json_output=False):
+        return "Summary"
+
+    async def fake_after_insert(documents):
+        pass
+
+    monkeypatch.setattr(module, "_call_model", fake_call_model)
+    monkeypatch.setattr(module, "_after_insert", fake_after_insert)
+    code = "64b7f0c2a1b2c3d4e5f60718"
+    db = {"assets": FakeAssets()}
+    db["assets"].docs.append({"_id": "original", "code": module.variant_code(code), "style": "original", "content": "Ohm's law"})
+
+    def get_asset(style):
+        response = asyncio.run(content_transformer.get_asset(code, "engineering-student", "movies", style, db=db))
+        return json.loads(response.body)
+
+    generated, stored, original = get_asset("summary"), get_asset("summary"), get_asset("original")
+
+    assert (generated["match_type"], stored["match_type"]) == ("generated", "exact")
+    assert generated["asset"]["id"] == stored["asset"]["id"]
+    assert original["match_type"] == "default_original" and original["asset"]["id"] == "original"
+    assert len(db["assets"].docs) == 2
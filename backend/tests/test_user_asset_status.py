@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.core import indexes
+from app.services.course_progress_service import course_progress_service
+from app.services.user_asset_status_service import build_status_update, rollup_deltas, user_asset_status_service
+
+
+def test_status_update_sets_progress_when_given():
+    """Explicit progress is written on both insert and update."""
+    now = datetime(2024, 1, 1)
+    update = build_status_update("in-progress", 40, now)
+
+    assert update["$set"]["progress"] == 40
+    assert update["$setOnInsert"] == {"created_at": now}
+
+
+def test_status_update_defaults_progress_only_on_insert():
+    """Without progress, new rows start at 0 and existing rows keep theirs."""
+    update = build_status_update("completed", None, datetime(2024, 1, 1))
+
+    assert "progress" not in update["$set"]
+    assert update["$setOnInsert"]["progress"] == 0
+
+
+def test_rollup_deltas_replay_updates_against_the_previous_rows():
+    t0 = datetime(2024, 1, 1)
+    previous = {
+        ("u1", "c1", "a1"): {"status": "in-progress", "updated_at": t0},
+        # Already written after the buffered heartbeat below
+        ("u1", "c1", "a2"): {"status": "completed", "updated_at": t0 + timedelta(minutes=5)}
+    }
+    updates = [
+        {"user": "u1", "course": "c1", "asset": "a1", "status": "completed", "at": t0 + timedelta(minutes=2)},
+        {"user": "u1", "course": "c1", "asset": "a2", "status": "in-progress", "at": t0 + timedelta(minutes=1)},
+        {"user": "u1", "course": "c1", "asset": "a3", "status": "in-progress", "at": t0 + timedelta(minutes=1)},
+        {"user": "u1", "course": "c1", "asset": "a3", "status": "completed", "at": t0 + timedelta(minutes=3)},
+        {"user": "u2", "course": "c1", "asset": "a1", "status": "in-progress"}
+    ]
+    now = t0 + timedelta(minutes=10)
+
+    deltas = rollup_deltas(previous, updates, now)
+
+    # a1 in-progress -> completed, a2 untouched, a3 new -> in-progress -> completed
+    assert deltas == {("u1", "c1"): (2, -1, t0 + timedelta(minutes=3)), ("u2", "c1"): (0, 1, now)}
+
+
+class _Rows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class _StatusCollection:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def find(self, query, projection=None):
+        return _Rows(self.rows)
+
+    async def bulk_write(self, operations, ordered=True):
+        class Result:
+            matched_count = modified_count = upserted_count = len(operations)
+        return Result()
+
+
+def test_bulk_updates_apply_deltas_instead_of_recounting(monkeypatch):
+    applied, recounted = [], []
+
+    async def apply_status_deltas(db, deltas):
+        applied.append(deltas)
+
+    async def recompute(db, pairs):
+        recounted.append(pairs)
+
+    monkeypatch.setattr(course_progress_service, "apply_status_deltas", apply_status_deltas)
+    monkeypatch.setattr(course_progress_service, "recompute", recompute)
+    at = datetime(2024, 1, 1)
+    db = {"userassetstatus": _StatusCollection([{"user": "u1", "course": "c1", "asset": "a1", "status": "in-progress"}])}
+
+    asyncio.run(user_asset_status_service.bulk_upsert_statuses(
+        db, [{"user": "u1", "course": "c1", "asset": "a1", "status": "completed", "at": at}]
+    ))
+
+    assert applied == [{("u1", "c1"): (1, -1, at)}]
+    assert recounted == []
+
+
+class _DedupeCollection:
+    def __init__(self, groups, indexes=()):
+        self.groups = groups
+        self.indexes = {name: {} for name in indexes}
+        self.operations = []
+        self.created = []
+
+    def aggregate(self, pipeline, allowDiskUse=False):
+        return _Rows(self.groups)
+
+    async def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+
+        class Result:
+            deleted_count = sum(len(op._filter["_id"]["$in"]) for op in operations if isinstance(op._filter["_id"], dict))
+        return Result()
+
+    async def index_information(self):
+        return self.indexes
+
+    async def create_index(self, keys, **options):
+        self.created.append(options["name"])
+
+
+class _IndexDB(dict):
+    def __getitem__(self, name):
+        return self.setdefault(name, _DedupeCollection([]))
+
+
+def test_duplicate_rows_are_removed_before_the_unique_index_is_built(monkeypatch):
+    recounted = []
+
+    async def recompute(db, pairs):
+        recounted.append(set(pairs))
+
+    monkeypatch.setattr(course_progress_service, "recompute", recompute)
+    latest, older, oldest = ObjectId(), ObjectId(), ObjectId()
+    first_completion = datetime(2024, 1, 1)
+    # Sorted newest first by the pipeline
+    statuses = _DedupeCollection([{
+        "_id": {"user": "u1", "course": "c1", "asset": "a1"},
+        "ids": [latest, older, oldest], "count": 3, "completed_at": first_completion
+    }])
+    db = _IndexDB({"userassetstatus": statuses})
+
+    asyncio.run(indexes.ensure_indexes(db))
+
+    delete, carry = statuses.operations
+    assert delete._filter == {"_id": {"$in": [older, oldest]}}
+    assert (carry._filter, carry._doc) == ({"_id": latest}, {"$min": {"completed_at": first_completion}})
+    assert recounted == [{("u1", "c1")}]
+    assert "user_course_asset_unique" in statuses.created
+
+    # Once the index exists, startup doesn't scan for duplicates again
+    statuses.operations.clear()
+    statuses.indexes["user_course_asset_unique"] = {}
+    asyncio.run(indexes.ensure_indexes(db))
+    assert statuses.operations == []
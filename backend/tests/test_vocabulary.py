@@ -0,0 +1,70 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.api.api_v1.endpoints.content_transformer import canonicalize_keys
+from app.schemas.content_transformer import ContentTransformerRequest, TransformationStyle
+from app.schemas.users_collection import UsersCollectionUpdate
+from app.services.vocabulary_backfill_service import canonical_changes, plan_merges
+from app.utils.vocabulary import canonical_domain, canonical_hobbies, canonical_hobby, canonical_style
+
+
+def test_casing_spacing_and_synonyms_map_to_one_key():
+    assert {canonical_hobby(value) for value in ("Movies", " movies ", "Films", "Movie Buff", "CINEMA")} == {"movies"}
+    assert {canonical_domain(value) for value in ("engineering-student", "Engineering Student", "B.Tech")} == {
+        "engineering-student"
+    }
+    assert canonical_domain("Teacher / Trainer") == "teacher-trainer"
+    assert canonical_style("Visual Cues") == "visual_cue"
+    assert canonical_style(TransformationStyle.storytelling) == "storytelling"
+
+
+def test_unknown_values_keep_their_normalized_form():
+    assert canonical_hobby("Board  Games") == canonical_hobby("board games") == "board-games"
+    assert canonical_domain("") == ""
+
+
+def test_hobbies_list_is_canonicalized_and_deduplicated():
+    assert canonical_hobbies("Movies, films,Cricket,,") == "movies, cricket"
+
+
+def test_schemas_store_canonical_keys():
+    request = ContentTransformerRequest(
+        assetCode="A1", style="Story", content="Some lecture content", domain="MBA", hobby="Films"
+    )
+    assert (request.style, request.domain, request.hobby) == (TransformationStyle.storytelling, "business-student", "movies")
+
+    update = UsersCollectionUpdate(hobbies="Video Games", learningStyle="Visual")
+    assert update.dict(exclude_none=True) == {"hobbies": "gaming", "learningStyle": "visual_cue"}
+
+
+def test_merge_keeps_referenced_or_oldest_variant():
+    ids = [ObjectId() for _ in range(5)]
+    code = ObjectId()
+    docs = [
+        {"_id": ids[0], "code": code, "style": "summary", "domain": "Medical", "hobby": "Films"},
+        {"_id": ids[1], "code": code, "style": "summary", "domain": "medical-student", "hobby": "movies"},
+        {"_id": ids[2], "code": code, "style": "summary", "domain": "medical-student", "hobby": "Movies"},
+        # Other language, and an original with no domain/hobby, are never merged
+        {"_id": ids[3], "code": code, "style": "summary", "domain": "medical-student", "hobby": "movies", "language": "hi"},
+        {"_id": ids[4], "code": code, "style": "original"}
+    ]
+    for doc in docs:
+        doc.update(canonical_changes(doc))
+
+    assert canonical_changes({"domain": "medical-student", "hobby": "movies", "style": "summary"}) == {}
+    assert plan_merges(docs, "code", set()) == {ids[0]: [ids[1], ids[2]]}
+    assert plan_merges(docs, "code", {str(ids[1])}) == {ids[1]: [ids[0], ids[2]]}
+    assert plan_merges(docs, "code", {str(ids[1]), str(ids[2])}) == {ids[1]: [ids[0]]}
+
+
+def test_canonicalize_is_admin_only():
+    learner = SimpleNamespace(id=7, is_superuser=False)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(canonicalize_keys(apply=True, db=object(), current_user=learner))
+
+    assert error.value.status_code == 403